@@ -1,2 +1,5 @@
 # RAG Bot application package
+from dotenv import load_dotenv
 
+# .env는 패키지를 처음 import할 때 한 번만 읽음 (각 모듈은 os.getenv만 사용)
+load_dotenv()
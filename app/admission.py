@@ -0,0 +1,122 @@
+import asyncio
+import time
+from collections import deque
+from typing import Deque
+
+from app import metrics
+
+ADMISSION_TOTAL = metrics.register(metrics.Counter(
+    "rag_admission_total", "Admission decisions (admitted, degraded, shed_queue_full, shed_deadline)", ("endpoint", "result"),
+))
+ADMISSION_ACTIVE = metrics.register(metrics.Gauge(
+    "rag_admission_active", "Requests currently holding an admission slot", ("endpoint",),
+))
+ADMISSION_WAITING = metrics.register(metrics.Gauge(
+    "rag_admission_waiting", "Requests waiting for an admission slot", ("endpoint",),
+))
+
+
+class Deadline:
+    """요청이 도착한 시점부터 쓰는 시간 예산 (서명 검증, 대기, 검색, 생성이 함께 씀)"""
+
+    __slots__ = ("expires_at",)
+
+    def __init__(self, budget: float):
+        self.expires_at = time.monotonic() + budget
+
+    def remaining(self) -> float:
+        return self.expires_at - time.monotonic()
+
+
+class AdmissionController:
+    """
+    동시 처리 수 제한 + 대기열
+
+    - 동시에 max_concurrency개까지 처리, 나머지는 max_queue개까지 도착 순서대로 대기
+    - 대기열이 가득 찼거나 timeout 안에 자리가 나지 않으면 거절 (시작했다가 버리지 않음)
+    - 처리 시간의 지수 이동 평균(expected)으로 남은 예산 안에 끝날지 판단
+
+    이벤트 루프에 묶인 객체(Semaphore 등)를 미리 만들지 않으므로 어느 루프에서든 사용 가능
+    """
+
+    def __init__(self, endpoint: str, max_concurrency: int, max_queue: int, expected: float, alpha: float = 0.2):
+        self.endpoint = endpoint
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.expected = expected  # 예상 처리 시간(초)
+        self.alpha = alpha
+        self.active = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+
+    async def acquire(self, timeout: float) -> bool:
+        """
+        처리 자리 얻기 (성공하면 끝난 뒤 release() 호출)
+
+        Returns:
+            True: 자리 얻음, False: 대기열 가득 참/timeout 안에 자리가 나지 않음
+        """
+        if self.active < self.max_concurrency and not self._waiters:
+            self.active += 1
+            self._update_gauges()
+            return True
+        if len(self._waiters) >= self.max_queue:
+            ADMISSION_TOTAL.inc(1, self.endpoint, "shed_queue_full")
+            return False
+        if timeout <= 0:
+            ADMISSION_TOTAL.inc(1, self.endpoint, "shed_deadline")
+            return False
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self._update_gauges()
+        try:
+            await asyncio.wait_for(waiter, timeout)
+            return True  # release()가 자리를 넘겨줌 (active 그대로)
+        except asyncio.TimeoutError:
+            ADMISSION_TOTAL.inc(1, self.endpoint, "shed_deadline")
+            return False
+        except asyncio.CancelledError:
+            # 자리를 넘겨받은 직후 취소되면 다음 대기자에게 넘김
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            raise
+        finally:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+            self._update_gauges()
+
+    def release(self):
+        """처리가 끝난 자리를 가장 오래 기다린 요청에 넘기거나 반납"""
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                self._update_gauges()
+                return
+        self.active -= 1
+        self._update_gauges()
+
+    def decide(self, remaining: float, min_budget: float) -> str:
+        """
+        자리를 얻은 뒤 남은 예산으로 할 일 결정
+
+        Returns:
+            "admitted" (그대로 처리) | "degraded" (예상 처리 시간보다 짧음 → 줄여서 처리)
+            | "shed_deadline" (min_budget보다 짧음 → 시작하지 않고 거절)
+        """
+        if remaining < min_budget:
+            result = "shed_deadline"
+        elif remaining < self.expected:
+            result = "degraded"
+        else:
+            result = "admitted"
+        ADMISSION_TOTAL.inc(1, self.endpoint, result)
+        return result
+
+    def observe(self, seconds: float):
+        """처리 시간 기록 → 예상 처리 시간 갱신"""
+        self.expected += self.alpha * (seconds - self.expected)
+
+    def _update_gauges(self):
+        ADMISSION_ACTIVE.set(self.active, self.endpoint)
+        ADMISSION_WAITING.set(len(self._waiters), self.endpoint)
@@ -0,0 +1,174 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Optional
+
+import numpy as np
+
+from app.pipelines import normalize_question
+
+
+class AnswerCache:
+    """
+    generate_answer() 앞단의 답변 캐시
+
+    - 정확 일치: 정규화된 질문 문자열이 같으면 바로 반환 (임베딩 호출도 생략)
+    - 의미 일치: 질문 임베딩의 코사인 유사도가 similarity_threshold 이상이면 반환
+    - TTL(초)이 지난 항목은 무시, max_entries를 넘으면 가장 오래 안 쓴 항목부터 삭제 (LRU)
+    - max_entries <= 0 이면 캐시 비활성화
+    - 무효화: clear()마다 generation이 늘어남 → 그 전에 시작한 파이프라인의 put()은 버림
+      stamp_path(다른 프로세스가 문서를 바꾸면 덧붙이는 파일)가 바뀌었으면 get()/put()에서 전체 무효화
+    """
+
+    def __init__(self, max_entries: int = 1000, ttl: float = 3600, similarity_threshold: float = 0.95,
+                 stamp_path: Optional[str] = None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.similarity_threshold = similarity_threshold
+        self.stamp_path = stamp_path
+        self.generation = 0
+        self._stamp = self._read_stamp()
+
+        # key: 정규화된 질문 → (answer_data, 정규화된 임베딩, 만료 시각)
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        # 의미 검색용 행렬 캐시 (항목이 바뀔 때만 다시 만듦)
+        self._matrix = None
+        self._matrix_keys: List[str] = []
+
+        self.exact_hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    def get(self, question: str, query_embedding: Optional[List[float]] = None) -> Optional[dict]:
+        """
+        캐시된 답변 조회
+
+        query_embedding 없이 호출하면 정확 일치만 확인합니다.
+        (임베딩 비용까지 아끼려면 먼저 임베딩 없이 호출한 뒤, 실패하면 임베딩과 함께 다시 호출)
+        """
+        if not self.enabled:
+            return None
+
+        key = normalize_question(question)
+        now = time.monotonic()
+        self._check_stamp()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[2] > now:
+                    self._entries.move_to_end(key)
+                    self.exact_hits += 1
+                    return entry[0]
+                self._remove(key)
+
+            if query_embedding is None:
+                return None
+
+            match = self._nearest(query_embedding, now)
+            if match is not None:
+                self._entries.move_to_end(match)
+                self.semantic_hits += 1
+                return self._entries[match][0]
+
+            self.misses += 1
+            return None
+
+    def put(self, question: str, query_embedding: Optional[List[float]], answer_data: dict,
+            generation: Optional[int] = None):
+        """
+        답변 저장
+
+        generation: 파이프라인이 검색을 시작할 때의 self.generation
+                    (그 사이 문서가 바뀌었으면 예전 문서로 만든 답변이므로 저장하지 않음)
+        """
+        if not self.enabled:
+            return
+        self._check_stamp()
+
+        key = normalize_question(question)
+        vector = None
+        if query_embedding is not None:
+            vector = np.asarray(query_embedding, dtype=np.float32)
+            norm = np.linalg.norm(vector)
+            vector = vector / norm if norm > 0 else None
+
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            self._entries[key] = (answer_data, vector, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._matrix = None
+
+    def clear(self, *_):
+        """전체 무효화 (컬렉션 변경 알림 콜백으로도 사용)"""
+        with self._lock:
+            self._entries.clear()
+            self._matrix = None
+            self._matrix_keys = []
+            self.generation += 1
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "exact_hits": self.exact_hits,
+            "semantic_hits": self.semantic_hits,
+            "misses": self.misses,
+        }
+
+    # ----- 내부 -----
+
+    def _read_stamp(self):
+        if not self.stamp_path:
+            return None
+        try:
+            stat = os.stat(self.stamp_path)
+        except OSError:
+            return None
+        return stat.st_size, stat.st_mtime_ns
+
+    def _check_stamp(self):
+        """다른 프로세스가 문서를 바꿨으면 (변경 표시 파일이 바뀜) 전체 무효화"""
+        if not self.stamp_path:
+            return
+        stamp = self._read_stamp()
+        if stamp != self._stamp:
+            self._stamp = stamp
+            self.clear()
+
+    def _remove(self, key: str):
+        del self._entries[key]
+        self._matrix = None
+
+    def _nearest(self, query_embedding: List[float], now: float) -> Optional[str]:
+        """유사도가 임계값 이상인 가장 가까운 (만료되지 않은) 질문 키"""
+        if self._matrix is None:
+            keys = [key for key, entry in self._entries.items() if entry[1] is not None]
+            if not keys:
+                return None
+            self._matrix_keys = keys
+            self._matrix = np.stack([self._entries[key][1] for key in keys])
+
+        query = np.asarray(query_embedding, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm == 0:
+            return None
+
+        scores = self._matrix @ (query / norm)
+        for index in np.argsort(-scores):
+            if scores[index] < self.similarity_threshold:
+                break
+            key = self._matrix_keys[index]
+            entry = self._entries.get(key)
+            if entry is not None and entry[2] > now:
+                return key
+        return None
@@ -0,0 +1,55 @@
+import asyncio
+import httpx
+import os
+from typing import Optional
+
+CALLBACK_TIMEOUT = float(os.getenv("KAKAO_CALLBACK_TIMEOUT", "5.0"))   # 콜백 POST 1회 타임아웃(초)
+CALLBACK_RETRIES = int(os.getenv("KAKAO_CALLBACK_RETRIES", "2"))
+
+# 요청마다 AsyncClient를 새로 만들지 않고 연결을 재사용 (keep-alive)
+_client: Optional[httpx.AsyncClient] = None
+
+def get_client() -> httpx.AsyncClient:
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            timeout=CALLBACK_TIMEOUT,
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+        )
+    return _client
+
+async def close_client():
+    """서버 종료 시 연결 풀 정리"""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+async def send_callback(callback_url: str, payload: dict) -> bool:
+    """
+    카카오 콜백 URL로 최종 스킬 응답 전송
+
+    콜백 URL은 1분 동안 한 번만 쓸 수 있으므로, 연결 오류/5xx만 짧게 재시도합니다.
+
+    Returns:
+        True: 전송 성공, False: 실패
+    """
+    client = get_client()
+    for attempt in range(CALLBACK_RETRIES + 1):
+        try:
+            response = await client.post(callback_url, json=payload)
+            if response.status_code < 400:
+                return True
+            if response.status_code < 500:
+                print(f"❌ 카카오 콜백 거절됨: {response.status_code} {response.text[:200]}")
+                return False
+            reason = f"HTTP {response.status_code}"
+        except httpx.HTTPError as e:
+            reason = type(e).__name__
+        
+        if attempt == CALLBACK_RETRIES:
+            print(f"❌ 카카오 콜백 실패 ({reason})")
+            return False
+        print(f"⚠️ 카카오 콜백 실패 ({reason}), 재시도 {attempt + 1}/{CALLBACK_RETRIES}")
+        await asyncio.sleep(0.5 * (attempt + 1))
+    return False
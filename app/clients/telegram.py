@@ -1,37 +1,297 @@
+import asyncio
 import httpx
 import os
-from dotenv import load_dotenv
+import time
+from collections import deque
+from typing import Deque, Dict, Hashable, List, Optional
 
-load_dotenv()
+from app import metrics
 
+API_BASE = os.getenv("TELEGRAM_API_BASE", "https://api.telegram.org")
 BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
-API_URL = f"https://api.telegram.org/bot{BOT_TOKEN}"
+API_URL = f"{API_BASE}/bot{BOT_TOKEN}"
 
-async def send_message(chat_id: int, text: str):
+# 봇 여러 개 (멀티 테넌트): 쉼표로 구분한 토큰, 봇 ID = 토큰의 ":" 앞부분
+# 웹훅은 봇마다 /telegram/webhook/{봇 ID}로 등록
+BOT_TOKENS: Dict[str, str] = {
+    token.split(":", 1)[0]: token
+    for token in (value.strip() for value in os.getenv("TELEGRAM_BOT_TOKENS", "").split(","))
+    if token
+}
+
+def api_url(bot_id: Optional[str] = None) -> str:
+    """Bot API 주소 (bot_id가 None이면 TELEGRAM_BOT_TOKEN 봇)"""
+    if bot_id is None:
+        return API_URL
+    return f"{API_BASE}/bot{BOT_TOKENS[bot_id]}"
+
+SEND_TIMEOUT = float(os.getenv("TELEGRAM_SEND_TIMEOUT", "10.0"))  # API 호출 1회 타임아웃(초)
+SEND_RETRIES = int(os.getenv("TELEGRAM_SEND_RETRIES", "3"))       # 429/5xx/연결 오류 재시도 횟수
+
+# 텔레그램 전송 한도: 전체 초당 약 30개, 같은 채팅에는 초당 약 1개 (짧은 버스트는 허용)
+GLOBAL_RATE = float(os.getenv("TELEGRAM_GLOBAL_RATE", "30"))
+CHAT_RATE = float(os.getenv("TELEGRAM_CHAT_RATE", "1"))
+CHAT_BURST = float(os.getenv("TELEGRAM_CHAT_BURST", "3"))  # 나눠 보내는 긴 답변이 바로 나가도록
+
+MAX_MESSAGE_LENGTH = 4096  # 텔레그램 메시지 1개 최대 길이
+
+SEND_TOTAL = metrics.register(metrics.Counter(
+    "rag_telegram_requests_total", "Telegram Bot API calls by method and result", ("method", "result"),
+))
+RATE_LIMIT_WAIT_SECONDS = metrics.register(metrics.Histogram(
+    "rag_telegram_rate_limit_wait_seconds", "Time spent waiting for Telegram rate limit tokens", ("scope",),
+))
+
+# 요청마다 AsyncClient를 새로 만들지 않고 연결을 재사용 (keep-alive)
+_client: Optional[httpx.AsyncClient] = None
+
+def get_client() -> httpx.AsyncClient:
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            timeout=SEND_TIMEOUT,
+            limits=httpx.Limits(max_connections=50, max_keepalive_connections=20),
+        )
+    return _client
+
+async def close_client(drain_timeout: float = 5.0):
+    """서버 종료 시 남은 전송을 잠시 기다린 뒤 연결 풀 정리"""
+    global _client
+    if _sender is not None:
+        await _sender.drain(drain_timeout)
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+class TokenBucket:
+    """
+    토큰 버킷 (초당 rate개 보충, 최대 capacity개까지 모아 둠)
+
+    토큰이 모자라면 미리 빚을 지고 예약 → 호출한 순서대로 기다림 (대기 중 다른 호출이 끼어들지 않음)
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self) -> float:
+        """토큰 1개 예약 → 기다려야 할 시간(초)"""
+        self._refill()
+        self.tokens -= 1
+        return max(0.0, -self.tokens / self.rate)
+
+    def is_full(self) -> bool:
+        self._refill()
+        return self.tokens >= self.capacity
+
+    async def acquire(self, scope: str):
+        wait = self.reserve()
+        if wait > 0:
+            RATE_LIMIT_WAIT_SECONDS.observe(wait, scope)
+            await asyncio.sleep(wait)
+
+
+class TelegramSender:
+    """
+    텔레그램 전송 큐
+
+    - 채팅별 FIFO 큐 + 작업 태스크 1개 → 같은 채팅의 메시지는 보낸 순서대로 도착
+    - 채팅별/봇별 토큰 버킷으로 전송 속도 제한 (텔레그램 한도는 봇 토큰마다 따로)
+    - 429는 retry_after만큼 기다렸다가 재시도 (그동안 같은 채팅의 다음 메시지도 대기)
+    """
+
+    MAX_CHAT_BUCKETS = 10000  # 이보다 많아지면 가득 찬(한동안 안 쓴) 채팅 버킷 정리
+
+    def __init__(self, global_rate: float = GLOBAL_RATE, chat_rate: float = CHAT_RATE,
+                 chat_burst: float = CHAT_BURST, retries: int = SEND_RETRIES):
+        self.global_rate = global_rate
+        self.global_bucket = TokenBucket(global_rate, max(1.0, global_rate))
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.retries = retries
+        self._bot_buckets: Dict[str, TokenBucket] = {}  # TELEGRAM_BOT_TOKENS 봇의 전체 한도
+        self._chat_buckets: Dict[Hashable, TokenBucket] = {}  # (봇 ID, 채팅 ID) → 버킷
+        self._queues: Dict[Hashable, Deque] = {}
+        self._workers: Dict[Hashable, asyncio.Task] = {}
+
+    def pending(self) -> int:
+        """큐에서 전송을 기다리는 메시지 수"""
+        return sum(len(queue) for queue in self._queues.values())
+
+    def enqueue(self, chat_id: int, method: str, payload: dict, future: asyncio.Future, bot_id: Optional[str] = None):
+        """채팅 큐에 추가 (전송 결과는 future로 받음)"""
+        key = (bot_id, chat_id)
+        self._queues.setdefault(key, deque()).append((method, payload, future))
+        if key not in self._workers:
+            self._workers[key] = asyncio.ensure_future(self._worker(key))
+
+    async def _worker(self, key: tuple):
+        bot_id, chat_id = key
+        queue = self._queues[key]
+        try:
+            while queue:
+                method, payload, future = queue.popleft()
+                if future.done():  # 기다리던 쪽이 취소됨
+                    continue
+                try:
+                    result = await self.call(method, payload, chat_id, bot_id=bot_id)
+                except asyncio.CancelledError:
+                    future.cancel()
+                    raise
+                except Exception as e:  # 예상 못 한 응답 형식 등 → 이 메시지만 실패
+                    if not future.done():
+                        future.set_exception(e)
+                    continue
+                if not future.done():
+                    future.set_result(result)
+        finally:
+            # 큐 확인과 정리 사이에 await가 없으므로 새 메시지를 놓치지 않음
+            del self._workers[key]
+            del self._queues[key]
+            for method, payload, future in queue:  # 작업 태스크가 취소된 경우
+                future.cancel()
+
+    def _chat_bucket(self, chat_key: tuple) -> TokenBucket:
+        bucket = self._chat_buckets.get(chat_key)
+        if bucket is None:
+            if len(self._chat_buckets) >= self.MAX_CHAT_BUCKETS:
+                for idle in [key for key, value in self._chat_buckets.items() if value.is_full()]:
+                    del self._chat_buckets[idle]
+            bucket = self._chat_buckets[chat_key] = TokenBucket(self.chat_rate, self.chat_burst)
+        return bucket
+
+    def _bot_bucket(self, bot_id: Optional[str]) -> TokenBucket:
+        if bot_id is None:
+            return self.global_bucket
+        bucket = self._bot_buckets.get(bot_id)
+        if bucket is None:
+            bucket = self._bot_buckets[bot_id] = TokenBucket(self.global_rate, max(1.0, self.global_rate))
+        return bucket
+
+    async def call(self, method: str, payload: dict, chat_id: Optional[int] = None, retries: Optional[int] = None,
+                   bot_id: Optional[str] = None) -> dict:
+        """
+        Bot API 호출 (속도 제한 + 재시도)
+
+        Args:
+            chat_id: 채팅별 속도 제한 대상 (None이면 전체 한도만 적용)
+            retries: 재시도 횟수 (기본: SEND_RETRIES)
+            bot_id: 보낼 봇 (TELEGRAM_BOT_TOKENS의 봇 ID, None이면 TELEGRAM_BOT_TOKEN 봇)
+
+        Returns:
+            API 응답 JSON (실패 시 {"ok": False, ...})
+        """
+        retries = self.retries if retries is None else retries
+        for attempt in range(retries + 1):
+            if chat_id is not None:
+                await self._chat_bucket((bot_id, chat_id)).acquire("chat")
+            await self._bot_bucket(bot_id).acquire("global")
+            try:
+                response = await get_client().post(f"{api_url(bot_id)}/{method}", json=payload)
+                data = response.json()
+            except (httpx.HTTPError, ValueError) as e:
+                status, data, delay = type(e).__name__, {"ok": False, "description": type(e).__name__}, 0.5 * (attempt + 1)
+            else:
+                if response.status_code == 429:
+                    status, delay = "rate_limited", float(data.get("parameters", {}).get("retry_after", 1))
+                elif response.status_code >= 500:
+                    status, delay = f"HTTP {response.status_code}", 0.5 * (attempt + 1)
+                else:
+                    SEND_TOTAL.inc(1, method, "ok" if data.get("ok") else "rejected")
+                    if not data.get("ok"):
+                        print(f"❌ 텔레그램 {method} 거절됨: {data.get('description')}")
+                    return data
+
+            SEND_TOTAL.inc(1, method, "rate_limited" if status == "rate_limited" else "error")
+            if attempt == retries:
+                print(f"❌ 텔레그램 {method} 실패 ({status})")
+                return data
+            print(f"⚠️ 텔레그램 {method} 실패 ({status}), {delay:.1f}초 후 재시도 {attempt + 1}/{retries}")
+            await asyncio.sleep(delay)
+        return data
+
+    async def drain(self, timeout: float):
+        """남은 전송을 timeout초까지 기다리고, 끝나지 않은 것은 취소"""
+        workers = list(self._workers.values())
+        if not workers:
+            return
+        _, pending = await asyncio.wait(workers, timeout=timeout)
+        for task in pending:
+            task.cancel()
+        if pending:
+            print(f"⚠️ 텔레그램 전송 {len(pending)}개 채팅의 남은 메시지를 버림 (종료)")
+            await asyncio.wait(pending)
+
+
+_sender: Optional[TelegramSender] = None
+
+def get_sender() -> TelegramSender:
+    global _sender
+    if _sender is None:
+        _sender = TelegramSender()
+    return _sender
+
+
+def split_message(text: str, limit: int = MAX_MESSAGE_LENGTH) -> List[str]:
+    """
+    긴 답변을 limit자 이하 메시지들로 나눔
+
+    문단(빈 줄) → 줄바꿈 → 공백 순으로 자르기 좋은 위치를 찾고, 없으면 limit에서 자름
+    """
+    parts = []
+    while len(text) > limit:
+        window = text[:limit + 1]  # 경계 바로 뒤의 구분자도 자르는 위치로 사용
+        for separator in ("\n\n", "\n", " "):
+            cut = window.rfind(separator)
+            if cut > limit // 2:
+                break
+        else:
+            cut = limit
+        part = text[:cut].rstrip()
+        if part:
+            parts.append(part)
+        text = text[cut:].lstrip()
+    if text.strip():
+        parts.append(text)
+    return parts
+
+async def send_message(chat_id: int, text: str, bot_id: Optional[str] = None) -> List[dict]:
     """
-    텔레그램 메시지 전송
-    
+    텔레그램 메시지 전송 (4096자를 넘으면 여러 메시지로 나눠 순서대로)
+
     Args:
         chat_id: 사용자 채팅 ID
         text: 전송할 텍스트 (Markdown 지원)
+        bot_id: 보낼 봇 (None이면 TELEGRAM_BOT_TOKEN 봇)
+
+    Returns:
+        메시지별 API 응답 JSON
     """
-    async with httpx.AsyncClient() as client:
-        response = await client.post(
-            f"{API_URL}/sendMessage",
-            json={
-                "chat_id": chat_id,
-                "text": text,
-                "parse_mode": "Markdown",  # **굵게**, _기울임_ 지원
-            }
-        )
-        return response.json()
+    sender = get_sender()
+    loop = asyncio.get_running_loop()
+    futures = []
+    for part in split_message(text):
+        future = loop.create_future()
+        sender.enqueue(chat_id, "sendMessage", {
+            "chat_id": chat_id,
+            "text": part,
+            "parse_mode": "Markdown",  # **굵게**, _기울임_ 지원
+        }, future, bot_id)
+        futures.append(future)
+    return list(await asyncio.gather(*futures))
 
-async def send_typing(chat_id: int):
+async def send_typing(chat_id: int, bot_id: Optional[str] = None):
     """
     "입력 중..." 표시 (사용자 경험 향상)
+
+    메시지가 아니므로 채팅별 한도/재시도 없이 전체 한도만 적용
     """
-    async with httpx.AsyncClient() as client:
-        await client.post(
-            f"{API_URL}/sendChatAction",
-            json={"chat_id": chat_id, "action": "typing"}
-        )
+    return await get_sender().call("sendChatAction", {"chat_id": chat_id, "action": "typing"}, retries=0, bot_id=bot_id)
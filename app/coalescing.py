@@ -0,0 +1,116 @@
+import asyncio
+from typing import Awaitable, Callable, Dict, Hashable, Optional, TypeVar
+
+from app import metrics
+
+T = TypeVar("T")
+
+COALESCED_TOTAL = metrics.register(metrics.Counter(
+    "rag_coalesced_requests_total", "Requests that joined an identical request already in flight instead of running it again",
+))
+
+
+class _Flight:
+    """
+    진행 중인 공유 작업 + 마감
+
+    마감은 합류한 호출자 중 가장 늦은 것 (한 명이라도 제한이 없으면 None)
+    → 마감이 지나면 아무도 기다리지 않으므로 작업을 취소
+    """
+
+    def __init__(self, task: asyncio.Task, expires: Optional[float]):
+        self.task = task
+        self.expires = expires
+        self.expired = False  # 마감이 지나서 취소됨
+        self._loop = asyncio.get_running_loop()
+        self._timer = None
+        self._schedule()
+
+    def extend(self, expires: Optional[float]):
+        """늦은 마감으로 합류한 호출자가 있으면 작업 마감을 늦춤"""
+        if self.expires is None:
+            return
+        if expires is None:
+            self.expires = None
+            self.close()
+        elif expires > self.expires:
+            self.expires = expires  # 타이머가 울리면 새 마감으로 다시 예약
+
+    def _schedule(self):
+        if self.expires is not None:
+            self._timer = self._loop.call_at(self.expires, self._check)
+
+    def _check(self):
+        self._timer = None
+        if self.task.done() or self.expires is None:
+            return
+        if self._loop.time() < self.expires:
+            self._schedule()
+            return
+        self.expired = True
+        self.task.cancel()
+
+    def close(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+    async def wait(self, timeout: Optional[float]) -> T:
+        """이 호출자의 timeout만큼 기다림 (작업이 마감으로 취소됐으면 TimeoutError)"""
+        try:
+            return await asyncio.wait_for(asyncio.shield(self.task), timeout)
+        except asyncio.CancelledError:
+            if self.expired:
+                raise asyncio.TimeoutError() from None
+            raise
+
+
+class SingleFlight:
+    """
+    동일한 요청 합치기 (single-flight)
+
+    같은 key로 동시에 들어온 호출은 먼저 시작된 작업 하나를 함께 기다립니다.
+    → 같은 질문이 동시에 수십 번 들어와도 검색/GPT 호출은 한 번만 실행
+
+    - 먼저 온 호출자가 취소(타임아웃)되어도 공유 작업은 취소되지 않음 (asyncio.shield)
+    - timeout은 호출자마다 따로 적용: 공유 작업은 합류한 호출자 중 가장 늦은 마감까지 실행되고,
+      각 호출자는 자기 timeout이 지나면 TimeoutError (짧은 마감으로 먼저 시작한 작업에
+      긴 마감의 호출자가 합류해도 일찍 끊기지 않음)
+    - 작업이 끝나면 key가 비워지므로 이후 호출은 새로 실행 (결과 재사용은 답변 캐시 담당)
+    """
+
+    def __init__(self):
+        self._inflight: Dict[Hashable, _Flight] = {}
+        self.calls = 0       # 실제로 실행된 작업 수
+        self.coalesced = 0   # 진행 중인 작업에 합류한 호출 수
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]], timeout: Optional[float] = None) -> T:
+        expires = None if timeout is None else asyncio.get_running_loop().time() + timeout
+        flight = self._inflight.get(key)
+        if flight is not None and not flight.task.done():
+            self.coalesced += 1
+            COALESCED_TOTAL.inc()
+            flight.extend(expires)
+            return await flight.wait(timeout)
+
+        self.calls += 1
+        flight = _Flight(asyncio.ensure_future(fn()), expires)
+        self._inflight[key] = flight
+        flight.task.add_done_callback(lambda t: self._done(key, flight))
+        return await flight.wait(timeout)
+
+    def _done(self, key: Hashable, flight: _Flight):
+        if self._inflight.get(key) is flight:
+            del self._inflight[key]
+        flight.close()
+        # 모든 호출자가 먼저 취소된 경우에도 "exception was never retrieved" 경고가 나지 않도록
+        if not flight.task.cancelled():
+            flight.task.exception()
+
+    def stats(self) -> dict:
+        """이 인스턴스의 실행/합류 횟수 (/metrics에는 모든 인스턴스의 합류 수가 rag_coalesced_requests_total로 나감)"""
+        return {
+            "calls": self.calls,
+            "coalesced": self.coalesced,
+            "inflight": len(self._inflight),
+        }
@@ -0,0 +1,183 @@
+import os
+from functools import lru_cache
+from typing import Any, List, Optional, Set, Tuple
+
+import tiktoken
+
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "2000"))      # 컨텍스트에 쓸 최대 토큰 수
+CONTEXT_DEDUP_THRESHOLD = float(os.getenv("CONTEXT_DEDUP_THRESHOLD", "0.9"))  # 이 이상 겹치면 중복으로 보고 제외
+TOKEN_COUNT_CACHE_SIZE = int(os.getenv("TOKEN_COUNT_CACHE_SIZE", "10000"))
+TOKENIZER_MODEL = "gpt-4o-mini"  # app.llm에서 쓰는 모델과 맞춤
+
+_encoding = None
+_encoding_loaded = False
+
+
+def _get_encoding():
+    """
+    tiktoken 인코딩 (처음 한 번만 로드)
+
+    tiktoken은 처음 쓸 때 BPE 파일을 내려받으므로, 오프라인 등으로 실패하면
+    None을 반환하고 근사치(UTF-8 바이트 / 3)로 셉니다.
+    """
+    global _encoding, _encoding_loaded
+    if not _encoding_loaded:
+        _encoding_loaded = True
+        try:
+            try:
+                _encoding = tiktoken.encoding_for_model(TOKENIZER_MODEL)
+            except KeyError:
+                # 설치된 tiktoken이 모르는 모델이면 가장 가까운 인코딩 사용
+                _encoding = tiktoken.get_encoding("cl100k_base")
+        except Exception as e:
+            print(f"⚠️ tiktoken 인코딩 로드 실패, 토큰 수를 근사치로 계산합니다: {e}")
+            _encoding = None
+    return _encoding
+
+
+@lru_cache(maxsize=TOKEN_COUNT_CACHE_SIZE)
+def count_tokens(text: str) -> int:
+    """텍스트의 토큰 수 (같은 청크/프롬프트는 다시 세지 않도록 캐시)"""
+    return count_tokens_uncached(text)
+
+
+def count_tokens_uncached(text: str) -> int:
+    """텍스트의 토큰 수 (캐시 없이, 생성된 답변처럼 한 번만 세는 텍스트용 → 캐시 항목을 밀어내지 않음)"""
+    encoding = _get_encoding()
+    if encoding is None:
+        return (len(text.encode("utf-8")) + 2) // 3
+    return len(encoding.encode(text))
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """텍스트를 앞에서부터 max_tokens 토큰까지만 남김"""
+    if max_tokens <= 0:
+        return ""
+    encoding = _get_encoding()
+    if encoding is None:
+        # 근사치 기준: 바이트 수로 자르고 깨진 글자는 버림
+        return text.encode("utf-8")[: max_tokens * 3].decode("utf-8", errors="ignore")
+    tokens = encoding.encode(text)
+    if len(tokens) <= max_tokens:
+        return text
+    return encoding.decode(tokens[:max_tokens])
+
+
+def context_header(index: int, doc: Any) -> str:
+    """프롬프트에서 청크 앞에 붙는 머리말 (문서명/페이지 포함)"""
+    return f"[문서 {index}] ({doc.metadata.get('title', '문서')}, p.{doc.metadata.get('page', '?')}) "
+
+
+def _shingles(text: str, size: int = 3) -> Set[str]:
+    text = " ".join(text.split())
+    return {text[i:i + size] for i in range(max(1, len(text) - size + 1))}
+
+
+def _similarity(a: Set[str], b: Set[str]) -> float:
+    """작은 쪽 기준 겹침 비율 (한 청크가 다른 청크에 거의 포함되면 1에 가까움)"""
+    if not a or not b:
+        return 0.0
+    return len(a & b) / min(len(a), len(b))
+
+
+def _span(doc: Any) -> Optional[Tuple[Any, Any, int, int]]:
+    """(doc_id, page, start, end) — 오프셋이 없는 예전 청크는 None"""
+    start = doc.metadata.get("start_index")
+    end = doc.metadata.get("end_index")
+    if start is None or end is None:
+        return None
+    return doc.metadata.get("doc_id"), doc.metadata.get("page"), int(start), int(end)
+
+
+def _trim_overlap(doc: Any, content: str, selected_spans: List[tuple]) -> Optional[str]:
+    """
+    같은 문서/페이지에서 이미 고른 청크와 겹치는 부분을 잘라냄
+
+    청크 분할 시 CHUNK_OVERLAP만큼 앞뒤 청크가 겹치므로, 이웃 청크를 둘 다 넣으면
+    같은 문장이 두 번 들어갑니다. 완전히 포함되면 None (넣을 필요 없음)
+    """
+    span = _span(doc)
+    if span is None:
+        return content
+
+    doc_id, page, start, end = span
+    for other_doc_id, other_page, other_start, other_end in selected_spans:
+        if (other_doc_id, other_page) != (doc_id, page):
+            continue
+        if other_start <= start and end <= other_end:
+            return None
+        if other_start <= start < other_end:
+            # 앞부분이 이미 들어간 청크의 뒷부분과 겹침
+            content = content[other_end - start:]
+            start = other_end
+        elif other_start < end <= other_end:
+            # 뒷부분이 이미 들어간 청크의 앞부분과 겹침
+            content = content[: len(content) - (end - other_start)]
+            end = other_start
+    return content if content.strip() else None
+
+
+def pack_context(
+    search_results: List[Tuple[Any, float]],
+    budget: int = CONTEXT_TOKEN_BUDGET,
+    dedup_threshold: float = CONTEXT_DEDUP_THRESHOLD,
+) -> dict:
+    """
+    검색 결과를 토큰 예산 안에 맞춰 컨텍스트로 구성
+
+    - 검색 순위 순서대로 예산이 남는 만큼 넣음 (큰 청크가 안 들어가면 다음 청크 시도)
+      (하이브리드 검색/MMR 순위는 유사도 점수 순서와 다를 수 있으므로 다시 정렬하지 않음)
+    - 이미 넣은 청크와 거의 같은 청크(near-duplicate)는 제외
+    - 같은 문서의 이웃 청크끼리 겹치는 부분(CHUNK_OVERLAP)은 잘라냄
+    - 첫 청크가 혼자서 예산을 넘으면 예산에 맞게 잘라서라도 넣음
+
+    Returns:
+        {"context", "results": 실제로 넣은 [(Document, score), ...], "tokens",
+         "dropped_duplicates", "dropped_budget", "trimmed_chars"}
+    """
+    lines: List[str] = []
+    packed: List[Tuple[Any, float]] = []
+    selected_shingles: List[Set[str]] = []
+    selected_spans: List[tuple] = []
+    used = 0
+    dropped_duplicates = dropped_budget = trimmed_chars = 0
+    separator_tokens = count_tokens("\n\n")
+
+    for doc, score in search_results:
+        shingles = _shingles(doc.page_content)
+        if any(_similarity(shingles, other) >= dedup_threshold for other in selected_shingles):
+            dropped_duplicates += 1
+            continue
+
+        content = _trim_overlap(doc, doc.page_content, selected_spans)
+        if content is None:
+            dropped_duplicates += 1
+            continue
+        trimmed_chars += len(doc.page_content) - len(content)
+
+        # 머리말/본문을 따로 세서 본문 토큰 수는 청크 단위로 캐시되게 함
+        header = context_header(len(lines) + 1, doc)
+        cost = count_tokens(header) + count_tokens(content) + (separator_tokens if lines else 0)
+        if used + cost > budget:
+            if lines:
+                dropped_budget += 1
+                continue
+            content = truncate_to_tokens(content, max(0, budget - count_tokens(header)))
+            cost = count_tokens(header) + count_tokens(content)
+
+        lines.append(header + content)
+        packed.append((doc, score))
+        selected_shingles.append(shingles)
+        span = _span(doc)
+        if span is not None:
+            selected_spans.append(span)
+        used += cost
+
+    return {
+        "context": "\n\n".join(lines),
+        "results": packed,
+        "tokens": used,
+        "dropped_duplicates": dropped_duplicates,
+        "dropped_budget": dropped_budget,
+        "trimmed_chars": trimmed_chars,
+    }
@@ -0,0 +1,210 @@
+import json
+import os
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+
+class DocumentIndex:
+    """
+    문서(doc_id) 단위 대표 벡터 인덱스 (2단계 검색의 1단계)
+
+    - 문서마다 청크 임베딩 평균(centroid)을 정규화해서 한 행에 저장
+    - 문서가 바뀌면 그 행만 제자리에서 갱신, 삭제된 문서의 행은 재사용
+    - 검색은 대표 벡터 전체와 내적 (문서 수는 청크 수의 1/수십이라 전수 검색도 빠름)
+
+    디렉터리 구성:
+        meta.json        {"dim", "rows", "docs": {doc_id: 행 번호}, "free": [빈 행 번호]}
+        centroids.f32    (rows, dim) float32 대표 벡터
+
+    NumpyIndex와 마찬가지로 쓰기는 한 프로세스만 한다고 가정하고,
+    다른 프로세스는 meta.json이 바뀌면 다시 불러옵니다.
+    """
+
+    def __init__(self, path: str):
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._load()
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+    def _load(self):
+        meta_path = self._file("meta.json")
+        self._stamp = None
+        self._meta = {"dim": None, "rows": 0, "docs": {}, "free": []}
+        if os.path.exists(meta_path):
+            stat = os.stat(meta_path)
+            self._stamp = (stat.st_ino, stat.st_mtime_ns)
+            with open(meta_path, encoding="utf-8") as f:
+                self._meta = json.load(f)
+        self._map()
+
+    def _map(self):
+        rows, dim = self._meta["rows"], self._meta["dim"]
+        self._centroids = None
+        self._doc_ids = np.array([], dtype=object)
+        if rows and dim:
+            self._centroids = np.memmap(self._file("centroids.f32"), dtype=np.float32, mode="r+", shape=(rows, dim))
+            doc_ids = np.full(rows, None, dtype=object)
+            for doc_id, row in self._meta["docs"].items():
+                doc_ids[row] = doc_id
+            self._doc_ids = doc_ids
+
+    def _refresh(self):
+        """다른 프로세스(색인 작업)가 persist()했으면 다시 불러옴"""
+        try:
+            stat = os.stat(self._file("meta.json"))
+        except FileNotFoundError:
+            return
+        if (stat.st_ino, stat.st_mtime_ns) != self._stamp:
+            with self._lock:
+                self._load()
+
+    def __len__(self) -> int:
+        return len(self._meta["docs"])
+
+    def update(self, centroids: Dict[str, Optional[np.ndarray]]):
+        """
+        문서 대표 벡터 갱신
+
+        Args:
+            centroids: {doc_id: 대표 벡터}, 벡터가 None이면 문서 삭제
+        """
+        with self._lock:
+            docs, free = self._meta["docs"], self._meta["free"]
+            for doc_id, vector in centroids.items():
+                if vector is None:
+                    row = docs.pop(doc_id, None)
+                    if row is not None:
+                        free.append(row)
+                        self._centroids[row] = 0.0
+                        self._doc_ids[row] = None
+                    continue
+
+                vector = np.asarray(vector, dtype=np.float32)
+                norm = np.linalg.norm(vector)
+                vector = vector / norm if norm > 0 else vector
+                if self._meta["dim"] is None:
+                    self._meta["dim"] = int(vector.shape[0])
+                elif vector.shape[0] != self._meta["dim"]:
+                    raise ValueError(f"임베딩 차원 불일치: {vector.shape[0]} != {self._meta['dim']}")
+                row = docs.get(doc_id)
+                if row is None:
+                    row = free.pop() if free else self._grow()
+                    docs[doc_id] = row
+                self._centroids[row] = vector
+                self._doc_ids[row] = doc_id
+
+    def _grow(self) -> int:
+        """행 하나 추가 (파일은 두 배씩 늘려서 매번 다시 매핑하지 않음)"""
+        rows, dim = self._meta["rows"], self._meta["dim"]
+        capacity = max(64, rows * 2)
+        if self._centroids is not None:
+            self._centroids.flush()
+        with open(self._file("centroids.f32"), "ab") as f:
+            f.write(np.zeros((capacity - rows, dim), dtype=np.float32).tobytes())
+        self._meta["free"].extend(range(capacity - 1, rows, -1))
+        self._meta["rows"] = capacity
+        self._map()
+        return rows
+
+    def persist(self):
+        with self._lock:
+            if self._centroids is not None:
+                self._centroids.flush()
+            tmp = self._file("meta.json.tmp")
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(self._meta, f, ensure_ascii=False)
+            os.replace(tmp, self._file("meta.json"))
+            stat = os.stat(self._file("meta.json"))
+            self._stamp = (stat.st_ino, stat.st_mtime_ns)
+
+    def search(self, query_embedding: List[float], k: int = 10) -> List[Tuple[str, float]]:
+        """[(doc_id, 코사인 유사도), ...] 유사도 내림차순"""
+        self._refresh()
+        centroids, doc_ids = self._centroids, self._doc_ids
+        if centroids is None or not self._meta["docs"] or k <= 0:
+            return []
+        query = np.asarray(query_embedding, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm > 0:
+            query = query / norm
+
+        scores = np.asarray(centroids) @ query
+        scores[doc_ids == None] = -np.inf  # noqa: E711 (빈 행)
+        if len(scores) > k:
+            top = np.argpartition(-scores, k)[:k]
+        else:
+            top = np.arange(len(scores))
+        top = top[np.argsort(-scores[top])]
+        return [(doc_ids[i], float(scores[i])) for i in top if np.isfinite(scores[i])]
+
+    def export_arrays(self) -> Tuple[List[str], np.ndarray]:
+        """(doc_id 목록, 대표 벡터 행렬) — 빈 행은 빼고 (app.snapshot)"""
+        self._refresh()
+        with self._lock:
+            docs = sorted(self._meta["docs"].items(), key=lambda item: item[1])
+            if not docs:
+                return [], np.empty((0, self._meta["dim"] or 0), dtype=np.float32)
+            rows = np.array([row for _, row in docs], dtype=np.int64)
+            return [doc_id for doc_id, _ in docs], np.asarray(self._centroids[rows], dtype=np.float32)
+
+    def rebuild(self, centroids: Iterable[Tuple[str, np.ndarray]]):
+        """전체 재구성 (기존 컬렉션에서 처음 만들 때)"""
+        with self._lock:
+            for name in ("meta.json", "centroids.f32"):
+                try:
+                    os.remove(self._file(name))
+                except OSError:
+                    pass
+            self._load()
+        batch = {}
+        for doc_id, vector in centroids:
+            batch[doc_id] = vector
+            if len(batch) >= 1000:
+                self.update(batch)
+                batch = {}
+        self.update(batch)
+        self.persist()
+
+
+def centroids_from(doc_ids: List[str], embeddings: np.ndarray) -> Dict[str, np.ndarray]:
+    """청크별 (doc_id, 임베딩) → {doc_id: 정규화된 청크 임베딩의 평균}"""
+    if not doc_ids:
+        return {}
+    embeddings = np.asarray(embeddings, dtype=np.float32)
+    norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+    embeddings = embeddings / np.where(norms > 0, norms, 1.0)
+    names, groups = np.unique(np.asarray(doc_ids, dtype=str), return_inverse=True)
+    order = np.argsort(groups, kind="stable")
+    starts = np.searchsorted(groups[order], np.arange(len(names)))
+    sums = np.add.reduceat(embeddings[order], starts, axis=0)
+    return {name: sums[i] for i, name in enumerate(names)}
+
+
+def main():
+    """
+    기존 벡터 컬렉션에서 문서 대표 벡터 인덱스를 새로 구축
+
+        python -m app.document_index
+    """
+    import time
+    from app import vector_store
+
+    if vector_store.get_document_index() is None:
+        print("❌ TWO_STAGE_SEARCH가 꺼져 있습니다.")
+        raise SystemExit(1)
+
+    start = time.perf_counter()
+    stored = vector_store._collection().get(include=["metadatas", "embeddings"])
+    doc_ids = [(meta or {}).get("doc_id", "") for meta in stored["metadatas"]]
+    centroids = centroids_from(doc_ids, stored["embeddings"])
+    vector_store.get_document_index().rebuild(centroids.items())
+    print(f"✅ 문서 대표 벡터 구축: 문서 {len(centroids)}개 / 청크 {len(doc_ids)}개 ({time.perf_counter() - start:.1f}초)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+import asyncio
+import hashlib
+import sqlite3
+import threading
+import time
+from array import array
+from typing import Dict, List, Optional
+
+from langchain.schema.embeddings import Embeddings
+
+from app import metrics
+
+EMBEDDING_CACHE_TOTAL = metrics.register(metrics.Counter(
+    "rag_embedding_cache_total", "Embedding cache lookups (kind: query | documents, result: hit | miss)", ("kind", "result"),
+))
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    디스크(SQLite) 기반 임베딩 캐시
+
+    - 키: sha256(모델명 + 텍스트) → 같은 텍스트는 한 번만 임베딩
+    - 값: float32 벡터 (BLOB)
+    - max_entries를 넘으면 가장 오래 사용하지 않은 항목부터 삭제 (LRU)
+      (사용 시각은 메모리에 모았다가 RECENCY_FLUSH개마다/저장할 때 한 번에 기록 → 조회는 SELECT만)
+    - 비동기 메서드는 SQLite 조회/저장을 스레드에서 실행 (이벤트 루프를 막지 않음)
+
+    청크 크기(CHUNK_SIZE)를 바꿔서 재색인해도 내용이 같은 청크는
+    캐시에서 가져오므로, 실제로 바뀐 청크만 OpenAI API를 호출합니다.
+    """
+
+    # SQLite 파라미터 개수 제한(999) 대비 조회 배치 크기
+    LOOKUP_BATCH = 500
+    # 메모리에 모아 둔 사용 시각이 이 개수를 넘으면 SQLite에 기록
+    RECENCY_FLUSH = 1000
+
+    def __init__(
+        self,
+        underlying: Embeddings,
+        model_name: str,
+        path: str = "./embedding_cache.sqlite3",
+        max_entries: int = 200_000,
+    ):
+        self.underlying = underlying
+        self.model_name = model_name
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._recent: Dict[str, float] = {}  # 아직 기록하지 않은 사용 시각 {key: 시각}
+
+        # 여러 스레드(검색 스레드 풀 등)에서 공유하므로 Lock으로 보호
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            " key TEXT PRIMARY KEY,"
+            " vector BLOB NOT NULL,"
+            " last_used REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_embeddings_last_used ON embeddings(last_used)"
+        )
+        self._conn.commit()
+        self._size = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    # ----- 캐시 키/직렬화 -----
+
+    def _key(self, text: str) -> str:
+        return hashlib.sha256(f"{self.model_name}\0{text}".encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _to_blob(vector: List[float]) -> bytes:
+        return array("f", vector).tobytes()
+
+    @staticmethod
+    def _from_blob(blob: bytes) -> List[float]:
+        vector = array("f")
+        vector.frombytes(blob)
+        return vector.tolist()
+
+    # ----- 조회/저장 -----
+
+    def _lookup(self, keys: List[str]) -> Dict[str, List[float]]:
+        """캐시에 있는 키만 {key: vector}로 반환 (사용 시각은 메모리에 기록)"""
+        found = {}
+        with self._lock:
+            for i in range(0, len(keys), self.LOOKUP_BATCH):
+                batch = keys[i:i + self.LOOKUP_BATCH]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})",
+                    batch,
+                ).fetchall()
+                for key, blob in rows:
+                    found[key] = self._from_blob(blob)
+
+            if found:
+                now = time.time()
+                for key in found:
+                    self._recent[key] = now
+                if len(self._recent) >= self.RECENCY_FLUSH:
+                    self._flush_recent()
+                    self._conn.commit()
+        return found
+
+    def _flush_recent(self):
+        """모아 둔 사용 시각을 SQLite에 기록 (Lock을 잡은 상태에서 호출, commit은 호출한 쪽에서)"""
+        if self._recent:
+            self._conn.executemany(
+                "UPDATE embeddings SET last_used = ? WHERE key = ?",
+                [(used, key) for key, used in self._recent.items()],
+            )
+            self._recent.clear()
+
+    def _store(self, items: Dict[str, List[float]]):
+        """새 임베딩 저장 후 용량 초과 시 LRU 삭제"""
+        if not items:
+            return
+        now = time.time()
+        with self._lock:
+            before = self._conn.total_changes
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO embeddings (key, vector, last_used) VALUES (?, ?, ?)",
+                [(key, self._to_blob(vector), now) for key, vector in items.items()],
+            )
+            self._size += self._conn.total_changes - before
+
+            overflow = self._size - self.max_entries
+            if overflow > 0:
+                self._flush_recent()  # 최근에 쓴 항목이 지워지지 않도록 사용 시각 먼저 반영
+                self._conn.execute(
+                    "DELETE FROM embeddings WHERE key IN ("
+                    " SELECT key FROM embeddings ORDER BY last_used LIMIT ?)",
+                    (overflow,),
+                )
+                self._size -= overflow
+            self._conn.commit()
+
+    def _split(self, texts: List[str]):
+        """(키 목록, 캐시 적중 결과, 임베딩이 필요한 {key: text}) 반환"""
+        keys = [self._key(text) for text in texts]
+        cached = self._lookup(list(set(keys)))
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in cached:
+                missing[key] = text  # 같은 텍스트가 여러 번 나와도 한 번만 임베딩
+
+        hits = len(texts) - sum(1 for key in keys if key not in cached)
+        with self._lock:
+            self.hits += hits
+            self.misses += len(missing)
+        EMBEDDING_CACHE_TOTAL.inc(hits, "documents", "hit")
+        EMBEDDING_CACHE_TOTAL.inc(len(missing), "documents", "miss")
+        return keys, cached, missing
+
+    def _get(self, key: str) -> Optional[List[float]]:
+        """질문 하나 조회 + 적중/미스 집계"""
+        vector = self._lookup([key]).get(key)
+        with self._lock:
+            if vector is not None:
+                self.hits += 1
+            else:
+                self.misses += 1
+        EMBEDDING_CACHE_TOTAL.inc(1, "query", "miss" if vector is None else "hit")
+        return vector
+
+    # ----- Embeddings 인터페이스 -----
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys, cached, missing = self._split(texts)
+        if missing:
+            vectors = self.underlying.embed_documents(list(missing.values()))
+            new_items = dict(zip(missing.keys(), vectors))
+            self._store(new_items)
+            cached.update(new_items)
+        return [cached[key] for key in keys]
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        loop = asyncio.get_running_loop()
+        keys, cached, missing = await loop.run_in_executor(None, self._split, texts)
+        if missing:
+            vectors = await self.underlying.aembed_documents(list(missing.values()))
+            new_items = dict(zip(missing.keys(), vectors))
+            await loop.run_in_executor(None, self._store, new_items)
+            cached.update(new_items)
+        return [cached[key] for key in keys]
+
+    def embed_query(self, text: str) -> List[float]:
+        key = self._key(text)
+        vector = self._get(key)
+        if vector is None:
+            vector = self.underlying.embed_query(text)
+            self._store({key: vector})
+        return vector
+
+    async def aembed_query(self, text: str) -> List[float]:
+        # 카카오 응답 경로: 디스크 조회/Lock 대기는 스레드에서
+        loop = asyncio.get_running_loop()
+        key = self._key(text)
+        vector = await loop.run_in_executor(None, self._get, key)
+        if vector is None:
+            vector = await self.underlying.aembed_query(text)
+            await loop.run_in_executor(None, self._store, {key: vector})
+        return vector
+
+    # ----- 통계 -----
+
+    def stats(self) -> dict:
+        with self._lock:
+            hits, misses = self.hits, self.misses
+        total = hits + misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / total, 3) if total else 0.0,
+            "entries": self._size,
+            "max_entries": self.max_entries,
+        }
+
+    def close(self):
+        with self._lock:
+            self._flush_recent()
+            self._conn.commit()
+            self._conn.close()
+
+
+def wrap_embeddings(underlying: Embeddings, model_name: str, path: Optional[str], max_entries: int) -> Embeddings:
+    """path가 비어 있으면 캐시 없이 원본 임베딩을 그대로 사용"""
+    if not path:
+        return underlying
+    return CachedEmbeddings(underlying, model_name=model_name, path=path, max_entries=max_entries)
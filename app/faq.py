@@ -0,0 +1,534 @@
+"""
+자주 묻는 질문(FAQ) 답변 미리 만들기
+
+트래픽 대부분은 소수의 질문이 차지하므로, 자주 들어온 질문의 답변을 미리 만들어 두고
+검색/GPT 호출 없이 바로 응답합니다 (답변 캐시보다 먼저 확인, TTL 없음).
+
+1. 질문 로그: 라우터가 정규화된 질문별 횟수를 기록 (메모리에 모았다가 QUERY_LOG_FLUSH개마다 SQLite에 반영)
+2. 구축: `python -m app.faq build`가 테넌트별 상위 FAQ_TOP_N개 질문의 답변을 generate_answer로 생성
+   → 답변, 질문 임베딩, 근거 문서(doc_id)를 저장
+3. 조회: 정규화된 질문이 같으면 바로 (임베딩 호출 없음), 아니면 질문 임베딩 유사도가 FAQ_SIMILARITY 이상인 질문
+4. 갱신: 근거 문서가 바뀌면 그 답변은 바로 내리고(stale), 서버가 FAQ_REBUILD_DELAY초 뒤 백그라운드에서 다시 생성
+   (색인하는 동안 여러 번 바뀌어도 한 번만 생성, 다른 프로세스의 CLI 색인/구축으로 바뀐 경우도
+   서버가 FAQ_REFRESH_INTERVAL초마다 스레드에서 확인 → 조회는 메모리의 답변 테이블만 봄)
+
+답변 상태: 0 = 사용 중, 1 = 근거 문서가 바뀜 (다시 생성 대기), 2 = 다시 생성 중
+"""
+import argparse
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+from app import metrics
+from app.llm import generate_answer
+from app.pipelines import normalize_question
+from app.vector_store import DEFAULT_TENANT, aembed_query, asearch_by_vector, on_collection_change
+
+FAQ_ENABLED = os.getenv("FAQ_ENABLED", "true").lower() == "true"
+FAQ_DB_PATH = os.getenv("FAQ_DB_PATH", "./faq.sqlite3")
+FAQ_TOP_N = int(os.getenv("FAQ_TOP_N", "100"))              # 테넌트별로 미리 만들 질문 수
+FAQ_MIN_COUNT = int(os.getenv("FAQ_MIN_COUNT", "3"))        # 이보다 적게 들어온 질문은 만들지 않음
+FAQ_SIMILARITY = float(os.getenv("FAQ_SIMILARITY", "0.95"))  # 의미 일치 기준 (답변 캐시와 같은 기본값)
+FAQ_REBUILD_DELAY = float(os.getenv("FAQ_REBUILD_DELAY", "30"))
+FAQ_BUILD_CONCURRENCY = int(os.getenv("FAQ_BUILD_CONCURRENCY", "4"))
+FAQ_REFRESH_INTERVAL = float(os.getenv("FAQ_REFRESH_INTERVAL", "1.0"))  # 다른 프로세스의 변경을 확인하는 주기(초)
+FAQ_K = 5                    # 답변을 만들 때 검색할 청크 수 (retrieve_answer 기본값과 같음)
+FAQ_SCORE_THRESHOLD = 0.3
+QUERY_LOG_FLUSH = 100        # 메모리에 모은 질문이 이만큼 되면 SQLite에 반영
+
+FRESH, STALE, REBUILDING = 0, 1, 2
+
+FAQ_ANSWERS_TOTAL = metrics.register(metrics.Counter(
+    "rag_faq_answers_total", "Precomputed FAQ answers generated", ("result",),
+))
+
+
+def _key(tenant: Optional[str]) -> str:
+    """테넌트 → 저장 키 (기본 테넌트는 빈 문자열)"""
+    return "" if tenant is None or tenant == DEFAULT_TENANT else tenant
+
+
+class FaqStore:
+    """
+    질문 로그 + 미리 만든 답변 (SQLite)
+
+    queries: (tenant, 정규화된 질문) → 원문 예시, 횟수, 마지막 시각
+    answers: (tenant, 정규화된 질문) → 원문 예시, 질문 임베딩, 답변, 근거 doc_id 목록, 상태
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        # 이벤트 루프(로그/조회), 색인 스레드(변경 알림)가 공유하므로 Lock으로 보호
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS queries ("
+            " tenant TEXT NOT NULL,"
+            " question TEXT NOT NULL,"
+            " sample TEXT NOT NULL,"
+            " count INTEGER NOT NULL,"
+            " last_seen REAL NOT NULL,"
+            " PRIMARY KEY (tenant, question))"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS answers ("
+            " tenant TEXT NOT NULL,"
+            " question TEXT NOT NULL,"
+            " sample TEXT NOT NULL,"
+            " embedding BLOB,"
+            " answer TEXT,"
+            " doc_ids TEXT,"  # NULL: 아직 모름 (어떤 문서가 바뀌어도 다시 생성)
+            " status INTEGER NOT NULL,"
+            " built_at REAL NOT NULL DEFAULT 0,"
+            " marked_at REAL NOT NULL DEFAULT 0,"
+            " PRIMARY KEY (tenant, question))"
+        )
+        self._changes = 0  # 이 연결로 바꾼 횟수 (data_version은 다른 연결의 변경만 반영)
+
+    def version(self) -> Tuple[int, int]:
+        """답변이 바뀌었는지 확인용 (다른 프로세스의 변경 포함)"""
+        with self._lock:
+            return self._conn.execute("PRAGMA data_version").fetchone()[0], self._changes
+
+    def log(self, counts: Dict[Tuple[str, str], list]):
+        """{(tenant, 정규화된 질문): [원문 예시, 횟수]} 반영"""
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT INTO queries (tenant, question, sample, count, last_seen) VALUES (?, ?, ?, ?, ?)"
+                " ON CONFLICT (tenant, question) DO UPDATE SET"
+                " count = count + excluded.count, sample = excluded.sample, last_seen = excluded.last_seen",
+                [(tenant, question, sample, count, now) for (tenant, question), (sample, count) in counts.items()],
+            )
+
+    def top_questions(self, tenant: str, limit: int, min_count: int = 1) -> List[Tuple[str, str, int]]:
+        """[(정규화된 질문, 원문 예시, 횟수), ...] 많이 들어온 순서"""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT question, sample, count FROM queries WHERE tenant = ? AND count >= ?"
+                " ORDER BY count DESC, last_seen DESC LIMIT ?",
+                (tenant, min_count, limit),
+            ).fetchall()
+
+    def answers(self, tenant: Optional[str] = None) -> List[dict]:
+        """저장된 답변 (tenant가 None이면 전체)"""
+        sql = "SELECT tenant, question, sample, embedding, answer, doc_ids, status FROM answers"
+        params = ()
+        if tenant is not None:
+            sql, params = sql + " WHERE tenant = ?", (tenant,)
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [
+            {
+                "tenant": row[0],
+                "question": row[1],
+                "sample": row[2],
+                "embedding": np.frombuffer(row[3], dtype=np.float32) if row[3] else None,
+                "answer": json.loads(row[4]) if row[4] else None,
+                "doc_ids": json.loads(row[5]) if row[5] is not None else None,
+                "status": row[6],
+            }
+            for row in rows
+        ]
+
+    def claim(self, tenant: str, questions: List[Tuple[str, str]]):
+        """[(정규화된 질문, 원문 예시), ...]를 다시 생성 중으로 표시 (없으면 빈 행 추가)"""
+        with self._lock:
+            self._conn.executemany(
+                "INSERT INTO answers (tenant, question, sample, status) VALUES (?, ?, ?, ?)"
+                " ON CONFLICT (tenant, question) DO UPDATE SET status = excluded.status",
+                [(tenant, question, sample, REBUILDING) for question, sample in questions],
+            )
+            self._changes += 1
+
+    def claim_stale(self, tenant: str) -> List[Tuple[str, str]]:
+        """근거 문서가 바뀐 답변을 가져가서 다시 생성 중으로 표시 (여러 워커가 같은 답변을 만들지 않도록)"""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                rows = self._conn.execute(
+                    "SELECT question, sample FROM answers WHERE tenant = ? AND status = ?", (tenant, STALE),
+                ).fetchall()
+                self._conn.execute("UPDATE answers SET status = ? WHERE tenant = ? AND status = ?", (REBUILDING, tenant, STALE))
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._changes += 1
+        return rows
+
+    def put(self, tenant: str, question: str, sample: str, embedding, answer: dict, doc_ids: List[str], started: float):
+        """
+        생성한 답변 저장
+
+        생성을 시작한 뒤(started 이후)에 근거 문서가 바뀌었으면 다시 생성 대기로 남김
+        """
+        with self._lock:
+            self._conn.execute(
+                "UPDATE answers SET sample = ?, embedding = ?, answer = ?, doc_ids = ?, built_at = ?,"
+                " status = CASE WHEN marked_at > ? THEN ? ELSE ? END"
+                " WHERE tenant = ? AND question = ?",
+                (
+                    sample, np.asarray(embedding, dtype=np.float32).tobytes(),
+                    json.dumps(answer, ensure_ascii=False), json.dumps(sorted(doc_ids), ensure_ascii=False),
+                    time.time(), started, STALE, FRESH, tenant, question,
+                ),
+            )
+            self._changes += 1
+
+    def remove(self, tenant: str, questions: List[str]):
+        with self._lock:
+            self._conn.executemany(
+                "DELETE FROM answers WHERE tenant = ? AND question = ?", [(tenant, question) for question in questions],
+            )
+            self._changes += 1
+
+    def mark_stale(self, tenant: str, doc_ids: Optional[Set[str]]) -> int:
+        """근거 문서가 바뀐 답변을 다시 생성 대기로 표시 (doc_ids가 None이면 테넌트 전체)"""
+        with self._lock:
+            rows = self._conn.execute("SELECT question, doc_ids FROM answers WHERE tenant = ?", (tenant,)).fetchall()
+            stale = [
+                question for question, sources in rows
+                if doc_ids is None or sources is None or not doc_ids.isdisjoint(json.loads(sources))
+            ]
+            if stale:
+                now = time.time()
+                self._conn.executemany(
+                    "UPDATE answers SET status = ?, marked_at = ? WHERE tenant = ? AND question = ?",
+                    [(STALE, now, tenant, question) for question in stale],
+                )
+                self._changes += 1
+        return len(stale)
+
+
+class FaqTable:
+    """테넌트 하나의 사용 중인 답변 (정확 일치 dict + 의미 일치용 정규화된 임베딩 행렬)"""
+
+    def __init__(self, entries: List[dict]):
+        self.answers = {entry["question"]: entry["answer"] for entry in entries}
+        with_vectors = [entry for entry in entries if entry["embedding"] is not None]
+        self.keys = [entry["question"] for entry in with_vectors]
+        self.matrix = None
+        if with_vectors:
+            matrix = np.stack([entry["embedding"] for entry in with_vectors])
+            norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+            self.matrix = matrix / np.where(norms > 0, norms, 1)
+
+    def get(self, question: str, query_embedding: Optional[List[float]] = None) -> Optional[Tuple[dict, str]]:
+        """(답변, "exact" | "semantic"), 없으면 None"""
+        answer = self.answers.get(normalize_question(question))
+        if answer is not None:
+            return answer, "exact"
+        if query_embedding is None or self.matrix is None:
+            return None
+        query = np.asarray(query_embedding, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm == 0 or len(query) != self.matrix.shape[1]:
+            return None
+        scores = self.matrix @ (query / norm)
+        best = int(np.argmax(scores))
+        if scores[best] < FAQ_SIMILARITY:
+            return None
+        return self.answers[self.keys[best]], "semantic"
+
+
+# ----- 저장소/조회 테이블 (프로세스 전역) -----
+
+_store: Optional[FaqStore] = None
+_store_lock = threading.Lock()
+_tables: Dict[str, FaqTable] = {}
+_tables_version = None
+_tables_lock = threading.Lock()  # 새로 고침끼리 순서 보장 (늦게 읽은 예전 버전이 덮어쓰지 않도록)
+_pending: Dict[Tuple[str, str], list] = {}  # 아직 반영 안 한 질문 로그
+_pending_count = 0
+_pending_lock = threading.Lock()
+
+_loop: Optional[asyncio.AbstractEventLoop] = None  # 서버 이벤트 루프 (start()에서 설정, 있으면 백그라운드 재생성)
+_rebuild_tasks: Dict[str, asyncio.Task] = {}
+_watch_task: Optional[asyncio.Task] = None
+
+
+def get_store(create: bool = True) -> Optional[FaqStore]:
+    """FAQ 저장소 (create=False면 DB 파일이 아직 없을 때 None → FAQ를 안 쓰는 배포는 비용 없음)"""
+    global _store
+    if _store is None:
+        if not create and not os.path.exists(FAQ_DB_PATH):
+            return None
+        with _store_lock:
+            if _store is None:
+                os.makedirs(os.path.dirname(os.path.abspath(FAQ_DB_PATH)), exist_ok=True)
+                _store = FaqStore(FAQ_DB_PATH)
+    return _store
+
+
+def log_question(question: str, tenant: Optional[str] = None):
+    """라우터가 받은 질문 기록 (정규화해서 횟수만, QUERY_LOG_FLUSH개마다 SQLite에 반영)"""
+    global _pending_count
+    if not FAQ_ENABLED:
+        return
+    normalized = normalize_question(question)
+    if not normalized:
+        return
+    with _pending_lock:
+        entry = _pending.get((_key(tenant), normalized))
+        if entry is None:
+            entry = _pending[(_key(tenant), normalized)] = [question, 0]
+        entry[1] += 1
+        _pending_count += 1
+        full = _pending_count >= QUERY_LOG_FLUSH
+    if not full:
+        return
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:  # 이벤트 루프 밖(CLI 등)이면 바로 반영
+        flush_log()
+        return
+    # 라우터의 응답 마감 시간 안에서 SQLite 쓰기를 기다리지 않도록 스레드에서 반영
+    loop.run_in_executor(None, _flush_log_in_background)
+
+
+def flush_log():
+    """메모리에 모은 질문 로그를 SQLite에 반영 (서버 종료 시, FAQ 구축 전)"""
+    global _pending, _pending_count
+    with _pending_lock:
+        batch, _pending, _pending_count = _pending, {}, 0
+    if batch:
+        get_store().log(batch)
+
+
+def _flush_log_in_background():
+    try:
+        flush_log()
+    except Exception as e:  # 집계가 조금 빠질 뿐이므로 요청에는 영향 없음
+        print(f"⚠️ 질문 로그 반영 실패: {e}")
+
+
+def refresh_tables():
+    """
+    사용 중인 답변 테이블 새로 고침 (저장소가 바뀌었을 때만 다시 불러옴)
+
+    SQLite를 읽으므로 이벤트 루프에서 부르지 않음: 서버는 주기적으로 스레드에서,
+    이 프로세스에서 답변을 바꾼 직후(mark_stale, 생성 완료)에는 바로 호출
+    """
+    global _tables, _tables_version
+    store = get_store(create=False)
+    if store is None:
+        return
+    with _tables_lock:
+        version = store.version()
+        if version == _tables_version:
+            return
+        entries = store.answers()
+        grouped: Dict[str, List[dict]] = {}
+        for entry in entries:
+            if entry["status"] == FRESH and entry["answer"] is not None:
+                grouped.setdefault(entry["tenant"], []).append(entry)
+        _tables = {tenant: FaqTable(rows) for tenant, rows in grouped.items()}
+        _tables_version = version
+    # 다른 프로세스(CLI 색인)에서 근거 문서가 바뀐 답변도 이 서버가 다시 생성
+    for tenant in {entry["tenant"] for entry in entries if entry["status"] == STALE}:
+        _schedule_rebuild(tenant)
+
+
+async def _watch_tables():
+    """FAQ_REFRESH_INTERVAL초마다 다른 프로세스의 변경 확인 (SQLite 조회는 스레드에서)"""
+    loop = asyncio.get_running_loop()
+    while True:
+        await asyncio.sleep(FAQ_REFRESH_INTERVAL)
+        try:
+            await loop.run_in_executor(None, refresh_tables)
+        except Exception as e:
+            print(f"⚠️ FAQ 답변 테이블 새로 고침 실패: {e}")
+
+
+def lookup(question: str, tenant: Optional[str] = None, query_embedding: Optional[List[float]] = None) -> Optional[dict]:
+    """
+    미리 만든 답변 조회 (없으면 None)
+
+    query_embedding 없이 호출하면 정확 일치만 확인합니다 (임베딩 호출 전 단계).
+    메모리의 답변 테이블만 보므로 요청 처리 중에 SQLite를 읽지 않습니다 (refresh_tables 참고).
+    """
+    if not FAQ_ENABLED:
+        return None
+    table = _tables.get(_key(tenant))
+    if table is None:
+        return None
+    found = table.get(question, query_embedding)
+    if found is None:
+        return None
+    answer, match = found
+    metrics.annotate(cache="faq", faq_match=match)
+    return answer
+
+
+# ----- 답변 생성 -----
+
+async def _generate(tenant: str, questions: List[Tuple[str, str]]) -> Dict[str, int]:
+    """[(정규화된 질문, 원문 예시), ...]의 답변을 생성해서 저장 (claim()으로 표시한 뒤 호출)"""
+    store = get_store()
+    semaphore = asyncio.Semaphore(FAQ_BUILD_CONCURRENCY)
+    results = {"generated": 0, "no_evidence": 0, "failed": 0}
+
+    async def one(question: str, sample: str):
+        async with semaphore:
+            started = time.time()
+            try:
+                embedding = await aembed_query(sample)
+                docs = await asearch_by_vector(
+                    embedding, k=FAQ_K, score_threshold=FAQ_SCORE_THRESHOLD, query=sample, tenant=tenant or None,
+                )
+                if not docs:  # 근거가 없는 질문은 미리 만들지 않음 (문서가 추가되면 일반 경로에서 답변)
+                    store.remove(tenant, [question])
+                    result = "no_evidence"
+                else:
+                    answer = await generate_answer(sample, docs)
+                    doc_ids = {(doc.metadata or {}).get("doc_id", "") for doc, _ in docs}
+                    store.put(tenant, question, sample, embedding, answer, doc_ids, started)
+                    result = "generated"
+            except Exception as e:
+                print(f"❌ FAQ 답변 생성 실패 ({sample}): {e}")
+                store.remove(tenant, [question])  # 일반 경로로 답변하고, 다음 구축 때 다시 시도
+                result = "failed"
+        results[result] += 1
+        FAQ_ANSWERS_TOTAL.inc(1, result)
+
+    await asyncio.gather(*(one(question, sample) for question, sample in questions))
+    if questions:
+        await asyncio.get_running_loop().run_in_executor(None, refresh_tables)  # 새 답변 바로 사용
+    return results
+
+
+async def build(tenant: Optional[str] = None, top_n: int = FAQ_TOP_N, min_count: int = FAQ_MIN_COUNT) -> dict:
+    """
+    질문 로그의 상위 top_n개 질문으로 답변 구축
+
+    - 이미 만든 답변(근거 문서가 그대로인 것)은 다시 만들지 않음
+    - 상위 목록에서 빠진 질문의 답변은 삭제
+
+    Returns:
+        {"questions", "kept", "removed", "generated", "no_evidence", "failed"}
+    """
+    flush_log()
+    store, key = get_store(), _key(tenant)
+    top = store.top_questions(key, top_n, min_count)
+    current = {entry["question"]: entry for entry in store.answers(key)}
+    wanted = {question for question, _, _ in top}
+    removed = [question for question in current if question not in wanted]
+    store.remove(key, removed)
+
+    todo = [(question, sample) for question, sample, _ in top
+            if question not in current or current[question]["status"] != FRESH]
+    store.claim(key, todo)
+    results = await _generate(key, todo)
+    return {"questions": len(top), "kept": len(top) - len(todo), "removed": len(removed), **results}
+
+
+async def rebuild_stale(tenant: str) -> Dict[str, int]:
+    """근거 문서가 바뀐 답변만 다시 생성"""
+    return await _generate(tenant, get_store().claim_stale(tenant))
+
+
+def _on_collection_change(doc_ids, tenant: Optional[str]):
+    """문서가 바뀌면 그 문서를 근거로 쓴 답변을 바로 내리고 다시 생성 예약"""
+    if not FAQ_ENABLED:
+        return
+    store = get_store(create=False)
+    if store is None:
+        return
+    if store.mark_stale(_key(tenant), doc_ids):
+        refresh_tables()  # 바뀐 문서를 근거로 쓴 답변은 바로 내림 (색인 스레드에서 호출됨)
+        _schedule_rebuild(_key(tenant))
+
+
+on_collection_change(_on_collection_change)
+
+
+def _schedule_rebuild(tenant: str):
+    loop = _loop
+    if loop is not None and not loop.is_closed():
+        loop.call_soon_threadsafe(_start_rebuild, tenant)  # 색인 스레드에서도 호출됨
+
+
+def _start_rebuild(tenant: str):
+    task = _rebuild_tasks.get(tenant)
+    if task is None or task.done():
+        _rebuild_tasks[tenant] = asyncio.ensure_future(_rebuild_later(tenant))
+
+
+async def _rebuild_later(tenant: str):
+    """FAQ_REBUILD_DELAY초 기다렸다가 다시 생성 (그동안 바뀐 문서는 한 번에, 생성 중에 또 바뀌면 반복)"""
+    while True:
+        await asyncio.sleep(FAQ_REBUILD_DELAY)
+        claimed = get_store().claim_stale(tenant)
+        if not claimed:
+            return
+        try:
+            results = await _generate(tenant, claimed)
+            print(f"🔁 FAQ 답변 다시 생성 ({tenant or DEFAULT_TENANT}): {results}")
+        except Exception as e:
+            print(f"❌ FAQ 답변 다시 생성 실패 ({tenant or DEFAULT_TENANT}): {e}")
+            return
+
+
+def start():
+    """서버 시작 시: 답변 테이블을 불러오고 백그라운드 새로 고침/재생성 활성화 (이벤트 루프 안에서 호출)"""
+    global _loop, _watch_task
+    _loop = asyncio.get_running_loop()
+    refresh_tables()  # 미리 불러오고, 다시 생성할 답변이 남아 있으면 예약
+    if FAQ_ENABLED:
+        _watch_task = asyncio.ensure_future(_watch_tables())
+
+
+async def stop():
+    """서버 종료 시: 재생성 중단 + 질문 로그 반영"""
+    global _loop, _watch_task
+    _loop = None
+    tasks = [task for task in _rebuild_tasks.values() if not task.done()]
+    _rebuild_tasks.clear()
+    if _watch_task is not None:
+        tasks.append(_watch_task)
+        _watch_task = None
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    if FAQ_ENABLED:
+        flush_log()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="질문 로그의 상위 질문으로 FAQ 답변 미리 만들기")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build_command = commands.add_parser("build", help="상위 질문의 답변 생성 (이미 만든 답변은 유지)")
+    build_command.add_argument("--tenant", default=None, help="테넌트 (예: kakao:<봇 ID>, 기본: 기본 테넌트)")
+    build_command.add_argument("--top", type=int, default=FAQ_TOP_N, help="미리 만들 질문 수")
+    build_command.add_argument("--min-count", type=int, default=FAQ_MIN_COUNT, help="최소 질문 횟수")
+    top_command = commands.add_parser("top", help="질문 로그 상위 질문 출력")
+    top_command.add_argument("--tenant", default=None)
+    top_command.add_argument("--top", type=int, default=20)
+    args = parser.parse_args()
+
+    if args.command == "top":
+        for question, sample, count in get_store().top_questions(_key(args.tenant), args.top):
+            print(f"{count:>6}  {sample}")
+        return
+
+    start = time.perf_counter()
+    result = asyncio.run(build(args.tenant, args.top, args.min_count))
+    print(
+        f"✅ FAQ 답변: 질문 {result['questions']}개 (유지 {result['kept']}, 생성 {result['generated']}, "
+        f"근거 없음 {result['no_evidence']}, 실패 {result['failed']}, 삭제 {result['removed']}) "
+        f"({time.perf_counter() - start:.1f}초)"
+    )
+    raise SystemExit(1 if result["failed"] else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -18,10 +18,15 @@ def format_skill_response(answer: str, sources: list[dict]) -> dict:
     """
     # 출처 목록 생성
     source_text = "\n\n📚 출처:\n"
+    seen = set()  # 같은 문서/페이지는 한 번만 표시
     for src in sources:
         title = src.get("title", "문서")
         page = src.get("page", "?")
-        source_text += f"• {title} (p.{page})\n"
+        if (title, page) in seen:
+            continue
+        seen.add((title, page))
+        # 페이지 정보가 없는 청크(예전 색인 등)는 문서명만 표시
+        source_text += f"• {title} (p.{page})\n" if page != "?" else f"• {title}\n"
     
     return {
         "version": "2.0",
@@ -52,3 +57,18 @@ def format_error_response(error_msg: str) -> dict:
             ]
         }
     }
+
+def format_callback_response(text: str = "답변을 준비하고 있어요. 잠시만 기다려 주세요! ⏳") -> dict:
+    """
+    콜백 대기 응답 포맷 (답변은 나중에 callbackUrl로 전송)
+    
+    카카오는 이 응답을 받으면 data.text를 "대기 중" 메시지로 보여주고,
+    1분 안에 callbackUrl로 오는 스킬 응답을 사용자에게 전달합니다.
+    """
+    return {
+        "version": "2.0",
+        "useCallback": True,
+        "data": {
+            "text": text
+        }
+    }
@@ -11,10 +11,15 @@ def format_answer(answer: str, sources: list[dict]) -> str:
     """
     # 출처 목록 생성
     source_text = "\n\n*출처:*\n"
+    seen = set()  # 같은 문서/페이지는 한 번만 표시
     for src in sources:
         title = src.get("title", "문서")
         page = src.get("page", "?")
-        source_text += f"• {title} (p.{page})\n"
+        if (title, page) in seen:
+            continue
+        seen.add((title, page))
+        # 페이지 정보가 없는 청크(예전 색인 등)는 문서명만 표시
+        source_text += f"• {title} (p.{page})\n" if page != "?" else f"• {title}\n"
     
     # Markdown 특수문자 이스케이프
     answer = answer.replace("_", "\\_").replace("*", "\\*")
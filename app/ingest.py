@@ -0,0 +1,253 @@
+"""
+디렉터리 일괄 색인 CLI
+
+    python -m app.ingest ./manuals
+    python -m app.ingest ./manuals --workers 8 --pages-per-task 25
+
+- 파싱: ProcessPoolExecutor로 파일을 여러 프로세스에서 동시에 파싱
+        (페이지가 많은 PDF는 페이지 범위로 쪼개서 병렬 추출)
+- 색인: 파싱이 끝난 파일부터 split_text → bulk_ingest로 바로 흘려보냄
+- CSV: 수 GB 표도 메모리에 올리지 않도록 메인 프로세스에서 행 묶음 단위로 스트리밍 색인
+- 파일 하나가 실패해도 나머지는 계속 진행 (오류는 매니페스트에 기록)
+- 매니페스트(.ingest_manifest.json)에 완료된 파일을 기록 → 중단 후 다시 실행하면 이어서 진행
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from app.parsers import iter_document
+from app.parsers.pdf import count_pages, extract_pages, pdf_metadata
+
+SUPPORTED_EXTENSIONS = {".pdf", ".docx", ".csv"}
+STREAMED_EXTENSIONS = {".csv"}  # 워커에서 섹션 목록을 만들지 않고 바로 스트리밍
+MANIFEST_NAME = ".ingest_manifest.json"
+
+
+class Manifest:
+    """
+    파일별 색인 상태 기록 (JSON)
+
+    {"파일 경로": {"size", "mtime", "status": "done" | "failed", "chunks", "error"}}
+    파일 크기/수정 시각이 같고 status가 done이면 다음 실행에서 건너뜁니다.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.entries: Dict[str, dict] = {}
+        if path.exists():
+            self.entries = json.loads(path.read_text(encoding="utf-8"))
+
+    @staticmethod
+    def _fingerprint(file_path: Path) -> dict:
+        stat = file_path.stat()
+        return {"size": stat.st_size, "mtime": stat.st_mtime}
+
+    def is_done(self, file_path: Path) -> bool:
+        entry = self.entries.get(str(file_path))
+        return (
+            entry is not None
+            and entry.get("status") == "done"
+            and {"size": entry.get("size"), "mtime": entry.get("mtime")} == self._fingerprint(file_path)
+        )
+
+    def record(self, file_path: Path, status: str, **fields):
+        self.entries[str(file_path)] = {**self._fingerprint(file_path), "status": status, **fields}
+        self._save()
+
+    def _save(self):
+        # 임시 파일에 쓰고 교체 → 쓰는 도중 죽어도 매니페스트가 깨지지 않음
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(self.entries, ensure_ascii=False, indent=2), encoding="utf-8")
+        os.replace(tmp, self.path)
+
+
+def discover_files(directory: Path) -> List[Path]:
+    return sorted(
+        path for path in directory.rglob("*")
+        if path.is_file() and path.suffix.lower() in SUPPORTED_EXTENSIONS
+    )
+
+
+def document_id(directory: Path, file_path: Path) -> str:
+    """
+    문서 ID = 색인 루트 기준 상대 경로 (예: "인사/규정.pdf")
+
+    하위 디렉터리에 같은 파일명이 있어도 서로의 청크를 지우거나 ID가 겹치지 않음
+    (루트 바로 아래 파일은 파일명과 같으므로 예전 색인과 호환)
+    """
+    return file_path.relative_to(directory).as_posix()
+
+
+def _load_sections(file_path: str, doc_id: Optional[str] = None) -> list:
+    """(워커 프로세스) 파일 전체를 섹션 목록으로"""
+    return list(iter_document(file_path, doc_id))
+
+
+async def _parse(pool: ProcessPoolExecutor, file_path: Path, pages_per_task: int, doc_id: str) -> list:
+    """
+    파일 하나 파싱 → [(섹션 텍스트, 메타데이터), ...]
+
+    PDF는 페이지 단위 섹션(메타데이터에 "page" 포함)이며,
+    페이지가 pages_per_task보다 많으면 페이지 범위별로 나눠 여러 프로세스에서 추출
+    """
+    loop = asyncio.get_running_loop()
+    path = str(file_path)
+
+    if file_path.suffix.lower() != ".pdf":
+        return await loop.run_in_executor(pool, _load_sections, path, doc_id)
+
+    page_count = await loop.run_in_executor(pool, count_pages, path)
+    starts = range(0, page_count, pages_per_task)
+    parts = await asyncio.gather(*(
+        loop.run_in_executor(pool, extract_pages, path, start, start + pages_per_task)
+        for start in starts
+    ))
+    metadata = pdf_metadata(path, page_count, doc_id)
+    return [
+        (text, {**metadata, "page": start + offset + 1})
+        for start, part in zip(starts, parts)
+        for offset, text in enumerate(part)
+        if text.strip()
+    ]
+
+
+async def _run(args) -> int:
+    # 무거운 모듈(Chroma/OpenAI)은 메인 프로세스에서만 로드
+    # (spawn 방식 워커 프로세스는 이 모듈을 다시 import하므로 최상단에 두지 않음)
+    from app import faq, vector_store  # noqa: F401 (faq: 바뀐 문서를 근거로 쓴 FAQ 답변을 다시 생성 대기로 표시)
+
+    directory = Path(args.directory)
+    manifest = Manifest(Path(args.manifest) if args.manifest else directory / MANIFEST_NAME)
+
+    files = discover_files(directory)
+    pending = [path for path in files if not manifest.is_done(path)]
+    print(f"📂 {len(files)}개 파일 발견 (완료 {len(files) - len(pending)} / 남음 {len(pending)})")
+    if not pending:
+        return 0
+
+    # 서버의 업로드 색인 작업 등 다른 프로세스와 같은 인덱스에 동시에 쓰지 않음
+    lock = vector_store.write_lock()
+    if not lock.acquire(blocking=False):
+        print("❌ 다른 프로세스(서버의 업로드 색인 작업 등)가 색인 중입니다. 끝난 뒤 다시 실행하세요.")
+        return 1
+    try:
+        return await _ingest_files(args, directory, manifest, pending)
+    finally:
+        lock.release()
+
+
+async def _ingest_files(args, directory: Path, manifest: Manifest, pending: List[Path]) -> int:
+    """대기 중인 파일을 파싱 → 색인 (쓰기 잠금을 잡은 상태에서 호출)"""
+    from app import vector_store
+    from app.ingestion import bulk_ingest
+    from app.pipelines import iter_split_text
+
+    start = time.perf_counter()
+    done = failed = total_chunks = 0
+    context = multiprocessing.get_context("spawn")
+
+    with ProcessPoolExecutor(max_workers=args.workers, mp_context=context) as pool:
+        # 파싱은 최대 workers * 2개 파일까지만 미리 진행 (메모리 제한)
+        # 자리는 색인까지 끝난 뒤에 반납 → 파싱된 섹션 목록이 색인을 기다리며 쌓이지 않음
+        limit = asyncio.Semaphore(args.workers * 2)
+
+        async def parse_limited(path: Path):
+            """(경로, 섹션 목록 또는 None, 오류 또는 None) — limit 자리는 호출한 쪽에서 반납"""
+            await limit.acquire()
+            try:
+                return path, await _parse(pool, path, args.pages_per_task, document_id(directory, path)), None
+            except Exception as e:
+                return path, None, e
+
+        async def stream_sections(path: Path):
+            """스트리밍 파일은 파싱을 색인 단계로 미룸"""
+            return path, None, None
+
+        tasks = [
+            stream_sections(path) if path.suffix.lower() in STREAMED_EXTENSIONS else parse_limited(path)
+            for path in pending
+        ]
+
+        for index, future in enumerate(asyncio.as_completed(tasks), 1):
+            path, sections, error = await future
+            file_start = time.perf_counter()
+            doc_id = document_id(directory, path)
+            try:
+                if error is not None:
+                    failed += 1
+                    manifest.record(path, "failed", error=f"parse: {error}")
+                    print(f"[{index}/{len(pending)}] ❌ {doc_id}: 파싱 실패 ({error})")
+                    continue
+
+                try:
+                    if sections is None:
+                        # 새 청크를 모두 저장한 뒤 예전 버전에만 있던 청크 정리 (업로드 작업과 같은 순서)
+                        # → 중간에 실패해도 예전 버전은 그대로 검색됨, 모아 두는 것은 청크 ID뿐
+                        keep_ids = set()
+                        stats = await bulk_ingest(
+                            iter_split_text(iter_document(str(path), doc_id)),
+                            batch_size=args.batch_size,
+                            concurrency=args.concurrency,
+                            tenant=args.tenant,
+                            chunk_ids=keep_ids,
+                        )
+                        if not stats["chunks"]:
+                            raise ValueError("추출된 텍스트가 없습니다")
+                        vector_store.prune_document(doc_id, keep_ids, tenant=args.tenant)
+                    else:
+                        if not sections:
+                            raise ValueError("추출된 텍스트가 없습니다")
+                        chunks = list(iter_split_text(sections))
+                        del sections
+                        stats = await bulk_ingest(
+                            chunks, batch_size=args.batch_size, concurrency=args.concurrency, tenant=args.tenant,
+                        )
+                        # 파일이 바뀐 경우 예전 청크 정리
+                        vector_store.prune_document(doc_id, {vector_store.chunk_id(c) for c in chunks}, tenant=args.tenant)
+                        del chunks
+                except Exception as e:
+                    failed += 1
+                    manifest.record(path, "failed", error=f"index: {e}")
+                    print(f"[{index}/{len(pending)}] ❌ {doc_id}: 색인 실패 ({e})")
+                    continue
+            finally:
+                if path.suffix.lower() not in STREAMED_EXTENSIONS:
+                    limit.release()  # 색인까지 끝난 파일의 자리 반납 → 다음 파일 파싱 시작
+
+            done += 1
+            total_chunks += stats["chunks"]
+            manifest.record(path, "done", chunks=stats["chunks"])
+            elapsed = time.perf_counter() - start
+            print(
+                f"[{index}/{len(pending)}] ✅ {doc_id}: {stats['chunks']}개 청크 "
+                f"({time.perf_counter() - file_start:.1f}초) | 누적 {total_chunks}개, "
+                f"{total_chunks / elapsed:.1f} chunks/s"
+            )
+
+    elapsed = time.perf_counter() - start
+    print(f"🏁 완료 {done} / 실패 {failed} ({elapsed:.1f}초)")
+    return 1 if failed else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="디렉터리의 문서를 병렬로 파싱해서 벡터 DB에 색인")
+    parser.add_argument("directory", help="색인할 문서 디렉터리")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 4, help="파싱 프로세스 수")
+    parser.add_argument("--pages-per-task", type=int, default=50, help="큰 PDF를 나눌 페이지 단위")
+    parser.add_argument("--manifest", default=None, help=f"매니페스트 경로 (기본: <directory>/{MANIFEST_NAME})")
+    parser.add_argument("--batch-size", type=int, default=128, help="임베딩 배치 크기")
+    parser.add_argument("--concurrency", type=int, default=4, help="동시 임베딩 배치 수")
+    parser.add_argument("--tenant", default=None, help="색인할 테넌트 (예: kakao:<봇 ID>, 기본: 기본 테넌트)")
+    args = parser.parse_args()
+
+    raise SystemExit(asyncio.run(_run(args)))
+
+
+if __name__ == "__main__":
+    main()
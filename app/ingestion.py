@@ -0,0 +1,223 @@
+import asyncio
+import os
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Set
+
+import openai
+from langchain.schema import Document
+
+from app import vector_store
+
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "128"))     # 임베딩 API 1회 호출당 청크 수
+EMBED_CONCURRENCY = int(os.getenv("EMBED_CONCURRENCY", "4"))     # 동시에 진행할 임베딩 배치 수
+WRITE_BATCH_SIZE = int(os.getenv("WRITE_BATCH_SIZE", "1000"))    # Chroma에 한 번에 쓸 청크 수
+EMBED_MAX_RETRIES = int(os.getenv("EMBED_MAX_RETRIES", "6"))
+
+# Chroma 쓰기는 한 스레드에서 순서대로 (이벤트 루프는 막지 않음)
+_write_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="chroma-write")
+
+
+def _retry_delay(error: Exception, attempt: int) -> Optional[float]:
+    """
+    재시도 대기 시간(초), 재시도하지 않을 오류면 None
+
+    - 429(Rate limit): retry-after 헤더가 있으면 그 값, 없으면 지수 백오프
+    - 타임아웃/연결 오류/5xx: 지수 백오프
+    """
+    retryable = (openai.RateLimitError, openai.APITimeoutError, openai.APIConnectionError, openai.InternalServerError)
+    if not isinstance(error, retryable):
+        return None
+
+    response = getattr(error, "response", None)
+    retry_after = response.headers.get("retry-after") if response is not None else None
+    if retry_after:
+        try:
+            return float(retry_after)
+        except ValueError:
+            pass
+    return min(60.0, 2 ** attempt) * (0.5 + random.random() / 2)  # 지터 포함
+
+
+async def _embed_with_backoff(texts: List[str]) -> List[List[float]]:
+    for attempt in range(EMBED_MAX_RETRIES + 1):
+        try:
+            return await vector_store.get_embedding().aembed_documents(texts)
+        except Exception as e:
+            delay = _retry_delay(e, attempt)
+            if delay is None or attempt == EMBED_MAX_RETRIES:
+                raise
+            print(f"⏳ 임베딩 재시도 {attempt + 1}/{EMBED_MAX_RETRIES} ({type(e).__name__}, {delay:.1f}초 대기)")
+            await asyncio.sleep(delay)
+
+
+class _ChromaWriter:
+    """임베딩된 청크를 모았다가 WRITE_BATCH_SIZE 단위로 Chroma에 upsert"""
+
+    def __init__(self, write_batch_size: int, tenant: Optional[str] = None):
+        self.write_batch_size = write_batch_size
+        self.tenant = tenant
+        self._ids: List[str] = []
+        self._embeddings: List[List[float]] = []
+        self._metadatas: List[dict] = []
+        self._documents: List[str] = []
+        self._lock = asyncio.Lock()
+        self.written = 0
+        self.dirty = False  # 컬렉션에 쓰기 시작한 배치가 있음 (취소돼도 쓰기 스레드에서 끝까지 저장됨)
+
+    async def add(self, ids, embeddings, chunks: List[Document]):
+        async with self._lock:
+            self._ids.extend(ids)
+            self._embeddings.extend(embeddings)
+            self._metadatas.extend(chunk.metadata for chunk in chunks)
+            self._documents.extend(chunk.page_content for chunk in chunks)
+            if len(self._ids) >= self.write_batch_size:
+                await self._flush()
+
+    async def close(self):
+        async with self._lock:
+            await self._flush()
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(_write_executor, vector_store._persist, self.tenant)
+
+    async def _flush(self):
+        if not self._ids:
+            return
+        batch = dict(
+            ids=self._ids,
+            embeddings=self._embeddings,
+            metadatas=self._metadatas,
+            documents=self._documents,
+        )
+        self._ids, self._embeddings, self._metadatas, self._documents = [], [], [], []
+
+        self.dirty = True
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(
+            _write_executor,
+            lambda: vector_store.upsert_vectors(**batch, tenant=self.tenant),
+        )
+        self.written += len(batch["ids"])
+
+
+async def bulk_ingest(
+    chunks: Iterable[Document],
+    batch_size: int = EMBED_BATCH_SIZE,
+    concurrency: int = EMBED_CONCURRENCY,
+    write_batch_size: int = WRITE_BATCH_SIZE,
+    skip_existing: bool = True,
+    tenant: Optional[str] = None,
+    chunk_ids: Optional[Set[str]] = None,
+) -> dict:
+    """
+    대량 색인 엔진
+
+    - chunks를 끝까지 읽어 두지 않고 batch_size 단위로 흘려보냄 (제너레이터 권장)
+    - 동시에 진행하는 임베딩 배치는 concurrency개로 제한 → 메모리 사용량이 코퍼스 크기와 무관
+    - Rate limit(429)은 retry-after / 지수 백오프로 재시도
+    - 이미 저장된 청크(같은 chunk_id)는 임베딩하지 않음 (skip_existing)
+    - persist()는 마지막에 한 번만 호출
+    - tenant를 주면 그 테넌트의 컬렉션에 색인 (None이면 기본 테넌트)
+    - chunk_ids를 주면 입력 청크의 ID를 모두 모음 (색인 후 prune_document로 예전 청크 정리용)
+    - 실패/취소되면 진행 중인 배치를 모두 취소하고 끝난 뒤에 예외를 전파,
+      그때까지 저장된 청크는 persist()하고 변경 알림 (캐시된 답변이 남지 않도록)
+
+    Returns:
+        {"chunks", "embedded", "skipped", "seconds", "chunks_per_sec"}
+    """
+    start = time.perf_counter()
+    writer = _ChromaWriter(write_batch_size, tenant)
+    semaphore = asyncio.Semaphore(concurrency)
+    tasks = set()
+    errors: List[Exception] = []
+    stats = {"chunks": 0, "embedded": 0, "skipped": 0}
+    doc_ids = set()
+    loop = asyncio.get_running_loop()
+
+    async def process(batch: List[Document]):
+        try:
+            unique: Dict[str, Document] = vector_store._unique_chunks(batch)
+            ids = list(unique.keys())
+            if chunk_ids is not None:
+                chunk_ids.update(ids)
+            if skip_existing:
+                existing = await loop.run_in_executor(
+                    _write_executor,
+                    lambda: vector_store._existing_ids(tenant=tenant, ids=ids),
+                )
+                ids = [cid for cid in ids if cid not in existing]
+            stats["skipped"] += len(batch) - len(ids)
+
+            if ids:
+                new_chunks = [unique[cid] for cid in ids]
+                vectors = await _embed_with_backoff([chunk.page_content for chunk in new_chunks])
+                await writer.add(ids, vectors, new_chunks)
+                stats["embedded"] += len(ids)
+        except Exception as e:  # 취소(CancelledError)는 그대로 전파
+            errors.append(e)
+        finally:
+            semaphore.release()
+
+    async def submit(batch: List[Document]):
+        await semaphore.acquire()  # 진행 중인 배치가 concurrency개면 여기서 대기 (backpressure)
+        if errors:
+            semaphore.release()
+            raise errors[0]
+        task = asyncio.ensure_future(process(batch))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+
+    batch: List[Document] = []
+    try:
+        for chunk in chunks:
+            batch.append(chunk)
+            doc_ids.add(chunk.metadata.get("doc_id"))
+            stats["chunks"] += 1
+            if len(batch) >= batch_size:
+                await submit(batch)
+                batch = []
+                if stats["chunks"] % (batch_size * 20) == 0:
+                    elapsed = time.perf_counter() - start
+                    print(f"   ... {stats['chunks']}개 청크 처리 중 ({stats['chunks'] / elapsed:.1f} chunks/s)")
+        if batch:
+            await submit(batch)
+
+        if tasks:
+            await asyncio.gather(*tasks)
+        if errors:
+            raise errors[0]
+        await writer.close()
+    except BaseException:
+        # 실패/취소: 진행 중인 배치를 취소하고 끝날 때까지 기다림
+        # (실패를 알린 뒤에 임베딩/저장이 이어지지 않도록)
+        in_flight = list(tasks)
+        for task in in_flight:
+            task.cancel()
+        await asyncio.gather(*in_flight, return_exceptions=True)
+        if writer.dirty:
+            # 이미 저장된 청크는 그대로 두고 디스크 반영 + 변경 알림 (쓰기 스레드가 하나라서 진행 중인 저장 뒤에 실행)
+            try:
+                await loop.run_in_executor(_write_executor, vector_store._persist, tenant)
+            except Exception as e:  # 원래 오류를 가리지 않도록
+                print(f"⚠️ 실패한 색인의 저장분 반영 실패: {e}")
+            vector_store._notify_change(doc_ids, tenant)
+        raise
+
+    elapsed = time.perf_counter() - start
+    stats["seconds"] = round(elapsed, 2)
+    stats["chunks_per_sec"] = round(stats["chunks"] / elapsed, 1) if elapsed > 0 else 0.0
+    print(
+        f"✅ 대량 색인 완료: {stats['chunks']}개 청크 "
+        f"(신규 임베딩 {stats['embedded']} / 건너뜀 {stats['skipped']}) "
+        f"{stats['seconds']}초, {stats['chunks_per_sec']} chunks/s"
+    )
+
+    if stats["embedded"]:
+        vector_store._notify_change(doc_ids, tenant)
+    return stats
+
+
+def ingest_chunks(chunks: Iterable[Document], **kwargs) -> dict:
+    """bulk_ingest()의 동기 버전 (스크립트/CLI용)"""
+    return asyncio.run(bulk_ingest(chunks, **kwargs))
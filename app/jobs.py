@@ -0,0 +1,355 @@
+"""
+문서 업로드 색인 작업 (/documents API)
+
+- 업로드는 디스크에 저장하고 작업 ID를 바로 반환 → 색인은 백그라운드 작업자가 처리
+- 작업자는 서버 이벤트 루프 밖의 전용 스레드에서 실행하고, 파싱은 별도 프로세스에서 실행
+  (GIL을 오래 잡는 PDF 텍스트 추출이 질문 응답 지연에 영향을 주지 않음)
+- 작업 상태/단계별 소요 시간/오류는 SQLite(JobStore)에 저장
+  → 서버가 재시작돼도 조회 가능, 끝나지 않은 작업은 시작할 때 resume()으로 다시 실행
+"""
+import json
+import multiprocessing
+import os
+import shutil
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+from typing import BinaryIO, List, Optional
+
+from app import ingestion, metrics, vector_store
+from app.ingest import STREAMED_EXTENSIONS, SUPPORTED_EXTENSIONS, _load_sections
+from app.parsers import iter_document
+from app.pipelines import iter_split_text
+
+JOBS_DIR = os.getenv("INGEST_JOBS_DIR", "./ingest_jobs")             # 업로드 임시 파일 + 작업 DB
+JOB_WORKERS = int(os.getenv("INGEST_JOB_WORKERS", "1"))              # 동시에 색인하는 작업 수
+JOB_PARSE_PROCESSES = int(os.getenv("INGEST_PARSE_PROCESSES", "1"))  # 파싱 프로세스 수
+JOB_MAX_PENDING = int(os.getenv("INGEST_MAX_PENDING", "20"))         # 대기+실행 중 작업이 이보다 많으면 업로드 거절
+UPLOAD_MAX_BYTES = int(os.getenv("UPLOAD_MAX_MB", "100")) * 1024 * 1024
+STREAM_BATCH_SIZE = 500  # 스트리밍 파일(CSV) 진행 상황(chunks)을 기록하는 청크 단위
+
+JOBS_TOTAL = metrics.register(metrics.Counter(
+    "rag_ingest_jobs_total", "Finished document ingestion jobs", ("result",),
+))
+JOBS_PENDING = metrics.register(metrics.Gauge(
+    "rag_ingest_jobs_pending", "Ingestion jobs queued or running",
+))
+JOB_STAGE_SECONDS = metrics.register(metrics.Histogram(
+    "rag_ingest_job_stage_seconds", "Time spent in each ingestion job stage", ("stage",),
+    buckets=(0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0, 1800.0),
+))
+
+
+class UploadTooLarge(ValueError):
+    """업로드 파일이 UPLOAD_MAX_BYTES보다 큼"""
+
+
+class JobStore:
+    """
+    작업 상태 저장소 (SQLite)
+
+    {"id", "filename", "tenant", "status": queued | running | done | failed,
+     "stage": wait | parse | split | index, "chunks", "result", "timings": {단계: 초}, "error", "created_at", "updated_at"}
+    """
+
+    FIELDS = ("id", "filename", "tenant", "status", "stage", "chunks", "result", "timings", "error",
+              "upload_path", "created_at", "updated_at")
+    JSON_FIELDS = ("result", "timings")
+
+    def __init__(self, path: str):
+        self.path = path
+        # 작업자 스레드와 이벤트 루프(조회)가 공유하므로 Lock으로 보호
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            " id TEXT PRIMARY KEY,"
+            " filename TEXT NOT NULL,"
+            " tenant TEXT,"
+            " status TEXT NOT NULL,"
+            " stage TEXT,"
+            " chunks INTEGER NOT NULL DEFAULT 0,"
+            " result TEXT,"
+            " timings TEXT,"
+            " error TEXT,"
+            " upload_path TEXT,"
+            " created_at REAL NOT NULL,"
+            " updated_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_created_at ON jobs(created_at)")
+        self._conn.commit()
+
+    def _row(self, row) -> dict:
+        job = dict(zip(self.FIELDS, row))
+        for name in self.JSON_FIELDS:
+            job[name] = json.loads(job[name]) if job[name] else None
+        return job
+
+    def create(self, job_id: str, filename: str, tenant: Optional[str], upload_path: str) -> dict:
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (id, filename, tenant, status, upload_path, created_at, updated_at)"
+                " VALUES (?, ?, ?, 'queued', ?, ?, ?)",
+                (job_id, filename, tenant, upload_path, now, now),
+            )
+            self._conn.commit()
+        return self.get(job_id)
+
+    def update(self, job_id: str, **fields):
+        for name in self.JSON_FIELDS:
+            if name in fields:
+                fields[name] = json.dumps(fields[name], ensure_ascii=False)
+        fields["updated_at"] = time.time()
+        assignments = ", ".join(f"{name} = ?" for name in fields)  # 이름은 코드에서만 지정
+        with self._lock:
+            self._conn.execute(f"UPDATE jobs SET {assignments} WHERE id = ?", (*fields.values(), job_id))
+            self._conn.commit()
+
+    def get(self, job_id: str) -> Optional[dict]:
+        with self._lock:
+            row = self._conn.execute(f"SELECT {', '.join(self.FIELDS)} FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._row(row) if row else None
+
+    def recent(self, limit: int = 50) -> List[dict]:
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {', '.join(self.FIELDS)} FROM jobs ORDER BY created_at DESC LIMIT ?", (limit,),
+            ).fetchall()
+        return [self._row(row) for row in rows]
+
+    def unfinished(self) -> List[dict]:
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {', '.join(self.FIELDS)} FROM jobs WHERE status IN ('queued', 'running') ORDER BY created_at",
+            ).fetchall()
+        return [self._row(row) for row in rows]
+
+
+# 처음 쓸 때 생성 (업로드를 안 쓰는 서버/테스트는 디렉터리/DB를 만들지 않음)
+_store: Optional[JobStore] = None
+_executor: Optional[ThreadPoolExecutor] = None
+_parse_pool: Optional[ProcessPoolExecutor] = None
+_init_lock = threading.Lock()
+_pending = 0
+_pending_lock = threading.Lock()
+_stopping = False  # shutdown() 이후: 실행 중인 작업이 실패해도 업로드를 남겨 다음 시작 때 다시 실행
+
+def get_store() -> JobStore:
+    global _store
+    with _init_lock:
+        if _store is None:
+            os.makedirs(JOBS_DIR, exist_ok=True)
+            _store = JobStore(os.path.join(JOBS_DIR, "jobs.sqlite3"))
+    return _store
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor, _stopping
+    with _init_lock:
+        if _executor is None:
+            _stopping = False
+            _executor = ThreadPoolExecutor(max_workers=JOB_WORKERS, thread_name_prefix="ingest-job")
+    return _executor
+
+def _get_parse_pool() -> ProcessPoolExecutor:
+    global _parse_pool
+    with _init_lock:
+        if _stopping:
+            raise RuntimeError("서버 종료 중")  # 종료 중에 파싱 프로세스를 새로 띄우지 않음
+        if _parse_pool is None:
+            # spawn: 서버 프로세스의 스레드/연결 상태를 복제하지 않음
+            _parse_pool = ProcessPoolExecutor(max_workers=JOB_PARSE_PROCESSES, mp_context=multiprocessing.get_context("spawn"))
+    return _parse_pool
+
+def pending() -> int:
+    """대기 중이거나 실행 중인 작업 수"""
+    return _pending
+
+def describe(job: dict) -> dict:
+    """API 응답용 작업 정보 (서버 내부 경로 제외)"""
+    return {name: value for name, value in job.items() if name != "upload_path"}
+
+def is_supported(filename: str) -> bool:
+    return Path(filename).suffix.lower() in SUPPORTED_EXTENSIONS
+
+def save_upload(source: BinaryIO, filename: str, tenant: Optional[str] = None) -> dict:
+    """
+    업로드 파일을 작업 디렉터리에 저장하고 작업 생성 (블로킹, 이벤트 루프 밖에서 호출)
+
+    파일명은 그대로 doc_id가 되므로 작업마다 디렉터리를 따로 만들어 저장
+
+    Raises:
+        UploadTooLarge: UPLOAD_MAX_BYTES 초과
+    """
+    job_id = uuid.uuid4().hex
+    name = Path(filename).name  # 경로 구성 요소 제거
+    directory = os.path.join(JOBS_DIR, "uploads", job_id)
+    os.makedirs(directory)
+    path = os.path.join(directory, name)
+    size = 0
+    with open(path, "wb") as target:
+        while True:
+            block = source.read(1024 * 1024)
+            if not block:
+                break
+            size += len(block)
+            if size > UPLOAD_MAX_BYTES:
+                target.close()
+                shutil.rmtree(directory, ignore_errors=True)
+                raise UploadTooLarge(f"{name}: {UPLOAD_MAX_BYTES // (1024 * 1024)}MB 초과")
+            target.write(block)
+    return get_store().create(job_id, name, tenant, path)
+
+def submit(job_id: str):
+    """작업을 작업자 큐에 추가"""
+    global _pending
+    with _pending_lock:
+        _pending += 1
+        JOBS_PENDING.set(_pending)
+    _get_executor().submit(_run_job, job_id)
+
+def resume() -> int:
+    """
+    서버가 멈춘 사이 끝나지 않은 작업 다시 실행 (서버 시작 시)
+
+    Returns:
+        다시 실행한 작업 수 (업로드 파일이 없어진 작업은 실패 처리)
+    """
+    if not os.path.exists(os.path.join(JOBS_DIR, "jobs.sqlite3")):
+        return 0
+    store = get_store()
+    resumed = 0
+    for job in store.unfinished():
+        if job["upload_path"] and os.path.exists(job["upload_path"]):
+            store.update(job["id"], status="queued", stage=None)
+            submit(job["id"])
+            resumed += 1
+        else:
+            store.update(job["id"], status="failed", error="서버 재시작 중 업로드 파일이 없어짐")
+    if resumed:
+        print(f"🔁 끝나지 않은 색인 작업 {resumed}개 다시 실행")
+    return resumed
+
+def shutdown():
+    """
+    서버 종료 시: 대기 중인 작업은 취소 (다음 시작 때 resume()으로 다시 실행)
+
+    실행 중인 작업은 파싱 프로세스가 멈추면서 중단될 수 있는데,
+    그 경우에도 업로드 파일을 남기고 queued로 돌려 두므로 다음 시작 때 다시 실행
+    """
+    global _executor, _parse_pool, _stopping
+    _stopping = True
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+    if _parse_pool is not None:
+        _parse_pool.shutdown(wait=False, cancel_futures=True)
+        _parse_pool = None
+
+def _run_job(job_id: str):
+    """작업 하나 실행 (작업자 스레드): 파싱 → 분할 → 색인"""
+    global _pending
+    store = get_store()
+    job = store.get(job_id)
+    path, tenant = job["upload_path"], job["tenant"]
+    timings = {}
+    start = time.perf_counter()
+    keep_upload = False
+    lock = vector_store.write_lock()
+    locked = False
+
+    def finish_stage(name: str, started: float, **fields):
+        """단계 소요 시간 기록 (fields: 다음 단계 등 함께 갱신할 값)"""
+        seconds = time.perf_counter() - started
+        JOB_STAGE_SECONDS.observe(seconds, name)
+        timings[name] = round(seconds, 3)
+        store.update(job_id, timings=timings, **fields)
+
+    try:
+        # CLI(python -m app.ingest) 등 다른 프로세스가 색인 중이면 끝날 때까지 대기
+        if not lock.acquire(blocking=False):
+            store.update(job_id, stage="wait")
+            while not lock.acquire(blocking=False):
+                if _stopping:
+                    keep_upload = True
+                    store.update(job_id, status="queued", stage=None)
+                    return
+                time.sleep(1.0)
+        locked = True
+
+        store.update(job_id, status="running", stage="parse")
+        if Path(path).suffix.lower() in STREAMED_EXTENSIONS:
+            result = _index_streamed(job_id, path, tenant, finish_stage)
+        else:
+            step = time.perf_counter()
+            sections = _get_parse_pool().submit(_load_sections, path).result()
+            if not sections:
+                raise ValueError("추출된 텍스트가 없습니다")
+            finish_stage("parse", step, stage="split")
+
+            step = time.perf_counter()
+            chunks = list(iter_split_text(sections))
+            del sections
+            finish_stage("split", step, stage="index", chunks=len(chunks))
+
+            step = time.perf_counter()
+            # 같은 파일명(doc_id)을 다시 올리면 바뀐 청크만 임베딩하고 사라진 청크는 삭제
+            result = vector_store.upsert_document(job["filename"], chunks, tenant=tenant)
+            finish_stage("index", step)
+
+        timings["total"] = round(time.perf_counter() - start, 3)
+        store.update(job_id, status="done", stage=None, result=result, timings=timings)
+        JOBS_TOTAL.inc(1, "done")
+        print(f"✅ 색인 작업 {job_id} ({job['filename']}) 완료: {timings['total']}초")
+    except Exception as e:
+        if _stopping:
+            # 서버 종료로 중단됨 (파싱 프로세스 종료 등) → 다음 시작 때 resume()으로 다시 실행
+            keep_upload = True
+            store.update(job_id, status="queued", stage=None)
+            print(f"⏸️  색인 작업 {job_id} ({job['filename']}) 서버 종료로 중단 (다음 시작 때 다시 실행)")
+        else:
+            timings["total"] = round(time.perf_counter() - start, 3)
+            store.update(job_id, status="failed", error=f"{type(e).__name__}: {e}", timings=timings)
+            JOBS_TOTAL.inc(1, "failed")
+            print(f"❌ 색인 작업 {job_id} ({job['filename']}) 실패: {e}")
+    finally:
+        if locked:
+            lock.release()
+        if not keep_upload:
+            shutil.rmtree(os.path.dirname(path), ignore_errors=True)
+        with _pending_lock:
+            _pending -= 1
+            JOBS_PENDING.set(_pending)
+
+def _index_streamed(job_id: str, path: str, tenant: Optional[str], finish_stage) -> dict:
+    """
+    CSV처럼 큰 표는 섹션 목록을 만들지 않고 청크를 바로 대량 색인 엔진(bulk_ingest)으로 흘려보냄
+
+    - 배치마다 persist/변경 알림을 하지 않고 끝에서 한 번만 (답변 캐시를 배치마다 비우지 않음)
+    - 새 청크를 모두 저장한 뒤에 예전 버전에만 있던 청크를 삭제 (upsert_document와 같은 순서)
+      → 중간에 실패해도 예전 버전은 그대로 검색됨
+    (바뀌지 않은 청크는 임베딩하지 않고 건너뜀, 모아 두는 것은 청크 ID뿐)
+    """
+    store = get_store()
+    doc_id = Path(path).name
+    step = time.perf_counter()
+    store.update(job_id, stage="index")
+
+    def reported(chunks):
+        for count, chunk in enumerate(chunks, 1):
+            if count % STREAM_BATCH_SIZE == 0:
+                store.update(job_id, chunks=count)
+            yield chunk
+
+    keep_ids = set()
+    stats = ingestion.ingest_chunks(reported(iter_split_text(iter_document(path))), tenant=tenant, chunk_ids=keep_ids)
+    added = stats["chunks"]
+    if not added:
+        raise ValueError("추출된 텍스트가 없습니다")
+    deleted = vector_store.prune_document(doc_id, keep_ids, tenant=tenant)
+    finish_stage("index", step, chunks=added)
+    return {"added": added, "deleted": deleted}
@@ -0,0 +1,483 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import unicodedata
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+# 한글은 글자 2-gram, 영문/숫자는 단어 단위 (제품 코드 "AB-1234"는 통째로 + 부분으로)
+_TOKEN = re.compile(r"[0-9a-z]+(?:[-_./][0-9a-z]+)*|[가-힣]+|[^\W\d_a-z가-힣]+")
+_HANGUL = re.compile(r"[가-힣]+")
+_CODE_PARTS = re.compile(r"[-_./]")
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    BM25용 색인어 추출
+
+    - 한글: 글자 2-gram ("연차휴가" → 연차, 차휴, 휴가) → 조사/띄어쓰기가 달라도 매칭
+    - 영문/숫자: 소문자 단어 그대로, 제품 코드처럼 -_./로 이어진 경우 전체 + 부분
+    """
+    text = unicodedata.normalize("NFKC", text).lower()
+    terms = []
+    for word in _TOKEN.findall(text):
+        if _HANGUL.fullmatch(word):
+            if len(word) == 1:
+                terms.append(word)
+            else:
+                terms.extend(word[i:i + 2] for i in range(len(word) - 1))
+        else:
+            terms.append(word)
+            parts = _CODE_PARTS.split(word)
+            if len(parts) > 1:
+                terms.extend(part for part in parts if part)
+    return terms
+
+
+def _term_hash(term: str) -> int:
+    return int.from_bytes(hashlib.blake2b(term.encode("utf-8"), digest_size=8).digest(), "little") >> 1
+
+
+_FIELDS = ("hashes", "offsets", "docs", "weights")
+
+
+class _Segment:
+    """
+    변경되지 않는 역색인 조각 (CSR 형태 배열)
+
+    hashes[i]의 게시 목록 = docs[offsets[i]:offsets[i+1]], weights[...]
+    - weights: BM25의 tf 부분 tf·(k1+1) / (tf + k1·(1-b+b·len/avg_len)) (색인 시 계산)
+    - 게시 목록은 문서 번호 오름차순 → 후보 문서의 가중치를 searchsorted로 바로 찾음
+    """
+
+    __slots__ = ("name", "hashes", "offsets", "docs", "weights", "saved")
+
+    def __init__(self, name, hashes, offsets, docs, weights, saved=False):
+        self.name = name
+        self.hashes = hashes
+        self.offsets = offsets
+        self.docs = docs
+        self.weights = weights
+        self.saved = saved
+
+    @classmethod
+    def from_postings(cls, name, hashes, docs, weights) -> "_Segment":
+        order = np.lexsort((docs, hashes))
+        hashes, docs, weights = hashes[order], docs[order], weights[order]
+        unique, starts = np.unique(hashes, return_index=True)
+        offsets = np.append(starts, len(hashes)).astype(np.int64)
+        return cls(name, unique, offsets, docs, weights)
+
+    def lookup(self, term_hash: int) -> Tuple[int, int]:
+        """게시 목록 범위 (start, end), 없으면 (0, 0)"""
+        i = np.searchsorted(self.hashes, term_hash)
+        if i >= len(self.hashes) or self.hashes[i] != term_hash:
+            return 0, 0
+        return int(self.offsets[i]), int(self.offsets[i + 1])
+
+    def save(self, directory: str):
+        for field in _FIELDS:
+            np.save(os.path.join(directory, f"{self.name}.{field}.npy"), getattr(self, field))
+        self.saved = True
+
+    @classmethod
+    def load(cls, directory: str, name: str) -> "_Segment":
+        # np.asarray: memmap 하위 클래스 대신 일반 ndarray 뷰로 (슬라이스할 때마다 붙는 오버헤드 제거)
+        arrays = [np.asarray(np.load(os.path.join(directory, f"{name}.{field}.npy"), mmap_mode="r")) for field in _FIELDS]
+        return cls(name, *arrays, saved=True)
+
+    @staticmethod
+    def remove(directory: str, name: str):
+        for field in _FIELDS:
+            try:
+                os.remove(os.path.join(directory, f"{name}.{field}.npy"))
+            except OSError:
+                pass
+
+
+class LexicalIndex:
+    """
+    한국어 BM25 역색인 (청크 ID 단위, 증분 추가/삭제)
+
+    - 추가할 때마다 정렬된 배열 세그먼트를 하나 만들고, 세그먼트가 MAX_SEGMENTS개를 넘으면 하나로 병합
+    - 삭제는 alive 표시만 하고 병합할 때 게시 목록에서 제거
+    - 디스크에는 .npy 배열로 저장 → 시작 시 np.load(mmap_mode="r")로 바로 열림
+    - 변경 사항은 persist()를 호출해야 디스크/다른 프로세스에 반영
+
+    디렉터리 구성:
+        meta.json          {"docs", "ids_bytes", "segments", "next_segment"}
+        chunk_ids.txt      문서 번호 순서대로 청크 ID (한 줄에 하나, 추가만 함)
+        doc_len.f32        문서별 색인어 수 (추가만 함)
+        alive.u8           1: 사용 중, 0: 삭제됨
+        seg_{n}.*.npy      세그먼트 배열
+    """
+
+    K1 = 1.2
+    B = 0.75
+    MAX_SEGMENTS = 8
+    COMMON_TERM_RATIO = 0.05    # 문서의 5%보다 많이 나오는 색인어는 후보 문서에만 점수 계산
+    MAX_POSTINGS = 1024         # 흔한 색인어만 있는 질의에서 색인어마다 읽을 게시 수 (세그먼트별)
+    RESCORE_CANDIDATES = 100    # 흔한 색인어 점수를 더할 후보 수
+
+    def __init__(self, path: str):
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._stamp = None
+        self._load()
+
+    # ----- 저장/불러오기 -----
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+    def _load(self):
+        meta_path = self._file("meta.json")
+        meta = {"docs": 0, "ids_bytes": 0, "segments": [], "next_segment": 0}
+        self._stamp = None
+        if os.path.exists(meta_path):
+            stat = os.stat(meta_path)
+            self._stamp = (stat.st_ino, stat.st_mtime_ns)
+            with open(meta_path, encoding="utf-8") as f:
+                meta = json.load(f)
+        self._meta = meta
+
+        n = meta["docs"]
+        self._chunk_ids: List[str] = []
+        if n:
+            with open(self._file("chunk_ids.txt"), "rb") as f:
+                self._chunk_ids = f.read(meta["ids_bytes"]).decode("utf-8").split("\n")[:n]
+        self._doc_len = np.zeros(max(1024, n * 2), dtype=np.float32)
+        self._alive = np.zeros(len(self._doc_len), dtype=np.uint8)
+        if n:
+            self._doc_len[:n] = np.fromfile(self._file("doc_len.f32"), dtype=np.float32, count=n)
+            self._alive[:n] = np.fromfile(self._file("alive.u8"), dtype=np.uint8, count=n)
+        self._n = n
+        self._saved_docs = n
+        self._positions: Dict[str, int] = {cid: i for i, cid in enumerate(self._chunk_ids) if self._alive[i]}
+        self._segments = [_Segment.load(self.path, name) for name in meta["segments"]]
+        self._total_len = float(self._doc_len[:n][self._alive[:n] == 1].sum())
+
+    def _refresh(self):
+        """다른 프로세스(색인 작업)가 persist()했으면 다시 불러옴"""
+        try:
+            stat = os.stat(self._file("meta.json"))
+            stamp = (stat.st_ino, stat.st_mtime_ns)
+        except FileNotFoundError:
+            return
+        if stamp != self._stamp:
+            with self._lock:
+                self._load()
+
+    def persist(self):
+        with self._lock:
+            # 1. 새 문서 정보는 파일 끝에 추가 (meta.json에 기록된 길이 이후는 버린 뒤)
+            new_ids = self._chunk_ids[self._saved_docs:self._n]
+            ids_bytes = self._meta["ids_bytes"]
+            if new_ids:
+                data = ("\n".join(new_ids) + "\n").encode("utf-8")
+                mode = "r+b" if os.path.exists(self._file("chunk_ids.txt")) else "wb"
+                with open(self._file("chunk_ids.txt"), mode) as f:
+                    f.seek(ids_bytes)
+                    f.truncate()
+                    f.write(data)
+                ids_bytes += len(data)
+                with open(self._file("doc_len.f32"), "r+b" if os.path.exists(self._file("doc_len.f32")) else "wb") as f:
+                    f.seek(self._saved_docs * 4)
+                    f.truncate()
+                    f.write(self._doc_len[self._saved_docs:self._n].tobytes())
+            tmp = self._file("alive.u8.tmp")
+            self._alive[:self._n].tofile(tmp)
+            os.replace(tmp, self._file("alive.u8"))
+
+            # 2. 새 세그먼트 저장
+            for segment in self._segments:
+                if not segment.saved:
+                    segment.save(self.path)
+
+            # 3. meta.json 교체 → 이 시점부터 새 상태가 유효
+            previous = set(self._meta["segments"])
+            self._meta = {
+                "docs": self._n,
+                "ids_bytes": ids_bytes,
+                "segments": [segment.name for segment in self._segments],
+                "next_segment": self._meta["next_segment"],
+            }
+            tmp = self._file("meta.json.tmp")
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(self._meta, f)
+            os.replace(tmp, self._file("meta.json"))
+            stat = os.stat(self._file("meta.json"))
+            self._stamp = (stat.st_ino, stat.st_mtime_ns)
+            self._saved_docs = self._n
+
+            # 병합으로 사라진 세그먼트 파일 정리
+            for name in previous - set(self._meta["segments"]):
+                _Segment.remove(self.path, name)
+
+    # ----- 추가/삭제 -----
+
+    def add(self, chunk_ids: List[str], texts: List[str]):
+        """청크 색인 (같은 ID가 있으면 교체)"""
+        if not chunk_ids:
+            return
+        # 게시 목록을 Python에서 만들되, 색인어 해시는 색인어마다 한 번만 계산
+        term_hashes: Dict[str, int] = {}
+        hashes, local_docs, tfs, lengths = [], [], [], []
+        for offset, text in enumerate(texts):
+            counts = Counter(tokenize(text))
+            for term, tf in counts.items():
+                term_hash = term_hashes.get(term)
+                if term_hash is None:
+                    term_hash = term_hashes[term] = _term_hash(term)
+                hashes.append(term_hash)
+                local_docs.append(offset)
+                tfs.append(tf)
+            lengths.append(sum(counts.values()))
+        hashes = np.array(hashes, dtype=np.int64)
+        local_docs = np.array(local_docs, dtype=np.int32)
+        tfs = np.array(tfs, dtype=np.float32)
+        lengths = np.array(lengths, dtype=np.float32)
+
+        with self._lock:
+            self._delete_locked(chunk_ids)
+            start = self._n
+            end = start + len(chunk_ids)
+            self._grow(end)
+            self._chunk_ids.extend(chunk_ids)
+            self._doc_len[start:end] = lengths
+            self._alive[start:end] = 1
+            self._positions.update((cid, start + offset) for offset, cid in enumerate(chunk_ids))
+            self._total_len += float(lengths.sum())
+            self._n = end
+
+            # 평균 길이는 색인 시점 값으로 고정 (문서가 계속 추가되면 조금씩 달라지는 근사치)
+            avg_len = max(self._total_len / max(len(self._positions), 1), 1.0)
+            norm = self.K1 * (1 - self.B + self.B * lengths[local_docs] / avg_len)
+            weights = (tfs * (self.K1 + 1) / (tfs + norm)).astype(np.float32)
+
+            name = f"seg_{self._meta['next_segment']}"
+            self._meta["next_segment"] += 1
+            segment = _Segment.from_postings(name, hashes, local_docs + start, weights)
+            self._segments = self._segments + [segment]
+            if len(self._segments) > self.MAX_SEGMENTS:
+                self._merge_locked()
+
+    def delete(self, chunk_ids: List[str]):
+        with self._lock:
+            self._delete_locked(chunk_ids)
+
+    def _delete_locked(self, chunk_ids: List[str]):
+        for cid in chunk_ids:
+            doc = self._positions.pop(cid, None)
+            if doc is not None:
+                self._alive[doc] = 0
+                self._total_len -= float(self._doc_len[doc])
+
+    def _grow(self, size: int):
+        if size <= len(self._doc_len):
+            return
+        capacity = max(size, len(self._doc_len) * 2)
+        self._doc_len = np.concatenate([self._doc_len, np.zeros(capacity - len(self._doc_len), dtype=np.float32)])
+        self._alive = np.concatenate([self._alive, np.zeros(capacity - len(self._alive), dtype=np.uint8)])
+
+    def _postings_locked(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """모든 세그먼트의 게시 (색인어 해시, 문서 번호, 가중치)"""
+        hashes, docs, weights = [], [], []
+        for segment in self._segments:
+            counts = np.diff(segment.offsets)
+            hashes.append(np.repeat(np.asarray(segment.hashes), counts))
+            docs.append(np.asarray(segment.docs))
+            weights.append(np.asarray(segment.weights))
+        if not hashes:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int32), np.empty(0, dtype=np.float32)
+        return np.concatenate(hashes), np.concatenate(docs), np.concatenate(weights)
+
+    def _merge_locked(self):
+        """모든 세그먼트를 하나로 병합 (삭제된 문서의 게시 목록 제거)"""
+        hashes, docs, weights = self._postings_locked()
+        keep = self._alive[docs] == 1
+        name = f"seg_{self._meta['next_segment']}"
+        self._meta["next_segment"] += 1
+        self._segments = [_Segment.from_postings(name, hashes[keep], docs[keep], weights[keep])]
+
+    # ----- 검색 -----
+
+    def __len__(self) -> int:
+        return len(self._positions)
+
+    def search(self, query: str, k: int = 10) -> List[Tuple[str, float]]:
+        """
+        [(청크 ID, BM25 점수), ...] 점수 내림차순
+
+        게시 목록 전체를 더하면 흔한 색인어(한글 2-gram은 대부분 흔함) 때문에 질의 시간이
+        코퍼스 크기에 비례하므로 두 단계로 계산합니다.
+        1. 드문 색인어(문서의 COMMON_TERM_RATIO 이하)의 게시 목록만 모두 더해서 후보 선정
+        2. 부분 점수 상위 RESCORE_CANDIDATES개 후보에만 흔한 색인어 점수를 찾아서 더함
+        흔한 색인어만 있는 질의는 색인어마다 앞 MAX_POSTINGS개 문서만 봅니다.
+        """
+        self._refresh()
+        terms = set(tokenize(query))
+        segments, alive = self._segments, self._alive
+        n_alive = len(self._positions)
+        if not terms or not n_alive or not segments:
+            return []
+
+        common_df = max(self.MAX_POSTINGS, int(n_alive * self.COMMON_TERM_RATIO))
+        rare, common = [], []  # [(idf, [(segment, start, end), ...]), ...]
+        for term in terms:
+            term_hash = _term_hash(term)
+            ranges = [(segment, *segment.lookup(term_hash)) for segment in segments]
+            ranges = [(segment, start, end) for segment, start, end in ranges if end > start]
+            df = sum(end - start for _, start, end in ranges)  # 삭제된 문서도 포함된 근사치 (병합 시 정리됨)
+            if not df:
+                continue
+            idf = np.float32(np.log(1 + (n_alive - df + 0.5) / (df + 0.5)))
+            (common if df > common_df else rare).append((idf, ranges))
+        if not rare and not common:
+            return []
+        if not rare:
+            rare = [(idf, [(segment, start, min(end, start + self.MAX_POSTINGS)) for segment, start, end in ranges]) for idf, ranges in common]
+            common = []
+
+        # 1단계: 드문 색인어 점수 합 (점수 배열 전체를 훑지 않도록 읽은 위치에만 더하고 다시 0으로)
+        # 한 게시 목록 안에서는 문서가 겹치지 않으므로 scores[docs] += w가 정확함
+        scores = self._scratch(len(alive))
+        doc_parts = []
+        for idf, ranges in rare:
+            for segment, start, end in ranges:
+                docs = segment.docs[start:end]
+                scores[docs] += segment.weights[start:end] * idf
+                doc_parts.append(docs)
+        docs = np.concatenate(doc_parts)
+        doc_scores = scores[docs] * alive[docs]
+        scores[docs] = 0
+
+        # 2단계: 상위 후보에 흔한 색인어 점수 추가
+        # docs에는 같은 문서가 최대 len(doc_parts)번 나오므로 그만큼 넉넉히 고른 뒤 중복 제거
+        top = k if not common else max(k, self.RESCORE_CANDIDATES)
+        if len(docs) > top * len(doc_parts):
+            picked = np.argpartition(-doc_scores, top * len(doc_parts))[:top * len(doc_parts)]
+            docs, doc_scores = docs[picked], doc_scores[picked]
+        docs, first = np.unique(docs, return_index=True)
+        doc_scores = doc_scores[first]
+        if len(docs) > top:
+            picked = np.argpartition(-doc_scores, top)[:top]
+            docs, doc_scores = docs[picked], doc_scores[picked]
+        for idf, ranges in common:
+            for segment, start, end in ranges:
+                postings = segment.docs[start:end]
+                positions = np.minimum(np.searchsorted(postings, docs), len(postings) - 1)
+                found = postings[positions] == docs
+                doc_scores = doc_scores + np.where(found, segment.weights[start:end][positions] * idf, 0)
+
+        order = np.argsort(-doc_scores, kind="stable")[:k]
+        chunk_ids = self._chunk_ids
+        return [(chunk_ids[docs[i]], float(doc_scores[i])) for i in order if doc_scores[i] > 0]
+
+    def _scratch(self, size: int) -> np.ndarray:
+        """검색 스레드별 점수 누적 배열 (항상 0으로 되돌려 둠)"""
+        scores = getattr(self._local, "scores", None)
+        if scores is None or len(scores) < size:
+            scores = self._local.scores = np.zeros(size, dtype=np.float32)
+        return scores
+
+    def rebuild(self, chunk_ids: List[str], texts: List[str]):
+        """전체 재구성 (기존 Chroma 컬렉션에서 처음 만들 때)"""
+        with self._lock:
+            for name in self._meta["segments"]:
+                _Segment.remove(self.path, name)
+            for name in ("meta.json", "chunk_ids.txt", "doc_len.f32", "alive.u8"):
+                try:
+                    os.remove(self._file(name))
+                except OSError:
+                    pass
+            self._load()
+        for start in range(0, len(chunk_ids), 10000):
+            self.add(chunk_ids[start:start + 10000], texts[start:start + 10000])
+        self.persist()
+
+
+    # ----- 스냅샷 (app.snapshot) -----
+
+    def export_arrays(self) -> Tuple[List[str], Dict[str, np.ndarray]]:
+        """
+        살아 있는 청크만 남긴 세그먼트 하나 (삭제된 문서를 빼고 문서 번호를 다시 매김)
+
+        Returns:
+            (청크 ID 목록, {"doc_len", "hashes", "offsets", "docs", "weights"})
+        """
+        self._refresh()
+        with self._lock:
+            n = self._n
+            alive = self._alive[:n] == 1
+            renumber = (np.cumsum(alive) - 1).astype(np.int32)
+            hashes, docs, weights = self._postings_locked()
+            keep = alive[docs]
+            segment = _Segment.from_postings("seg_0", hashes[keep], renumber[docs[keep]], weights[keep])
+            chunk_ids = [self._chunk_ids[i] for i in np.flatnonzero(alive)]
+            arrays = {"doc_len": self._doc_len[:n][alive].copy()}
+            arrays.update((field, getattr(segment, field)) for field in _FIELDS)
+        return chunk_ids, arrays
+
+    def restore(self, chunk_ids: List[str], arrays: Dict[str, np.ndarray]):
+        """export_arrays() 결과로 전체 교체 (색인어를 다시 추출하지 않음, BM25 가중치도 그대로)"""
+        with self._lock:
+            for name in self._meta["segments"]:
+                _Segment.remove(self.path, name)
+            data = ("\n".join(chunk_ids) + "\n").encode("utf-8") if chunk_ids else b""
+            with open(self._file("chunk_ids.txt"), "wb") as f:
+                f.write(data)
+            np.asarray(arrays["doc_len"], dtype=np.float32).tofile(self._file("doc_len.f32"))
+            np.ones(len(chunk_ids), dtype=np.uint8).tofile(self._file("alive.u8"))
+            segments = []
+            if len(arrays["hashes"]):
+                _Segment("seg_0", *(np.asarray(arrays[field]) for field in _FIELDS)).save(self.path)
+                segments.append("seg_0")
+            meta = {"docs": len(chunk_ids), "ids_bytes": len(data), "segments": segments, "next_segment": 1}
+            tmp = self._file("meta.json.tmp")
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(meta, f)
+            os.replace(tmp, self._file("meta.json"))
+            self._load()
+
+
+def reciprocal_rank_fusion(*rankings: List[str], k: int = 60) -> List[Tuple[str, float]]:
+    """
+    여러 순위 목록을 RRF로 합침: score = Σ 1 / (k + 순위)
+
+    점수 척도가 다른 검색(코사인 유사도 vs BM25)을 정규화 없이 합칠 수 있습니다.
+    """
+    scores: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, key in enumerate(ranking, 1):
+            scores[key] = scores.get(key, 0.0) + 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+
+def main():
+    """
+    기존 벡터 컬렉션에서 BM25 역색인을 새로 구축
+
+        python -m app.lexical_index
+    """
+    import time
+    from app import vector_store
+
+    if vector_store.get_lexical_index() is None:
+        print("❌ HYBRID_SEARCH가 꺼져 있습니다.")
+        raise SystemExit(1)
+
+    start = time.perf_counter()
+    stored = vector_store.get_vector_client().get(include=["documents"])
+    vector_store.get_lexical_index().rebuild(stored["ids"], stored["documents"])
+    print(f"✅ BM25 역색인 구축: {len(stored['ids'])}개 청크 ({time.perf_counter() - start:.1f}초)")
+
+
+if __name__ == "__main__":
+    main()
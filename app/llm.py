@@ -1,24 +1,37 @@
-from langchain_openai import ChatOpenAI
 from langchain.schema import HumanMessage, SystemMessage
 from typing import List, Tuple, Any
 import os
-from dotenv import load_dotenv
+import time
 
-load_dotenv()
+from app import metrics
+from app.context_packer import count_tokens, count_tokens_uncached, pack_context
 
-llm = ChatOpenAI(
-    model="gpt-4o-mini",
-    temperature=0.2,  # 낮을수록 일관적 (0~1)
-    openai_api_key=os.getenv("OPENAI_API_KEY")
-)
+LLM_MODEL = "gpt-4o-mini"
 
-async def generate_answer(question: str, search_results: List[Tuple[Any, float]]) -> dict:
+# GPT 클라이언트 (처음 쓸 때 생성, 서버는 시작할 때 main.warmup()에서 미리 생성)
+# - langchain_openai import만 1초 가까이 걸려서 import 시점에 만들지 않음
+# - 테스트/벤치마크는 llm을 직접 바꿔서 대역을 넣을 수 있음
+llm = None
+
+def get_llm():
+    global llm
+    if llm is None:
+        from langchain_openai import ChatOpenAI
+        llm = ChatOpenAI(
+            model=LLM_MODEL,
+            temperature=0.2,  # 낮을수록 일관적 (0~1)
+            openai_api_key=os.getenv("OPENAI_API_KEY")
+        )
+    return llm
+
+async def generate_answer(question: str, search_results: List[Tuple[Any, float]], max_tokens: int = None) -> dict:
     """
     검색 결과를 바탕으로 GPT 답변 생성
     
     Args:
         question: 사용자 질문
         search_results: [(Document, score), ...]
+        max_tokens: 답변 최대 토큰 수 (None이면 모델 기본값)
         
     Returns:
         {"answer": "...", "sources": [...]}
@@ -29,11 +42,11 @@ async def generate_answer(question: str, search_results: List[Tuple[Any, float]]
             "sources": []
         }
     
-    # 컨텍스트 구성
-    context = "\n\n".join([
-        f"[문서 {i+1}] {doc.page_content}"
-        for i, (doc, score) in enumerate(search_results)
-    ])
+    # 컨텍스트 구성 (CONTEXT_TOKEN_BUDGET 토큰 안에서 중요한 청크부터)
+    # 문서명/페이지를 함께 넣어서 GPT가 출처를 정확한 페이지로 인용하도록 함
+    with metrics.stage("pack_context"):
+        packed = pack_context(search_results)
+    context = packed["context"]
     
     # 프롬프트 구성
     system_prompt = """당신은 문서 기반 Q&A 어시스턴트입니다.
@@ -47,7 +60,7 @@ async def generate_answer(question: str, search_results: List[Tuple[Any, float]]
 답변 내용...
 
 **출처:**
-- [문서명] 참고
+- [문서명] p.페이지
 """
     
     messages = [
@@ -55,20 +68,60 @@ async def generate_answer(question: str, search_results: List[Tuple[Any, float]]
         HumanMessage(content=f"질문: {question}\n\n컨텍스트:\n{context}")
     ]
     
-    # GPT 호출
-    response = await llm.apredict_messages(messages)
+    # 청크별/고정 문구 토큰 수는 캐시되어 있으므로 프롬프트 전체를 다시 세지 않음
+    # (질문은 매번 달라서 캐시하면 유용한 항목만 밀어냄 → 캐시 없이 셈)
+    prompt_tokens = (
+        count_tokens(system_prompt) + count_tokens("질문: ") + count_tokens_uncached(question)
+        + count_tokens("\n\n컨텍스트:\n") + packed["tokens"]
+    )
+    print(
+        f"🧮 프롬프트 {prompt_tokens} 토큰 (컨텍스트 {packed['tokens']} 토큰, "
+        f"청크 {len(packed['results'])}/{len(search_results)}, "
+        f"중복 제외 {packed['dropped_duplicates']}, 예산 초과 {packed['dropped_budget']}, "
+        f"겹침 제거 {packed['trimmed_chars']}자)"
+    )
+    metrics.count_tokens("prompt", prompt_tokens)
     
-    # 출처 정리
+    # GPT 호출 (스트리밍으로 받아서 이어 붙임)
+    answer = await _stream_completion(messages, max_tokens)
+    
+    # 출처 정리 (실제로 컨텍스트에 들어간 청크만)
     sources = [
         {
             "title": doc.metadata.get("title", "문서"),
-            "page": doc.metadata.get("page_count", "?"),
+            "page": doc.metadata.get("page", "?"),  # 청크가 나온 실제 페이지
             "score": round(score, 2)
         }
-        for doc, score in search_results
+        for doc, score in packed["results"]
     ]
     
     return {
-        "answer": response.content,
+        "answer": answer,
         "sources": sources
     }
+
+async def _stream_completion(messages, max_tokens: int = None) -> str:
+    """
+    GPT 응답을 토큰 스트림으로 받아 전체 텍스트로 합침
+    
+    첫 토큰까지 걸린 시간과 전체 시간을 로그로 남깁니다.
+    호출한 쪽이 타임아웃으로 취소하면 스트림도 바로 닫혀서 남은 토큰 생성이 중단됩니다.
+    """
+    start = time.perf_counter()
+    first_token_at = None
+    parts = []
+    options = {"max_tokens": max_tokens} if max_tokens else {}
+    async for chunk in get_llm().astream(messages, **options):
+        if first_token_at is None:
+            first_token_at = time.perf_counter() - start
+        parts.append(chunk.content)
+    
+    answer = "".join(parts)
+    if first_token_at is not None:
+        elapsed = time.perf_counter() - start
+        print(f"💬 GPT 응답: 첫 토큰 {first_token_at:.2f}초, 전체 {elapsed:.2f}초")
+        metrics.record("llm_first_token", first_token_at)
+        metrics.record("llm", elapsed)
+        if metrics.METRICS_ENABLED:
+            metrics.count_tokens("completion", count_tokens_uncached(answer))
+    return answer
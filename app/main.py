@@ -4,11 +4,26 @@ import sys
 import os
 import asyncio
 import json
-from fastapi import FastAPI, Request
+import time
+from contextlib import asynccontextmanager
+from functools import partial
+from typing import Optional
+from fastapi import FastAPI, File, Form, Request, UploadFile
+from fastapi.responses import JSONResponse, PlainTextResponse
+from app import faq, jobs, metrics, snapshot
+from app.security.admin import verify_api_key
 from app.security.kakao import verify_signature
-from app.formatters.kakao import format_skill_response, format_error_response
-from app.vector_store import search_documents
-from app.llm import generate_answer
+from app.security.telegram import verify_secret_token
+from app.formatters.kakao import format_skill_response, format_error_response, format_callback_response
+from app.formatters.telegram import format_answer
+from app.clients.kakao import send_callback, close_client, get_client
+from app.clients import telegram as telegram_client
+from app.context_packer import count_tokens
+from app.llm import get_llm
+from app.retriever import cached_answer, retrieve_answer
+from app.admission import AdmissionController, Deadline
+from app.update_queue import UpdateQueue
+from app import vector_store
 
 # ChromaDB 텔레메트리 경고 무시 (import 전에 설정)
 warnings.filterwarnings("ignore", category=UserWarning, module="chromadb")
@@ -20,26 +35,225 @@ logging.getLogger("chromadb").setLevel(logging.ERROR)
 # 텔레메트리 비활성화 환경 변수 설정
 os.environ.setdefault("ANONYMIZED_TELEMETRY", "False")
 
+# 콜백 모드: 이 시간(초) 안에 답이 안 나오면 useCallback으로 먼저 응답하고 나중에 전송
+KAKAO_CALLBACK_WAIT = float(os.getenv("KAKAO_CALLBACK_WAIT", "3.0"))
+# 콜백 모드의 답변 타임아웃 (대기 + 검색 + GPT, 콜백 URL은 1분간 유효)
+KAKAO_CALLBACK_LLM_TIMEOUT = float(os.getenv("KAKAO_CALLBACK_LLM_TIMEOUT", "50.0"))
+# 콜백 모드는 마감이 길어서 일반 모드보다 넉넉하게, 하지만 따로 동시 처리 수를 제한
+KAKAO_CALLBACK_MAX_CONCURRENCY = int(os.getenv("KAKAO_CALLBACK_MAX_CONCURRENCY", "64"))
+KAKAO_CALLBACK_MAX_QUEUE = int(os.getenv("KAKAO_CALLBACK_MAX_QUEUE", "128"))
+
+# 카카오는 5초가 넘은 응답을 버리므로, 요청이 도착한 순간부터 KAKAO_DEADLINE초 안에 모든 단계를 끝냄
+KAKAO_DEADLINE = float(os.getenv("KAKAO_DEADLINE", "4.5"))
+KAKAO_MAX_CONCURRENCY = int(os.getenv("KAKAO_MAX_CONCURRENCY", "16"))  # 동시에 검색/GPT를 실행하는 요청 수
+KAKAO_MAX_QUEUE = int(os.getenv("KAKAO_MAX_QUEUE", "32"))              # 자리를 기다리는 요청 수 (넘으면 바로 거절)
+KAKAO_MIN_BUDGET = float(os.getenv("KAKAO_MIN_BUDGET", "1.0"))        # 이보다 시간이 덜 남았으면 시작하지 않음
+KAKAO_EXPECTED_LATENCY = float(os.getenv("KAKAO_EXPECTED_LATENCY", "2.5"))  # 예상 처리 시간 초깃값 (이후 실측 이동 평균)
+# 남은 시간이 예상 처리 시간보다 짧으면 검색 개수와 답변 길이를 줄임
+KAKAO_DEGRADED_K = int(os.getenv("KAKAO_DEGRADED_K", "3"))
+KAKAO_DEGRADED_MAX_TOKENS = int(os.getenv("KAKAO_DEGRADED_MAX_TOKENS", "300"))
+
+# 텔레그램 웹훅: 업데이트는 바로 응답하고 답변은 작업자 TELEGRAM_WORKERS개가 처리 (GPT 동시 호출 수 제한)
+TELEGRAM_WORKERS = int(os.getenv("TELEGRAM_WORKERS", "4"))
+TELEGRAM_QUEUE_SIZE = int(os.getenv("TELEGRAM_QUEUE_SIZE", "100"))  # 가득 차면 503 → 텔레그램이 나중에 재전송
+TELEGRAM_LLM_TIMEOUT = float(os.getenv("TELEGRAM_LLM_TIMEOUT", "30.0"))  # 응답 시간 제한이 없으므로 길게
+TELEGRAM_WELCOME = "안녕하세요! 사내 문서에 대해 궁금한 점을 질문해 주세요."  # /start 등 명령 응답
+
+# 멀티 테넌트: 카카오 봇/텔레그램 봇마다 따로 색인한 문서로 답변 (꺼져 있으면 모두 기본 테넌트)
+# - 카카오: 요청의 bot.id → 테넌트 "kakao:{봇 ID}"
+# - 텔레그램: /telegram/webhook/{봇 ID} → 테넌트 "telegram:{봇 ID}"
+# - 문서 색인: python -m app.ingest <디렉터리> --tenant kakao:{봇 ID}
+MULTI_TENANT = os.getenv("MULTI_TENANT", "false").lower() == "true"
+
+# 워밍업: 요청을 받기 전에 검색 객체/GPT 클라이언트를 만들고 컬렉션과 OpenAI 연결을 미리 열어 둠
+WARMUP_ON_STARTUP = os.getenv("WARMUP_ON_STARTUP", "true").lower() == "true"
+WARMUP_CONNECT_TIMEOUT = float(os.getenv("WARMUP_CONNECT_TIMEOUT", "3.0"))  # OpenAI 연결 워밍업 타임아웃(초), 0이면 생략
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # uvicorn은 lifespan 시작 단계가 끝나야 요청을 받으므로 첫 요청이 초기화 비용을 내지 않음
+    if snapshot.SNAPSHOT_PATH:
+        # 스냅샷으로 인덱스를 채운 뒤 워밍업 (새 레플리카가 임베딩 API 호출 없이 바로 서비스)
+        await asyncio.get_running_loop().run_in_executor(None, snapshot.import_on_startup)
+    if WARMUP_ON_STARTUP:
+        await warmup()
+    jobs.resume()  # 지난번에 끝나지 않은 업로드 색인 작업
+    faq.start()  # 근거 문서가 바뀐 FAQ 답변을 백그라운드에서 다시 생성
+    yield
+    # 종료 시 큐에 남은 텔레그램 업데이트를 처리하고, 콜백/텔레그램 HTTP 연결 풀 정리 (텔레그램은 남은 전송을 잠시 기다림)
+    jobs.shutdown()
+    await faq.stop()
+    await telegram_updates.stop()
+    await close_client()
+    await telegram_client.close_client()
+    vector_store.close_tenants()
+
+async def warmup() -> dict:
+    """
+    무거운 객체를 미리 생성 (서버 시작 시)
+
+    - 임베딩/벡터 인덱스/BM25 역색인/문서 대표 벡터 생성, 컬렉션 열기 (vector_store.warmup)
+    - GPT 클라이언트 생성, tiktoken 인코딩 로드, 카카오 콜백/텔레그램 연결 풀 생성
+    - OpenAI 임베딩/GPT 연결을 미리 맺어 연결 풀에 남김 (첫 요청의 TLS 핸드셰이크 제거)
+
+    Returns:
+        {단계: 소요 시간(초)}
+    """
+    start = time.perf_counter()
+    loop = asyncio.get_running_loop()
+    timings = await loop.run_in_executor(vector_store._search_executor, vector_store.warmup)
+    
+    loaders = [
+        ("llm", get_llm),
+        ("tokenizer", lambda: count_tokens("워밍업")),
+        ("kakao_client", get_client),
+    ]
+    if telegram_client.BOT_TOKEN:
+        loaders.append(("telegram_client", telegram_client.get_client))
+    for name, load in loaders:
+        step = time.perf_counter()
+        load()
+        timings[name] = time.perf_counter() - step
+    
+    if WARMUP_CONNECT_TIMEOUT > 0:
+        step = time.perf_counter()
+        await asyncio.gather(_open_connection(vector_store.get_embedding()), _open_connection(get_llm()))
+        timings["connections"] = time.perf_counter() - step
+    
+    timings["total"] = time.perf_counter() - start
+    details = ", ".join(f"{name} {seconds * 1000:.0f}ms" for name, seconds in timings.items() if name != "total")
+    print(f"🔥 워밍업 완료: {timings['total']:.2f}초 ({details})")
+    return timings
+
+async def _open_connection(client):
+    """
+    OpenAI API 연결을 미리 맺어 둠 (모델 목록 조회, 토큰 비용 없음)
+
+    인증/네트워크 오류여도 시작은 계속 (연결이 맺어졌으면 풀에 남고, 아니면 첫 요청에서 다시 연결)
+    """
+    client = getattr(client, "underlying", client)  # 임베딩 캐시 안의 OpenAIEmbeddings
+    openai_client = getattr(getattr(client, "async_client", None), "_client", None)
+    if openai_client is None:  # 테스트 대역 등
+        return
+    try:
+        await openai_client.with_options(timeout=WARMUP_CONNECT_TIMEOUT, max_retries=0).models.list()
+    except Exception as e:
+        print(f"⚠️ OpenAI 연결 워밍업 실패 ({type(e).__name__}), 첫 요청에서 연결합니다")
+
 # FastAPI 앱 초기화
-app = FastAPI(title="RAG 챗봇 API")
+app = FastAPI(title="RAG 챗봇 API", lifespan=lifespan)
+
+# 응답 후에도 진행 중인 콜백 작업 (가비지 컬렉션 방지용 참조)
+_callback_tasks = set()
 
 @app.get("/")
 def health_check():
     """헬스 체크 엔드포인트"""
     return {"status": "ok", "message": "RAG 챗봇 서버 실행 중"}
 
+@app.get("/metrics")
+def metrics_endpoint():
+    """Prometheus 수집 엔드포인트 (단계별 지연 시간 히스토그램, GPT 토큰 수)"""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+# ----- 문서 관리 API (X-Admin-Key 헤더 필요) -----
+
+def _forbidden(request: Request) -> Optional[JSONResponse]:
+    if not verify_api_key(request.headers.get("X-Admin-Key", "")):
+        return JSONResponse({"error": "Invalid admin key"}, status_code=403)
+    return None
+
+@app.post("/documents")
+async def upload_document(request: Request, file: UploadFile = File(...), tenant: Optional[str] = Form(None)):
+    """
+    문서 업로드 → 색인 작업 ID를 바로 반환 (202)
+
+    파싱/분할/임베딩은 백그라운드 작업자가 처리하고 진행 상황은 GET /documents/jobs/{job_id}로 확인
+    같은 파일명을 다시 올리면 그 문서를 갱신 (바뀐 청크만 임베딩)
+    """
+    denied = _forbidden(request)
+    if denied:
+        return denied
+    if not file.filename or not jobs.is_supported(file.filename):
+        return JSONResponse({"error": "지원하지 않는 파일 형식입니다 (PDF, DOCX, CSV)"}, status_code=400)
+    if jobs.pending() >= jobs.JOB_MAX_PENDING:
+        return JSONResponse({"error": "색인 대기 작업이 너무 많습니다. 잠시 후 다시 시도해 주세요."}, status_code=503)
+    if vector_store.write_lock().held_elsewhere():
+        # python -m app.ingest 등 다른 프로세스가 같은 인덱스에 쓰는 중 (인덱스는 쓰는 프로세스가 하나라고 가정)
+        return JSONResponse({"error": "다른 프로세스가 색인 중입니다. 잠시 후 다시 시도해 주세요."}, status_code=503)
+    
+    # 디스크 저장도 이벤트 루프 밖에서 (큰 파일 복사가 질문 응답을 막지 않도록)
+    loop = asyncio.get_running_loop()
+    try:
+        job = await loop.run_in_executor(None, jobs.save_upload, file.file, file.filename, tenant)
+    except jobs.UploadTooLarge as e:
+        return JSONResponse({"error": f"파일이 너무 큽니다 ({e})"}, status_code=413)
+    finally:
+        await file.close()
+    jobs.submit(job["id"])
+    return JSONResponse(jobs.describe(job), status_code=202)
+
+@app.get("/documents/jobs")
+async def list_jobs(request: Request, limit: int = 50):
+    """최근 색인 작업 목록"""
+    denied = _forbidden(request)
+    if denied:
+        return denied
+    loop = asyncio.get_running_loop()
+    recent = await loop.run_in_executor(None, jobs.get_store().recent, min(max(limit, 1), 500))
+    return {"jobs": [jobs.describe(job) for job in recent], "pending": jobs.pending()}
+
+@app.get("/documents/jobs/{job_id}")
+async def get_job(job_id: str, request: Request):
+    """색인 작업 상태 (status, stage, chunks, timings, error)"""
+    denied = _forbidden(request)
+    if denied:
+        return denied
+    job = jobs.get_store().get(job_id)
+    if job is None:
+        return JSONResponse({"error": "Unknown job"}, status_code=404)
+    return jobs.describe(job)
+
+@app.delete("/documents/{doc_id}")
+async def delete_document(doc_id: str, request: Request, tenant: Optional[str] = None):
+    """문서의 모든 청크 삭제 (doc_id = 업로드한 파일명)"""
+    denied = _forbidden(request)
+    if denied:
+        return denied
+    loop = asyncio.get_running_loop()
+    deleted = await loop.run_in_executor(None, partial(vector_store.delete_document, doc_id, tenant=tenant))
+    if not deleted:
+        return JSONResponse({"doc_id": doc_id, "deleted": 0}, status_code=404)
+    return {"doc_id": doc_id, "deleted": deleted}
+
+def _tenant_for(platform: str, bot_id) -> str:
+    """봇 ID → 테넌트 (MULTI_TENANT가 꺼져 있거나 봇 ID가 없으면 None = 기본 테넌트)"""
+    if not MULTI_TENANT or not bot_id:
+        return None
+    tenant = f"{platform}:{bot_id}"
+    metrics.annotate(tenant=tenant)
+    return tenant
+
 @app.post("/kakao/router")
 async def kakao_router(request: Request):
     """
     카카오 i 오픈빌더 스킬 서버 엔드포인트
     """
+    # 요청별 단계 소요 시간 (끝나면 JSON 한 줄로 로그)
+    timer = metrics.start_request("kakao")
+    # 서명 검증, 대기, 검색, 생성이 함께 쓰는 시간 예산
+    deadline = Deadline(KAKAO_DEADLINE)
+    status = "error"
     try:
         # 요청 본문 읽기 (시그니처 검증용)
         body = await request.body()
         
         # 시그니처 검증
         signature = request.headers.get("X-Kakao-Signature", "")
-        if not verify_signature(body, signature):
+        with metrics.stage("verify_signature"):
+            verified = verify_signature(body, signature)
+        if not verified:
+            status = "forbidden"
             return {"error": "Invalid signature"}, 403
         
         # JSON 파싱 (body를 직접 파싱)
@@ -48,30 +262,259 @@ async def kakao_router(request: Request):
         # 사용자 질문 추출
         user_request = payload.get("userRequest", {})
         question = user_request.get("utterance", "").strip()
+        tenant = _tenant_for("kakao", (payload.get("bot") or {}).get("id"))
         
         if not question:
+            status = "empty"
             return format_error_response("질문을 입력해 주세요.")
+        faq.log_question(question, tenant)  # 자주 묻는 질문 집계 (python -m app.faq build)
         
-        # RAG 파이프라인 실행 (타임아웃 3초)
-        results = search_documents(question, k=5)
-        answer_data = await asyncio.wait_for(
-            generate_answer(question, results),
-            timeout=3.0  # 카카오는 5초 이내 응답 필수
-        )
+        # 콜백이 켜진 블록이면 느린 답변도 버리지 않고 나중에 전송
+        callback_url = user_request.get("callbackUrl")
+        if callback_url:
+            response = await _answer_with_callback(question, callback_url, tenant)
+            status = "callback" if response.get("useCallback") else "ok"
+            return response
+        
+        # 캐시된 답변은 대기/마감 판단 없이 바로 응답
+        answer_data = cached_answer(question, tenant)
+        if answer_data is None:
+            # RAG 파이프라인 실행 (비동기 검색 → GPT, 마감 안에 못 끝낼 요청은 시작하지 않고 거절)
+            answer_data = await _answer_within_deadline(question, deadline, tenant)
+        if answer_data is None:
+            status = "shed"
+            return format_error_response("지금은 문의가 많아 답변이 어렵습니다. 잠시 후 다시 질문해 주세요.")
         
         # 카카오 포맷으로 변환
-        return format_skill_response(
-            answer_data["answer"],
-            answer_data["sources"]
-        )
+        with metrics.stage("format"):
+            response = format_skill_response(
+                answer_data["answer"],
+                answer_data["sources"]
+            )
+        status = "ok"
+        return response
     
     except asyncio.TimeoutError:
+        status = "timeout"
         return format_error_response("응답 시간이 초과되었습니다.")
     except Exception as e:
         print(f"❌ 에러: {e}")
         import traceback
         traceback.print_exc()
         return format_error_response("처리 중 오류가 발생했습니다.")
+    finally:
+        timer.finish(status)
+
+async def _answer_within_deadline(question: str, deadline: Deadline, tenant: str = None):
+    """
+    마감 시간 안에 끝낼 수 있을 때만 답변 생성
+
+    - 동시 처리 자리가 날 때까지 최대 (남은 시간 - KAKAO_MIN_BUDGET)초 대기
+    - 남은 시간이 예상 처리 시간보다 짧으면 검색 개수(k)와 답변 길이(max_tokens)를 줄여서 처리
+    - 임베딩/검색/생성 전체에 남은 시간을 타임아웃으로 적용 (공유 파이프라인도 같은 순간에 끊김
+      → 자리를 반납한 뒤에 검색/GPT가 계속 돌지 않음)
+
+    Returns:
+        {"answer", "sources"}, 거절했으면 None
+    """
+    with metrics.stage("admission_wait"):
+        admitted = await kakao_admission.acquire(deadline.remaining() - KAKAO_MIN_BUDGET)
+    if not admitted:
+        return None
+    
+    start = time.perf_counter()
+    try:
+        remaining = deadline.remaining()
+        decision = kakao_admission.decide(remaining, KAKAO_MIN_BUDGET)
+        if decision == "shed_deadline":
+            return None
+        degraded = decision == "degraded"
+        if degraded:
+            metrics.annotate(degraded=True)
+        
+        answer_data = await asyncio.wait_for(retrieve_answer(
+            question,
+            k=KAKAO_DEGRADED_K if degraded else 5,
+            score_threshold=None,
+            llm_timeout=remaining,
+            max_tokens=KAKAO_DEGRADED_MAX_TOKENS if degraded else None,
+            tenant=tenant,
+        ), timeout=remaining)
+        kakao_admission.observe(time.perf_counter() - start)
+        return answer_data
+    except asyncio.TimeoutError:
+        kakao_admission.observe(time.perf_counter() - start)  # 시간 초과도 예상 처리 시간에 반영
+        raise
+    finally:
+        kakao_admission.release()
+
+# 카카오 일반 모드의 동시 처리 제한
+kakao_admission = AdmissionController(
+    "kakao",
+    max_concurrency=KAKAO_MAX_CONCURRENCY,
+    max_queue=KAKAO_MAX_QUEUE,
+    expected=KAKAO_EXPECTED_LATENCY,
+)
+# 콜백 모드의 동시 처리 제한 (1분 안에만 보내면 되므로 더 크게, 일반 모드와 자리를 나눠 쓰지 않음)
+kakao_callback_admission = AdmissionController(
+    "kakao_callback",
+    max_concurrency=KAKAO_CALLBACK_MAX_CONCURRENCY,
+    max_queue=KAKAO_CALLBACK_MAX_QUEUE,
+    expected=KAKAO_EXPECTED_LATENCY,
+)
+
+async def _answer_with_callback(question: str, callback_url: str, tenant: str = None) -> dict:
+    """
+    콜백 모드 응답
+    
+    - KAKAO_CALLBACK_WAIT초 안에 답이 나오면 (캐시 등) 바로 일반 응답
+    - 아니면 useCallback 응답을 먼저 보내고, 답변이 끝나면 callbackUrl로 POST
+    """
+    task = asyncio.ensure_future(_callback_answer(question, tenant))
+    done, _ = await asyncio.wait({task}, timeout=KAKAO_CALLBACK_WAIT)
+    if done:
+        answer_data = task.result()  # 예외는 kakao_router에서 처리
+        if answer_data is None:
+            return format_error_response("지금은 문의가 많아 답변이 어렵습니다. 잠시 후 다시 질문해 주세요.")
+        with metrics.stage("format"):
+            return format_skill_response(answer_data["answer"], answer_data["sources"])
+    
+    callback_task = asyncio.ensure_future(_deliver_callback(task, callback_url))
+    _callback_tasks.add(callback_task)
+    callback_task.add_done_callback(_callback_tasks.discard)
+    return format_callback_response()
+
+async def _callback_answer(question: str, tenant: str = None):
+    """
+    콜백 모드 답변 (캐시된 답변은 바로, 나머지는 콜백 전용 동시 처리 제한 안에서)
+
+    Returns:
+        {"answer", "sources"}, 거절했으면 None
+    """
+    answer_data = cached_answer(question, tenant)
+    if answer_data is not None:
+        return answer_data
+
+    deadline = Deadline(KAKAO_CALLBACK_LLM_TIMEOUT)
+    with metrics.stage("admission_wait"):
+        admitted = await kakao_callback_admission.acquire(deadline.remaining() - KAKAO_MIN_BUDGET)
+    if not admitted:
+        return None
+    start = time.perf_counter()
+    try:
+        answer_data = await retrieve_answer(
+            question,
+            k=5,
+            score_threshold=None,
+            llm_timeout=deadline.remaining(),
+            tenant=tenant,
+        )
+        kakao_callback_admission.observe(time.perf_counter() - start)
+        return answer_data
+    finally:
+        kakao_callback_admission.release()
+
+async def _deliver_callback(task: asyncio.Future, callback_url: str):
+    """진행 중인 답변을 끝까지 기다렸다가 콜백 URL로 전송"""
+    # 원래 요청의 측정을 이어받음 (단계별 시간이 응답 후에도 같은 기록에 쌓임)
+    timer = metrics.start_request("kakao_callback", inherit=True)
+    status = "ok"
+    try:
+        answer_data = await task
+        if answer_data is None:
+            status = "shed"
+            payload = format_error_response("지금은 문의가 많아 답변이 어렵습니다. 잠시 후 다시 질문해 주세요.")
+        else:
+            with metrics.stage("format"):
+                payload = format_skill_response(answer_data["answer"], answer_data["sources"])
+    except asyncio.TimeoutError:
+        status = "timeout"
+        payload = format_error_response("응답 시간이 초과되었습니다.")
+    except Exception as e:
+        print(f"❌ 콜백 답변 생성 에러: {e}")
+        status = "error"
+        payload = format_error_response("처리 중 오류가 발생했습니다.")
+    
+    with metrics.stage("callback_send"):
+        await send_callback(callback_url, payload)
+    timer.finish(status)
+
+@app.post("/telegram/webhook")
+async def telegram_webhook(request: Request):
+    """
+    텔레그램 봇 웹훅 엔드포인트
+
+    업데이트를 큐에 넣고 바로 응답 → 답변은 백그라운드 작업자가 만들어 sendMessage로 전송
+    (텔레그램은 응답이 늦거나 실패하면 같은 update_id로 다시 보내므로 중복은 무시)
+    """
+    return await _accept_update(request, None)
+
+@app.post("/telegram/webhook/{bot_id}")
+async def telegram_bot_webhook(bot_id: str, request: Request):
+    """봇별 웹훅 (TELEGRAM_BOT_TOKENS에 등록한 봇, 답변도 그 봇으로 전송)"""
+    return await _accept_update(request, bot_id)
+
+async def _accept_update(request: Request, bot_id: str):
+    if not verify_secret_token(request.headers.get("X-Telegram-Bot-Api-Secret-Token", "")):
+        return JSONResponse({"ok": False, "error": "Invalid secret token"}, status_code=403)
+    if bot_id is not None and bot_id not in telegram_client.BOT_TOKENS:
+        return JSONResponse({"ok": False, "error": "Unknown bot"}, status_code=404)
+    
+    update = await request.json()
+    message = update.get("message") or {}
+    question = (message.get("text") or "").strip()
+    chat_id = message.get("chat", {}).get("id")
+    if not question or chat_id is None or "update_id" not in update:
+        return {"ok": True}  # 텍스트 메시지가 아닌 업데이트 (수정, 사진, 멤버 변경 등)는 무시
+    
+    # update_id는 봇마다 따로 증가
+    result = telegram_updates.submit((bot_id, update["update_id"]), (chat_id, question, bot_id))
+    if result == "full":
+        return JSONResponse({"ok": False, "error": "Too many pending updates"}, status_code=503)
+    return {"ok": True, "status": result}
+
+async def _answer_telegram(update: tuple) -> str:
+    """텔레그램 업데이트 처리 (작업자에서 실행): 검색 → GPT 답변 → 포맷 → 전송"""
+    chat_id, question, bot_id = update
+    tenant = _tenant_for("telegram", bot_id)
+    if question.startswith("/"):  # /start, /help 등 명령
+        await telegram_client.send_message(chat_id, TELEGRAM_WELCOME, bot_id)
+        return "command"
+    
+    faq.log_question(question, tenant)
+    await telegram_client.send_typing(chat_id, bot_id)
+    status = "ok"
+    try:
+        answer_data = await retrieve_answer(
+            question,
+            k=5,
+            score_threshold=None,
+            llm_timeout=TELEGRAM_LLM_TIMEOUT,
+            tenant=tenant,
+        )
+        with metrics.stage("format"):
+            text = format_answer(answer_data["answer"], answer_data["sources"])
+    except asyncio.TimeoutError:
+        status = "timeout"
+        text = "응답 시간이 초과되었습니다. 잠시 후 다시 질문해 주세요."
+    except Exception as e:
+        print(f"❌ 텔레그램 답변 생성 에러: {e}")
+        status = "error"
+        text = "처리 중 오류가 발생했습니다."
+    
+    with metrics.stage("telegram_send"):
+        results = await telegram_client.send_message(chat_id, text, bot_id)
+    if not all(result.get("ok") for result in results):
+        status = "send_failed"
+    return status
+
+# 텔레그램 업데이트 큐 (첫 업데이트에서 작업자 시작, 서버 종료 시 정리)
+telegram_updates = UpdateQueue(
+    "telegram",
+    _answer_telegram,
+    workers=TELEGRAM_WORKERS,
+    max_size=TELEGRAM_QUEUE_SIZE,
+)
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,259 @@
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from typing import Dict, Iterator, Optional, Tuple
+
+# 단계별 지연 시간 측정 (꺼 두면 stage()가 아무것도 하지 않는 컨텍스트만 반환)
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+# 요청마다 단계별 소요 시간을 JSON 한 줄로 출력
+TIMING_LOG = os.getenv("TIMING_LOG", "true").lower() == "true"
+# 테넌트별 요청 지표는 처음 본 TENANT_METRICS_MAX개 테넌트만 따로 (나머지는 "other", 시계열 수 제한)
+TENANT_METRICS_MAX = int(os.getenv("TENANT_METRICS_MAX", "100"))
+
+# 초 단위 히스토그램 구간 (서명 검증 같은 ms 이하 단계 ~ GPT 전체 응답까지)
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{value}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class Histogram:
+    """Prometheus 히스토그램 (레이블 값 조합별 구간 카운트/합계/개수)"""
+
+    def __init__(self, name: str, documentation: str, labels: Tuple[str, ...] = (), buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._series: Dict[Tuple[str, ...], list] = {}  # 레이블 값 → [구간별 카운트..., 합계, 개수]
+
+    def observe(self, value: float, *label_values: str):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [0] * (len(self.buckets) + 1) + [0.0, 0]
+            series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            snapshot = {key: list(series) for key, series in self._series.items()}
+        for label_values, series in sorted(snapshot.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series):
+                cumulative += count
+                le = 'le="+Inf"' if bound == float("inf") else f'le="{bound!r}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labels, label_values, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labels, label_values)} {_format_value(series[-2])}")
+            lines.append(f"{self.name}_count{_format_labels(self.labels, label_values)} {series[-1]}")
+        return "\n".join(lines)
+
+
+class Counter:
+    """Prometheus 카운터 (레이블 값 조합별 누적 합)"""
+
+    def __init__(self, name: str, documentation: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self._lock = threading.Lock()
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, *label_values: str):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            snapshot = dict(self._values)
+        for label_values, value in sorted(snapshot.items()):
+            lines.append(f"{self.name}{_format_labels(self.labels, label_values)} {_format_value(value)}")
+        return "\n".join(lines)
+
+
+class Gauge(Counter):
+    """Prometheus 게이지 (큐 길이처럼 오르내리는 현재 값)"""
+
+    def set(self, value: float, *label_values: str):
+        with self._lock:
+            self._values[label_values] = value
+
+    def render(self) -> str:
+        return super().render().replace(f"# TYPE {self.name} counter", f"# TYPE {self.name} gauge", 1)
+
+
+STAGE_SECONDS = Histogram("rag_stage_seconds", "Latency of each request stage in seconds", ("stage",))
+# 요청 수는 rag_request_seconds_count{endpoint, status}로 확인
+REQUEST_SECONDS = Histogram("rag_request_seconds", "End-to-end request latency in seconds", ("endpoint", "status"))
+LLM_TOKENS_TOTAL = Counter("rag_llm_tokens_total", "Tokens sent to / received from the LLM", ("kind",))
+TENANT_REQUEST_SECONDS = Histogram(
+    "rag_tenant_request_seconds", "End-to-end request latency per tenant in seconds", ("tenant", "status"),
+)
+
+_registry = [STAGE_SECONDS, REQUEST_SECONDS, LLM_TOKENS_TOTAL, TENANT_REQUEST_SECONDS]
+_tenant_labels = set()
+_tenant_labels_lock = threading.Lock()
+
+
+def register(metric):
+    """다른 모듈의 지표를 /metrics 출력에 추가"""
+    _registry.append(metric)
+    return metric
+
+
+def render() -> str:
+    """/metrics 응답 본문 (Prometheus text format 0.0.4)"""
+    return "\n".join(metric.render() for metric in _registry) + "\n"
+
+
+# ----- 요청 단위 측정 -----
+
+# 현재 요청의 단계별 소요 시간 (asyncio 태스크는 만들 때 컨텍스트를 복사하므로 하위 태스크 기록도 모임)
+_current: ContextVar[Optional[dict]] = ContextVar("rag_request_timings", default=None)
+_NOOP = nullcontext()
+
+
+def stage(name: str):
+    """
+    단계 소요 시간 측정
+
+        with metrics.stage("embed"):
+            ...
+
+    히스토그램에 기록하고, 요청 안이면 요청별 로그에도 합산합니다.
+    """
+    if not METRICS_ENABLED:
+        return _NOOP
+    return _timed_stage(name)
+
+
+@contextmanager
+def _timed_stage(name: str) -> Iterator[None]:
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, time.perf_counter() - start)
+
+
+def record(name: str, seconds: float):
+    """이미 잰 시간 기록 (첫 토큰까지 걸린 시간처럼 with 블록으로 감싸기 어려운 경우)"""
+    if not METRICS_ENABLED:
+        return
+    STAGE_SECONDS.observe(seconds, name)
+    timings = _current.get()
+    if timings is not None:
+        stages = timings["stages"]
+        stages[name] = stages.get(name, 0.0) + seconds
+
+
+def count_tokens(kind: str, tokens: int):
+    """GPT 토큰 수 기록 (kind: prompt | completion)"""
+    if not METRICS_ENABLED:
+        return
+    LLM_TOKENS_TOTAL.inc(tokens, kind)
+    timings = _current.get()
+    if timings is not None:
+        timings["tokens"][kind] = timings["tokens"].get(kind, 0) + tokens
+
+
+def annotate(**fields):
+    """요청별 로그에 남길 값 추가 (캐시 적중 여부, tenant 등)"""
+    timings = _current.get()
+    if timings is not None:
+        timings["fields"].update(fields)
+
+
+def tenant_label(tenant: str) -> str:
+    """테넌트 → 지표 레이블 값 (TENANT_METRICS_MAX개를 넘은 새 테넌트는 "other")"""
+    if tenant in _tenant_labels:
+        return tenant
+    with _tenant_labels_lock:
+        if len(_tenant_labels) < TENANT_METRICS_MAX:
+            _tenant_labels.add(tenant)
+            return tenant
+    return "other"
+
+
+class RequestTimer:
+    """
+    요청 하나의 전체 시간과 단계별 시간 측정
+
+        timer = metrics.start_request("kakao")
+        ...
+        timer.finish("ok")
+    """
+
+    __slots__ = ("endpoint", "start", "timings", "token")
+
+    def __init__(self, endpoint: str, inherit: bool = False):
+        self.endpoint = endpoint
+        timings = _current.get() if inherit else None
+        if timings is None:
+            timings = {"start": time.perf_counter(), "stages": {}, "tokens": {}, "fields": {}}
+        self.start = timings["start"]
+        self.timings = timings
+        self.token = _current.set(timings)
+
+    def finish(self, status: str, endpoint: Optional[str] = None):
+        endpoint = endpoint or self.endpoint
+        elapsed = time.perf_counter() - self.start
+        REQUEST_SECONDS.observe(elapsed, endpoint, status)
+        tenant = self.timings["fields"].get("tenant")
+        if tenant:
+            TENANT_REQUEST_SECONDS.observe(elapsed, tenant_label(tenant), status)
+        if self.token is not None:
+            _current.reset(self.token)
+            self.token = None
+        if TIMING_LOG:
+            line = {
+                "event": "request_timing",
+                "endpoint": endpoint,
+                "status": status,
+                "total_ms": round(elapsed * 1000, 2),
+                "stages_ms": {name: round(seconds * 1000, 2) for name, seconds in self.timings["stages"].items()},
+            }
+            if self.timings["tokens"]:
+                line["tokens"] = self.timings["tokens"]
+            line.update(self.timings["fields"])
+            print(json.dumps(line, ensure_ascii=False), flush=True)
+
+
+class _NoopTimer:
+    __slots__ = ()
+
+    def finish(self, status: str, endpoint: Optional[str] = None):
+        pass
+
+
+_NOOP_TIMER = _NoopTimer()
+
+
+def start_request(endpoint: str, inherit: bool = False):
+    """
+    요청 측정 시작 (METRICS_ENABLED가 꺼져 있으면 아무것도 하지 않는 객체)
+
+    Args:
+        inherit: 이미 측정 중인 요청을 이어서 측정 (콜백 전송처럼 응답 후에 끝나는 작업,
+                 전체 시간도 원래 요청 시작부터 계산)
+    """
+    if not METRICS_ENABLED:
+        return _NOOP_TIMER
+    return RequestTimer(endpoint, inherit)
@@ -0,0 +1,438 @@
+import json
+import os
+import sqlite3
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from langchain.schema.embeddings import Embeddings
+
+
+class NumpyIndex:
+    """
+    메모리 맵(memmap) 파일 기반 벡터 인덱스 (Chroma 대체용, VECTOR_BACKEND=numpy)
+
+    - 임베딩은 정규화해서 float32(또는 int8 양자화)로 파일에 저장하고 np.memmap으로 읽음
+      → uvicorn 워커 여러 개가 같은 파일을 열어도 OS 페이지 캐시를 공유 (워커별 복사본 없음)
+    - 검색은 행렬-벡터 곱 한 번 + argpartition top-k (메모리 대역폭이 한계)
+    - 청크 ID/본문/메타데이터는 같은 디렉터리의 SQLite(chunks.sqlite3)에 저장
+    - vector_store가 쓰는 Chroma 메서드(add_texts, get, delete, persist)와
+      컬렉션 메서드(query, count)를 같은 모양으로 제공
+
+    디렉터리 구성 (g = 세대 번호, 압축할 때마다 증가):
+        meta.json            {"dim", "dtype", "rows", "generation"}
+        vectors.{g}.bin      (rows, dim) float32 또는 int8
+        scales.{g}.f32       (rows,) int8 복원용 행별 배율 (int8일 때만)
+        alive.{g}.u8         (rows,) 1: 사용 중, 0: 삭제됨
+        keys.{g}.i64         (rows,) SQLite key (항상 오름차순)
+
+    쓰기는 한 프로세스(색인 작업)에서만 한다고 가정합니다 (vector_store.write_lock()으로 보장).
+    다른 프로세스의 읽기 전용 인스턴스는 meta.json이 바뀌면 자동으로 다시 매핑합니다.
+    """
+
+    CONVERT_BLOCK_BYTES = 1 << 20  # int8 검색 시 float32로 변환할 블록 크기 (L2 캐시 크기 정도)
+    COMPACT_RATIO = 0.3           # 삭제된 행이 이 비율을 넘으면 persist()에서 압축
+
+    def __init__(self, path: str, embedding_function: Optional[Embeddings] = None, dtype: str = "float32"):
+        if dtype not in ("float32", "int8"):
+            raise ValueError(f"지원하지 않는 dtype: {dtype}")
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.embedding_function = embedding_function
+        self.dtype = dtype
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(os.path.join(path, "chunks.sqlite3"), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS chunks ("
+            " key INTEGER PRIMARY KEY AUTOINCREMENT,"
+            " id TEXT UNIQUE NOT NULL,"
+            " doc_id TEXT,"
+            " document TEXT NOT NULL,"
+            " metadata TEXT NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_chunks_doc_id ON chunks(doc_id)")
+        self._conn.commit()
+
+        self._meta = None
+        self._meta_stamp = None
+        self._arrays = None  # (vectors, scales, alive, keys)
+        self._load()
+
+    @property
+    def embeddings(self) -> Optional[Embeddings]:
+        """langchain VectorStore.embeddings와 같은 이름 (vector_store에서 백엔드 구분 없이 사용)"""
+        return self.embedding_function
+
+    # ----- 파일/메모리 맵 -----
+
+    def _file(self, name: str, generation: int) -> str:
+        stem, ext = name.split(".")
+        return os.path.join(self.path, f"{stem}.{generation}.{ext}")
+
+    def _meta_path(self) -> str:
+        return os.path.join(self.path, "meta.json")
+
+    def _load(self):
+        """meta.json 기준으로 파일을 다시 매핑"""
+        meta_path = self._meta_path()
+        if not os.path.exists(meta_path):
+            self._meta = {"dim": None, "dtype": self.dtype, "rows": 0, "generation": 0}
+            self._meta_stamp = None
+            self._arrays = None
+            return
+
+        stat = os.stat(meta_path)
+        with open(meta_path, encoding="utf-8") as f:
+            meta = json.load(f)
+        self._meta = meta
+        self._meta_stamp = (stat.st_ino, stat.st_mtime_ns)
+        self.dtype = meta["dtype"]
+
+        rows, dim, g = meta["rows"], meta["dim"], meta["generation"]
+        if rows == 0:
+            self._arrays = None
+            return
+        vectors = np.memmap(self._file("vectors.bin", g), dtype=np.dtype(meta["dtype"]), mode="r", shape=(rows, dim))
+        scales = (
+            np.memmap(self._file("scales.f32", g), dtype=np.float32, mode="r", shape=(rows,))
+            if meta["dtype"] == "int8" else None
+        )
+        alive = np.memmap(self._file("alive.u8", g), dtype=np.uint8, mode="r", shape=(rows,))
+        keys = np.memmap(self._file("keys.i64", g), dtype=np.int64, mode="r", shape=(rows,))
+        self._arrays = (vectors, scales, alive, keys)
+
+    def _refresh(self):
+        """다른 프로세스가 인덱스를 바꿨으면 다시 매핑 (stat 한 번)"""
+        try:
+            stat = os.stat(self._meta_path())
+            stamp = (stat.st_ino, stat.st_mtime_ns)
+        except FileNotFoundError:
+            stamp = None
+        if stamp != self._meta_stamp:
+            with self._lock:
+                self._load()
+
+    def _write_meta(self, **changes):
+        meta = {**self._meta, **changes}
+        tmp = self._meta_path() + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(tmp, self._meta_path())
+        self._load()
+
+    def _encode(self, embeddings) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        """정규화 (+ int8 양자화) → (저장할 행렬, 행별 배율)"""
+        vectors = np.asarray(embeddings, dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors = vectors / np.where(norms > 0, norms, 1)
+        if self.dtype == "float32":
+            return vectors, None
+        peak = np.abs(vectors).max(axis=1)
+        scales = np.where(peak > 0, peak / 127, 1).astype(np.float32)
+        quantized = np.round(vectors / scales[:, None]).astype(np.int8)
+        return quantized, scales
+
+    # ----- 쓰기 -----
+
+    def upsert(self, ids: List[str], embeddings, metadatas: List[dict], documents: List[str]):
+        """청크 추가 (같은 ID가 있으면 예전 행은 삭제 표시 후 새 행 추가)"""
+        if not ids:
+            return
+        vectors, scales = self._encode(embeddings)
+        with self._lock:
+            if self._meta["dim"] is None:
+                self._meta["dim"] = int(vectors.shape[1])
+            elif vectors.shape[1] != self._meta["dim"]:
+                raise ValueError(f"임베딩 차원 불일치: {vectors.shape[1]} != {self._meta['dim']}")
+
+            previous = self._keys_for(ids)
+            try:
+                self._delete_rows(previous)
+                self._conn.executemany(
+                    "INSERT INTO chunks (id, doc_id, document, metadata) VALUES (?, ?, ?, ?)",
+                    [
+                        (cid, (meta or {}).get("doc_id"), doc, json.dumps(meta or {}, ensure_ascii=False))
+                        for cid, meta, doc in zip(ids, metadatas, documents)
+                    ],
+                )
+                keys = self._keys_for(ids)
+                key_array = np.array([keys[cid] for cid in ids], dtype=np.int64)
+
+                self._append("vectors.bin", vectors)
+                if scales is not None:
+                    self._append("scales.f32", scales)
+                self._append("alive.u8", np.ones(len(ids), dtype=np.uint8))
+                self._append("keys.i64", key_array)
+                # 새 행을 다 쓴 뒤에 예전 행을 삭제 표시 (중간에 실패하면 예전 행이 그대로 남음)
+                self._mark_dead(previous)
+            except Exception:
+                self._conn.rollback()
+                raise
+
+            # 파일에 행을 다 쓴 뒤에 SQLite/meta 반영 → 읽는 쪽은 완성된 행만 봄
+            self._conn.commit()
+            self._write_meta(rows=self._meta["rows"] + len(ids))
+
+    def _append(self, name: str, rows: np.ndarray):
+        """
+        현재 세대 파일 끝에 행 추가
+
+        meta.json에 기록된 행 수 뒤의 바이트(실패한 쓰기가 남긴 조각)는 먼저 잘라냄
+        → 벡터/키 파일의 행 위치가 항상 일치
+        """
+        row_bytes = rows.itemsize * (rows.shape[1] if rows.ndim > 1 else 1)
+        with open(self._file(name, self._meta["generation"]), "ab") as f:
+            f.truncate(self._meta["rows"] * row_bytes)
+            f.write(np.ascontiguousarray(rows).tobytes())
+
+    def add_texts(self, texts: List[str], metadatas: Optional[List[dict]] = None, ids: Optional[List[str]] = None) -> List[str]:
+        texts = list(texts)
+        metadatas = metadatas or [{} for _ in texts]
+        embeddings = self.embedding_function.embed_documents(texts)
+        self.upsert(ids=ids, embeddings=embeddings, metadatas=metadatas, documents=texts)
+        return ids
+
+    def delete(self, ids: Optional[List[str]] = None, where: Optional[dict] = None):
+        with self._lock:
+            if ids is None:
+                ids = self._select_ids(where)
+            keys = self._keys_for(ids)
+            self._mark_deleted(keys)
+            self._conn.commit()
+            self._write_meta()  # 다른 프로세스도 변경을 알아채도록
+
+    def _keys_for(self, ids: List[str]) -> Dict[str, int]:
+        found = {}
+        ids = list(ids)
+        for i in range(0, len(ids), 500):
+            batch = ids[i:i + 500]
+            rows = self._conn.execute(
+                f"SELECT id, key FROM chunks WHERE id IN ({','.join('?' * len(batch))})", batch
+            ).fetchall()
+            found.update(rows)
+        return found
+
+    def _mark_deleted(self, keys: Dict[str, int]):
+        self._mark_dead(keys)
+        self._delete_rows(keys)
+
+    def _mark_dead(self, keys: Dict[str, int]):
+        """벡터 행을 삭제 표시 (alive 파일)"""
+        if not keys or self._arrays is None:
+            return
+        stored_keys = self._arrays[3]
+        targets = np.array(sorted(keys.values()), dtype=np.int64)
+        positions = np.searchsorted(stored_keys, targets)
+        valid = positions < len(stored_keys)
+        positions, targets = positions[valid], targets[valid]
+        positions = positions[stored_keys[positions] == targets]
+        if len(positions):
+            alive = np.memmap(
+                self._file("alive.u8", self._meta["generation"]), dtype=np.uint8, mode="r+",
+                shape=(self._meta["rows"],),
+            )
+            alive[positions] = 0
+            alive.flush()
+            del alive
+
+    def _delete_rows(self, keys: Dict[str, int]):
+        """SQLite 행 삭제 (commit은 호출한 쪽에서)"""
+        values = list(keys.values())
+        for i in range(0, len(values), 500):
+            batch = values[i:i + 500]
+            self._conn.execute(f"DELETE FROM chunks WHERE key IN ({','.join('?' * len(batch))})", batch)
+
+    def persist(self):
+        """삭제된 행이 많으면 압축 (새 세대 파일로 다시 쓰고 meta.json 교체)"""
+        with self._lock:
+            if self._arrays is None:
+                return
+            vectors, scales, alive, keys = self._arrays
+            dead = len(alive) - int(np.count_nonzero(alive))
+            if dead <= self.COMPACT_RATIO * len(alive):
+                return
+
+            old, new = self._meta["generation"], self._meta["generation"] + 1
+            keep = np.flatnonzero(alive)
+            with open(self._file("vectors.bin", new), "wb") as f:
+                for start in range(0, len(keep), 65536):
+                    f.write(np.ascontiguousarray(vectors[keep[start:start + 65536]]).tobytes())
+            if scales is not None:
+                np.asarray(scales[keep]).tofile(self._file("scales.f32", new))
+            np.ones(len(keep), dtype=np.uint8).tofile(self._file("alive.u8", new))
+            np.asarray(keys[keep]).tofile(self._file("keys.i64", new))
+            self._write_meta(rows=int(len(keep)), generation=new)
+
+            # 예전 파일을 매핑 중인 다른 프로세스는 다음 검색에서 새 세대로 넘어감
+            for name in ("vectors.bin", "scales.f32", "alive.u8", "keys.i64"):
+                try:
+                    os.remove(self._file(name, old))
+                except OSError:
+                    pass
+            print(f"🧹 벡터 인덱스 압축: 삭제된 행 {dead}개 정리")
+
+    # ----- 읽기 -----
+
+    def count(self) -> int:
+        self._refresh()
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
+
+    def _select_ids(self, where: Optional[dict], limit: Optional[int] = None) -> List[str]:
+        sql, params = self._where_sql(where)
+        if limit is not None:
+            sql += f" LIMIT {int(limit)}"
+        return [row[0] for row in self._conn.execute(f"SELECT id FROM chunks{sql}", params)]
+
+    @staticmethod
+    def _where_sql(where: Optional[dict]) -> Tuple[str, list]:
+        """Chroma 스타일 메타데이터 필터 ({"key": 값} 또는 {"key": {"$in": [...]}}) → SQL"""
+        if not where:
+            return "", []
+        clauses, params = [], []
+        for key, value in where.items():
+            column = "doc_id" if key == "doc_id" else f"json_extract(metadata, '$.{key}')"
+            if isinstance(value, dict) and "$in" in value:
+                values = list(value["$in"])
+                clauses.append(f"{column} IN ({','.join('?' * len(values))})" if values else "0")
+                params.extend(values)
+            else:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        return " WHERE " + " AND ".join(clauses), params
+
+    def get(self, ids: Optional[List[str]] = None, where: Optional[dict] = None, include: Optional[List[str]] = None,
+            limit: Optional[int] = None) -> dict:
+        self._refresh()
+        include = ["documents", "metadatas"] if include is None else include
+        with self._lock:
+            if ids is not None:
+                found = self._keys_for(ids)
+                selected = [cid for cid in ids if cid in found][:limit]
+            else:
+                selected = self._select_ids(where, limit)
+
+            result = {"ids": selected}
+            if include:
+                records = {}
+                for i in range(0, len(selected), 500):
+                    batch = selected[i:i + 500]
+                    records.update(
+                        (row[0], row[1:]) for row in self._conn.execute(
+                            f"SELECT id, document, metadata FROM chunks WHERE id IN ({','.join('?' * len(batch))})", batch
+                        )
+                    )
+                if "documents" in include:
+                    result["documents"] = [records[cid][0] for cid in selected]
+                if "metadatas" in include:
+                    result["metadatas"] = [json.loads(records[cid][1]) for cid in selected]
+                if "embeddings" in include:
+                    keys = self._keys_for(selected)
+                    result["embeddings"] = self._vectors_for([keys[cid] for cid in selected])
+        return result
+
+    def _vectors_for(self, keys: List[int]) -> np.ndarray:
+        """SQLite key 목록 → 저장된 (정규화) 벡터, int8이면 복원해서 반환"""
+        if self._arrays is None or not keys:
+            return np.empty((0, self._meta["dim"] or 0), dtype=np.float32)
+        vectors, scales, _, stored_keys = self._arrays
+        positions = np.searchsorted(stored_keys, np.asarray(keys, dtype=np.int64))
+        rows = np.asarray(vectors[positions], dtype=np.float32)
+        if scales is not None:
+            rows *= scales[positions][:, None]
+        return rows
+
+    def search_by_vector(self, query_embedding: List[float], k: int = 5, where: Optional[dict] = None) -> List[Tuple[int, float]]:
+        """
+        [(SQLite key, 코사인 유사도), ...] 유사도 내림차순
+
+        where(메타데이터 필터)를 주면 해당 행만 읽어서 계산 (2단계 검색에서 문서 안 검색)
+        """
+        self._refresh()
+        arrays = self._arrays
+        if arrays is None or k <= 0:
+            return []
+        vectors, scales, alive, keys = arrays
+
+        query = np.asarray(query_embedding, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm > 0:
+            query = query / norm
+
+        if where is not None:
+            sql, params = self._where_sql(where)
+            with self._lock:
+                rows = self._conn.execute(f"SELECT key FROM chunks{sql}", params).fetchall()
+            allowed = np.sort(np.array(rows, dtype=np.int64).reshape(-1))
+            positions = np.minimum(np.searchsorted(keys, allowed), len(keys) - 1)
+            positions = positions[(keys[positions] == allowed) & (alive[positions] == 1)]
+            rows = np.asarray(vectors)[positions].astype(np.float32, copy=False)
+            scores = rows @ query
+            if scales is not None:
+                scores *= scales[positions]
+            if len(scores) > k:
+                top = np.argpartition(-scores, k)[:k]
+            else:
+                top = np.arange(len(scores))
+            top = top[np.argsort(-scores[top])]
+            return [(int(keys[positions[i]]), float(scores[i])) for i in top]
+
+        if scales is None:
+            scores = vectors @ query
+        else:
+            # int8 → float32 변환은 CPU 캐시에 들어가는 작은 블록 단위로 (큰 임시 배열을 만들지 않음)
+            scores = np.empty(len(vectors), dtype=np.float32)
+            block = max(1, self.CONVERT_BLOCK_BYTES // (vectors.shape[1] * 4))
+            buffer = np.empty((block, vectors.shape[1]), dtype=np.float32)
+            for start in range(0, len(vectors), block):
+                end = min(start + block, len(vectors))
+                np.copyto(buffer[:end - start], vectors[start:end], casting="unsafe")
+                np.dot(buffer[:end - start], query, out=scores[start:end])
+            scores *= scales
+        scores[alive == 0] = -np.inf
+
+        if len(scores) > k:
+            top = np.argpartition(-scores, k)[:k]
+        else:
+            top = np.arange(len(scores))
+        best_scores, best_positions = scores[top], top
+        order = np.argsort(-best_scores)
+        return [
+            (int(keys[best_positions[i]]), float(best_scores[i]))
+            for i in order
+            if np.isfinite(best_scores[i])
+        ]
+
+    def query(self, query_embeddings: List[List[float]], n_results: int = 10, where: Optional[dict] = None, include: Optional[List[str]] = None) -> dict:
+        """
+        Chroma collection.query()와 같은 형식 ({"ids": [[...]], "distances": [[...]], ...})
+
+        distances는 Chroma(l2 공간)와 같은 제곱 L2 거리 (2 - 2·코사인 유사도)
+        """
+        include = ["documents", "metadatas", "distances"] if include is None else include
+        result = {"ids": []}
+        for field in include:
+            result[field] = []
+        for embedding in query_embeddings:
+            hits = self.search_by_vector(embedding, n_results, where=where)
+            with self._lock:
+                records = {
+                    row[0]: row[1:] for row in self._conn.execute(
+                        f"SELECT key, id, document, metadata FROM chunks WHERE key IN ({','.join('?' * len(hits))})",
+                        [key for key, _ in hits],
+                    )
+                } if hits else {}
+            hits = [(key, score) for key, score in hits if key in records]  # 검색 도중 삭제됨
+            result["ids"].append([records[key][0] for key, _ in hits])
+            if "documents" in include:
+                result["documents"].append([records[key][1] for key, _ in hits])
+            if "metadatas" in include:
+                result["metadatas"].append([json.loads(records[key][2]) for key, _ in hits])
+            if "embeddings" in include:
+                result["embeddings"].append(self._vectors_for([key for key, _ in hits]))
+            if "distances" in include:
+                result["distances"].append([max(0.0, 2.0 - 2.0 * score) for _, score in hits])
+        return result
@@ -1,5 +1,6 @@
 from pathlib import Path
-from .pdf import parse_pdf
+from typing import Optional
+from .pdf import parse_pdf, iter_pdf
 
 def parse_document(file_path: str):
     """
@@ -17,3 +18,26 @@ def parse_document(file_path: str):
         return parse_csv(file_path)
     else:
         raise ValueError(f"지원하지 않는 파일 형식: {ext}")
+
+def iter_document(file_path: str, doc_id: Optional[str] = None):
+    """
+    파일을 (텍스트, 메타데이터) 섹션 단위로 하나씩 반환 (제너레이터, 대량 색인용)
+    
+    - PDF: 페이지 단위 (메타데이터에 "page" 포함)
+    - DOCX: 제목(Heading) 단위 (메타데이터에 "section" 포함)
+    - CSV: 행 묶음 단위 (메타데이터에 "row_start"/"row_end" 포함)
+
+    doc_id: 문서 ID (기본: 파일명, 디렉터리 일괄 색인은 루트 기준 상대 경로)
+    """
+    ext = Path(file_path).suffix.lower()
+    
+    if ext == ".pdf":
+        yield from iter_pdf(file_path, doc_id)
+    elif ext == ".docx":
+        from .docx_parser import iter_docx
+        yield from iter_docx(file_path, doc_id)
+    elif ext == ".csv":
+        from .csv_parser import iter_csv
+        yield from iter_csv(file_path, doc_id=doc_id)
+    else:
+        raise ValueError(f"지원하지 않는 파일 형식: {ext}")
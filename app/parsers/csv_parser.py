@@ -0,0 +1,83 @@
+import csv
+import os
+from typing import Tuple, Dict, Iterator, List, Optional
+
+# 한 섹션(≈ 청크)에 넣을 최대 글자 수 (행은 중간에 자르지 않음)
+CSV_SECTION_CHARS = int(os.getenv("CSV_SECTION_CHARS", os.getenv("CHUNK_SIZE", "600")))
+
+def parse_csv(file_path: str) -> Tuple[str, Dict]:
+    """
+    CSV 파일을 읽어서 텍스트와 메타데이터 반환
+
+    전체 텍스트를 메모리에 올리므로, 큰 CSV 색인에는 iter_csv()를 사용하세요.
+
+    Args:
+        file_path: CSV 파일 경로
+        
+    Returns:
+        (전체 텍스트, 메타데이터 딕셔너리)
+    """
+    text = "\n\n".join(section_text for section_text, _ in iter_csv(file_path))
+    return text, csv_metadata(file_path)
+
+def iter_csv(file_path: str, section_chars: int = CSV_SECTION_CHARS, doc_id: Optional[str] = None) -> Iterator[Tuple[str, Dict]]:
+    """
+    CSV를 행 묶음 단위로 하나씩 읽어서 (텍스트, 메타데이터) 반환 (제너레이터)
+
+    - csv 모듈로 한 행씩 읽으므로 수 GB 파일도 DataFrame으로 올리지 않음
+    - 각 행은 "열이름: 값 | 열이름: 값" 형태 → 청크만 봐도 어떤 열인지 알 수 있음
+    - 행을 section_chars 글자까지 모아서 하나의 섹션으로 (행은 중간에 자르지 않음)
+    - 메타데이터 "row_start"/"row_end": 섹션에 포함된 데이터 행 번호 (1부터, 헤더 제외)
+    - doc_id: 문서 ID (기본: 파일명)
+    """
+    metadata = csv_metadata(file_path, doc_id)
+
+    with open(file_path, newline="", encoding=_detect_encoding(file_path), errors="replace") as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if header is None:
+            return
+        header = [name.strip() for name in header]
+
+        lines: List[str] = []
+        size = 0
+        row_start = 1
+
+        for row_number, row in enumerate(reader, 1):
+            line = " | ".join(
+                f"{name}: {value.strip()}"
+                for name, value in zip(header, row)
+                if value.strip()
+            )
+            if not line:
+                continue
+
+            if lines and size + len(line) + 1 > section_chars:
+                yield "\n".join(lines), {**metadata, "row_start": row_start, "row_end": row_number - 1}
+                lines, size, row_start = [], 0, row_number
+
+            lines.append(line)
+            size += len(line) + 1
+
+        if lines:
+            yield "\n".join(lines), {**metadata, "row_start": row_start, "row_end": row_number}
+
+def _detect_encoding(file_path: str) -> str:
+    """UTF-8(BOM 포함)이 아니면 엑셀 한글 기본 인코딩(CP949)으로 간주"""
+    with open(file_path, "rb") as f:
+        sample = f.read(1024 * 1024)
+    try:
+        sample.decode("utf-8")
+        return "utf-8-sig"
+    except UnicodeDecodeError as e:
+        # 샘플 끝에서 잘린 멀티바이트 문자는 무시
+        if e.start >= len(sample) - 3:
+            return "utf-8-sig"
+        return "cp949"
+
+def csv_metadata(file_path: str, doc_id: Optional[str] = None) -> Dict:
+    return {
+        "doc_id": doc_id or file_path.split("/")[-1],  # 기본: 파일명만 추출
+        "title": file_path.split("/")[-1],
+        "source_path": file_path,
+    }
@@ -0,0 +1,73 @@
+from docx import Document as DocxDocument
+from docx.table import Table
+from typing import Tuple, Dict, Iterator, List, Optional
+
+def parse_docx(file_path: str) -> Tuple[str, Dict]:
+    """
+    DOCX 파일을 읽어서 텍스트와 메타데이터 반환 (문단 + 표)
+
+    Args:
+        file_path: DOCX 파일 경로
+        
+    Returns:
+        (전체 텍스트, 메타데이터 딕셔너리)
+    """
+    sections = list(iter_docx(file_path))
+    text = "\n\n".join(section_text for section_text, _ in sections)
+    return text, docx_metadata(file_path)
+
+def iter_docx(file_path: str, doc_id: Optional[str] = None) -> Iterator[Tuple[str, Dict]]:
+    """
+    DOCX를 제목(Heading) 단위 섹션으로 나눠서 (텍스트, 메타데이터) 반환 (제너레이터)
+
+    - 문단과 표를 문서 순서대로 읽음
+    - 표는 행마다 "셀 | 셀 | 셀" 한 줄로 변환
+    - 메타데이터 "section"에 해당 섹션의 제목을 기록 (제목 전 내용은 빈 문자열)
+    - doc_id: 문서 ID (기본: 파일명)
+    """
+    document = DocxDocument(file_path)
+    metadata = docx_metadata(file_path, doc_id)
+
+    heading = ""
+    lines: List[str] = []
+
+    for block in document.iter_inner_content():
+        if isinstance(block, Table):
+            lines.extend(_table_lines(block))
+            continue
+
+        text = block.text.strip()
+        if not text:
+            continue
+        style = block.style.name if block.style is not None else ""
+        if style.startswith("Heading") or style == "Title":
+            # 새 제목이 나오면 지금까지 모은 섹션을 내보냄
+            if lines:
+                yield "\n".join(lines), {**metadata, "section": heading}
+            heading = text
+            lines = [text]
+        else:
+            lines.append(text)
+
+    if lines:
+        yield "\n".join(lines), {**metadata, "section": heading}
+
+def _table_lines(table: Table) -> List[str]:
+    lines = []
+    for row in table.rows:
+        cells = []
+        for cell in row.cells:
+            value = cell.text.strip().replace("\n", " ")
+            # 병합된 셀은 같은 값이 반복되므로 한 번만
+            if not cells or cells[-1] != value:
+                cells.append(value)
+        if any(cells):
+            lines.append(" | ".join(cells))
+    return lines
+
+def docx_metadata(file_path: str, doc_id: Optional[str] = None) -> Dict:
+    return {
+        "doc_id": doc_id or file_path.split("/")[-1],  # 기본: 파일명만 추출
+        "title": file_path.split("/")[-1],
+        "source_path": file_path,
+    }
@@ -1,29 +1,75 @@
 from pypdf import PdfReader
-from typing import Tuple, Dict
+from typing import Tuple, Dict, Iterator, List, Optional
+
+# 이 페이지 수마다 pypdf 내부 객체 캐시를 비움 (페이지 수와 무관하게 메모리 유지)
+CACHE_CLEAR_INTERVAL = 20
 
 def parse_pdf(file_path: str) -> Tuple[str, Dict]:
     """
     PDF 파일을 읽어서 텍스트와 메타데이터 반환
 
+    전체 텍스트를 한 번에 메모리에 올리므로, 큰 PDF 색인에는 iter_pdf()를 사용하세요.
+
     Args:
         file_path: PDF 파일 경로
         
     Returns:
         (전체 텍스트, 메타데이터 딕셔너리)
+        메타데이터의 "page_starts"는 페이지별 시작 위치(문자 오프셋)
+        → split_text()가 청크마다 실제 페이지 번호("page")로 바꿔 넣음
     """
     reader = PdfReader(file_path)
 
     # 모든 페이지를 \n\n으로 구분해서 합침
-    text = "\n\n".join(
-        page.extract_text() 
-        for page in reader.pages
-    )
+    pages = [page.extract_text() for page in reader.pages]
+    page_starts = []
+    offset = 0
+    for page_text in pages:
+        page_starts.append(offset)
+        offset += len(page_text) + 2
+    text = "\n\n".join(pages)
+
+    return text, {**pdf_metadata(file_path, len(reader.pages)), "page_starts": page_starts}
 
-    metadata = {
-        "doc_id": file_path.split("/")[-1],  # 파일명만 추출
+def iter_pdf(file_path: str, doc_id: Optional[str] = None) -> Iterator[Tuple[str, Dict]]:
+    """
+    PDF를 페이지 단위로 하나씩 읽어서 (페이지 텍스트, 메타데이터) 반환 (제너레이터)
+
+    - 메타데이터에 실제 페이지 번호("page", 1부터 시작) 포함 → 출처에 정확한 페이지 표시
+    - 파일 전체를 메모리에 읽지 않고, 이미 처리한 페이지의 객체 캐시는 주기적으로 비움
+      → 1,000페이지 PDF도 메모리 사용량이 거의 일정
+    - doc_id: 문서 ID (기본: 파일명)
+    """
+    with open(file_path, "rb") as f:
+        reader = PdfReader(f)  # 경로 대신 파일 객체를 넘기면 파일 전체를 읽어 두지 않음
+        metadata = pdf_metadata(file_path, len(reader.pages), doc_id)
+
+        for index in range(len(reader.pages)):
+            text = reader.pages[index].extract_text()
+            if (index + 1) % CACHE_CLEAR_INTERVAL == 0:
+                reader.resolved_objects.clear()
+            if text.strip():
+                yield text, {**metadata, "page": index + 1}
+
+def pdf_metadata(file_path: str, page_count: int, doc_id: Optional[str] = None) -> Dict:
+    return {
+        "doc_id": doc_id or file_path.split("/")[-1],  # 기본: 파일명만 추출
         "title": file_path.split("/")[-1],
         "source_path": file_path,
-        "page_count": len(reader.pages),
+        "page_count": page_count,
     }
 
-    return text, metadata
+def count_pages(file_path: str) -> int:
+    """PDF 페이지 수 (텍스트 추출 없이)"""
+    with open(file_path, "rb") as f:
+        return len(PdfReader(f).pages)
+
+def extract_pages(file_path: str, start: int, end: int) -> List[str]:
+    """
+    [start, end) 범위 페이지의 텍스트 목록
+    
+    큰 PDF를 여러 프로세스가 페이지 범위로 나눠서 추출할 때 사용
+    """
+    with open(file_path, "rb") as f:
+        reader = PdfReader(f)
+        return [reader.pages[i].extract_text() for i in range(start, min(end, len(reader.pages)))]
@@ -1,26 +1,75 @@
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain.schema import Document
-from typing import List
+from bisect import bisect_right
+from typing import Iterable, Iterator, List, Tuple
 import os
-from dotenv import load_dotenv
-
-load_dotenv()
+import re
+import unicodedata
 
 CHUNK_SIZE = int(os.getenv("CHUNK_SIZE", "600"))
 CHUNK_OVERLAP = int(os.getenv("CHUNK_OVERLAP", "120"))
 
-def split_text(text: str, metadata: dict) -> List[Document]:
-    
-    splitter = RecursiveCharacterTextSplitter(
+def _make_splitter() -> RecursiveCharacterTextSplitter:
+    return RecursiveCharacterTextSplitter(
         chunk_size=CHUNK_SIZE,
         chunk_overlap=CHUNK_OVERLAP,
-        separators=["\n\n", "\n", " ", ""]
+        separators=["\n\n", "\n", " ", ""],
+        add_start_index=True,  # 청크의 시작 위치(문자 오프셋)를 메타데이터에 기록
     )
+
+def _split(splitter: RecursiveCharacterTextSplitter, text: str, metadata: dict) -> List[Document]:
+    """
+    텍스트 분할 + 위치 정보
     
+    각 청크 메타데이터에 원본(PDF는 해당 페이지) 안에서의
+    start_index / end_index 문자 오프셋이 들어갑니다.
+    
+    메타데이터에 "page_starts"(parse_pdf()로 읽은 PDF 전체 텍스트의 페이지별 시작 위치)가 있으면
+    청크가 시작하는 페이지를 "page"로 넣고 오프셋도 그 페이지 기준으로 바꿈 (iter_pdf()와 같은 형태)
+    """
+    page_starts = metadata.get("page_starts")
+    if page_starts is not None:
+        metadata = {key: value for key, value in metadata.items() if key != "page_starts"}  # 벡터 DB에는 목록을 저장할 수 없음
     chunks = splitter.create_documents(
         texts=[text],
         metadatas=[metadata]
     )
+    for chunk in chunks:
+        if page_starts:
+            start = chunk.metadata["start_index"]
+            page = max(1, bisect_right(page_starts, start))
+            chunk.metadata["page"] = page
+            chunk.metadata["start_index"] = max(0, start - page_starts[page - 1])
+        chunk.metadata["end_index"] = chunk.metadata["start_index"] + len(chunk.page_content)
+    return chunks
+
+def split_text(text: str, metadata: dict) -> List[Document]:
+    
+    chunks = _split(_make_splitter(), text, metadata)
     
     print(f"✅ 청크 분할 완료: {len(chunks)}개")
     return chunks
+
+def iter_split_text(documents: Iterable[Tuple[str, dict]]) -> Iterator[Document]:
+    """
+    (텍스트, 메타데이터) 스트림을 청크 스트림으로 변환 (대량 색인용)
+    
+    문서(또는 iter_document()의 페이지)를 하나씩 분할해서 바로 흘려보내므로
+    전체 텍스트/청크 목록을 메모리에 들고 있지 않습니다.
+    섹션 메타데이터의 "page"는 그대로 각 청크에 남습니다.
+    """
+    splitter = _make_splitter()
+    for text, metadata in documents:
+        yield from _split(splitter, text, metadata)
+
+def normalize_question(text: str) -> str:
+    """
+    질문 정규화 (캐시 키/중복 판단용)
+    
+    - 유니코드 정규화(NFKC), 소문자화
+    - 연속 공백 → 공백 1개
+    - 끝의 물음표/마침표/느낌표 등 제거
+    """
+    text = unicodedata.normalize("NFKC", text).lower()
+    text = re.sub(r"\s+", " ", text).strip()
+    return text.rstrip("?!.~ ")
@@ -0,0 +1,104 @@
+import os
+from typing import Optional
+
+import numpy as np
+
+SEARCH_DEDUP_THRESHOLD = float(os.getenv("SEARCH_DEDUP_THRESHOLD", "0.97"))  # 임베딩 코사인이 이 이상이면 같은 내용으로 봄
+SEARCH_MMR_LAMBDA = float(os.getenv("SEARCH_MMR_LAMBDA", "0.7"))  # 1.0: 관련도만, 낮을수록 다양성 중시
+
+
+def normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms > 0, norms, 1.0)
+
+
+def cosine_scores(query_embedding, embeddings: np.ndarray) -> np.ndarray:
+    """저장된 임베딩과 질문의 코사인 유사도 (0~1로 자름)"""
+    return np.clip(normalize_rows(embeddings) @ normalize_rows(query_embedding), 0.0, 1.0)
+
+
+def near_duplicates(embeddings: np.ndarray, threshold: float = SEARCH_DEDUP_THRESHOLD) -> np.ndarray:
+    """
+    순위가 더 높은 후보와 임베딩이 거의 같은 후보 표시 (embeddings는 순위 순서)
+
+    Returns:
+        bool 배열, True면 중복으로 제외
+    """
+    if len(embeddings) < 2:
+        return np.zeros(len(embeddings), dtype=bool)
+    vectors = normalize_rows(embeddings)
+    similar = np.triu(vectors @ vectors.T >= threshold, k=1)
+    return similar.any(axis=0)
+
+
+def mmr(embeddings: np.ndarray, relevance: np.ndarray, k: int, lambda_mult: float = SEARCH_MMR_LAMBDA) -> np.ndarray:
+    """
+    MMR(Maximal Marginal Relevance)로 k개 선택
+
+    매번 λ·관련도 - (1-λ)·(이미 고른 후보와의 최대 유사도)가 가장 큰 후보를 고름
+    → 같은 내용을 조금씩 다르게 담은 청크가 상위를 차지하지 않게 함
+
+    Returns:
+        선택한 후보의 인덱스 (선택 순서)
+    """
+    n = len(relevance)
+    k = min(k, n)
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    if lambda_mult >= 1.0 or k == 1:
+        return np.argsort(-relevance, kind="stable")[:k]
+
+    vectors = normalize_rows(embeddings)
+    similarity = vectors @ vectors.T
+    max_similarity = np.full(n, -np.inf, dtype=np.float32)
+    available = np.ones(n, dtype=bool)
+    selected = []
+    for _ in range(k):
+        redundancy = np.where(np.isfinite(max_similarity), max_similarity, 0.0)
+        scores = np.where(available, lambda_mult * relevance - (1 - lambda_mult) * redundancy, -np.inf)
+        best = int(np.argmax(scores))
+        selected.append(best)
+        available[best] = False
+        np.maximum(max_similarity, similarity[best], out=max_similarity)
+    return np.array(selected, dtype=np.int64)
+
+
+def rank(
+    embeddings: np.ndarray,
+    similarity: np.ndarray,
+    k: int,
+    relevance: Optional[np.ndarray] = None,
+    score_threshold: Optional[float] = None,
+    dedup_threshold: float = SEARCH_DEDUP_THRESHOLD,
+    mmr_lambda: float = SEARCH_MMR_LAMBDA,
+) -> np.ndarray:
+    """
+    후보 → 최종 k개 (임계값 → 중복 제거 → MMR)
+
+    Args:
+        embeddings: 후보 임베딩 (m, dim)
+        similarity: 질문과의 코사인 유사도 (m,) — 임계값 기준이자 반환 점수
+        relevance: 순위용 관련도 (하이브리드 검색이면 RRF 점수), None이면 similarity
+        score_threshold: 최소 유사도 (None 또는 0이면 필터링 안 함)
+
+    Returns:
+        최종 후보 인덱스 (순위 순서)
+    """
+    similarity = np.asarray(similarity, dtype=np.float32)
+    relevance = similarity if relevance is None else np.asarray(relevance, dtype=np.float32)
+    candidates = np.argsort(-relevance, kind="stable")
+    if score_threshold is not None and score_threshold > 0:
+        candidates = candidates[similarity[candidates] >= score_threshold]
+    if len(candidates) == 0:
+        return candidates
+
+    embeddings = np.asarray(embeddings, dtype=np.float32)[candidates]
+    keep = ~near_duplicates(embeddings, dedup_threshold)
+    candidates, embeddings = candidates[keep], embeddings[keep]
+
+    # 관련도를 0~1로 맞춰야 유사도(0~1)와 같은 비중으로 MMR 계산 가능
+    scaled = relevance[candidates]
+    if scaled.max() > 0:
+        scaled = scaled / scaled.max()
+    return candidates[mmr(embeddings, scaled, k, mmr_lambda)]
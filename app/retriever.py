@@ -1,23 +1,133 @@
-from app.vector_store import vector_client
+import asyncio
+import os
+from collections import OrderedDict
+from typing import Optional
+from app import faq, metrics
+from app.vector_store import TENANT_CACHE_SIZE, aembed_query, asearch_by_vector, change_stamp_path, on_collection_change
 from app.llm import generate_answer
+from app.answer_cache import AnswerCache
+from app.coalescing import SingleFlight
+from app.pipelines import normalize_question
 
-async def retrieve_answer(question: str) -> dict:
-    # score_threshold 없이 검색 후 필터링
-    docs_with_scores = vector_client.similarity_search_with_score(
-        question,
-        k=5,
+def _new_answer_cache(tenant: Optional[str] = None) -> AnswerCache:
+    return AnswerCache(
+        max_entries=int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", "1000")),
+        ttl=float(os.getenv("ANSWER_CACHE_TTL", "3600")),
+        similarity_threshold=float(os.getenv("ANSWER_CACHE_SIMILARITY", "0.95")),
+        stamp_path=change_stamp_path(tenant),  # CLI 색인 등 다른 프로세스의 문서 변경도 반영
     )
+
+# 답변 캐시 (반복 질문은 임베딩/검색/GPT 호출 없이 응답)
+answer_cache = _new_answer_cache()
+# 테넌트별 답변 캐시 (기본 테넌트는 answer_cache, 나머지는 최근에 쓴 TENANT_CACHE_SIZE개만 유지)
+_tenant_caches: "OrderedDict[str, AnswerCache]" = OrderedDict()
+
+def get_answer_cache(tenant: Optional[str] = None, create: bool = True) -> Optional[AnswerCache]:
+    """테넌트의 답변 캐시 (create=False면 없을 때 None)"""
+    if tenant is None:
+        return answer_cache
+    cache = _tenant_caches.get(tenant)
+    if cache is None and create:
+        cache = _tenant_caches[tenant] = _new_answer_cache(tenant)
+        while len(_tenant_caches) > TENANT_CACHE_SIZE:
+            _tenant_caches.popitem(last=False)
+    elif cache is not None:
+        _tenant_caches.move_to_end(tenant)
+    return cache
+
+def _invalidate_answers(doc_ids, tenant: Optional[str]):
+    cache = get_answer_cache(tenant, create=False)
+    if cache is not None:
+        cache.clear(doc_ids)
+
+# 문서가 추가/변경되면 그 테넌트의 캐시된 답변은 모두 무효화
+on_collection_change(_invalidate_answers)
+
+# 동시에 들어온 같은 질문은 검색/GPT 호출 하나를 공유
+inflight = SingleFlight()
+
+def cached_answer(question: str, tenant: Optional[str] = None):
+    """정확히 같은 질문의 미리 만든 FAQ 답변 또는 캐시된 답변 (없으면 None, 임베딩 호출 없음)"""
+    answer = faq.lookup(question, tenant)
+    if answer is not None:
+        return answer
+    cache = get_answer_cache(tenant, create=False)
+    cached = cache.get(question) if cache is not None else None
+    if cached is not None:
+        metrics.annotate(cache="exact")
+    return cached
+
+async def retrieve_answer(
+    question: str,
+    k: int = 5,
+    score_threshold: float = 0.3,
+    llm_timeout: float = None,
+    max_tokens: int = None,
+    tenant: Optional[str] = None,
+) -> dict:
+    """
+    질문 → 미리 만든 FAQ 답변 → 답변 캐시 → 검색 → GPT 답변
     
-    # 거리 점수를 유사도로 변환하고 최소 유사도 0.3 이상만 선택
-    filtered_docs = []
-    for doc, distance in docs_with_scores:
-        similarity = max(0.0, 1.0 - (distance / 2.0))
-        if similarity >= 0.3:  # 유사도 30% 이상
-            filtered_docs.append(doc)
+    Args:
+        question: 사용자 질문
+        k: 검색할 문서 개수
+        score_threshold: 최소 유사도 (기본 0.3 = 유사도 30% 이상, None이면 필터링 안 함)
+        llm_timeout: 답변 전체(임베딩 → 검색 → GPT) 타임아웃(초), None이면 제한 없음
+                     같은 질문을 기다리는 호출자가 모두 포기하면 공유 파이프라인도 끊음
+                     → 호출자가 포기한 뒤에도 검색/GPT가 계속 돌지 않음
+        max_tokens: 답변 최대 토큰 수 (시간이 부족할 때 짧게), None이면 모델 기본값
+        tenant: 검색할 테넌트 (None이면 기본 테넌트)
+        
+    Returns:
+        {"answer": "...", "sources": [...]}
+    """
+    # 1. 정확히 같은 질문: 미리 만든 FAQ 답변 → 답변 캐시 (임베딩 호출도 생략)
+    cached = cached_answer(question, tenant)
+    if cached is not None:
+        return cached
+    
+    # 2. 같은 테넌트에 같은 질문이 이미 처리 중이면 그 결과를 함께 기다림
+    #    (타임아웃은 호출자마다 따로: 공유 파이프라인은 가장 늦은 마감까지 실행되고 그 뒤에 끊김)
+    key = (tenant, normalize_question(question), k, score_threshold, max_tokens)
+    return await inflight.do(
+        key,
+        lambda: _answer_pipeline(question, k, score_threshold, max_tokens, tenant),
+        timeout=llm_timeout,
+    )
+
+async def _answer_pipeline(
+    question: str, k: int, score_threshold: float, max_tokens: int, tenant: Optional[str],
+) -> dict:
+    # 3. 의미가 비슷한 질문: 미리 만든 FAQ 답변 → 답변 캐시 (질문 임베딩은 검색에 그대로 재사용)
+    query_embedding = await aembed_query(question)
+    answer = faq.lookup(question, tenant, query_embedding)
+    if answer is not None:
+        return answer
+    cache = get_answer_cache(tenant)
+    cached = cache.get(question, query_embedding)
+    if cached is not None:
+        metrics.annotate(cache="semantic")
+        return cached
+    generation = cache.generation  # 검색 후 문서가 바뀌면 이 답변은 캐시하지 않음
+    
+    # 4. 검색 + 답변 생성
+    # 거리 → 유사도 변환은 search_documents와 동일한 방식을 사용
+    filtered_docs = await asearch_by_vector(
+        query_embedding,
+        k=k,
+        score_threshold=score_threshold,
+        query=question,  # 하이브리드 검색(BM25)용 원문
+        tenant=tenant,
+    )
     
     if not filtered_docs:
         return {
             "answer": "자료에서 근거를 찾지 못했습니다. 관련 문서를 업로드해 주세요.",
             "sources": [],
         }
-    return await generate_answer(question, filtered_docs)
+    
+    answer_data = await generate_answer(question, filtered_docs, max_tokens=max_tokens)
+    # 줄여서 만든 답변은 캐시하지 않음 (여유 있을 때 온 같은 질문은 온전한 답변을 받도록)
+    if max_tokens is None:
+        cache.put(question, query_embedding, answer_data, generation)
+    return answer_data
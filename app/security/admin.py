@@ -0,0 +1,22 @@
+import hmac
+import os
+
+API_KEY = os.getenv("ADMIN_API_KEY")
+
+def verify_api_key(key: str) -> bool:
+    """
+    관리 API(/documents) 요청 검증
+
+    X-Admin-Key 헤더 값이 ADMIN_API_KEY와 같아야 합니다.
+
+    Args:
+        key: X-Admin-Key 헤더 값
+
+    Returns:
+        True: 검증 성공, False: 검증 실패 (ADMIN_API_KEY가 설정되지 않은 경우 포함)
+    """
+    if not API_KEY:
+        return False
+
+    # 비교 (타이밍 공격 방지)
+    return hmac.compare_digest(API_KEY.encode("utf-8"), key.encode("utf-8"))
@@ -2,9 +2,6 @@ import base64
 import hmac
 import hashlib
 import os
-from dotenv import load_dotenv
-
-load_dotenv()
 
 SECRET = os.getenv("KAKAO_CHANNEL_SECRET")
 
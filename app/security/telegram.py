@@ -0,0 +1,22 @@
+import hmac
+import os
+
+SECRET_TOKEN = os.getenv("TELEGRAM_WEBHOOK_SECRET")
+
+def verify_secret_token(token: str) -> bool:
+    """
+    텔레그램 웹훅 요청 검증
+
+    setWebhook의 secret_token으로 등록한 값이 X-Telegram-Bot-Api-Secret-Token 헤더로 옵니다.
+
+    Args:
+        token: X-Telegram-Bot-Api-Secret-Token 헤더 값
+
+    Returns:
+        True: 검증 성공, False: 검증 실패 (비밀 값이 설정되지 않은 경우 포함)
+    """
+    if not SECRET_TOKEN:
+        return False
+
+    # 비교 (타이밍 공격 방지)
+    return hmac.compare_digest(SECRET_TOKEN.encode("utf-8"), token.encode("utf-8"))
@@ -0,0 +1,392 @@
+"""
+벡터 인덱스 스냅샷 (새 서버/레플리카를 임베딩 API 호출 없이 몇 초 안에 준비)
+
+청크 본문/메타데이터/임베딩과 BM25 역색인, 문서 대표 벡터를 파일 하나에 담습니다.
+- 색인 중인 ./chroma 디렉터리를 그대로 복사하면 쓰는 도중의 상태가 섞일 수 있음
+  → 내보내기는 저장된 청크를 읽어서 새 파일에 쓰고, 다 쓴 뒤에 파일 이름을 바꿈
+- 배열은 64바이트 경계에 그대로 저장 → np.memmap으로 복사 없이 읽음
+- 구역(section)마다 sha256을 기록하고 불러올 때 검사 (복사 중 잘린 파일을 그대로 쓰지 않음)
+
+파일 구성:
+    MAGIC (8바이트)
+    구역들          embeddings (rows, dim) float32, records(JSON 줄), record_offsets, lexical.*, documents.*
+    헤더 (JSON)     {"version", "embedding_model", "rows", "dim", "sections": {이름: {offset, length, sha256, ...}}, ...}
+    꼬리 (56바이트) 헤더 위치/길이, 헤더 sha256, MAGIC
+
+사용법:
+    python -m app.snapshot export snapshots/rag.snap [--tenant kakao:<봇 ID>]
+    python -m app.snapshot import snapshots/rag.snap [--tenant ...] [--force]
+    python -m app.snapshot info snapshots/rag.snap
+
+서버는 SNAPSHOT_PATH가 있으면 시작할 때 가져옵니다 (같은 스냅샷을 이미 가져왔으면 건너뜀).
+"""
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import struct
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from app import vector_store
+from app.document_index import centroids_from
+
+MAGIC = b"RAGSNAP\0"
+FORMAT_VERSION = 1
+_TRAILER = struct.Struct("<QQ32s8s")  # 헤더 위치, 헤더 길이, 헤더 sha256, MAGIC
+_ALIGN = 64
+
+SNAPSHOT_PATH = os.getenv("SNAPSHOT_PATH")  # 서버 시작 시 가져올 스냅샷 (기본 테넌트)
+BATCH_SIZE = 5000  # 내보내기/가져오기 한 번에 읽고 쓰는 청크 수 (Chroma 배치 한도보다 작게)
+MARKER_NAME = "snapshot.json"  # 마지막으로 가져온 스냅샷 기록 (인덱스 디렉터리 안)
+
+
+class SnapshotError(ValueError):
+    """스냅샷 파일이 아니거나 손상됨/호환되지 않음"""
+
+
+class _Writer:
+    """구역을 순서대로 쓰고 마지막에 헤더/꼬리를 붙임 (구역마다 sha256 계산)"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.file = open(path, "wb")
+        self.file.write(MAGIC)
+        self.sections: Dict[str, dict] = {}
+        self._current = None
+
+    def begin(self, name: str, **info):
+        padding = -self.file.tell() % _ALIGN
+        self.file.write(b"\0" * padding)
+        self._current = (name, self.file.tell(), hashlib.sha256(), info)
+
+    def write(self, data: bytes):
+        self.file.write(data)
+        self._current[2].update(data)
+
+    def end(self):
+        name, offset, digest, info = self._current
+        self.sections[name] = {"offset": offset, "length": self.file.tell() - offset, "sha256": digest.hexdigest(), **info}
+        self._current = None
+
+    def add_bytes(self, name: str, data: bytes):
+        self.begin(name)
+        self.write(data)
+        self.end()
+
+    def add_array(self, name: str, array: np.ndarray):
+        array = np.ascontiguousarray(array)
+        self.begin(name, dtype=array.dtype.str, shape=list(array.shape))
+        self.write(array.tobytes())
+        self.end()
+
+    def add_strings(self, name: str, values: List[str]):
+        self.add_bytes(name, json.dumps(values, ensure_ascii=False).encode("utf-8"))
+
+    def close(self, header: dict):
+        header = {**header, "sections": self.sections}
+        data = json.dumps(header, ensure_ascii=False).encode("utf-8")
+        offset = self.file.tell()
+        self.file.write(data)
+        self.file.write(_TRAILER.pack(offset, len(data), hashlib.sha256(data).digest(), MAGIC))
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.file.close()
+
+
+class Snapshot:
+    """
+    스냅샷 파일 읽기 (메모리 맵)
+
+        snapshot = Snapshot("rag.snap")   # 헤더 + 전체 sha256 검사
+        snapshot.array("embeddings")      # np.memmap (복사 없음)
+        snapshot.records(0, 100)          # [(청크 ID, 본문, 메타데이터), ...]
+    """
+
+    def __init__(self, path: str, verify: bool = True):
+        self.path = path
+        with open(path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if size < len(MAGIC) + _TRAILER.size or f.read(len(MAGIC)) != MAGIC:
+                raise SnapshotError(f"스냅샷 파일이 아닙니다: {path}")
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        offset, length, digest, magic = _TRAILER.unpack(self._mmap[-_TRAILER.size:])
+        if magic != MAGIC or offset + length > size - _TRAILER.size:
+            raise SnapshotError(f"스냅샷 파일이 잘렸습니다: {path}")
+        data = self._mmap[offset:offset + length]
+        if hashlib.sha256(data).digest() != digest:
+            raise SnapshotError(f"스냅샷 헤더 체크섬 불일치: {path}")
+        self.header = json.loads(data)
+        if self.header.get("version") != FORMAT_VERSION:
+            raise SnapshotError(f"지원하지 않는 스냅샷 버전: {self.header.get('version')} (지원: {FORMAT_VERSION})")
+        self.sections: Dict[str, dict] = self.header["sections"]
+        self.checksum = digest.hex()  # 헤더에 구역별 sha256이 있으므로 스냅샷 전체의 식별자로 사용
+        if verify:
+            self.verify()
+
+    def verify(self):
+        for name, section in self.sections.items():
+            digest = hashlib.sha256()
+            view = memoryview(self._mmap)[section["offset"]:section["offset"] + section["length"]]
+            for start in range(0, len(view), 1 << 24):
+                digest.update(view[start:start + (1 << 24)])
+            view.release()
+            if digest.hexdigest() != section["sha256"]:
+                raise SnapshotError(f"스냅샷 구역 {name} 체크섬 불일치: {self.path}")
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.sections
+
+    def bytes(self, name: str) -> bytes:
+        section = self.sections[name]
+        return self._mmap[section["offset"]:section["offset"] + section["length"]]
+
+    def array(self, name: str) -> np.ndarray:
+        section = self.sections[name]
+        if not section["length"]:  # 빈 배열은 매핑할 수 없음
+            return np.empty(tuple(section["shape"]), dtype=np.dtype(section["dtype"]))
+        return np.memmap(self.path, dtype=np.dtype(section["dtype"]), mode="r",
+                         offset=section["offset"], shape=tuple(section["shape"]))
+
+    def strings(self, name: str) -> List[str]:
+        return json.loads(self.bytes(name))
+
+    def records(self, start: int, end: int) -> List[tuple]:
+        """[(청크 ID, 본문, 메타데이터), ...] start번째부터 end번째 전까지"""
+        offsets = self.array("record_offsets")
+        base = self.sections["records"]["offset"]
+        data = self._mmap[base + int(offsets[start]):base + int(offsets[end])]
+        return [tuple(json.loads(line)) for line in data.decode("utf-8").splitlines()]
+
+    def close(self):
+        self._mmap.close()
+
+
+def export_snapshot(path: str, tenant: Optional[str] = None) -> dict:
+    """
+    테넌트 인덱스를 스냅샷 파일로 내보내기 (서버가 실행 중이어도 됨: 저장된 상태만 읽음)
+
+    Returns:
+        스냅샷 헤더 (sections 제외)
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp = path + ".tmp"
+    writer = _Writer(tmp)
+    try:
+        with vector_store.open_tenant(tenant) as index:
+            client = index.vector_client
+            ids = sorted(client.get(include=[])["ids"])
+
+            # 임베딩은 배치 단위로 읽어서 바로 파일에 씀 (본문 JSON 줄만 모아 두었다가 다음 구역에 씀)
+            chunk_ids, lines, dim = [], [], None
+            writer.begin("embeddings", dtype=np.dtype(np.float32).str)
+            for start in range(0, len(ids), BATCH_SIZE):
+                stored = client.get(ids=ids[start:start + BATCH_SIZE], include=["documents", "metadatas", "embeddings"])
+                if not stored["ids"]:  # 읽는 도중 삭제됨
+                    continue
+                embeddings = np.asarray(stored["embeddings"], dtype=np.float32)
+                dim = embeddings.shape[1]
+                writer.write(embeddings.tobytes())
+                chunk_ids.extend(stored["ids"])
+                lines.extend(
+                    json.dumps([cid, document, meta or {}], ensure_ascii=False).encode("utf-8") + b"\n"
+                    for cid, document, meta in zip(stored["ids"], stored["documents"], stored["metadatas"])
+                )
+            writer.end()
+            writer.sections["embeddings"]["shape"] = [len(chunk_ids), dim or 0]
+
+            writer.add_bytes("records", b"".join(lines))
+            writer.add_array("record_offsets", np.cumsum([0] + [len(line) for line in lines], dtype=np.int64))
+            del lines
+
+            lexical = index.lexical_index
+            if lexical is not None:
+                lexical_ids, arrays = lexical.export_arrays()
+                writer.add_strings("lexical.chunk_ids", lexical_ids)
+                for name, array in arrays.items():
+                    writer.add_array(f"lexical.{name}", array)
+
+            document_centroids = index.document_index
+            if document_centroids is not None:
+                doc_ids, centroids = document_centroids.export_arrays()
+                writer.add_strings("documents.doc_ids", doc_ids)
+                writer.add_array("documents.centroids", centroids)
+
+        header = {
+            "version": FORMAT_VERSION,
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "tenant": tenant or vector_store.DEFAULT_TENANT,
+            "embedding_model": vector_store.EMBEDDING_MODEL,
+            "rows": len(chunk_ids),
+            "dim": dim or 0,
+        }
+        writer.close(header)
+        os.replace(tmp, path)
+    except BaseException:
+        if not writer.file.closed:
+            writer.file.close()
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    return header
+
+
+def _marker_path(index) -> str:
+    return os.path.join(index.path, MARKER_NAME)
+
+
+def imported_checksum(tenant: Optional[str] = None) -> Optional[str]:
+    """이 테넌트에 마지막으로 가져온 스냅샷의 체크섬 (없으면 None)"""
+    with vector_store.open_tenant(tenant) as index:
+        try:
+            with open(_marker_path(index), encoding="utf-8") as f:
+                return json.load(f).get("checksum")
+        except (OSError, ValueError):
+            return None
+
+
+def import_snapshot(path: str, tenant: Optional[str] = None, force: bool = False) -> dict:
+    """
+    스냅샷으로 테넌트 인덱스 전체를 교체 (임베딩/색인어 추출 없이 저장된 배열을 그대로 씀)
+
+    - 같은 스냅샷을 이미 가져왔으면 건너뜀 (force=True면 다시 가져옴)
+    - 임베딩 모델이 다르면 거부 (질문 임베딩과 비교할 수 없음)
+
+    Returns:
+        {"rows", "skipped", "seconds"}
+    """
+    start = time.perf_counter()
+    snapshot = Snapshot(path)
+    try:
+        header = snapshot.header
+        if header["embedding_model"] != vector_store.EMBEDDING_MODEL:
+            raise SnapshotError(
+                f"임베딩 모델 불일치: 스냅샷 {header['embedding_model']} / 서버 {vector_store.EMBEDDING_MODEL}"
+            )
+        if not force and imported_checksum(tenant) == snapshot.checksum:
+            return {"rows": header["rows"], "skipped": True, "seconds": time.perf_counter() - start}
+
+        # 서버의 업로드 색인 작업/CLI 색인과 동시에 쓰지 않음
+        lock = vector_store.write_lock()
+        if not lock.acquire(blocking=False):
+            raise SnapshotError("다른 프로세스가 색인 중입니다 (잠시 후 다시 시도)")
+        try:
+            with vector_store.open_tenant(tenant) as index:
+                client, collection = index.vector_client, index.collection
+                existing = client.get(include=[])["ids"]
+                with vector_store.suppress_stderr():
+                    for i in range(0, len(existing), BATCH_SIZE):
+                        client.delete(ids=existing[i:i + BATCH_SIZE])
+
+                embeddings = snapshot.array("embeddings")
+                for i in range(0, header["rows"], BATCH_SIZE):
+                    records = snapshot.records(i, min(i + BATCH_SIZE, header["rows"]))
+                    batch = np.asarray(embeddings[i:i + len(records)])
+                    collection.upsert(
+                        ids=[record[0] for record in records],
+                        # Chroma는 리스트만 받음, NumpyIndex는 배열 그대로 (변환 비용 없음)
+                        embeddings=batch if vector_store.VECTOR_BACKEND == "numpy" else batch.tolist(),
+                        metadatas=[record[2] for record in records],
+                        documents=[record[1] for record in records],
+                    )
+                client.persist()
+
+                lexical = index.lexical_index
+                if lexical is not None:
+                    if "lexical.chunk_ids" in snapshot:
+                        lexical.restore(
+                            snapshot.strings("lexical.chunk_ids"),
+                            {name: np.asarray(snapshot.array(f"lexical.{name}"))
+                             for name in ("doc_len", "hashes", "offsets", "docs", "weights")},
+                        )
+                    else:  # HYBRID_SEARCH를 끄고 내보낸 스냅샷 → 본문으로 새로 구축
+                        stored = client.get(include=["documents"])
+                        lexical.rebuild(stored["ids"], stored["documents"])
+
+                document_centroids = index.document_index
+                if document_centroids is not None:
+                    if "documents.doc_ids" in snapshot:
+                        centroids = zip(snapshot.strings("documents.doc_ids"), np.asarray(snapshot.array("documents.centroids")))
+                    else:
+                        records = snapshot.records(0, header["rows"])
+                        centroids = centroids_from(
+                            [(record[2] or {}).get("doc_id", "") for record in records], np.asarray(embeddings),
+                        ).items()
+                    with index.dirty_lock:
+                        index.dirty_documents.clear()
+                    document_centroids.rebuild(centroids)
+
+                marker = _marker_path(index)
+                os.makedirs(os.path.dirname(marker), exist_ok=True)
+                with open(marker, "w", encoding="utf-8") as f:
+                    json.dump({"checksum": snapshot.checksum, "path": os.path.abspath(path),
+                               "created_at": header["created_at"], "rows": header["rows"]}, f, ensure_ascii=False)
+        finally:
+            lock.release()
+    finally:
+        snapshot.close()
+
+    vector_store._notify_change(None, tenant)  # 예전 인덱스 기준 답변 캐시 비우기
+    return {"rows": header["rows"], "skipped": False, "seconds": time.perf_counter() - start}
+
+
+def import_on_startup() -> Optional[dict]:
+    """SNAPSHOT_PATH가 있으면 기본 테넌트로 가져오기 (서버 시작 시, 블로킹)"""
+    if not SNAPSHOT_PATH:
+        return None
+    if not os.path.exists(SNAPSHOT_PATH):
+        print(f"⚠️  스냅샷 파일이 없습니다: {SNAPSHOT_PATH}")
+        return None
+    result = import_snapshot(SNAPSHOT_PATH)
+    if result["skipped"]:
+        print(f"📦 스냅샷 이미 적용됨: {SNAPSHOT_PATH}")
+    else:
+        print(f"📦 스냅샷 가져오기: {result['rows']}개 청크 ({result['seconds']:.1f}초)")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="벡터 인덱스 스냅샷 내보내기/가져오기")
+    commands = parser.add_subparsers(dest="command", required=True)
+    for name, help_text in (
+        ("export", "실행 중인 인덱스를 스냅샷 파일로 내보내기"),
+        ("import", "스냅샷 파일로 인덱스 교체"),
+        ("info", "스냅샷 헤더 출력 + 체크섬 검사"),
+    ):
+        command = commands.add_parser(name, help=help_text)
+        command.add_argument("path", help="스냅샷 파일 경로")
+        if name != "info":
+            command.add_argument("--tenant", default=None, help="테넌트 (예: kakao:<봇 ID>, 기본: 기본 테넌트)")
+        if name == "import":
+            command.add_argument("--force", action="store_true", help="같은 스냅샷을 이미 가져왔어도 다시 가져오기")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    try:
+        if args.command == "export":
+            header = export_snapshot(args.path, tenant=args.tenant)
+            size = os.path.getsize(args.path) / (1 << 20)
+            print(f"✅ 스냅샷 내보내기: {header['rows']}개 청크, {size:.1f}MB ({time.perf_counter() - start:.1f}초)")
+        elif args.command == "import":
+            result = import_snapshot(args.path, tenant=args.tenant, force=args.force)
+            vector_store.close_tenants()
+            if result["skipped"]:
+                print("ℹ️  같은 스냅샷을 이미 가져왔습니다 (--force로 다시 가져오기)")
+            else:
+                print(f"✅ 스냅샷 가져오기: {result['rows']}개 청크 ({result['seconds']:.1f}초)")
+        else:
+            snapshot = Snapshot(args.path)
+            header = {key: value for key, value in snapshot.header.items() if key != "sections"}
+            print(json.dumps({**header, "checksum": snapshot.checksum, "sections": sorted(snapshot.sections)},
+                             ensure_ascii=False, indent=2))
+            snapshot.close()
+    except SnapshotError as e:
+        print(f"❌ {e}")
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+import asyncio
+import time
+import traceback
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Hashable, List, Optional
+
+from app import metrics
+
+QUEUE_DEPTH = metrics.register(metrics.Gauge(
+    "rag_queue_depth", "Updates waiting in the background queue", ("queue",),
+))
+QUEUE_BUSY_WORKERS = metrics.register(metrics.Gauge(
+    "rag_queue_busy_workers", "Workers currently handling an update", ("queue",),
+))
+QUEUE_REJECTED_TOTAL = metrics.register(metrics.Counter(
+    "rag_queue_rejected_total", "Updates not enqueued (queue full or duplicate update id)", ("queue", "reason"),
+))
+QUEUE_WAIT_SECONDS = metrics.register(metrics.Histogram(
+    "rag_queue_wait_seconds", "Time an update waited in the queue before a worker picked it up", ("queue",),
+))
+
+
+class UpdateQueue:
+    """
+    웹훅 업데이트 처리 큐 (바로 응답하고 답변은 백그라운드 작업자가 처리)
+
+    - 작업자 workers개 → GPT 호출 동시 실행 수 제한
+    - 큐가 max_size개로 가득 차면 받지 않음 (웹훅은 오류를 응답해 나중에 다시 받음 = 역압)
+    - 최근 dedup_size개 키(update_id)는 다시 들어와도 무시 (재전송된 업데이트)
+
+    handler(item)는 상태 문자열("ok", "error" 등)을 반환하며, 큐 이름으로 요청별 측정이 기록됩니다.
+    """
+
+    def __init__(self, name: str, handler: Callable[[Any], Awaitable[str]], workers: int, max_size: int, dedup_size: int = 10000):
+        self.name = name
+        self.handler = handler
+        self.workers = workers
+        self.max_size = max_size
+        self.dedup_size = dedup_size
+        self._seen: "OrderedDict[Hashable, None]" = OrderedDict()
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._loop = None
+        self._busy = 0
+
+    def start(self):
+        """작업자 시작 (이미 이 이벤트 루프에서 실행 중이면 그대로)"""
+        loop = asyncio.get_running_loop()
+        if self._loop is loop and self._tasks:
+            return
+        self._loop = loop
+        self._queue = asyncio.Queue(maxsize=self.max_size)
+        self._tasks = [asyncio.ensure_future(self._worker()) for _ in range(self.workers)]
+        self._busy = 0
+        self._update_gauges()
+
+    def submit(self, key: Hashable, item: Any) -> str:
+        """
+        업데이트 추가
+
+        Returns:
+            "accepted" | "duplicate" (이미 받은 키) | "full" (큐가 가득 참)
+        """
+        self.start()
+        if key in self._seen:
+            self._seen.move_to_end(key)
+            QUEUE_REJECTED_TOTAL.inc(1, self.name, "duplicate")
+            return "duplicate"
+        try:
+            self._queue.put_nowait((time.perf_counter(), item))
+        except asyncio.QueueFull:
+            # 키를 기억하지 않으므로 재전송되면 다시 받을 수 있음
+            QUEUE_REJECTED_TOTAL.inc(1, self.name, "full")
+            return "full"
+        self._seen[key] = None
+        if len(self._seen) > self.dedup_size:
+            self._seen.popitem(last=False)
+        self._update_gauges()
+        return "accepted"
+
+    async def _worker(self):
+        while True:
+            enqueued_at, item = await self._queue.get()
+            self._busy += 1
+            self._update_gauges()
+            wait = time.perf_counter() - enqueued_at
+            QUEUE_WAIT_SECONDS.observe(wait, self.name)
+            timer = metrics.start_request(self.name)
+            metrics.record("queue_wait", wait)
+            status = "error"
+            try:
+                status = await self.handler(item)
+            except Exception as e:
+                print(f"❌ {self.name} 업데이트 처리 에러: {e}")
+                traceback.print_exc()
+            finally:
+                timer.finish(status)
+                self._busy -= 1
+                self._queue.task_done()
+                self._update_gauges()
+
+    def _update_gauges(self):
+        QUEUE_DEPTH.set(self._queue.qsize() if self._queue else 0, self.name)
+        QUEUE_BUSY_WORKERS.set(self._busy, self.name)
+
+    async def stop(self, timeout: float = 10.0):
+        """서버 종료 시 남은 업데이트를 timeout초까지 처리하고 작업자 종료"""
+        if not self._tasks or self._loop is not asyncio.get_running_loop():
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+        except asyncio.TimeoutError:
+            print(f"⚠️ {self.name} 큐에 남은 업데이트 {self._queue.qsize()}개를 처리하지 못하고 종료")
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
@@ -2,12 +2,23 @@ import warnings
 import logging
 import sys
 import os
+import asyncio
+import hashlib
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import contextmanager
-from langchain_openai import OpenAIEmbeddings
-from langchain_community.vectorstores import Chroma
+from functools import partial
 from langchain.schema import Document
-from typing import List, Tuple
-from dotenv import load_dotenv
+from typing import Callable, Dict, Iterator, List, Optional, Set, Tuple
+from app import metrics, write_lock as _write_lock
+from app.embedding_cache import CachedEmbeddings, wrap_embeddings
+from app.document_index import DocumentIndex, centroids_from
+from app.lexical_index import LexicalIndex, reciprocal_rank_fusion
+from app.ranking import cosine_scores, rank
+import numpy as np
 
 # ChromaDB 텔레메트리 경고 무시
 warnings.filterwarnings("ignore", category=UserWarning, module="chromadb")
@@ -31,121 +42,699 @@ def suppress_stderr():
     finally:
         sys.stderr = original_stderr
 
-load_dotenv()
+EMBEDDING_MODEL = "text-embedding-3-small"  # 비용 절감형
+COLLECTION_NAME = "rag_documents"
 
-# 임베딩 모델 초기화
-embedding = OpenAIEmbeddings(
-    model="text-embedding-3-small",  # 비용 절감형
-    openai_api_key=os.getenv("OPENAI_API_KEY")
-)
+# 벡터 인덱스 백엔드
+# - chroma (기본): Chroma 영구 저장소
+# - numpy: 메모리 맵 파일 기반 인덱스 (워커 간 페이지 캐시 공유, NUMPY_INDEX_DTYPE=int8로 양자화 가능)
+VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "chroma").lower()
+if VECTOR_BACKEND == "numpy":
+    INDEX_PATH = os.getenv("NUMPY_INDEX_PATH", "./vector_index")
+else:
+    INDEX_PATH = os.getenv("VECTOR_DB_PATH", "./chroma")
+
+# 하이브리드 검색 (BM25 + 벡터)
+# - 임베딩 검색이 놓치는 제품 코드/고유명사를 한국어 BM25 역색인으로 보완
+# - 청크를 저장/삭제할 때 함께 갱신, 기존 컬렉션은 `python -m app.lexical_index`로 한 번 구축
+HYBRID_SEARCH = os.getenv("HYBRID_SEARCH", "true").lower() == "true"
+
+# 2단계 검색 (문서 대표 벡터로 상위 문서를 고른 뒤 그 문서 안에서만 청크 검색)
+# - 문서 대표 벡터(청크 임베딩 평균)는 청크를 저장/삭제할 때 _persist()에서 함께 갱신
+# - 청크가 TWO_STAGE_MIN_CHUNKS개 이상일 때만 사용 (작은 컬렉션은 전체 검색이 정확하고 충분히 빠름)
+# - 기존 컬렉션은 `python -m app.document_index`로 한 번 구축
+# - 기본은 꺼짐: 질문과 다른 주제의 문단은 문서 대표 벡터로 찾기 어려워 recall@10이 0.7~0.8로 떨어지고,
+#   Chroma(HNSW)에서는 $in 필터 때문에 전체 검색보다 느림 (benchmarks/bench_two_stage.py)
+#   → 전수 검색이 병목인 NumPy 백엔드에서 recall 손실을 감수할 때만 켜세요
+TWO_STAGE_SEARCH = os.getenv("TWO_STAGE_SEARCH", "false").lower() == "true"
+TWO_STAGE_DOCS = int(os.getenv("TWO_STAGE_DOCS", "20"))  # 1단계에서 고를 문서 수
+TWO_STAGE_MIN_CHUNKS = int(os.getenv("TWO_STAGE_MIN_CHUNKS", "100000"))
+_dirty_documents: Set[str] = set()  # 대표 벡터를 다시 계산할 문서
+_dirty_lock = threading.Lock()
+
+# 프로세스 전역 객체 (get_*()로 처음 쓸 때 생성, 서버는 시작할 때 warmup()에서 미리 생성)
+# - OpenAI 클라이언트/Chroma는 import와 생성에 수 초가 걸려서 모듈 import 시점에 만들지 않음
+#   → 검색을 안 쓰는 테스트/CLI는 비용을 내지 않고, 서버는 요청을 받기 전에 한 번만 냄
+# - 테스트/벤치마크는 이 변수들을 직접 바꿔서 대역을 넣을 수 있음
+# - lexical_index/document_index는 기능이 꺼져 있으면 None이므로 "아직 안 만듦"은 _UNSET으로 구분
+_UNSET = object()
+embedding = _UNSET       # 질문/청크 임베딩 (OpenAI + 디스크 캐시)
+vector_client = _UNSET   # Chroma 또는 NumpyIndex
+lexical_index = _UNSET   # BM25 역색인 (HYBRID_SEARCH가 꺼져 있으면 None)
+document_index = _UNSET  # 문서 대표 벡터 (TWO_STAGE_SEARCH가 꺼져 있으면 None)
+_init_lock = threading.RLock()  # 여러 스레드(검색 스레드 풀 등)가 동시에 처음 쓸 때 한 번만 생성
+
+def _singleton(name: str, create: Callable):
+    value = globals()[name]
+    if value is _UNSET:
+        with _init_lock:
+            value = globals()[name]
+            if value is _UNSET:
+                value = create()
+                globals()[name] = value
+    return value
 
-# Chroma 벡터 DB 클라이언트 초기화 (텔레메트리 오류 억제)
-with suppress_stderr():
-    vector_client = Chroma(
-        collection_name="rag_documents",
-        embedding_function=embedding,
-        persist_directory=os.getenv("VECTOR_DB_PATH", "./chroma"),
+def _create_embedding():
+    # 임베딩 모델 초기화
+    # - 디스크 캐시로 감싸서 같은 텍스트는 다시 임베딩하지 않음
+    # - EMBEDDING_CACHE_PATH를 빈 값으로 두면 캐시 비활성화
+    from langchain_openai import OpenAIEmbeddings
+    return wrap_embeddings(
+        OpenAIEmbeddings(
+            model=EMBEDDING_MODEL,
+            openai_api_key=os.getenv("OPENAI_API_KEY")
+        ),
+        model_name=EMBEDDING_MODEL,
+        path=os.getenv("EMBEDDING_CACHE_PATH", "./embedding_cache.sqlite3"),
+        max_entries=int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "200000")),
     )
 
-def add_documents(chunks: List[Document], clear_existing: bool = False):
+def _create_vector_client(collection_name: str = COLLECTION_NAME, path: str = INDEX_PATH):
+    if VECTOR_BACKEND == "numpy":
+        from app.numpy_index import NumpyIndex
+        return NumpyIndex(
+            path=path,
+            embedding_function=get_embedding(),
+            dtype=os.getenv("NUMPY_INDEX_DTYPE", "float32"),
+        )
+    
+    from langchain_community.vectorstores import Chroma
+    # Chroma 벡터 DB 클라이언트 초기화 (텔레메트리 오류 억제)
+    with suppress_stderr():
+        return Chroma(
+            collection_name=collection_name,
+            embedding_function=get_embedding(),
+            persist_directory=INDEX_PATH,
+        )
+
+def get_embedding():
+    return _singleton("embedding", _create_embedding)
+
+def get_vector_client():
+    return _singleton("vector_client", _create_vector_client)
+
+def get_lexical_index() -> Optional[LexicalIndex]:
+    return _singleton("lexical_index", lambda: (
+        LexicalIndex(os.getenv("LEXICAL_INDEX_PATH", os.path.join(INDEX_PATH, "lexical")))
+        if HYBRID_SEARCH else None
+    ))
+
+def get_document_index() -> Optional[DocumentIndex]:
+    return _singleton("document_index", lambda: (
+        DocumentIndex(os.getenv("DOCUMENT_INDEX_PATH", os.path.join(INDEX_PATH, "documents")))
+        if TWO_STAGE_SEARCH else None
+    ))
+
+# ----- 멀티 테넌트 -----
+# 카카오 채널/텔레그램 봇마다 문서를 따로 색인하고 검색 (다른 테넌트의 청크는 검색 결과에 섞이지 않음)
+# - 테넌트를 지정하지 않으면 기본 테넌트 = 위의 전역 객체 (단일 테넌트 배포와 동일한 컬렉션/경로)
+# - 다른 테넌트: Chroma 컬렉션 rag_documents-{slug} (같은 저장소),
+#   NumPy 인덱스/BM25 역색인/문서 대표 벡터는 {INDEX_PATH}/tenants/{slug}/
+# - 처음 쓸 때 열고, 최근에 쓴 TENANT_CACHE_SIZE개까지만 열어 둠 (LRU)
+#   → 테넌트 수가 늘어도 메모리에 올라간 인덱스 수는 일정
+# - 임베딩 모델/캐시는 모든 테넌트가 공유 (같은 텍스트면 같은 벡터)
+DEFAULT_TENANT = "default"
+TENANT_CACHE_SIZE = int(os.getenv("TENANT_CACHE_SIZE", "32"))
+
+OPEN_TENANTS = metrics.register(metrics.Gauge(
+    "rag_open_tenants", "Tenant indexes currently open (bounded by TENANT_CACHE_SIZE)",
+))
+
+def tenant_slug(tenant: str) -> str:
+    """테넌트 ID → 컬렉션/디렉터리 이름 (Chroma 컬렉션 이름 규칙: 영문/숫자/-_, 63자 이하)"""
+    readable = re.sub(r"[^A-Za-z0-9_-]+", "-", tenant).strip("-_")[:32]
+    digest = hashlib.sha256(tenant.encode("utf-8")).hexdigest()[:12]
+    return f"{readable}-{digest}" if readable else digest
+
+class TenantIndex:
+    """
+    테넌트 하나의 검색 객체 (벡터 인덱스, BM25 역색인, 문서 대표 벡터)
+
+    각 객체는 처음 쓸 때 생성하고, LRU에서 밀려나면 close()로 디스크에 반영한 뒤 내림
+    """
+
+    def __init__(self, tenant: str):
+        self.tenant = tenant
+        slug = tenant_slug(tenant)
+        self.collection_name = f"{COLLECTION_NAME}-{slug}"
+        self.path = os.path.join(INDEX_PATH, "tenants", slug)
+        self.dirty_documents: Set[str] = set()  # 대표 벡터를 다시 계산할 문서
+        self.dirty_lock = threading.Lock()
+        self.users = 0  # 사용 중인 작업 수 (0일 때만 LRU에서 내림)
+        self._objects: Dict[str, object] = {}
+        self._lock = threading.Lock()
+
+    def _get(self, name: str, create: Callable):
+        value = self._objects.get(name, _UNSET)
+        if value is _UNSET:
+            with self._lock:
+                value = self._objects.get(name, _UNSET)
+                if value is _UNSET:
+                    value = self._objects[name] = create()
+        return value
+
+    @property
+    def vector_client(self):
+        path = os.path.join(self.path, "vectors") if VECTOR_BACKEND == "numpy" else INDEX_PATH
+        return self._get("vector_client", lambda: _create_vector_client(self.collection_name, path))
+
+    @property
+    def lexical_index(self) -> Optional[LexicalIndex]:
+        return self._get("lexical_index", lambda: (
+            LexicalIndex(os.path.join(self.path, "lexical")) if HYBRID_SEARCH else None
+        ))
+
+    @property
+    def document_index(self) -> Optional[DocumentIndex]:
+        return self._get("document_index", lambda: (
+            DocumentIndex(os.path.join(self.path, "documents")) if TWO_STAGE_SEARCH else None
+        ))
+
+    @property
+    def collection(self):
+        """Chroma면 내부 컬렉션, NumPy 인덱스면 그대로 (query/get/upsert 형식이 같음)"""
+        client = self.vector_client
+        return getattr(client, "_collection", client)
+
+    def mark_dirty(self, doc_ids):
+        if self.document_index is not None:
+            with self.dirty_lock:
+                self.dirty_documents.update(doc_ids)
+
+    def persist(self):
+        """벡터 인덱스, BM25 역색인, 문서 대표 벡터를 디스크에 반영"""
+        self.vector_client.persist()
+        lexical = self.lexical_index
+        if lexical is not None:
+            lexical.persist()
+        if self.document_index is not None:
+            self._update_document_index()
+
+    def _update_document_index(self):
+        """바뀐 문서의 대표 벡터를 저장된 청크 임베딩으로 다시 계산 (청크가 없으면 삭제)"""
+        with self.dirty_lock:
+            dirty = sorted(self.dirty_documents)
+            self.dirty_documents.clear()
+        if not dirty:
+            return
+        collection, document_centroids = self.collection, self.document_index
+        for start in range(0, len(dirty), 100):
+            batch = dirty[start:start + 100]
+            stored = collection.get(where={"doc_id": {"$in": batch}}, include=["metadatas", "embeddings"])
+            centroids = centroids_from([(meta or {}).get("doc_id", "") for meta in stored["metadatas"]], stored["embeddings"])
+            document_centroids.update({doc_id: centroids.get(doc_id) for doc_id in batch})
+        document_centroids.persist()
+
+    def close(self):
+        """남은 변경을 디스크에 반영하고 메모리에 올린 인덱스를 내림 (다음에 쓰면 다시 로드)"""
+        if "vector_client" in self._objects:  # 벡터 인덱스를 연 적이 없으면 쓴 것도 없음
+            self.persist()
+            _release_collection(self._objects["vector_client"])
+        self._objects = {}
+
+class _DefaultTenant(TenantIndex):
+    """기본 테넌트: 모듈 전역 객체 사용 (get_*(), 테스트/벤치마크가 바꿔 넣은 대역 포함)"""
+
+    def __init__(self):
+        super().__init__(DEFAULT_TENANT)
+        self.collection_name = COLLECTION_NAME
+        self.path = INDEX_PATH
+        self.dirty_documents = _dirty_documents
+        self.dirty_lock = _dirty_lock
+
+    @property
+    def vector_client(self):
+        return get_vector_client()
+
+    @property
+    def lexical_index(self) -> Optional[LexicalIndex]:
+        return get_lexical_index()
+
+    @property
+    def document_index(self) -> Optional[DocumentIndex]:
+        return get_document_index()
+
+    def close(self):
+        pass  # 프로세스가 끝날 때까지 열어 둠
+
+_default_tenant = _DefaultTenant()
+_tenants: "OrderedDict[str, TenantIndex]" = OrderedDict()  # 최근에 쓴 순서
+_tenants_lock = threading.Lock()
+
+def _release_collection(client):
+    """
+    Chroma가 메모리에 올려 둔 컬렉션 세그먼트(HNSW 인덱스 등)를 내림
+
+    Chroma 0.4는 한 번 연 컬렉션을 프로세스가 끝날 때까지 들고 있으므로 직접 내림
+    (다음에 쓰면 디스크에서 다시 로드하고, 인덱스에 아직 반영 안 된 쓰기는 쓰기 로그에서 다시 적용)
+    NumPy 인덱스는 객체를 버리면 메모리 맵도 닫히므로 할 일 없음
+    """
+    collection = getattr(client, "_collection", None)
+    if collection is None:
+        return
+    try:
+        manager = collection._client._manager  # SegmentAPI → LocalSegmentManager
+        with manager._lock:
+            segments = manager._segment_cache.pop(collection.id, {})
+            handles = getattr(manager, "_vector_instances_file_handle_cache", None)
+            if handles is not None:
+                handles.cache.pop(collection.id, None)
+            instances = [manager._instances.pop(segment["id"], None) for segment in segments.values()]
+        for instance in instances:
+            if instance is not None:
+                instance.stop()
+    except Exception as e:  # Chroma 내부 구조가 바뀌면 메모리만 덜 줄어듦
+        print(f"⚠️  컬렉션 {collection.name} 세그먼트 해제 실패: {e}")
+
+def _evict_locked():
+    """사용 중이 아닌 테넌트를 오래된 순서로 TENANT_CACHE_SIZE개가 될 때까지 내림 (_tenants_lock 안에서 호출)"""
+    for tenant in list(_tenants):
+        if len(_tenants) <= TENANT_CACHE_SIZE:
+            break
+        index = _tenants[tenant]
+        if index.users == 0:
+            del _tenants[tenant]
+            # 락 안에서 닫음 → 같은 테넌트를 다시 열 때 디스크에 반영이 끝난 뒤 로드
+            index.close()
+
+@contextmanager
+def open_tenant(tenant: Optional[str] = None) -> Iterator[TenantIndex]:
+    """
+    테넌트 검색 객체 사용 (블록 안에서는 LRU에서 내리지 않음)
+
+        with open_tenant("kakao:bot-1") as index:
+            index.collection.query(...)
+
+    tenant가 None이거나 DEFAULT_TENANT면 기본 테넌트
+    """
+    if tenant is None or tenant == DEFAULT_TENANT:
+        yield _default_tenant
+        return
+    with _tenants_lock:
+        index = _tenants.get(tenant)
+        if index is None:
+            index = _tenants[tenant] = TenantIndex(tenant)
+        _tenants.move_to_end(tenant)
+        index.users += 1
+        _evict_locked()
+        OPEN_TENANTS.set(len(_tenants))
+    try:
+        yield index
+    finally:
+        with _tenants_lock:
+            index.users -= 1
+            _evict_locked()
+            OPEN_TENANTS.set(len(_tenants))
+
+def open_tenants() -> List[str]:
+    """지금 열려 있는 테넌트 (오래된 순서, 기본 테넌트 제외)"""
+    with _tenants_lock:
+        return list(_tenants)
+
+def close_tenants():
+    """열린 테넌트를 모두 디스크에 반영하고 내림 (서버 종료 시)"""
+    with _tenants_lock:
+        while _tenants:
+            _, index = _tenants.popitem(last=False)
+            index.close()
+        OPEN_TENANTS.set(0)
+
+# 검색 후보 수 (벡터/BM25 각각)
+# - k개보다 넉넉히 가져와서 중복 제거/MMR 후 k개를 고름
+SEARCH_CANDIDATES = int(os.getenv("SEARCH_CANDIDATES", "20"))
+
+# Chroma 조회 전용 스레드 풀
+# - Chroma 쿼리는 동기(블로킹) 호출이므로 이벤트 루프 밖에서 실행
+# - 워커 수를 제한해서 동시 요청이 몰려도 스레드가 무한히 늘어나지 않게 함
+SEARCH_WORKERS = int(os.getenv("SEARCH_WORKERS", "8"))
+_search_executor = ThreadPoolExecutor(
+    max_workers=SEARCH_WORKERS,
+    thread_name_prefix="chroma-search",
+)
+
+# 컬렉션 변경 알림 (답변 캐시 무효화 등)
+# - listener(doc_ids, tenant): 변경된 doc_id 집합(전체 초기화 시 None), 테넌트(기본 테넌트는 None)
+_change_listeners: List[Callable[[Optional[Set[str]], Optional[str]], None]] = []
+
+def on_collection_change(listener: Callable[[Optional[Set[str]], Optional[str]], None]):
+    """add_documents()/upsert_document()/delete_document()로 컬렉션이 바뀔 때 호출할 함수 등록"""
+    _change_listeners.append(listener)
+
+def change_stamp_path(tenant: Optional[str] = None) -> str:
+    """
+    테넌트의 변경 표시 파일 ({INDEX_PATH}/changes/{slug})
+
+    컬렉션이 바뀔 때마다 1바이트씩 덧붙임 → 다른 프로세스(서버)는 파일 크기/수정 시각이 바뀐 것을 보고
+    자기 답변 캐시를 비움 (CLI 색인은 서버의 리스너를 직접 부를 수 없음)
+    """
+    return os.path.join(INDEX_PATH, "changes", tenant_slug(tenant or DEFAULT_TENANT))
+
+def _touch_change_stamp(tenant: Optional[str]):
+    path = change_stamp_path(tenant)
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "ab") as f:
+            f.write(b".")
+    except OSError as e:
+        print(f"⚠️  변경 표시 파일 기록 실패: {e}")
+
+def _notify_change(doc_ids: Optional[Set[str]], tenant: Optional[str] = None):
+    if tenant == DEFAULT_TENANT:
+        tenant = None
+    _touch_change_stamp(tenant)
+    for listener in _change_listeners:
+        try:
+            listener(doc_ids, tenant)
+        except Exception as e:
+            print(f"⚠️  컬렉션 변경 알림 실패: {e}")
+
+def chunk_id(chunk: Document) -> str:
+    """
+    청크의 고정 ID: "{doc_id}:{페이지 + 내용 해시}"
+    
+    같은 문서의 같은 내용은 항상 같은 ID → 다시 색인해도 중복 저장되지 않고,
+    바뀐 청크만 새로 임베딩됩니다.
+    페이지 번호도 해시에 포함 → 페이지가 밀리면 출처 페이지가 갱신되도록 다시 저장
+    (임베딩은 임베딩 캐시에서 재사용)
+    """
+    doc_id = chunk.metadata.get("doc_id", "")
+    page = chunk.metadata.get("page", "")
+    digest = hashlib.sha256(f"{page}\0{chunk.page_content}".encode("utf-8")).hexdigest()[:16]
+    return f"{doc_id}:{digest}"
+
+def _unique_chunks(chunks: List[Document]) -> Dict[str, Document]:
+    """{chunk_id: 청크} (같은 문서 안의 동일한 청크는 하나만)"""
+    unique = {}
+    for chunk in chunks:
+        unique.setdefault(chunk_id(chunk), chunk)
+    return unique
+
+def _existing_ids(where: Optional[dict] = None, tenant: Optional[str] = None, ids: Optional[List[str]] = None) -> Set[str]:
+    """컬렉션에 저장된 청크 ID (where: 메타데이터 필터, ids: 이 중 저장된 것만)"""
+    with open_tenant(tenant) as index:
+        return set(index.vector_client.get(ids=ids, where=where, include=[])["ids"])
+
+def _write_chunks(chunks: Dict[str, Document], tenant: Optional[str] = None):
+    """청크 저장 (이미 있는 ID는 덮어씀)"""
+    if not chunks:
+        return
+    with open_tenant(tenant) as index:
+        index.vector_client.add_texts(
+            texts=[chunk.page_content for chunk in chunks.values()],
+            metadatas=[chunk.metadata for chunk in chunks.values()],
+            ids=list(chunks.keys()),
+        )
+        lexical = index.lexical_index
+        if lexical is not None:
+            lexical.add(list(chunks.keys()), [chunk.page_content for chunk in chunks.values()])
+        index.mark_dirty(chunk.metadata.get("doc_id", "") for chunk in chunks.values())
+
+def upsert_vectors(ids: List[str], embeddings: List[List[float]], metadatas: List[dict], documents: List[str], tenant: Optional[str] = None):
+    """이미 임베딩된 청크 저장 (대량 색인용, 백엔드에 상관없이 같은 방식)"""
+    with open_tenant(tenant) as index:
+        index.collection.upsert(ids=ids, embeddings=embeddings, metadatas=metadatas, documents=documents)
+        lexical = index.lexical_index
+        if lexical is not None:
+            lexical.add(ids, documents)
+        index.mark_dirty((meta or {}).get("doc_id", "") for meta in metadatas)
+
+def _delete_ids(ids: List[str], tenant: Optional[str] = None):
+    if ids:
+        with open_tenant(tenant) as index:
+            with suppress_stderr():  # 삭제 시 텔레메트리 오류 메시지 억제
+                index.vector_client.delete(ids=list(ids))
+            lexical = index.lexical_index
+            if lexical is not None:
+                lexical.delete(list(ids))
+            index.mark_dirty(cid.rsplit(":", 1)[0] for cid in ids)  # 청크 ID = "{doc_id}:{해시}"
+
+def write_lock() -> _write_lock.WriteLock:
+    """
+    인덱스 쓰기 잠금 (프로세스 간, {INDEX_PATH}/.write.lock)
+
+    서버의 업로드 색인 작업과 `python -m app.ingest`/스냅샷 가져오기가 동시에 쓰지 않도록
+    쓰는 쪽에서 acquire()/release()로 감쌈
+    """
+    return _write_lock.get_lock(os.path.join(INDEX_PATH, ".write.lock"))
+
+def _persist(tenant: Optional[str] = None):
+    """벡터 인덱스, BM25 역색인, 문서 대표 벡터를 디스크에 반영"""
+    with open_tenant(tenant) as index:
+        index.persist()
+
+def _cache_snapshot():
+    cache = get_embedding()
+    return cache.stats() if isinstance(cache, CachedEmbeddings) else None
+
+def _report_cache(before):
+    if before is None:
+        return
+    stats = get_embedding().stats()
+    hits = stats["hits"] - before["hits"]
+    misses = stats["misses"] - before["misses"]
+    print(f"💾 임베딩 캐시: 적중 {hits}개 / 신규 임베딩 {misses}개")
+
+def add_documents(chunks: List[Document], clear_existing: bool = False, tenant: Optional[str] = None):
     """
     청크를 벡터 DB에 저장
     
     Args:
         chunks: 저장할 Document 리스트
         clear_existing: 기존 데이터 삭제 여부 (테스트 시 중복 방지용)
+                        컬렉션을 지우고 다시 만들지 않고, 새 청크를 먼저 저장한 뒤
+                        나머지 청크만 삭제하므로 검색이 중단되지 않습니다.
+        tenant: 저장할 테넌트 (None이면 기본 테넌트)
     """
-    global vector_client  # 함수 시작 부분에 global 선언
-    
-    # 기존 데이터 삭제 (테스트 시 중복 방지)
-    if clear_existing:
-        try:
-            # ChromaDB 컬렉션 초기화
-            with suppress_stderr():
-                vector_client.delete_collection()
-                # 새로 생성
-                vector_client = Chroma(
-                    collection_name="rag_documents",
-                    embedding_function=embedding,
-                    persist_directory=os.getenv("VECTOR_DB_PATH", "./chroma"),
-                )
-            print("🗑️  기존 벡터 DB 데이터 삭제됨")
-        except Exception as e:
-            print(f"⚠️  컬렉션 삭제 실패 (이미 비어있을 수 있음): {e}")
+    unique = _unique_chunks(chunks)
+    stale = _existing_ids(tenant=tenant) - set(unique) if clear_existing else set()
     
-    vector_client.add_documents(chunks)
-    vector_client.persist()
+    cache_before = _cache_snapshot()
+    _write_chunks(unique, tenant)
+    _persist(tenant)
     print(f"✅ {len(chunks)}개 청크를 벡터 DB에 저장했습니다.")
+    _report_cache(cache_before)
+    
+    if stale:
+        _delete_ids(sorted(stale), tenant)
+        print(f"🗑️  기존 청크 {len(stale)}개 삭제됨")
+    
+    changed = None if clear_existing else {chunk.metadata.get("doc_id") for chunk in chunks}
+    _notify_change(changed, tenant)
+
+def upsert_document(doc_id: str, chunks: List[Document], tenant: Optional[str] = None) -> dict:
+    """
+    문서 단위 증분 색인 (parse_pdf가 넣어 둔 doc_id 메타데이터 기준)
+    
+    - 새로 생겼거나 내용이 바뀐 청크만 임베딩/저장
+    - 문서에서 사라진 청크는 삭제
+    - 다른 문서와 컬렉션은 건드리지 않음 → 10k 문서 중 하나를 고쳐도 몇 초면 끝
+    
+    Returns:
+        {"added": 추가된 청크 수, "deleted": 삭제된 청크 수, "unchanged": 그대로인 청크 수}
+    """
+    for chunk in chunks:
+        chunk.metadata["doc_id"] = doc_id
+    
+    unique = _unique_chunks(chunks)
+    existing = _existing_ids({"doc_id": doc_id}, tenant)
+    to_add = {cid: chunk for cid, chunk in unique.items() if cid not in existing}
+    to_delete = existing - set(unique)
+    
+    # 추가 먼저, 삭제는 나중에 → 갱신 중에도 문서가 비어 보이지 않음
+    cache_before = _cache_snapshot()
+    _write_chunks(to_add, tenant)
+    _delete_ids(sorted(to_delete), tenant)
+    _persist(tenant)
+    _report_cache(cache_before)
+    
+    result = {
+        "added": len(to_add),
+        "deleted": len(to_delete),
+        "unchanged": len(unique) - len(to_add),
+    }
+    print(f"🔄 {doc_id}: 추가 {result['added']} / 삭제 {result['deleted']} / 유지 {result['unchanged']}")
+    
+    if to_add or to_delete:
+        _notify_change({doc_id}, tenant)
+    return result
+
+def prune_document(doc_id: str, keep_ids: Set[str], tenant: Optional[str] = None) -> int:
+    """
+    문서의 청크 중 keep_ids에 없는 것 삭제 (대량 색인 후 사라진 청크 정리용)
+    
+    Returns:
+        삭제된 청크 수
+    """
+    stale = _existing_ids({"doc_id": doc_id}, tenant) - set(keep_ids)
+    _delete_ids(sorted(stale), tenant)
+    _persist(tenant)
+    if stale:
+        _notify_change({doc_id}, tenant)
+    return len(stale)
+
+def delete_document(doc_id: str, tenant: Optional[str] = None) -> int:
+    """
+    문서의 모든 청크 삭제
+    
+    Returns:
+        삭제된 청크 수
+    """
+    ids = _existing_ids({"doc_id": doc_id}, tenant)
+    _delete_ids(sorted(ids), tenant)
+    _persist(tenant)
+    print(f"🗑️  {doc_id}: 청크 {len(ids)}개 삭제됨")
+    
+    if ids:
+        _notify_change({doc_id}, tenant)
+    return len(ids)
 
-def search_documents(query: str, k: int = 5, score_threshold: float = None):
+def search_documents(query: str, k: int = 5, score_threshold: float = None, tenant: Optional[str] = None):
     """
-    질문과 유사한 문서 검색
+    질문과 유사한 문서 검색 (동기 버전)
+
+    async 핸들러 안에서는 이벤트 루프를 막으므로 asearch_documents()를 사용하세요.
     
     Args:
         query: 검색 질문
         k: 반환할 문서 개수
-        score_threshold: 최소 유사도 점수 (None이면 필터링 안 함, 0.0~1.0 범위)
+        score_threshold: 최소 코사인 유사도 (None이면 필터링 안 함, 0.0~1.0 범위)
                         기본값은 None (모든 결과 반환)
+        tenant: 검색할 테넌트 (None이면 기본 테넌트)
     
     Returns:
-        List[Tuple[Document, float]]: (문서, 유사도 점수) 리스트
-    """
-    # ChromaDB의 similarity_search_with_score는 거리(distance)를 반환
-    # 코사인 거리: 0 (완전히 동일) ~ 2 (완전히 반대)
-    # L2 거리: 0 이상의 값 (작을수록 유사)
-    results = vector_client.similarity_search_with_score(
-        query=query,
-        k=k,
-    )
+        List[Tuple[Document, float]]: (문서, 코사인 유사도) 리스트, 중복 제거/MMR을 거친 순위 순서
+    """
+    with metrics.stage("embed"), open_tenant(tenant) as index:
+        query_embedding = index.vector_client.embeddings.embed_query(query)
+    with metrics.stage("search"):
+        return _search(query_embedding, k, score_threshold, query, tenant)
+
+async def asearch_documents(query: str, k: int = 5, score_threshold: float = None, tenant: Optional[str] = None):
+    """
+    질문과 유사한 문서 검색 (비동기 버전)
+
+    - 질문 임베딩: OpenAI 비동기 클라이언트(aembed_query) 사용
+    - Chroma 조회: 전용 스레드 풀(_search_executor)에서 실행
+    → 느린 임베딩/조회가 있어도 같은 워커의 다른 요청이 멈추지 않음
+
+    Args/Returns: search_documents()와 동일
+    """
+    query_embedding = await aembed_query(query)
+    return await asearch_by_vector(query_embedding, k=k, score_threshold=score_threshold, query=query, tenant=tenant)
+
+async def aembed_query(query: str) -> List[float]:
+    """질문 임베딩 (비동기, 임베딩 캐시 적용)"""
+    with metrics.stage("embed"):
+        return await get_embedding().aembed_query(query)
+
+async def asearch_by_vector(query_embedding: List[float], k: int = 5, score_threshold: float = None, query: str = None,
+                            tenant: Optional[str] = None):
+    """
+    이미 계산된 질문 임베딩으로 검색 (답변 캐시 등에서 임베딩을 재사용할 때)
+
+    query(질문 원문)를 함께 주면 하이브리드 검색 (BM25 + 벡터)
+    """
+    loop = asyncio.get_running_loop()
+    # 스레드 풀 대기 시간까지 포함 (요청별 기록은 컨텍스트가 있는 이벤트 루프 쪽에서 측정)
+    with metrics.stage("search"):
+        return await loop.run_in_executor(
+            _search_executor,
+            partial(_search, query_embedding, k, score_threshold, query, tenant),
+        )
+
+def warmup() -> Dict[str, float]:
+    """
+    검색에 필요한 객체를 미리 생성하고 컬렉션을 열어 둠 (서버 시작 시, 블로킹)
+
+    컬렉션에 청크가 있으면 저장된 임베딩 하나로 검색해서 벡터 인덱스를 메모리에 올림
+    → 첫 요청이 클라이언트 생성/인덱스 로드 비용을 내지 않음
+
+    Returns:
+        {단계: 소요 시간(초)}
+    """
+    timings = {}
+    for name, load in (
+        ("embedding", get_embedding),
+        ("vector_client", get_vector_client),
+        ("lexical_index", get_lexical_index),
+        ("document_index", get_document_index),
+    ):
+        start = time.perf_counter()
+        load()
+        timings[name] = time.perf_counter() - start
     
-    # 거리 점수를 유사도 점수로 변환
-    # ChromaDB는 기본적으로 L2 거리를 사용
-    # OpenAI 임베딩은 정규화된 벡터이므로 코사인 유사도를 사용하는 것이 더 적합
-    # 하지만 ChromaDB는 L2 거리를 반환하므로 이를 적절히 변환해야 함
-    
-    normalized_results = []
-    seen_content = set()  # 중복 제거용
-    
-    # ChromaDB는 L2 거리를 사용하지만, 정규화된 벡터의 경우
-    # 거리 범위는 0 ~ sqrt(2) ≈ 1.414
-    # 실제 유사도 점수 분포를 기반으로 거리 변환 최적화
-    
-    for doc, distance in results:
-        # 중복 제거: 동일한 내용의 문서는 건너뛰기
-        content_hash = hash(doc.page_content[:100])  # 첫 100자로 중복 판단
-        if content_hash in seen_content:
-            continue
-        seen_content.add(content_hash)
-        
-        # 거리를 유사도로 변환
-        # OpenAI 임베딩(text-embedding-3-small)은 정규화된 벡터를 반환
-        # 정규화된 벡터의 L2 거리 범위: 0 ~ sqrt(2) ≈ 1.414
-        # 
-        # 실제 테스트 결과: 유사도 0.318~0.383 → 거리 약 0.9~1.1
-        # 더 나은 변환: 코사인 유사도 = 1 - (거리^2 / 2)
-        # 또는 단순 선형: similarity = max(0, 1 - distance / sqrt(2))
-        
-        # 방법 1: 정규화된 벡터의 L2 거리를 코사인 유사도로 변환
-        # 코사인 유사도 = 1 - (L2거리^2 / 2) (정규화된 벡터의 경우)
-        max_distance = 1.414  # sqrt(2) for normalized vectors
-        
-        if distance <= max_distance:
-            # 정규화된 벡터의 경우: similarity = 1 - (distance^2 / 2)
-            # 또는 선형 변환: similarity = 1 - (distance / max_distance)
-            # 실험적으로 제곱 공식이 더 나은 결과를 제공
-            similarity = max(0.0, 1.0 - (distance * distance) / 2.0)
-        else:
-            # 범위를 벗어난 경우: 지수 감쇠
-            similarity = max(0.0, 1.0 / (1.0 + distance))
-        
-        normalized_results.append((doc, similarity))
-    
-    # threshold 필터링 (지정된 경우)
-    if score_threshold is not None and score_threshold > 0:
-        filtered_results = [
-            (doc, sim) for doc, sim in normalized_results 
-            if sim >= score_threshold
-        ]
-        return filtered_results
-    
-    return normalized_results
+    start = time.perf_counter()
+    collection = _collection()
+    if collection.count() > 0:
+        sample = collection.get(limit=1, include=["embeddings"])["embeddings"]
+        collection.query(query_embeddings=[list(sample[0])], n_results=1, include=[])
+    timings["collection"] = time.perf_counter() - start
+    return timings
+
+def _collection():
+    """기본 테넌트의 컬렉션 (Chroma면 내부 컬렉션, NumPy 인덱스면 그대로)"""
+    return _default_tenant.collection
+
+def _search(query_embedding: List[float], k: int, score_threshold: float = None, query: str = None, tenant: Optional[str] = None):
+    with open_tenant(tenant) as index:
+        return _search_index(index, query_embedding, k, score_threshold, query)
+
+def _search_index(index: TenantIndex, query_embedding: List[float], k: int, score_threshold: float = None, query: str = None):
+    """
+    검색 엔진: 후보를 넉넉히 가져온 뒤 NumPy로 한 번에 정리
+    
+    1. 벡터 검색 후보 SEARCH_CANDIDATES개 (질문 원문이 있고 BM25 역색인이 있으면 BM25 후보도 RRF로 결합)
+       컬렉션이 크면 문서 대표 벡터로 상위 TWO_STAGE_DOCS개 문서를 먼저 고르고 그 안에서만 검색
+    2. 점수: 저장된 임베딩과 질문의 코사인 유사도 → 백엔드/검색 방식과 상관없이 같은 척도
+    3. 임계값 → 임베딩 기준 중복 제거 → MMR (app.ranking.rank)
+    
+    Returns:
+        [(Document, 코사인 유사도), ...] 순위 순서 (하이브리드/MMR 적용 시 점수 순서와 다를 수 있음)
+    """
+    collection = index.collection
+    candidates = max(k, SEARCH_CANDIDATES)
+    count = collection.count()
+    if count == 0 or k <= 0:
+        return []
+    where = None
+    document_centroids = index.document_index
+    if document_centroids is not None and count >= TWO_STAGE_MIN_CHUNKS and len(document_centroids) > TWO_STAGE_DOCS:
+        top_documents = [doc_id for doc_id, _ in document_centroids.search(query_embedding, TWO_STAGE_DOCS)]
+        if top_documents:
+            where = {"doc_id": {"$in": top_documents}}
+    found = collection.query(
+        query_embeddings=[list(map(float, query_embedding))],
+        n_results=min(candidates, count),
+        where=where,
+        include=["documents", "metadatas", "embeddings"],
+    )
+    ids = list(found["ids"][0])
+    documents = list(found["documents"][0])
+    metadatas = list(found["metadatas"][0])
+    embeddings = [np.asarray(found["embeddings"][0], dtype=np.float32)]
+
+    relevance = None
+    lexical = index.lexical_index
+    if lexical is not None and query and len(lexical) > 0:
+        lexical_ids = [cid for cid, _ in lexical.search(query, k=candidates)]
+        vector_ids = set(ids)
+        missing = [cid for cid in lexical_ids if cid not in vector_ids]
+        if missing:
+            # BM25로만 찾은 청크도 저장된 임베딩으로 같은 기준의 점수 계산
+            extra = collection.get(ids=missing, include=["documents", "metadatas", "embeddings"])
+            ids.extend(extra["ids"])
+            documents.extend(extra["documents"])
+            metadatas.extend(extra["metadatas"])
+            embeddings.append(np.asarray(extra["embeddings"], dtype=np.float32).reshape(len(extra["ids"]), -1))
+        fused = dict(reciprocal_rank_fusion(list(found["ids"][0]), lexical_ids))
+        relevance = np.array([fused.get(cid, 0.0) for cid in ids], dtype=np.float32)
+
+    if not ids:
+        return []
+    embeddings = np.concatenate([part for part in embeddings if len(part)])
+    similarity = cosine_scores(query_embedding, embeddings)
+    selected = rank(embeddings, similarity, k, relevance=relevance, score_threshold=score_threshold)
+    return [
+        (Document(page_content=documents[i], metadata=metadatas[i] or {}), float(similarity[i]))
+        for i in selected
+    ]
@@ -0,0 +1,73 @@
+"""
+색인 쓰기 잠금 (프로세스 간)
+
+NumpyIndex/LexicalIndex/DocumentIndex는 쓰기를 한 프로세스만 한다고 가정하므로,
+서버의 업로드 색인 작업과 `python -m app.ingest` CLI가 같은 인덱스에 동시에 쓰지 않도록
+인덱스 디렉터리의 잠금 파일에 fcntl.flock을 걸어서 보장합니다.
+
+- 같은 프로세스 안의 여러 스레드(작업자)는 잠금을 함께 보유 (보유 수를 세고 마지막에 해제)
+- 프로세스가 죽으면 운영체제가 잠금을 풀어 줌 → 남은 잠금 파일을 지울 필요 없음
+"""
+import os
+import threading
+from typing import Dict
+
+try:
+    import fcntl
+except ImportError:  # Windows: 프로세스 간 잠금 없이 동작
+    fcntl = None
+
+
+class WriteLock:
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._holders = 0
+        self._fd = None
+
+    def acquire(self, blocking: bool = True) -> bool:
+        """
+        잠금 획득 (이 프로세스가 이미 보유 중이면 바로 성공)
+
+        Returns:
+            blocking=False이고 다른 프로세스가 보유 중이면 False
+        """
+        with self._lock:
+            if self._holders == 0 and fcntl is not None:
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+                try:
+                    fcntl.flock(fd, fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+                except BlockingIOError:
+                    os.close(fd)
+                    return False
+                self._fd = fd
+            self._holders += 1
+            return True
+
+    def release(self):
+        with self._lock:
+            self._holders -= 1
+            if self._holders == 0 and self._fd is not None:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+                os.close(self._fd)
+                self._fd = None
+
+    def held_elsewhere(self) -> bool:
+        """다른 프로세스가 잠금을 보유 중인지 (업로드를 받기 전 확인)"""
+        if not self.acquire(blocking=False):
+            return True
+        self.release()
+        return False
+
+
+_locks: Dict[str, WriteLock] = {}
+_locks_lock = threading.Lock()
+
+def get_lock(path: str) -> WriteLock:
+    """경로별 잠금 객체 (같은 파일은 같은 객체 → 보유 수를 함께 셈)"""
+    path = os.path.abspath(path)
+    with _locks_lock:
+        if path not in _locks:
+            _locks[path] = WriteLock(path)
+        return _locks[path]
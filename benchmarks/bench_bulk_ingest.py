@@ -0,0 +1,112 @@
+"""
+대량 색인 벤치마크
+
+합성 문서를 split → bulk_ingest로 색인하면서 처리량(chunks/s)과
+파이썬 힙 최대 사용량(tracemalloc peak)을 코퍼스 크기별로 측정합니다.
+코퍼스가 커져도 peak 메모리가 거의 같아야 합니다.
+(peak에는 Chroma 내부 할당도 포함됩니다: 쓰기 버퍼(WRITE_BATCH_SIZE)만큼은 기본으로 잡히고,
+ Chroma의 id → label 매핑처럼 색인 크기에 비례하는 부분은 조금씩 늘어납니다)
+
+OpenAI 임베딩은 배치당 고정 지연을 가진 가짜 객체로 대체합니다.
+
+실행:
+    python -m benchmarks.bench_bulk_ingest
+    python -m benchmarks.bench_bulk_ingest --docs 100 500 --embed-ms 100 --concurrency 8
+"""
+import argparse
+import asyncio
+import hashlib
+import os
+import tempfile
+import tracemalloc
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-bench")
+os.environ.setdefault("VECTOR_DB_PATH", tempfile.mkdtemp(prefix="bench-chroma-"))
+os.environ.setdefault("EMBEDDING_CACHE_PATH", "")
+
+from langchain_community.vectorstores import Chroma
+
+import app.vector_store as vector_store
+from app.ingestion import bulk_ingest
+from app.pipelines import iter_split_text
+
+DIM = 64
+
+
+class FakeAsyncEmbeddings:
+    """배치당 고정 지연 + 텍스트 해시 기반 결정적 벡터"""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+
+    @staticmethod
+    def _vector(text):
+        digest = hashlib.sha256(text.encode("utf-8")).digest()
+        return [b / 255 for b in (digest * (DIM // len(digest) + 1))[:DIM]]
+
+    def embed_documents(self, texts):
+        return [self._vector(t) for t in texts]
+
+    def embed_query(self, text):
+        return self._vector(text)
+
+    async def aembed_documents(self, texts):
+        await asyncio.sleep(self.latency)
+        return self.embed_documents(texts)
+
+
+def synthetic_documents(n_docs: int, paragraphs: int = 40):
+    """(텍스트, 메타데이터)를 하나씩 생성 (전체 코퍼스를 메모리에 만들지 않음)"""
+    for d in range(n_docs):
+        text = "\n\n".join(
+            f"문서 {d} 문단 {p}: 연차 휴가 규정과 복리후생 포인트 신청 절차에 대한 설명입니다. " * 4
+            for p in range(paragraphs)
+        )
+        yield text, {"doc_id": f"doc-{d}.pdf", "title": f"doc-{d}.pdf"}
+
+
+def run(n_docs: int, args, trace_memory: bool) -> dict:
+    vector_store.vector_client = Chroma(
+        collection_name=f"bench_bulk_{n_docs}",
+        embedding_function=vector_store.get_embedding(),
+        persist_directory=tempfile.mkdtemp(prefix="bench-chroma-"),
+    )
+
+    if trace_memory:
+        tracemalloc.start()
+    stats = asyncio.run(bulk_ingest(
+        iter_split_text(synthetic_documents(n_docs)),
+        batch_size=args.batch_size,
+        concurrency=args.concurrency,
+    ))
+    if trace_memory:
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        stats["peak_mb"] = round(peak / 1024 / 1024, 1)
+
+    stats["docs"] = n_docs
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="대량 색인 벤치마크")
+    parser.add_argument("--docs", type=int, nargs="+", default=[50, 200])
+    parser.add_argument("--batch-size", type=int, default=128)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--embed-ms", type=float, default=50, help="임베딩 배치당 지연(ms)")
+    args = parser.parse_args()
+
+    vector_store.embedding = FakeAsyncEmbeddings(args.embed_ms / 1000)
+
+    # tracemalloc은 처리 속도를 크게 떨어뜨리므로 처리량/메모리는 따로 측정
+    throughput = [run(n, args, trace_memory=False) for n in args.docs]
+    memory = [run(n, args, trace_memory=True) for n in args.docs]
+
+    print()
+    print(f"{'docs':>6} {'chunks':>8} {'chunks/s':>10} {'peak MB':>8}")
+    for t, m in zip(throughput, memory):
+        print(f"{t['docs']:>6} {t['chunks']:>8} {t['chunks_per_sec']:>10} {m['peak_mb']:>8}")
+
+
+if __name__ == "__main__":
+    main()
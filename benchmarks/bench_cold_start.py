@@ -0,0 +1,101 @@
+"""
+콜드 스타트 벤치마크 (app import 시간 / 워밍업 / 첫 검색 지연)
+
+미리 만든 Chroma 컬렉션(합성 청크)을 대상으로, 모드마다 새 프로세스를 띄워 측정합니다.
+- lazy: import app.main 직후 첫 검색 → 첫 요청이 클라이언트 생성/컬렉션 열기 비용을 냄
+- warm: import 후 main.warmup() (서버 lifespan과 동일) → 첫 검색
+
+OpenAI 연결 워밍업은 네트워크가 필요하므로 생략합니다 (WARMUP_CONNECT_TIMEOUT=0).
+검색은 질의 벡터로 바로 호출 (임베딩 API 호출 없음).
+
+실행:
+    python -m benchmarks.bench_cold_start
+    python -m benchmarks.bench_cold_start --chunks 20000 --dim 384 --runs 3
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def child(mode: str, dim: int) -> dict:
+    """새 프로세스 안에서 실행: import → (워밍업) → 검색 2회"""
+    import numpy as np
+
+    start = time.perf_counter()
+    import app.main as main
+    from app import vector_store
+    result = {"import_s": time.perf_counter() - start}
+
+    if mode == "warm":
+        result["warmup_s"] = asyncio.run(main.warmup())["total"]
+
+    query = np.random.default_rng(1).standard_normal(dim).tolist()
+    for name in ("first_search_s", "second_search_s"):
+        step = time.perf_counter()
+        vector_store._search(query, k=5)
+        result[name] = time.perf_counter() - step
+    return result
+
+
+def build(path: str, chunks: int, dim: int, batch: int = 5000):
+    """Chroma 컬렉션에 합성 청크 저장 (실제 서버와 같은 vector_store 경로)"""
+    os.environ["VECTOR_DB_PATH"] = path
+    import numpy as np
+    from app import vector_store
+
+    rng = np.random.default_rng(0)
+    for start in range(0, chunks, batch):
+        end = min(chunks, start + batch)
+        ids = [f"doc{i // 50}.pdf:{i}" for i in range(start, end)]
+        vectors = rng.standard_normal((end - start, dim)).astype(np.float32)
+        vector_store.upsert_vectors(
+            ids, vectors.tolist(), [{"doc_id": id.split(":")[0]} for id in ids], [f"청크 {id}" for id in ids]
+        )
+    vector_store._persist()
+
+
+def run_child(path: str, mode: str, dim: int) -> dict:
+    env = {**os.environ, "VECTOR_DB_PATH": path, "WARMUP_CONNECT_TIMEOUT": "0"}
+    out = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_cold_start", "--child", mode, "--dim", str(dim)],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=True,
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="콜드 스타트 벤치마크")
+    parser.add_argument("--chunks", type=int, default=20000, help="컬렉션 청크 수")
+    parser.add_argument("--dim", type=int, default=384, help="벡터 차원")
+    parser.add_argument("--runs", type=int, default=3, help="모드별 프로세스 실행 횟수 (중앙값)")
+    parser.add_argument("--child", choices=("lazy", "warm"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        result = child(args.child, args.dim)
+        print(json.dumps(result))
+        return
+
+    os.environ.setdefault("OPENAI_API_KEY", "sk-bench")
+    os.environ.setdefault("EMBEDDING_CACHE_PATH", "")
+    path = tempfile.mkdtemp(prefix="bench-cold-")
+    print(f"🚀 컬렉션 생성: 청크 {args.chunks:,}개, {args.dim}차원")
+    build(path, args.chunks, args.dim)
+
+    for mode in ("lazy", "warm"):
+        runs = [run_child(path, mode, args.dim) for _ in range(args.runs)]
+        keys = [key for key in ("import_s", "warmup_s", "first_search_s", "second_search_s") if key in runs[0]]
+        summary = " | ".join(f"{key[:-2]} {statistics.median(run[key] for run in runs) * 1000:7.1f}ms" for key in keys)
+        print(f"{mode:>5}: {summary}")
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,80 @@
+"""
+CSV 파싱 메모리 벤치마크
+
+큰 CSV를 파싱 + 청크 분할할 때의 프로세스 최대 메모리(peak RSS)를 비교합니다.
+각 방식은 별도 프로세스에서 실행하므로 서로의 메모리 사용량이 섞이지 않습니다.
+- before: pandas.read_csv()로 표 전체를 읽어 텍스트로 변환 + split_text()
+- after : iter_csv() + iter_split_text() (행 묶음 단위 스트리밍)
+
+실행:
+    python -m benchmarks.bench_csv_streaming
+    python -m benchmarks.bench_csv_streaming --mb 1024 --only after
+"""
+import argparse
+import multiprocessing
+import os
+import resource
+import tempfile
+import time
+
+from benchmarks.corpus import write_csv
+
+
+def before(path):
+    import pandas as pd
+    from app.pipelines import split_text
+
+    frame = pd.read_csv(path, dtype=str)
+    text = "\n".join(
+        " | ".join(f"{name}: {value}" for name, value in row.items())
+        for row in frame.to_dict("records")
+    )
+    return len(split_text(text, {"doc_id": os.path.basename(path)}))
+
+
+def after(path):
+    from app.parsers.csv_parser import iter_csv
+    from app.pipelines import iter_split_text
+
+    count = 0
+    for _ in iter_split_text(iter_csv(path)):
+        count += 1  # 색인 단계로 흘려보낸다고 가정 (청크를 모아 두지 않음)
+    return count
+
+
+def _child(mode: str, path: str, queue):
+    start = time.perf_counter()
+    chunks = {"before": before, "after": after}[mode](path)
+    elapsed = time.perf_counter() - start
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss  # Linux: KB
+    queue.put((chunks, peak_kb / 1024, elapsed))
+
+
+def measure(mode: str, path: str) -> tuple:
+    context = multiprocessing.get_context("spawn")
+    queue = context.Queue()
+    process = context.Process(target=_child, args=(mode, path, queue))
+    process.start()
+    result = queue.get()
+    process.join()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CSV 파싱 메모리 벤치마크")
+    parser.add_argument("--mb", type=float, nargs="+", default=[10, 100], help="CSV 크기(MB)")
+    parser.add_argument("--only", choices=["before", "after"], default=None, help="한 방식만 측정")
+    args = parser.parse_args()
+
+    modes = [args.only] if args.only else ["before", "after"]
+    print(f"{'MB':>6} {'mode':>7} {'chunks':>9} {'peak RSS MB':>12} {'sec':>7}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for mb in args.mb:
+            path = write_csv(os.path.join(tmp, f"bench-{mb:g}mb.csv"), mb)
+            for mode in modes:
+                chunks, peak, elapsed = measure(mode, path)
+                print(f"{mb:>6g} {mode:>7} {chunks:>9} {peak:>12.1f} {elapsed:>7.1f}")
+
+
+if __name__ == "__main__":
+    main()
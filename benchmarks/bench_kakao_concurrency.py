@@ -0,0 +1,154 @@
+"""
+/kakao/router 동시성 벤치마크
+
+동시 요청 50개를 보냈을 때 응답 지연(p50/p99)을 측정합니다.
+- before: async 핸들러 안에서 동기 임베딩/Chroma 조회 호출 (이벤트 루프 블로킹)
+- after : 비동기 검색 경로 사용 (비동기 임베딩 + 스레드 풀 Chroma 조회)
+
+OpenAI / Chroma 호출은 고정 지연을 가진 가짜 객체로 대체하므로 API 키 없이 실행됩니다.
+
+실행:
+    python -m benchmarks.bench_kakao_concurrency
+    python -m benchmarks.bench_kakao_concurrency --requests 50 --embed-ms 200
+"""
+import argparse
+import asyncio
+import base64
+import hashlib
+import hmac
+import json
+import os
+import statistics
+import tempfile
+import time
+
+# app import 전에 환경 변수 설정 (실제 API 키/DB 불필요)
+SECRET = "bench-secret"
+os.environ.setdefault("OPENAI_API_KEY", "sk-bench")
+os.environ["KAKAO_CHANNEL_SECRET"] = SECRET
+os.environ.setdefault("VECTOR_DB_PATH", tempfile.mkdtemp(prefix="bench-chroma-"))
+os.environ.setdefault("EMBEDDING_CACHE_PATH", "")
+os.environ.setdefault("ANSWER_CACHE_MAX_ENTRIES", "0")
+os.environ.setdefault("FAQ_ENABLED", "false")
+
+import httpx
+from langchain.schema import Document
+
+import app.main as main
+import app.retriever as retriever
+import app.vector_store as vector_store
+
+
+class FakeEmbeddings:
+    """고정 지연을 가진 임베딩 (동기: time.sleep / 비동기: asyncio.sleep)"""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+
+    def embed_query(self, text):
+        time.sleep(self.latency)
+        return [0.1] * 8
+
+    async def aembed_query(self, text):
+        await asyncio.sleep(self.latency)
+        return [0.1] * 8
+
+
+class FakeChroma:
+    """고정 지연을 가진 Chroma 조회 (항상 블로킹)"""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+
+    def _results(self):
+        time.sleep(self.latency)
+        return [(Document(page_content=f"문서 {i}", metadata={"title": "bench.pdf"}), 0.8) for i in range(5)]
+
+    def similarity_search_by_vector_with_relevance_scores(self, embedding, k=5, **kwargs):
+        return self._results()[:k]
+
+
+async def fake_generate_answer(question, results, max_tokens=None):
+    await asyncio.sleep(0.05)
+    return {"answer": f"{question} 답변", "sources": []}
+
+
+def sign(body: bytes) -> str:
+    mac = hmac.new(SECRET.encode("utf-8"), body, hashlib.sha256)
+    return base64.b64encode(mac.digest()).decode("utf-8")
+
+
+async def blocking_embed_query(query):
+    """기존 방식 재현: async 함수 안에서 동기 임베딩 호출"""
+    return vector_store.get_embedding().embed_query(query)
+
+
+async def blocking_search_by_vector(query_embedding, k=5, score_threshold=None, query=None, tenant=None):
+    """기존 방식 재현: async 함수 안에서 동기 Chroma 조회"""
+    return vector_store._search(query_embedding, k, score_threshold, query)
+
+
+async def run_once(n_requests: int) -> list:
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+
+        async def one(i):
+            body = json.dumps({"userRequest": {"utterance": f"질문 {i}"}}).encode("utf-8")
+            start = time.perf_counter()
+            response = await client.post(
+                "/kakao/router",
+                content=body,
+                headers={"X-Kakao-Signature": sign(body), "Content-Type": "application/json"},
+            )
+            elapsed = time.perf_counter() - start
+            assert response.status_code == 200, response.text
+            return elapsed
+
+        return await asyncio.gather(*(one(i) for i in range(n_requests)))
+
+
+def percentile(values: list, p: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def report(label: str, latencies: list) -> dict:
+    result = {
+        "mode": label,
+        "requests": len(latencies),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 1),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 1),
+        "mean_ms": round(statistics.mean(latencies) * 1000, 1),
+    }
+    print(f"{label:>7}: p50 {result['p50_ms']:8.1f}ms | p99 {result['p99_ms']:8.1f}ms | mean {result['mean_ms']:8.1f}ms")
+    return result
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="/kakao/router 동시성 벤치마크")
+    parser.add_argument("--requests", type=int, default=50, help="동시 요청 수")
+    parser.add_argument("--embed-ms", type=float, default=100, help="임베딩 호출 지연(ms)")
+    parser.add_argument("--query-ms", type=float, default=10, help="Chroma 조회 지연(ms)")
+    args = parser.parse_args()
+
+    fake_embedding = FakeEmbeddings(args.embed_ms / 1000)
+    vector_store.embedding = fake_embedding
+    vector_store.vector_client = FakeChroma(args.query_ms / 1000)
+    retriever.generate_answer = fake_generate_answer
+
+    print(f"🚀 동시 요청 {args.requests}개 (임베딩 {args.embed_ms}ms, 조회 {args.query_ms}ms)")
+
+    original = (retriever.aembed_query, retriever.asearch_by_vector)
+    retriever.aembed_query = blocking_embed_query
+    retriever.asearch_by_vector = blocking_search_by_vector
+    before = report("before", asyncio.run(run_once(args.requests)))
+
+    retriever.aembed_query, retriever.asearch_by_vector = original
+    after = report("after", asyncio.run(run_once(args.requests)))
+
+    print(f"📈 p99 개선: {before['p99_ms'] / max(after['p99_ms'], 0.001):.1f}배")
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,107 @@
+"""
+BM25 역색인(app.lexical_index) 벤치마크
+
+합성 한국어 청크로 역색인을 만들고 다음을 측정합니다.
+- build  : 전체 색인 + persist 시간
+- load   : 새 인스턴스로 여는 시간 (.npy memmap)
+- 질의 p50/p99 (ms)
+    word: 임의 청크의 내용어 3개 (가장 흔한 200단어 제외, 사용자 질문에 가까움)
+    code: 제품 코드 + 단어 하나
+- hit@10 : word 질문의 원래 청크가 상위 10개 안에 있는 비율
+- recall : 게시 목록을 전부 더하는 정확한 BM25 대비 top-10 재현율 (word 질문)
+- 증분 추가: 청크 100개 add + persist 시간
+
+실행:
+    python -m benchmarks.bench_lexical_index
+    python -m benchmarks.bench_lexical_index --chunks 10000 100000 --queries 500
+"""
+import argparse
+import random
+import tempfile
+import time
+from collections import Counter
+
+import numpy as np
+
+from app.lexical_index import LexicalIndex
+from benchmarks.corpus import korean_chunks
+
+
+def percentiles(seconds: list) -> tuple:
+    ms = np.array(seconds) * 1000
+    return float(np.percentile(ms, 50)), float(np.percentile(ms, 99))
+
+
+def timed(index: LexicalIndex, queries: list) -> tuple:
+    results, seconds = [], []
+    for query in queries:
+        start = time.perf_counter()
+        results.append([cid for cid, _ in index.search(query, k=10)])
+        seconds.append(time.perf_counter() - start)
+    return results, percentiles(seconds)
+
+
+def run(n: int, queries: int):
+    chunks = korean_chunks(n)
+    ids = [cid for cid, _ in chunks]
+    texts = [text for _, text in chunks]
+    frequent = {word for word, _ in Counter(w for text in texts[:5000] for w in text.split()).most_common(200)}
+    rng = random.Random(1)
+
+    with tempfile.TemporaryDirectory(prefix="bench-lexical-") as tmp:
+        index = LexicalIndex(tmp)
+        start = time.perf_counter()
+        index.rebuild(ids, texts)
+        build = time.perf_counter() - start
+
+        start = time.perf_counter()
+        index = LexicalIndex(tmp)
+        load = time.perf_counter() - start
+
+        word, code, sources = [], [], []
+        for _ in range(queries):
+            i = rng.randrange(n)
+            words = [w for w in texts[i].split() if w not in frequent and not w.startswith("QX-")]
+            word.append(" ".join(rng.sample(words, 3)))
+            sources.append(ids[i])
+            code.append(f"QX-{rng.randrange(n):06d} {words[0]}")
+
+        index.search(word[0])  # 첫 조회(memmap 페이지 로드) 제외
+        word_results, word_ms = timed(index, word)
+        _, code_ms = timed(index, code)
+        hit = np.mean([source in got for got, source in zip(word_results, sources)])
+
+        index.COMMON_TERM_RATIO = 1.0  # 모든 게시 목록을 끝까지 더함
+        exact, exact_ms = timed(index, word)
+        del index.COMMON_TERM_RATIO
+        recall = np.mean([len(set(got) & set(want)) / max(len(want), 1) for got, want in zip(word_results, exact)])
+
+        extra = korean_chunks(100, seed=2)
+        start = time.perf_counter()
+        index.add([f"new:{cid}" for cid, _ in extra], [text for _, text in extra])
+        index.persist()
+        incremental = time.perf_counter() - start
+
+    print(
+        f"{n:>8} {build:>8.1f} {load * 1000:>8.1f} "
+        f"{word_ms[0]:>8.3f} {word_ms[1]:>8.3f} {code_ms[0]:>8.3f} {code_ms[1]:>8.3f} {exact_ms[0]:>9.3f} "
+        f"{hit:>7.3f} {recall:>7.3f} {incremental * 1000:>8.1f}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="BM25 역색인 벤치마크")
+    parser.add_argument("--chunks", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--queries", type=int, default=500)
+    args = parser.parse_args()
+
+    print(
+        f"{'chunks':>8} {'build s':>8} {'load ms':>8} {'word p50':>8} {'word p99':>8} "
+        f"{'code p50':>8} {'code p99':>8} {'exact p50':>9} {'hit@10':>7} {'recall':>7} {'add ms':>8}"
+    )
+    for n in args.chunks:
+        run(n, args.queries)
+
+
+if __name__ == "__main__":
+    main()
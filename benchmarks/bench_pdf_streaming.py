@@ -0,0 +1,60 @@
+"""
+PDF 파싱 메모리 벤치마크
+
+페이지 수별로 파싱 + 청크 분할의 파이썬 힙 최대 사용량(tracemalloc peak)을 비교합니다.
+- before: parse_pdf() + split_text() (전체 텍스트/청크 목록을 메모리에 보관)
+- after : iter_pdf() + iter_split_text() (페이지 단위 스트리밍)
+
+실행:
+    python -m benchmarks.bench_pdf_streaming
+    python -m benchmarks.bench_pdf_streaming --pages 100 1000 3000
+"""
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+
+from app.parsers.pdf import iter_pdf, parse_pdf
+from app.pipelines import iter_split_text, split_text
+from benchmarks.corpus import write_pdf
+
+
+def measure(fn) -> tuple:
+    tracemalloc.start()
+    start = time.perf_counter()
+    chunks = fn()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return chunks, peak / 1024 / 1024, elapsed
+
+
+def before(path):
+    text, metadata = parse_pdf(path)
+    return len(split_text(text, metadata))
+
+
+def after(path):
+    count = 0
+    for _ in iter_split_text(iter_pdf(path)):
+        count += 1  # 색인 단계로 흘려보낸다고 가정 (청크를 모아 두지 않음)
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="PDF 파싱 메모리 벤치마크")
+    parser.add_argument("--pages", type=int, nargs="+", default=[100, 1000])
+    args = parser.parse_args()
+
+    print(f"{'pages':>6} {'mode':>7} {'chunks':>7} {'peak MB':>8} {'sec':>6}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for pages in args.pages:
+            path = write_pdf(os.path.join(tmp, f"bench-{pages}.pdf"), pages)
+            for label, fn in (("before", before), ("after", after)):
+                chunks, peak, elapsed = measure(lambda: fn(path))
+                print(f"{pages:>6} {label:>7} {chunks:>7} {peak:>8.1f} {elapsed:>6.1f}")
+
+
+if __name__ == "__main__":
+    main()
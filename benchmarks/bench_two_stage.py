@@ -0,0 +1,140 @@
+"""
+2단계 검색(문서 대표 벡터 → 문서 안 청크 검색) vs 전체 청크 검색 벤치마크
+
+문서당 청크 50개인 합성 코퍼스를 만들고 같은 질의로 두 방식을 비교합니다.
+- flat     : 전체 청크 검색 (NumPy 전수 검색 결과가 정답 기준)
+- two-stage: DocumentIndex로 상위 N개 문서 → where={"doc_id": {"$in": ...}}로 그 문서 안에서만 검색
+- recall@k : NumPy 전수 검색 top-k 대비 재현율
+- --backend chroma: 같은 코퍼스를 Chroma 컬렉션에도 넣고 Chroma 검색(HNSW, $in 메타데이터 필터)을 측정
+
+코퍼스: 문서마다 주제 벡터가 있고, 청크는 주제 벡터 + 잡음 (--off-topic 비율만큼은 다른 주제 문단)
+→ 다른 주제 문단을 찾는 질문은 문서 대표 벡터로 찾기 어려우므로 recall 상한은 대략 1 - off-topic
+질의: 임의 청크 근처 (해당 청크를 찾는 질문 상황)
+
+실행:
+    python -m benchmarks.bench_two_stage
+    python -m benchmarks.bench_two_stage --chunks 10000 100000 1000000 --dim 256 --docs 10 20 50
+    python -m benchmarks.bench_two_stage --backend chroma --chunks 10000 100000
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from app.document_index import DocumentIndex, centroids_from
+from app.numpy_index import NumpyIndex
+
+CHUNKS_PER_DOC = 50
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    return (vectors / np.linalg.norm(vectors, axis=-1, keepdims=True)).astype(np.float32)
+
+
+def build(path: str, n: int, dim: int, off_topic_ratio: float, backend: str = "numpy", batch: int = 50000):
+    """
+    코퍼스를 배치 단위로 만들어 바로 저장 (1M 청크도 메모리에 한꺼번에 올리지 않음)
+
+    Returns:
+        (NumpyIndex, DocumentIndex, 질의 표본, Chroma 컬렉션 또는 None)
+    """
+    rng = np.random.default_rng(0)
+    n_docs = (n + CHUNKS_PER_DOC - 1) // CHUNKS_PER_DOC
+    topics = _normalize(rng.standard_normal((max(1, n_docs // 4), dim)))  # 비슷한 주제의 문서가 여럿
+    doc_topics = _normalize(topics[rng.integers(0, len(topics), n_docs)] + 0.6 * _normalize(rng.standard_normal((n_docs, dim))))
+
+    index = NumpyIndex(os.path.join(path, "chunks"))
+    documents = DocumentIndex(os.path.join(path, "documents"))
+    collection = None
+    if backend == "chroma":
+        import chromadb
+        client = chromadb.PersistentClient(path=os.path.join(path, "chroma"))
+        collection = client.get_or_create_collection("bench_two_stage", metadata={"hnsw:space": "cosine"})
+    samples = []
+    for start in range(0, n, batch):
+        end = min(n, start + batch)
+        docs = np.arange(start, end) // CHUNKS_PER_DOC
+        centers = doc_topics[docs]
+        off_topic = rng.random(end - start) < off_topic_ratio
+        centers[off_topic] = doc_topics[rng.integers(0, n_docs, off_topic.sum())]
+        vectors = _normalize(centers + 0.8 * _normalize(rng.standard_normal((end - start, dim))))
+        doc_ids = [f"doc{d}.pdf" for d in docs]
+        ids = [f"doc{d}.pdf:{i}" for d, i in zip(docs, range(start, end))]
+        index.upsert(ids, vectors, [{"doc_id": doc_id} for doc_id in doc_ids], ids)
+        if collection is not None:
+            for offset in range(0, end - start, 5000):  # Chroma 한 번에 넣을 수 있는 개수 제한
+                part = slice(offset, offset + 5000)
+                collection.upsert(ids=ids[part], embeddings=vectors[part].tolist(),
+                                  metadatas=[{"doc_id": doc_id} for doc_id in doc_ids[part]])
+        documents.update(centroids_from(doc_ids, vectors))  # 문서는 배치 경계에 걸치지 않음 (50000 % 50 == 0)
+        picked = rng.integers(0, end - start, 64)
+        samples.append(vectors[picked])
+    index.persist()
+    documents.persist()
+    return index, documents, np.concatenate(samples), collection
+
+
+def run(n: int, dim: int, doc_counts: list, queries: int, k: int, off_topic_ratio: float, backend: str = "numpy"):
+    with tempfile.TemporaryDirectory(prefix="bench-two-stage-") as tmp:
+        start = time.perf_counter()
+        index, documents, samples, collection = build(tmp, n, dim, off_topic_ratio, backend)
+        build_seconds = time.perf_counter() - start
+
+        rng = np.random.default_rng(1)
+        query_set = _normalize(samples[rng.integers(0, len(samples), queries)] + 0.5 * _normalize(rng.standard_normal((queries, dim))))
+
+        def timed(search):
+            results, seconds = [], []
+            for query in query_set:
+                begin = time.perf_counter()
+                results.append(search(query))
+                seconds.append(time.perf_counter() - begin)
+            return results, np.percentile(np.array(seconds) * 1000, [50, 99])
+
+        index.search_by_vector(query_set[0], k)  # 첫 조회(페이지 로드) 제외
+        exact, flat_ms = timed(lambda q: {key for key, _ in index.search_by_vector(q, k)})
+        print(f"{n:>8} {'flat':>10} {flat_ms[0]:>8.2f} {flat_ms[1]:>8.2f} {1.0:>7.3f}   (build {build_seconds:.0f}s)")
+
+        def search(query, where=None):
+            if collection is None:
+                return {key for key, _ in index.search_by_vector(query, k, where=where)}
+            found = collection.query(query_embeddings=[query.tolist()], n_results=k, where=where, include=[])
+            return {int(cid.split(":")[1]) + 1 for cid in found["ids"][0]}  # NumpyIndex key와 맞춤 (1부터)
+
+        def report(mode, search_fn):
+            got, ms = timed(search_fn)
+            recall = np.mean([len(a & b) / k for a, b in zip(got, exact)])
+            print(f"{n:>8} {mode:>10} {ms[0]:>8.2f} {ms[1]:>8.2f} {recall:>7.3f}")
+
+        if collection is not None:
+            search(query_set[0])  # 첫 조회(HNSW 로드) 제외
+            report("chroma", search)
+
+        for n_docs in doc_counts:
+            def two_stage(query):
+                top = [doc_id for doc_id, _ in documents.search(query, n_docs)]
+                return search(query, where={"doc_id": {"$in": top}})
+
+            report(f"docs={n_docs}", two_stage)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="2단계 검색 벤치마크")
+    parser.add_argument("--chunks", type=int, nargs="+", default=[10000, 100000, 1000000])
+    parser.add_argument("--dim", type=int, default=256, help="1M 청크 x 1536차원은 6GB라서 기본은 256차원")
+    parser.add_argument("--docs", type=int, nargs="+", default=[10, 20, 50])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("-k", type=int, default=10)
+    parser.add_argument("--off-topic", type=float, default=0.2, help="다른 주제 청크 비율")
+    parser.add_argument("--backend", choices=["numpy", "chroma"], default="numpy", help="2단계 검색을 측정할 백엔드")
+    args = parser.parse_args()
+
+    print(f"{'chunks':>8} {'mode':>10} {'p50 ms':>8} {'p99 ms':>8} {'recall':>7}")
+    for n in args.chunks:
+        run(n, args.dim, args.docs, args.queries, args.k, args.off_topic, args.backend)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""
+벡터 인덱스 백엔드 벤치마크 (Chroma vs NumPy memmap float32/int8)
+
+같은 무작위 정규화 벡터로 각 백엔드를 만든 뒤, 백엔드마다 새 프로세스에서 인덱스를 열고
+질의 top-k 검색의 QPS와 메모리를 측정합니다. (uvicorn 워커 하나가 인덱스를 여는 상황)
+- RSS MB : 프로세스 상주 메모리 증가분 (memmap 파일 페이지 포함)
+- anon MB: 그중 익명 메모리 (워커마다 따로 잡히는 부분, memmap 페이지는 여러 워커가 공유)
+- recall : NumPy float32(정확한 전수 검색) 결과 대비 top-k 재현율
+
+실행:
+    python -m benchmarks.bench_vector_index
+    python -m benchmarks.bench_vector_index --chunks 10000 100000 --dim 1536 --queries 200
+"""
+import argparse
+import multiprocessing
+import os
+import tempfile
+import time
+
+import numpy as np
+
+BACKENDS = ("chroma", "numpy-float32", "numpy-int8")
+
+
+def memory_mb() -> tuple:
+    """(RSS, 익명 메모리) MB — /proc/self/smaps_rollup (Linux)"""
+    values = {}
+    with open("/proc/self/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 2 and parts[0].endswith(":"):
+                values[parts[0][:-1]] = int(parts[1])
+    return values.get("Rss", 0) / 1024, values.get("Anonymous", 0) / 1024
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    return (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float32)
+
+
+def random_vectors(n: int, dim: int, seed: int) -> np.ndarray:
+    """
+    실제 임베딩처럼 군집이 있는 정규화 벡터 (군집당 평균 50개)
+
+    완전 무작위 고차원 벡터는 서로 거의 직교라서 근사 검색(HNSW)에 비현실적으로 불리합니다.
+    """
+    rng = np.random.default_rng(seed)
+    centers = _normalize(rng.standard_normal((max(1, n // 50), dim)))
+    noise = _normalize(rng.standard_normal((n, dim)))
+    return _normalize(centers[rng.integers(0, len(centers), n)] + 0.8 * noise)
+
+
+def query_vectors(data: np.ndarray, n: int, seed: int) -> np.ndarray:
+    """저장된 벡터 근처의 질의 (비슷한 질문 상황)"""
+    rng = np.random.default_rng(seed)
+    noise = _normalize(rng.standard_normal((n, data.shape[1])))
+    return _normalize(data[rng.integers(0, len(data), n)] + 0.5 * noise)
+
+
+def build(backend: str, path: str, n: int, dim: int):
+    ids = [f"bench.pdf:{i}" for i in range(n)]
+    batch = 5000
+    if backend == "chroma":
+        import chromadb
+        client = chromadb.PersistentClient(path=path)
+        collection = client.get_or_create_collection("bench_vectors")
+        for start in range(0, n, batch):
+            end = min(n, start + batch)
+            collection.upsert(
+                ids=ids[start:end],
+                embeddings=_slice(n, dim, start, end).tolist(),
+                metadatas=[{"doc_id": "bench.pdf"}] * (end - start),
+                documents=ids[start:end],
+            )
+    else:
+        from app.numpy_index import NumpyIndex
+        index = NumpyIndex(path, dtype=backend.split("-")[1])
+        for start in range(0, n, batch):
+            end = min(n, start + batch)
+            index.upsert(ids[start:end], _slice(n, dim, start, end), [{"doc_id": "bench.pdf"}] * (end - start), ids[start:end])
+
+
+_vectors_cache = {}
+
+
+def _slice(n: int, dim: int, start: int, end: int) -> np.ndarray:
+    if (n, dim) not in _vectors_cache:
+        _vectors_cache.clear()
+        _vectors_cache[(n, dim)] = random_vectors(n, dim, seed=0)
+    return _vectors_cache[(n, dim)][start:end]
+
+
+def _child(backend: str, path: str, queries: np.ndarray, k: int, queue):
+    os.environ.setdefault("ANONYMIZED_TELEMETRY", "False")
+    if backend == "chroma":
+        import chromadb
+    else:
+        from app.numpy_index import NumpyIndex
+    rss_before, anon_before = memory_mb()
+
+    if backend == "chroma":
+        collection = chromadb.PersistentClient(path=path).get_collection("bench_vectors")
+
+        def search(query):
+            return collection.query(query_embeddings=[query.tolist()], n_results=k, include=[])["ids"][0]
+    else:
+        index = NumpyIndex(path)
+
+        def search(query):
+            return [key for key, _ in index.search_by_vector(query, k)]
+
+    search(queries[0])  # 첫 조회(인덱스 로드) 제외
+    start = time.perf_counter()
+    results = [search(query) for query in queries]
+    elapsed = time.perf_counter() - start
+
+    rss_after, anon_after = memory_mb()
+    if backend == "chroma":
+        results = [[int(cid.split(":")[1]) + 1 for cid in ids] for ids in results]  # SQLite key와 맞춤 (1부터)
+    queue.put({
+        "qps": len(queries) / elapsed,
+        "rss_mb": rss_after - rss_before,
+        "anon_mb": anon_after - anon_before,
+        "results": results,
+    })
+
+
+def measure(backend: str, path: str, queries: np.ndarray, k: int) -> dict:
+    context = multiprocessing.get_context("spawn")
+    queue = context.Queue()
+    process = context.Process(target=_child, args=(backend, path, queries, k, queue))
+    process.start()
+    result = queue.get()
+    process.join()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="벡터 인덱스 백엔드 벤치마크")
+    parser.add_argument("--chunks", type=int, nargs="+", default=[10000, 50000])
+    parser.add_argument("--dim", type=int, default=1536, help="임베딩 차원 (text-embedding-3-small: 1536)")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("-k", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'chunks':>8} {'backend':>14} {'build s':>8} {'QPS':>8} {'RSS MB':>8} {'anon MB':>8} {'disk MB':>8} {'recall':>7}")
+    for n in args.chunks:
+        queries = query_vectors(_slice(n, args.dim, 0, n), args.queries, seed=1)
+        rows = {}
+        with tempfile.TemporaryDirectory(prefix="bench-index-") as tmp:
+            for backend in BACKENDS:
+                path = os.path.join(tmp, backend)
+                start = time.perf_counter()
+                build(backend, path, n, args.dim)
+                build_seconds = time.perf_counter() - start
+                disk = sum(os.path.getsize(os.path.join(root, f)) for root, _, files in os.walk(path) for f in files)
+                rows[backend] = {**measure(backend, path, queries, args.k), "build": build_seconds, "disk_mb": disk / 1024 / 1024}
+
+        exact = rows["numpy-float32"]["results"]
+        for backend in BACKENDS:
+            row = rows[backend]
+            recall = np.mean([len(set(got) & set(want)) / len(want) for got, want in zip(row["results"], exact)])
+            print(
+                f"{n:>8} {backend:>14} {row['build']:>8.1f} {row['qps']:>8.1f} {row['rss_mb']:>8.1f} "
+                f"{row['anon_mb']:>8.1f} {row['disk_mb']:>8.1f} {recall:>7.3f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
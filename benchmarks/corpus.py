@@ -0,0 +1,135 @@
+"""
+벤치마크/테스트용 합성 코퍼스 생성기
+"""
+
+
+def _pdf_string(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def write_pdf(path: str, pages: int, lines_per_page: int = 40) -> str:
+    """
+    텍스트 추출이 가능한 최소 PDF 생성 (외부 라이브러리 없이)
+
+    각 페이지에는 "Page {n} line {m} ..." 형태의 줄이 들어가므로
+    추출된 텍스트로 페이지 번호를 확인할 수 있습니다.
+    """
+    font_id = 3 + pages * 2
+    kids = " ".join(f"{3 + i * 2} 0 R" for i in range(pages))
+    objects = [
+        "<< /Type /Catalog /Pages 2 0 R >>",
+        f"<< /Type /Pages /Kids [{kids}] /Count {pages} >>",
+    ]
+    for i in range(pages):
+        lines = " ".join(
+            f"({_pdf_string(f'Page {i + 1} line {j} policy text about annual leave and welfare points')}) Tj 0 -14 Td"
+            for j in range(lines_per_page)
+        )
+        content = f"BT /F1 10 Tf 40 760 Td {lines} ET"
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents {4 + i * 2} 0 R "
+            f"/Resources << /Font << /F1 {font_id} 0 R >> >> >>"
+        )
+        objects.append(f"<< /Length {len(content)} >>\nstream\n{content}\nendstream")
+    objects.append("<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+
+    out = "%PDF-1.4\n"
+    offsets = []
+    for i, obj in enumerate(objects):
+        offsets.append(len(out.encode("latin-1")))
+        out += f"{i + 1} 0 obj\n{obj}\nendobj\n"
+    xref = len(out.encode("latin-1"))
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n"
+    out += "".join(f"{offset:010d} 00000 n \n" for offset in offsets)
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n"
+
+    with open(path, "w", encoding="latin-1") as f:
+        f.write(out)
+    return path
+
+
+def write_csv(path: str, megabytes: float, encoding: str = "utf-8") -> str:
+    """
+    지정한 크기(MB)의 CSV 생성 (행을 하나씩 써서 메모리를 쓰지 않음)
+
+    열: 사번, 이름, 부서, 잔여연차, 비고
+    """
+    target = int(megabytes * 1024 * 1024)
+    departments = ["인사팀", "재무팀", "개발팀", "영업팀", "총무팀"]
+    with open(path, "w", encoding=encoding, newline="") as f:
+        f.write("사번,이름,부서,잔여연차,비고\n")
+        row = 0
+        while f.tell() < target:
+            row += 1
+            f.write(
+                f"E{row:08d},직원{row},{departments[row % 5]},{row % 25},"
+                f"\"{row % 12 + 1}월 복리후생 포인트 신청, 연차 사용 계획 제출\"\n"
+            )
+    return path
+
+
+def korean_chunks(n: int, seed: int = 0, words_per_chunk: int = 60, vocabulary_size: int = 20000) -> list:
+    """
+    사내 규정 문서 같은 한국어 청크 n개
+
+    - 단어: 자주 쓰는 음절 2~4개 조합 + 조사, 빈도는 Zipf 분포 (실제 문서처럼 흔한 단어/드문 단어가 섞임)
+    - 청크마다 제품 코드(QX-000123) 하나
+
+    Returns:
+        [(청크 ID, 텍스트), ...]
+    """
+    import itertools
+    import random
+
+    rng = random.Random(seed)
+    syllables = "가각간감강개거건것게결경계고공과관교구국권규근금급기내년노다단담당대도동등라로료리마만명모무문물민바반발방법변보복부분비사산상서선설성세소수시신실안야약업여연영예외요용운원위유육율의이인일임자장재전절정제조종주준증지직진차채처청체초총추출취치통퇴특파평포표품필하한할합해행향허현형혜화확환회후휴"
+    particles = ["", "", "", "은", "는", "을", "를", "의", "에", "에서", "으로", "과"]
+    stems = set()
+    while len(stems) < vocabulary_size:
+        stems.add("".join(rng.choice(syllables) for _ in range(rng.randint(2, 4))))
+    vocabulary = sorted(stems)
+    rng.shuffle(vocabulary)
+    cumulative = list(itertools.accumulate(1.0 / (rank + 1) for rank in range(len(vocabulary))))
+
+    chunks = []
+    for i in range(n):
+        words = [stem + rng.choice(particles) for stem in rng.choices(vocabulary, cum_weights=cumulative, k=words_per_chunk)]
+        words.insert(rng.randrange(len(words)), f"QX-{i:06d}")
+        chunks.append((f"doc{i // 50}.pdf:{i:08x}", " ".join(words)))
+    return chunks
+
+
+def policy_sections(n: int, seed: int = 0, paragraphs: int = 4, words_per_paragraph: int = 60) -> list:
+    """
+    규정 문서 섹션 n개 (제목 + 문단 여러 개, 분할/색인 벤치마크 입력)
+
+    Returns:
+        [(섹션 텍스트, 메타데이터), ...] — iter_document()와 같은 형식
+    """
+    chunks = korean_chunks(n * paragraphs, seed=seed, words_per_chunk=words_per_paragraph, vocabulary_size=5000)
+    sections = []
+    for i in range(n):
+        body = "\n\n".join(text for _, text in chunks[i * paragraphs:(i + 1) * paragraphs])
+        doc_id = f"policy{i // 20}.pdf"
+        sections.append((f"제{i + 1}조 규정\n\n{body}", {"doc_id": doc_id, "title": doc_id, "page": i % 20 + 1}))
+    return sections
+
+
+def write_docx(path: str, sections: int, paragraphs: int = 4, table_rows: int = 5) -> str:
+    """
+    제목(Heading 1) + 문단 + 표로 된 DOCX 생성 (섹션마다 표 하나)
+    """
+    from docx import Document as DocxDocument
+
+    document = DocxDocument()
+    for i, (text, _) in enumerate(policy_sections(sections, paragraphs=paragraphs)):
+        heading, *body = text.split("\n\n")
+        document.add_heading(heading, level=1)
+        for paragraph in body:
+            document.add_paragraph(paragraph)
+        table = document.add_table(rows=table_rows, cols=3)
+        for r, row in enumerate(table.rows):
+            for c, cell in enumerate(row.cells):
+                cell.text = f"항목 {i}-{r}-{c}"
+    document.save(path)
+    return path
@@ -0,0 +1,103 @@
+"""
+오프라인 벤치마크용 OpenAI 대역 (API 키/네트워크 불필요, 결과 결정적)
+
+- FakeEmbeddings: OpenAIEmbeddings 대역, 색인어 해싱 벡터 → 같은 단어를 공유하는 텍스트끼리 유사도가 높음
+- FakeChatModel : ChatOpenAI 대역, 질문/컨텍스트로 만든 고정 답변을 토큰 단위 스트리밍
+
+지연 시간은 호출당 고정값으로 설정합니다 (동기: time.sleep / 비동기: asyncio.sleep).
+"""
+import asyncio
+import time
+import zlib
+from typing import List
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from langchain_core.messages import AIMessage, AIMessageChunk
+
+from app.lexical_index import tokenize
+
+
+class FakeEmbeddings(Embeddings):
+    """
+    결정적 임베딩 (feature hashing)
+
+    색인어(lexical_index.tokenize)마다 해시로 차원과 부호를 정해 더한 뒤 정규화
+    → 같은 텍스트는 항상 같은 벡터, 단어가 많이 겹칠수록 코사인 유사도가 높음
+
+    Args:
+        dim: 벡터 차원
+        latency: 호출(배치)당 지연(초) — 실제 API 왕복 시간 흉내
+    """
+
+    def __init__(self, dim: int = 256, latency: float = 0.0):
+        self.dim = dim
+        self.latency = latency
+        self.calls = 0
+
+    def _vector(self, text: str) -> List[float]:
+        # 대역 자체의 CPU 시간이 측정을 흐리지 않도록 crc32 + bincount (텍스트당 약 0.2ms, 대부분 색인어 추출)
+        hashes = np.fromiter((zlib.crc32(term.encode("utf-8")) for term in tokenize(text) or [text]), dtype=np.uint32)
+        signs = np.where(hashes >> 31, 1.0, -1.0)
+        vector = np.bincount(hashes % self.dim, weights=signs, minlength=self.dim)
+        norm = np.linalg.norm(vector)
+        if norm == 0:
+            vector[0] = norm = 1.0
+        return (vector / norm).tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        return [self._vector(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        self.calls += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return [self._vector(text) for text in texts]
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return (await self.aembed_documents([text]))[0]
+
+
+class FakeChatModel:
+    """
+    결정적 GPT 대역 (llm.astream()만 사용하므로 그 부분만 구현)
+
+    답변: 질문 + 컨텍스트 첫 청크 일부 + 출처 목록 → 프롬프트가 같으면 답변도 같음
+
+    Args:
+        first_token_latency: 첫 토큰까지 지연(초)
+        token_latency: 이후 토큰 사이 지연(초)
+        answer_tokens: 답변 토큰(공백 단위) 최대 개수
+    """
+
+    def __init__(self, first_token_latency: float = 0.0, token_latency: float = 0.0, answer_tokens: int = 60):
+        self.first_token_latency = first_token_latency
+        self.token_latency = token_latency
+        self.answer_tokens = answer_tokens
+        self.calls = 0
+
+    def _answer(self, messages) -> str:
+        prompt = messages[-1].content
+        question, _, context = prompt.partition("\n\n컨텍스트:\n")
+        question = question.removeprefix("질문: ")
+        words = context.split()[: self.answer_tokens]
+        return f"{question}에 대한 답변입니다. {' '.join(words)}\n\n**출처:**\n- [bench.pdf] p.1"
+
+    async def astream(self, messages, max_tokens: int = None):
+        self.calls += 1
+        tokens = self._answer(messages).split(" ")[:max_tokens]
+        for i, token in enumerate(tokens):
+            delay = self.first_token_latency if i == 0 else self.token_latency
+            if delay:
+                await asyncio.sleep(delay)
+            yield AIMessageChunk(content=token if i == 0 else " " + token)
+
+    async def ainvoke(self, messages) -> AIMessage:
+        parts = [chunk.content async for chunk in self.astream(messages)]
+        return AIMessage(content="".join(parts))
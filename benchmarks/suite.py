@@ -0,0 +1,445 @@
+"""
+오프라인 벤치마크 스위트
+
+OpenAI 임베딩/GPT를 결정적 대역(benchmarks/fakes.py)으로 바꾸고 합성 코퍼스로
+파싱 → 분할 → 색인 → 검색 → /kakao/router 전체 요청까지 시나리오별 소요 시간을 측정합니다.
+API 키, 네트워크, data/sample.pdf 없이 실행되며 결과는 커밋별 JSON으로 저장해서 비교합니다.
+
+시나리오:
+    parse_pdf     합성 PDF 페이지 추출 (iter_document)
+    parse_docx    합성 DOCX 제목 단위 섹션 추출
+    parse_csv     합성 CSV 행 묶음 추출
+    chunking      규정 섹션 → 청크 분할 (iter_split_text)
+    search        질문 → 임베딩 → 벡터/BM25 검색 → 중복 제거/MMR (search_documents)
+    kakao_router  서명된 카카오 요청 → 답변 (ASGI, 스트리밍 GPT 대역)
+    ingest        규정 섹션 분할 + 임베딩 + 저장 + persist (bulk_ingest, 라운드마다 새 문서)
+
+통계는 pytest-benchmark와 같은 항목(min/max/mean/stddev/median/iqr/ops, 단위: 초)으로 기록합니다.
+대역의 지연은 기본 0 (우리 코드의 CPU 시간만 측정), --embed-ms 등으로 API 지연을 흉내 낼 수 있습니다.
+
+실행:
+    python -m benchmarks.suite
+    python -m benchmarks.suite --scenarios search kakao_router --rounds 50
+    python -m benchmarks.suite --embed-ms 100 --llm-first-token-ms 500 --llm-token-ms 20
+    python -m benchmarks.suite --compare benchmarks/results/b0efca6.json --fail-on-regression
+"""
+import argparse
+import asyncio
+import base64
+import datetime
+import hashlib
+import hmac
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager, redirect_stdout
+from types import SimpleNamespace
+from typing import Callable, Dict, List, Optional
+
+# app import 전에 환경 변수 설정 (실제 API 키/DB 불필요)
+os.environ.setdefault("OPENAI_API_KEY", "sk-bench")
+os.environ.setdefault("VECTOR_DB_PATH", tempfile.mkdtemp(prefix="bench-chroma-"))
+os.environ.setdefault("EMBEDDING_CACHE_PATH", "")
+os.environ.setdefault("FAQ_DB_PATH", os.path.join(tempfile.mkdtemp(prefix="bench-faq-"), "faq.sqlite3"))
+os.environ.setdefault("TIMING_LOG", "false")
+
+import httpx
+from langchain.schema import Document
+from langchain_community.vectorstores import Chroma
+
+import app.llm as llm_module
+import app.main as main
+import app.metrics as metrics
+import app.retriever as retriever
+import app.security.kakao as kakao_security
+import app.vector_store as vector_store
+from app.answer_cache import AnswerCache
+from app.document_index import DocumentIndex
+from app.ingestion import bulk_ingest
+from app.lexical_index import LexicalIndex
+from app.numpy_index import NumpyIndex
+from app.parsers import iter_document
+from app.pipelines import iter_split_text
+from benchmarks.corpus import korean_chunks, policy_sections, write_csv, write_docx, write_pdf
+from benchmarks.fakes import FakeChatModel, FakeEmbeddings
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+SECRET = "bench-secret"
+FORMAT_VERSION = 1
+
+# 시나리오 이름 → (설정 함수, 기본 라운드 수), 등록 순서대로 실행
+SCENARIOS: Dict[str, tuple] = {}
+
+
+def scenario(name: str, rounds: int):
+    """
+    시나리오 등록
+
+    설정 함수(ctx)는 측정할 함수(인자 없음)와 extra_info(dict)를 반환합니다.
+    설정 시간은 측정에 포함되지 않습니다.
+    """
+    def register(setup: Callable):
+        SCENARIOS[name] = (setup, rounds)
+        return setup
+    return register
+
+
+# ----- 측정 -----
+
+def _percentile(ordered: List[float], p: float) -> float:
+    index = (len(ordered) - 1) * p
+    low = int(index)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (index - low)
+
+
+def stats(timings: List[float]) -> dict:
+    """pytest-benchmark와 같은 통계 항목 (초)"""
+    ordered = sorted(timings)
+    mean = statistics.fmean(ordered)
+    q1, q3 = _percentile(ordered, 0.25), _percentile(ordered, 0.75)
+    return {
+        "min": ordered[0],
+        "max": ordered[-1],
+        "mean": mean,
+        "stddev": statistics.stdev(ordered) if len(ordered) > 1 else 0.0,
+        "median": _percentile(ordered, 0.5),
+        "q1": q1,
+        "q3": q3,
+        "iqr": q3 - q1,
+        "rounds": len(ordered),
+        "total": sum(ordered),
+        "ops": 1.0 / mean if mean > 0 else 0.0,
+    }
+
+
+def measure(fn: Callable, rounds: int, warmup: int = 1) -> List[float]:
+    """fn을 warmup번 실행한 뒤 rounds번 측정 (앱 로그 출력은 버림)"""
+    with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+        for _ in range(warmup):
+            fn()
+        timings = []
+        for _ in range(rounds):
+            start = time.perf_counter()
+            fn()
+            timings.append(time.perf_counter() - start)
+    return timings
+
+
+# ----- 오프라인 앱 구성 -----
+
+@contextmanager
+def offline_app(workdir: str, config):
+    """
+    벡터 저장소/GPT/카카오 서명 키를 대역으로 교체 (끝나면 원래대로)
+
+    - 임베딩: FakeEmbeddings, GPT: FakeChatModel
+    - 벡터 인덱스/BM25 역색인/문서 대표 벡터: workdir 아래 새로 생성
+    - 답변 캐시: 비활성화 (매 라운드 실제 파이프라인을 측정)
+    """
+    fake_embeddings = FakeEmbeddings(dim=config.dim, latency=config.embed_ms / 1000)
+    fake_llm = FakeChatModel(
+        first_token_latency=config.llm_first_token_ms / 1000,
+        token_latency=config.llm_token_ms / 1000,
+    )
+    if config.backend == "numpy":
+        client = NumpyIndex(os.path.join(workdir, "vector_index"), embedding_function=fake_embeddings)
+    else:
+        with vector_store.suppress_stderr():
+            client = Chroma(
+                collection_name="bench",
+                embedding_function=fake_embeddings,
+                persist_directory=os.path.join(workdir, "chroma"),
+            )
+
+    originals = (
+        vector_store.embedding, vector_store.vector_client, vector_store.lexical_index, vector_store.document_index,
+        llm_module.llm, retriever.answer_cache, kakao_security.SECRET, metrics.TIMING_LOG,
+    )
+    vector_store.embedding = fake_embeddings
+    vector_store.vector_client = client
+    vector_store.lexical_index = LexicalIndex(os.path.join(workdir, "lexical")) if vector_store.HYBRID_SEARCH else None
+    vector_store.document_index = DocumentIndex(os.path.join(workdir, "documents")) if vector_store.TWO_STAGE_SEARCH else None
+    llm_module.llm = fake_llm
+    retriever.answer_cache = AnswerCache(max_entries=0)
+    kakao_security.SECRET = SECRET
+    metrics.TIMING_LOG = False
+    try:
+        yield SimpleNamespace(embeddings=fake_embeddings, llm=fake_llm)
+    finally:
+        (
+            vector_store.embedding, vector_store.vector_client, vector_store.lexical_index, vector_store.document_index,
+            llm_module.llm, retriever.answer_cache, kakao_security.SECRET, metrics.TIMING_LOG,
+        ) = originals
+
+
+def _corpus(ctx) -> list:
+    """검색/카카오 시나리오용 코퍼스 색인 (한 번만, 측정 제외)"""
+    if ctx.corpus is None:
+        chunks = korean_chunks(ctx.config.chunks, seed=ctx.config.seed)
+        documents = (
+            Document(page_content=text, metadata={"doc_id": cid.split(":")[0], "title": cid.split(":")[0], "page": 1})
+            for cid, text in chunks
+        )
+        with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+            ctx.loop.run_until_complete(bulk_ingest(documents, skip_existing=False))
+        ctx.corpus = chunks
+    return ctx.corpus
+
+
+def _questions(ctx, n: int = 64) -> list:
+    """코퍼스 청크에서 단어 몇 개를 골라 만든 질문 [(질문, 정답 청크 텍스트), ...]"""
+    rng = random.Random(ctx.config.seed + 1)
+    questions = []
+    for _, text in rng.sample(_corpus(ctx), min(n, len(ctx.corpus))):
+        words = text.split()
+        start = rng.randrange(max(1, len(words) - 6))
+        questions.append((" ".join(words[start:start + 6]) + " 알려주세요", text))
+    return questions
+
+
+def _cycle(items: list) -> Callable:
+    state = {"i": -1}
+
+    def next_item():
+        state["i"] = (state["i"] + 1) % len(items)
+        return items[state["i"]]
+    return next_item
+
+
+# ----- 시나리오 -----
+
+@scenario("parse_pdf", rounds=20)
+def _parse_pdf(ctx):
+    path = write_pdf(os.path.join(ctx.workdir, "bench.pdf"), pages=ctx.config.pdf_pages)
+    return lambda: sum(1 for _ in iter_document(path)), {"pages": ctx.config.pdf_pages}
+
+
+@scenario("parse_docx", rounds=20)
+def _parse_docx(ctx):
+    path = write_docx(os.path.join(ctx.workdir, "bench.docx"), sections=ctx.config.docx_sections)
+    return lambda: sum(1 for _ in iter_document(path)), {"sections": ctx.config.docx_sections}
+
+
+@scenario("parse_csv", rounds=20)
+def _parse_csv(ctx):
+    path = write_csv(os.path.join(ctx.workdir, "bench.csv"), megabytes=ctx.config.csv_mb)
+    return lambda: sum(1 for _ in iter_document(path)), {"megabytes": ctx.config.csv_mb}
+
+
+@scenario("chunking", rounds=50)
+def _chunking(ctx):
+    sections = policy_sections(ctx.config.sections, seed=ctx.config.seed)
+    chunks = sum(1 for _ in iter_split_text(sections))
+    return lambda: sum(1 for _ in iter_split_text(sections)), {"sections": len(sections), "chunks": chunks}
+
+
+@scenario("search", rounds=200)
+def _search(ctx):
+    questions = _questions(ctx)
+    next_question = _cycle(questions)
+
+    # 정답 청크가 상위 5개 안에 드는 비율 (속도만 보고 품질이 무너지는 변경을 잡기 위함)
+    with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+        hits = sum(
+            any(doc.page_content == answer for doc, _ in vector_store.search_documents(question, k=5))
+            for question, answer in questions
+        )
+    return (
+        lambda: vector_store.search_documents(next_question()[0], k=5),
+        {"chunks": len(ctx.corpus), "hit_at_5": round(hits / len(questions), 3)},
+    )
+
+
+def _sign(body: bytes) -> str:
+    return base64.b64encode(hmac.new(SECRET.encode("utf-8"), body, hashlib.sha256).digest()).decode("utf-8")
+
+
+@scenario("kakao_router", rounds=100)
+def _kakao_router(ctx):
+    bodies = [
+        json.dumps({"userRequest": {"utterance": question}}, ensure_ascii=False).encode("utf-8")
+        for question, _ in _questions(ctx)
+    ]
+    next_body = _cycle(bodies)
+    client = httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://bench")
+    ctx.cleanup.append(lambda: ctx.loop.run_until_complete(client.aclose()))
+
+    async def request():
+        body = next_body()
+        response = await client.post(
+            "/kakao/router",
+            content=body,
+            headers={"X-Kakao-Signature": _sign(body), "Content-Type": "application/json"},
+        )
+        text = response.json()["template"]["outputs"][0]["simpleText"]["text"]
+        assert "답변" in text, text  # 오류 응답이면 측정 무효
+
+    return lambda: ctx.loop.run_until_complete(request()), {"chunks": len(ctx.corpus)}
+
+
+@scenario("ingest", rounds=5)
+def _ingest(ctx):
+    sections = policy_sections(ctx.config.sections, seed=ctx.config.seed)
+    state = {"round": 0}
+
+    def ingest():
+        # 라운드마다 새 문서 (이미 저장된 청크를 건너뛰는 경로가 아니라 실제 색인을 측정)
+        state["round"] += 1
+        renamed = (
+            (text, {**meta, "doc_id": f"r{state['round']}-{meta['doc_id']}"})
+            for text, meta in sections
+        )
+        return ctx.loop.run_until_complete(bulk_ingest(iter_split_text(renamed)))
+
+    chunks = sum(1 for _ in iter_split_text(sections))
+    return ingest, {"sections": len(sections), "chunks": chunks}
+
+
+# ----- 실행 / 저장 / 비교 -----
+
+def _git(*args) -> str:
+    try:
+        return subprocess.run(["git", *args], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def run(config, scenarios: Optional[List[str]] = None) -> dict:
+    """
+    시나리오 실행 → 결과(JSON으로 저장할 dict)
+
+    Args:
+        config: 코퍼스 크기/대역 지연/라운드 수 설정 (parse_args() 결과)
+        scenarios: 실행할 시나리오 이름 (None이면 전체, 순서는 등록 순서)
+    """
+    names = [name for name in SCENARIOS if scenarios is None or name in scenarios]
+    unknown = set(scenarios or []) - set(SCENARIOS)
+    if unknown:
+        raise ValueError(f"알 수 없는 시나리오: {', '.join(sorted(unknown))}")
+
+    workdir = tempfile.mkdtemp(prefix="bench-suite-")
+    loop = asyncio.new_event_loop()
+    ctx = SimpleNamespace(config=config, workdir=workdir, loop=loop, corpus=None, cleanup=[])
+    benchmarks = []
+    try:
+        with offline_app(workdir, config):
+            for name in names:
+                setup, default_rounds = SCENARIOS[name]
+                fn, extra_info = setup(ctx)
+                timings = measure(fn, config.rounds or default_rounds, warmup=config.warmup)
+                result = {"name": name, "stats": stats(timings), "extra_info": extra_info}
+                benchmarks.append(result)
+                print(
+                    f"⏱️ {name:<13} median {result['stats']['median'] * 1000:9.2f}ms | "
+                    f"min {result['stats']['min'] * 1000:9.2f}ms | rounds {result['stats']['rounds']:4d} | {extra_info}"
+                )
+            for cleanup in ctx.cleanup:
+                cleanup()
+    finally:
+        loop.close()
+
+    return {
+        "version": FORMAT_VERSION,
+        "datetime": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "commit_info": {
+            "id": _git("rev-parse", "HEAD"),
+            "branch": _git("rev-parse", "--abbrev-ref", "HEAD"),
+            "dirty": bool(_git("status", "--porcelain", "--untracked-files=no")),
+        },
+        "machine_info": {
+            "python_version": platform.python_version(),
+            "platform": platform.platform(),
+            "machine": platform.machine(),
+            "cpu_count": os.cpu_count(),
+        },
+        "config": {key: value for key, value in vars(config).items() if key not in ("compare", "output", "fail_on_regression")},
+        "benchmarks": benchmarks,
+    }
+
+
+def default_output(result: dict) -> str:
+    commit = result["commit_info"]["id"][:7] or "nogit"
+    suffix = "-dirty" if result["commit_info"]["dirty"] else ""
+    return os.path.join(RESULTS_DIR, f"{commit}{suffix}.json")
+
+
+def save(result: dict, path: str) -> str:
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+    return path
+
+
+def compare(baseline: dict, current: dict, threshold: float = 0.10) -> List[dict]:
+    """
+    두 결과의 시나리오별 중앙값 비교
+
+    Returns:
+        [{"name", "baseline", "current", "change", "regression"}, ...]
+        change = current / baseline - 1, threshold보다 느려지면 regression
+    """
+    before = {bench["name"]: bench["stats"]["median"] for bench in baseline["benchmarks"]}
+    rows = []
+    for bench in current["benchmarks"]:
+        if bench["name"] not in before:
+            continue
+        old, new = before[bench["name"]], bench["stats"]["median"]
+        change = new / old - 1 if old > 0 else 0.0
+        rows.append({"name": bench["name"], "baseline": old, "current": new, "change": change, "regression": change > threshold})
+    return rows
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="오프라인 벤치마크 스위트 (OpenAI 대역 + 합성 코퍼스)")
+    parser.add_argument("--scenarios", nargs="+", choices=list(SCENARIOS), help="실행할 시나리오 (기본: 전체)")
+    parser.add_argument("--rounds", type=int, default=0, help="시나리오별 측정 횟수 (0이면 시나리오 기본값)")
+    parser.add_argument("--warmup", type=int, default=1, help="측정 전 실행 횟수")
+    parser.add_argument("--backend", choices=["chroma", "numpy"], default="chroma", help="벡터 인덱스 백엔드")
+    parser.add_argument("--chunks", type=int, default=5000, help="검색/카카오 시나리오 코퍼스 청크 수")
+    parser.add_argument("--sections", type=int, default=200, help="분할/색인 시나리오 섹션 수")
+    parser.add_argument("--pdf-pages", type=int, default=50)
+    parser.add_argument("--docx-sections", type=int, default=50)
+    parser.add_argument("--csv-mb", type=float, default=2.0)
+    parser.add_argument("--dim", type=int, default=256, help="가짜 임베딩 차원")
+    parser.add_argument("--embed-ms", type=float, default=0.0, help="임베딩 호출당 지연(ms)")
+    parser.add_argument("--llm-first-token-ms", type=float, default=0.0, help="GPT 첫 토큰 지연(ms)")
+    parser.add_argument("--llm-token-ms", type=float, default=0.0, help="GPT 토큰 간 지연(ms)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="결과 JSON 경로 (기본: benchmarks/results/<커밋>.json)")
+    parser.add_argument("--compare", help="비교할 이전 결과 JSON")
+    parser.add_argument("--threshold", type=float, default=0.10, help="이 비율 이상 느려지면 회귀로 표시")
+    parser.add_argument("--fail-on-regression", action="store_true", help="회귀가 있으면 종료 코드 1")
+    return parser.parse_args(argv)
+
+
+def main_cli(argv=None):
+    args = parse_args(argv)
+    print(f"🚀 오프라인 벤치마크 ({args.backend}, 코퍼스 {args.chunks}청크, 임베딩 지연 {args.embed_ms}ms)")
+    result = run(args, args.scenarios)
+    path = save(result, args.output or default_output(result))
+    print(f"💾 결과 저장: {path}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        print(f"📊 비교 기준: {baseline['commit_info']['id'][:7]} ({baseline['datetime']})")
+        rows = compare(baseline, result, args.threshold)
+        for row in rows:
+            mark = "❌" if row["regression"] else "✅"
+            print(
+                f"{mark} {row['name']:<13} {row['baseline'] * 1000:9.2f}ms → {row['current'] * 1000:9.2f}ms "
+                f"({row['change'] * 100:+.1f}%)"
+            )
+        if args.fail_on_regression and any(row["regression"] for row in rows):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main_cli()
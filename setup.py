@@ -19,5 +19,10 @@ setup(
         "python-dotenv==1.0.0",
         "tiktoken==0.5.2",
     ],
+    entry_points={
+        "console_scripts": [
+            "rag-ingest=app.ingest:main",
+        ],
+    },
 )
 
@@ -0,0 +1,153 @@
+import asyncio
+import time
+
+# 카카오 요청/가짜 검색 도우미 재사용 (app import 전 환경 변수 설정 포함)
+from test_kakao_callback import CallbackServer, StreamingFakeLLM, fake_search_by_vector, main, post_kakao, retriever, run_with_fakes, wait_for
+from app.admission import AdmissionController
+
+class RecordingFakeLLM(StreamingFakeLLM):
+    """max_tokens 옵션과 동시 실행 수를 기록하는 가짜 ChatOpenAI"""
+    def __init__(self, tokens, delay):
+        super().__init__(tokens, delay)
+        self.max_tokens = []
+        self.running = self.max_running = 0
+
+    async def astream(self, messages, max_tokens=None):
+        self.max_tokens.append(max_tokens)
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        try:
+            async for chunk in super().astream(messages):
+                yield chunk
+        finally:
+            self.running -= 1
+
+def with_admission(controller: AdmissionController, deadline: float, min_budget: float):
+    """카카오 동시 처리 제한/마감 설정 교체 (원래 값 반환 → restore()로 복구)"""
+    originals = (main.kakao_admission, main.KAKAO_DEADLINE, main.KAKAO_MIN_BUDGET)
+    main.kakao_admission, main.KAKAO_DEADLINE, main.KAKAO_MIN_BUDGET = controller, deadline, min_budget
+    return originals
+
+def restore(originals):
+    main.kakao_admission, main.KAKAO_DEADLINE, main.KAKAO_MIN_BUDGET = originals
+
+def answer_text(response: dict) -> str:
+    return response["template"]["outputs"][0]["simpleText"]["text"]
+
+def test_admission_queue_and_timeout():
+    async def scenario():
+        controller = AdmissionController("test", max_concurrency=1, max_queue=1, expected=1.0)
+        assert await controller.acquire(1.0)          # 바로 자리 얻음
+        waiting = asyncio.ensure_future(controller.acquire(1.0))
+        await asyncio.sleep(0)
+        assert not await controller.acquire(1.0)      # 대기열 가득 참 → 바로 거절
+        controller.release()                          # 대기자에게 자리 넘김
+        assert await waiting and controller.active == 1
+        start = time.perf_counter()
+        assert not await controller.acquire(0.05)     # 시간 안에 자리가 안 남
+        assert time.perf_counter() - start < 0.5
+        controller.release()
+        assert controller.active == 0
+
+        assert controller.decide(0.5, min_budget=1.0) == "shed_deadline"
+        assert controller.decide(1.3, min_budget=1.0) == "admitted"
+        controller.observe(3.0)                        # 실측이 느려지면 예상 처리 시간도 늘어남
+        assert controller.decide(1.3, min_budget=1.0) == "degraded"
+
+    asyncio.run(scenario())
+    print("✅ 대기열 가득 참/시간 초과 거절, 자리 넘김, 예산별 결정")
+
+def test_overload_is_shed_within_deadline():
+    llm = RecordingFakeLLM(["연차는 ", "15일", "입니다."], delay=0.15)  # 요청당 약 0.45초
+    originals = with_admission(AdmissionController("kakao", max_concurrency=2, max_queue=4, expected=0.5), deadline=1.2, min_budget=0.4)
+    cache_size = retriever.answer_cache.max_entries
+    retriever.answer_cache.max_entries = 0  # 가짜 임베딩이 모두 같아서 의미 캐시에 걸리지 않도록
+
+    async def scenario():
+        async def timed(i):
+            start = time.perf_counter()
+            response = await post_kakao(f"질문 {i}")
+            return time.perf_counter() - start, answer_text(response)
+        return await asyncio.gather(*(timed(i) for i in range(10)))
+
+    try:
+        results = run_with_fakes(scenario, llm)
+    finally:
+        restore(originals)
+        retriever.answer_cache.max_entries = cache_size
+    answered = [text for _, text in results if text.startswith("연차는 15일입니다.")]
+    shed = [text for _, text in results if "문의가 많아" in text]
+    slowest = max(elapsed for elapsed, _ in results)
+    assert len(answered) + len(shed) == 10 and answered and shed
+    assert llm.max_running <= 2            # 동시 GPT 호출 수 제한
+    assert slowest < 1.2 + 0.3             # 모든 응답이 마감 안에 (시작했다 버린 요청 없음)
+    print(f"✅ 10개 중 {len(answered)}개 답변, {len(shed)}개 바로 거절, 최장 {slowest:.2f}초")
+
+def test_degraded_when_budget_is_short():
+    llm = RecordingFakeLLM(["짧은 ", "답변"], delay=0.01)
+    # 예상 처리 시간(10초)이 예산보다 길면 줄여서 처리
+    originals = with_admission(AdmissionController("kakao", max_concurrency=2, max_queue=2, expected=10.0), deadline=4.5, min_budget=1.0)
+
+    async def scenario():
+        return await post_kakao("복지 포인트는 얼마인가요?")
+
+    try:
+        response = run_with_fakes(scenario, llm)
+    finally:
+        restore(originals)
+    assert answer_text(response).startswith("짧은 답변")
+    assert llm.max_tokens == [main.KAKAO_DEGRADED_MAX_TOKENS]
+    assert retriever.answer_cache.get("복지 포인트는 얼마인가요?") is None  # 줄인 답변은 캐시하지 않음
+    print(f"✅ 예산 부족 → max_tokens={main.KAKAO_DEGRADED_MAX_TOKENS}, k={main.KAKAO_DEGRADED_K}로 줄여서 답변")
+
+def test_pipeline_is_cut_at_deadline():
+    llm = RecordingFakeLLM(["아주 ", "느린 ", "답변"] * 4, delay=0.2)  # 약 2.4초 > 마감 0.8초
+    originals = with_admission(AdmissionController("kakao", max_concurrency=2, max_queue=2, expected=0.1), deadline=0.8, min_budget=0.2)
+
+    async def slow_search(*args, **kwargs):
+        await asyncio.sleep(0.4)  # 검색에 시간을 쓴 뒤 GPT 시작
+        return await fake_search_by_vector(*args, **kwargs)
+
+    async def scenario():
+        retriever.asearch_by_vector = slow_search  # run_with_fakes가 끝나면 복구
+        response = await post_kakao("마감 안에 못 끝나는 질문")
+        await asyncio.sleep(0.05)
+        return response, llm.running, main.kakao_admission.active
+
+    try:
+        response, running, active = run_with_fakes(scenario, llm)
+    finally:
+        restore(originals)
+    assert "시간이 초과" in answer_text(response)
+    assert running == 0 and active == 0  # 자리를 반납할 때 GPT 호출도 함께 끊김
+    print("✅ 마감이 지나면 공유 파이프라인(검색/GPT)도 같은 순간에 중단")
+
+def test_callback_mode_has_own_limit():
+    server = CallbackServer()
+    llm = RecordingFakeLLM(["콜백 ", "답변"], delay=0.3)
+    original = main.kakao_callback_admission
+    main.kakao_callback_admission = AdmissionController("kakao_callback", max_concurrency=1, max_queue=0, expected=1.0)
+
+    async def scenario():
+        responses = await asyncio.gather(*(post_kakao(f"콜백 질문 {i}", server.url) for i in range(3)))
+        await wait_for(lambda: server.received)
+        await main.close_client()
+        return responses
+
+    try:
+        responses = run_with_fakes(scenario, llm)
+    finally:
+        main.kakao_callback_admission = original
+        server.close()
+    shed = [r for r in responses if "문의가 많아" in str(r)]
+    assert len(shed) == 2 and sum(1 for r in responses if r.get("useCallback")) == 1
+    assert llm.max_running == 1
+    assert answer_text(server.received[0]).startswith("콜백 답변")
+    print("✅ 콜백 모드도 별도 동시 처리 제한 (넘는 요청은 바로 거절)")
+
+if __name__ == "__main__":
+    test_admission_queue_and_timeout()
+    test_overload_is_shed_within_deadline()
+    test_degraded_when_budget_is_short()
+    test_pipeline_is_cut_at_deadline()
+    test_callback_mode_has_own_limit()
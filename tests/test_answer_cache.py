@@ -0,0 +1,96 @@
+import asyncio
+import os
+import tempfile
+import time
+
+# 카카오 요청/가짜 검색 도우미 재사용 (app import 전 환경 변수 설정 포함)
+from test_kakao_callback import StreamingFakeLLM, fake_search_by_vector, retriever, run_with_fakes
+from app.answer_cache import AnswerCache
+import app.vector_store as vector_store
+
+ANSWER = {"answer": "연차는 15일입니다.", "sources": [{"title": "규정집.pdf", "page": 3, "score": 0.8}]}
+
+def test_exact_and_semantic_hit():
+    cache = AnswerCache(max_entries=10, ttl=60, similarity_threshold=0.9)
+    cache.put("연차는 며칠인가요?", [1.0, 0.0, 0.0], ANSWER)
+    
+    # 정확 일치: 공백/대소문자/물음표 차이는 무시
+    assert cache.get("  연차는   며칠인가요 ") is ANSWER
+    
+    # 의미 일치: 임베딩이 충분히 가까우면 적중
+    assert cache.get("연차 일수 알려줘", [0.99, 0.05, 0.0]) is ANSWER
+    # 임계값 미만이면 미스
+    assert cache.get("출장비 규정", [0.0, 1.0, 0.0]) is None
+    
+    stats = cache.stats()
+    assert (stats["exact_hits"], stats["semantic_hits"], stats["misses"]) == (1, 1, 1)
+    print("✅ 정확/의미 일치 확인")
+
+def test_ttl_lru_and_invalidation():
+    cache = AnswerCache(max_entries=2, ttl=0.05, similarity_threshold=0.9)
+    cache.put("a", [1.0, 0.0], ANSWER)
+    time.sleep(0.06)
+    assert cache.get("a", [1.0, 0.0]) is None  # TTL 만료
+    
+    cache = AnswerCache(max_entries=2, ttl=60)
+    cache.put("a", None, ANSWER)
+    cache.put("b", None, ANSWER)
+    cache.get("a")                  # a를 최근 사용으로 갱신
+    cache.put("c", None, ANSWER)    # b가 밀려남
+    assert cache.get("b") is None
+    assert cache.get("a") is ANSWER
+    
+    # 컬렉션 변경 알림 → 전체 무효화
+    cache.clear({"규정집.pdf"})
+    assert cache.get("a") is None
+    print("✅ TTL/LRU/무효화 확인")
+
+def test_disabled():
+    cache = AnswerCache(max_entries=0)
+    cache.put("a", [1.0], ANSWER)
+    assert cache.get("a", [1.0]) is None
+
+def test_stale_put_and_other_process_changes_are_dropped():
+    # clear() 전에 시작한 파이프라인의 답변은 저장하지 않음
+    cache = AnswerCache(max_entries=10, ttl=60)
+    generation = cache.generation
+    cache.clear({"규정집.pdf"})
+    cache.put("a", None, ANSWER, generation)
+    assert cache.get("a") is None
+    cache.put("a", None, ANSWER, cache.generation)
+    assert cache.get("a") is ANSWER
+
+    # 다른 프로세스(CLI 색인)가 변경 표시 파일에 덧붙이면 다음 조회에서 전체 무효화
+    stamp = os.path.join(tempfile.mkdtemp(prefix="test-stamp-"), "default")
+    cache = AnswerCache(max_entries=10, ttl=60, stamp_path=stamp)
+    cache.put("a", None, ANSWER)
+    assert cache.get("a") is ANSWER
+    with open(stamp, "ab") as f:
+        f.write(b".")
+    assert cache.get("a") is None
+    print("✅ 무효화 이후 도착한 답변은 버리고, 다른 프로세스의 문서 변경도 반영")
+
+def test_pipeline_racing_with_document_change_is_not_cached():
+    question = "연차는 며칠인가요?"
+
+    async def changing_search(*args, **kwargs):
+        # 검색 직후 문서가 바뀜 (예: 업로드 색인 완료)
+        results = await fake_search_by_vector(*args, **kwargs)
+        vector_store._notify_change({"규정.pdf"}, None)
+        return results
+
+    async def scenario():
+        retriever.asearch_by_vector = changing_search  # run_with_fakes가 끝나면 복구
+        await retriever.retrieve_answer(question, score_threshold=None)
+        return retriever.cached_answer(question)
+
+    cached = run_with_fakes(scenario, StreamingFakeLLM(["예전 ", "답변"], delay=0.01))
+    assert cached is None
+    print("✅ 검색 후 문서가 바뀐 파이프라인의 답변은 캐시하지 않음")
+
+if __name__ == "__main__":
+    test_exact_and_semantic_hit()
+    test_ttl_lru_and_invalidation()
+    test_disabled()
+    test_stale_put_and_other_process_changes_are_dropped()
+    test_pipeline_racing_with_document_change_is_not_cached()
@@ -0,0 +1,51 @@
+import json
+import os
+import tempfile
+
+# app import 시 실제 API 키/DB 없이 동작하도록 설정
+os.environ.setdefault("OPENAI_API_KEY", "sk-test")
+os.environ.setdefault("VECTOR_DB_PATH", tempfile.mkdtemp(prefix="test-chroma-"))
+os.environ.setdefault("EMBEDDING_CACHE_PATH", "")
+
+import numpy as np
+from benchmarks import suite
+from benchmarks.fakes import FakeEmbeddings
+import app.vector_store as vector_store
+
+def test_fake_embeddings_deterministic():
+    embeddings = FakeEmbeddings(dim=64)
+    a = np.array(embeddings.embed_query("연차휴가 신청 절차 안내"))
+    b = np.array(FakeEmbeddings(dim=64).embed_documents(["연차휴가 신청 절차 안내"])[0])
+    c = np.array(embeddings.embed_query("연차휴가 신청 방법"))
+    d = np.array(embeddings.embed_query("QX-1027 모델 교환"))
+    assert np.allclose(a, b) and abs(np.linalg.norm(a) - 1) < 1e-6
+    assert a @ c > a @ d  # 단어가 겹치는 질문이 더 가까움
+    print(f"✅ 가짜 임베딩: 유사 {a @ c:.2f} / 무관 {a @ d:.2f}")
+
+def test_suite_runs_offline_and_compares():
+    original_client = vector_store.vector_client
+    config = suite.parse_args(["--chunks", "300", "--sections", "10", "--rounds", "3", "--warmup", "0"])
+    result = suite.run(config, ["chunking", "search", "kakao_router"])
+    assert vector_store.vector_client is original_client  # 대역은 끝나면 원래대로
+    
+    assert [bench["name"] for bench in result["benchmarks"]] == ["chunking", "search", "kakao_router"]
+    for bench in result["benchmarks"]:
+        stats = bench["stats"]
+        assert stats["rounds"] == 3 and 0 < stats["min"] <= stats["median"] <= stats["max"]
+    assert result["benchmarks"][1]["extra_info"]["hit_at_5"] > 0.5
+    
+    path = suite.save(result, os.path.join(tempfile.mkdtemp(prefix="test-bench-"), "result.json"))
+    with open(path, encoding="utf-8") as f:
+        baseline = json.load(f)
+    
+    # 검색만 두 배 느려진 결과 → 검색만 회귀로 표시
+    slower = json.loads(json.dumps(baseline))
+    slower["benchmarks"][1]["stats"]["median"] *= 2
+    rows = {row["name"]: row for row in suite.compare(baseline, slower, threshold=0.1)}
+    assert rows["search"]["regression"] and abs(rows["search"]["change"] - 1.0) < 1e-9
+    assert not rows["chunking"]["regression"] and not rows["kakao_router"]["regression"]
+    print(f"✅ 오프라인 벤치마크: {[(b['name'], round(b['stats']['median'] * 1000, 1)) for b in result['benchmarks']]}")
+
+if __name__ == "__main__":
+    test_fake_embeddings_deterministic()
+    test_suite_runs_offline_and_compares()
@@ -0,0 +1,150 @@
+import asyncio
+import os
+import tempfile
+
+# app import 시 실제 API 키/DB 없이 동작하도록 설정
+os.environ.setdefault("OPENAI_API_KEY", "sk-test")
+os.environ.setdefault("VECTOR_DB_PATH", tempfile.mkdtemp(prefix="test-chroma-"))
+os.environ.setdefault("EMBEDDING_CACHE_PATH", "")
+
+import httpx
+import openai
+from langchain.schema import Document
+from langchain_community.vectorstores import Chroma
+import app.vector_store as vector_store
+from app.ingestion import bulk_ingest
+
+class FlakyEmbeddings:
+    """첫 호출은 429(Rate limit)로 실패하는 가짜 임베딩"""
+    def __init__(self):
+        self.calls = 0
+        self.embedded = 0
+    
+    async def aembed_documents(self, texts):
+        self.calls += 1
+        if self.calls == 1:
+            response = httpx.Response(429, headers={"retry-after": "0"}, request=httpx.Request("POST", "http://test"))
+            raise openai.RateLimitError("rate limited", response=response, body=None)
+        self.embedded += len(texts)
+        return [[float(len(t)), 1.0] for t in texts]
+
+def iter_chunks(n):
+    for i in range(n):
+        yield Document(page_content=f"청크 {i}", metadata={"doc_id": f"doc-{i % 7}.pdf"})
+
+def test_bulk_ingest_retries_and_skips_existing():
+    fake = FlakyEmbeddings()
+    originals = (vector_store.embedding, vector_store.vector_client)
+    vector_store.embedding = fake
+    vector_store.vector_client = Chroma(
+        collection_name="test_bulk",
+        embedding_function=fake,
+        persist_directory=tempfile.mkdtemp(prefix="test-chroma-"),
+    )
+    try:
+        stats = asyncio.run(bulk_ingest(iter_chunks(300), batch_size=32, concurrency=3, write_batch_size=100))
+        assert stats["chunks"] == 300 and stats["embedded"] == 300
+        assert fake.embedded == 300  # 429 후 재시도 성공
+        assert len(vector_store._existing_ids()) == 300
+        
+        # 같은 청크를 다시 넣으면 임베딩 없이 건너뜀
+        stats = asyncio.run(bulk_ingest(iter_chunks(300), batch_size=32, concurrency=3))
+        assert stats["embedded"] == 0 and stats["skipped"] == 300
+        assert fake.embedded == 300
+        print("✅ 429 재시도 / 기존 청크 건너뛰기 확인")
+    finally:
+        vector_store.embedding, vector_store.vector_client = originals
+
+class SlowEmbeddings:
+    """호출마다 오래 걸리는 가짜 임베딩 (끝난 호출 수 기록)"""
+    def __init__(self):
+        self.finished = 0
+
+    async def aembed_documents(self, texts):
+        await asyncio.sleep(0.3)
+        self.finished += 1
+        return [[float(len(t)), 1.0] for t in texts]
+
+def test_cancelled_bulk_ingest_stops_in_flight_batches():
+    fake = SlowEmbeddings()
+    originals = (vector_store.embedding, vector_store.vector_client)
+    vector_store.embedding = fake
+    vector_store.vector_client = Chroma(
+        collection_name="test_bulk_cancel",
+        embedding_function=fake,
+        persist_directory=tempfile.mkdtemp(prefix="test-chroma-"),
+    )
+
+    async def scenario():
+        task = asyncio.ensure_future(bulk_ingest(iter_chunks(100), batch_size=10, concurrency=2))
+        await asyncio.sleep(0.1)  # 배치 2개 임베딩 중, 세 번째 배치는 자리를 기다리는 중
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+        await asyncio.sleep(0.5)
+        return task.cancelled()
+
+    try:
+        assert asyncio.run(scenario())
+        assert fake.finished == 0 and vector_store._existing_ids() == set()
+        print("✅ 색인을 취소하면 진행 중인 배치도 취소 (실패로 바꾸지 않음)")
+    finally:
+        vector_store.embedding, vector_store.vector_client = originals
+
+class FailingEmbeddings:
+    """두 번째 호출은 바로 실패하고 나머지는 오래 걸리는 가짜 임베딩"""
+    def __init__(self):
+        self.calls = 0
+        self.finished = 0
+
+    async def aembed_documents(self, texts):
+        self.calls += 1
+        if self.calls == 2:
+            await asyncio.sleep(0.05)
+            raise RuntimeError("embedding API down")
+        if self.calls > 2:
+            await asyncio.sleep(0.3)
+        self.finished += 1
+        return [[float(len(t)), 1.0] for t in texts]
+
+def test_failed_bulk_ingest_stops_batches_and_publishes_written_rows():
+    fake = FailingEmbeddings()
+    changes = []
+    originals = (vector_store.embedding, vector_store.vector_client, list(vector_store._change_listeners))
+    vector_store.embedding = fake
+    vector_store.vector_client = Chroma(
+        collection_name="test_bulk_failure",
+        embedding_function=fake,
+        persist_directory=tempfile.mkdtemp(prefix="test-chroma-"),
+    )
+    vector_store.on_collection_change(lambda doc_ids, tenant: changes.append(doc_ids))
+
+    async def scenario():
+        try:
+            await bulk_ingest(iter_chunks(100), batch_size=10, concurrency=3, write_batch_size=10)
+        except RuntimeError:
+            pass
+        else:
+            raise AssertionError("실패가 전파되지 않음")
+        finished = fake.finished
+        await asyncio.sleep(0.5)
+        return finished
+
+    try:
+        finished = asyncio.run(scenario())
+        # 실패를 알린 뒤에는 남은 배치가 임베딩/저장을 이어가지 않음
+        assert fake.finished == finished == 1
+        # 실패 전에 저장된 첫 배치는 반영하고 변경을 알림 (캐시된 답변 무효화)
+        assert len(vector_store._existing_ids()) == 10
+        assert changes and changes[-1] == {f"doc-{i}.pdf" for i in range(7)}
+        print("✅ 배치 하나가 실패하면 나머지 배치를 취소하고 저장된 분량은 반영/알림")
+    finally:
+        vector_store.embedding, vector_store.vector_client = originals[:2]
+        vector_store._change_listeners[:] = originals[2]
+
+if __name__ == "__main__":
+    test_bulk_ingest_retries_and_skips_existing()
+    test_cancelled_bulk_ingest_stops_in_flight_batches()
+    test_failed_bulk_ingest_stops_batches_and_publishes_written_rows()
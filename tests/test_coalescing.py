@@ -0,0 +1,118 @@
+import asyncio
+import os
+import tempfile
+
+# app import 시 실제 API 키/DB 없이 동작하도록 설정
+os.environ.setdefault("OPENAI_API_KEY", "sk-test")
+os.environ.setdefault("VECTOR_DB_PATH", tempfile.mkdtemp(prefix="test-chroma-"))
+os.environ.setdefault("EMBEDDING_CACHE_PATH", "")
+
+from langchain.schema import Document
+import app.retriever as retriever
+from app import coalescing, metrics
+from app.coalescing import SingleFlight
+
+class SlowFakeLLM:
+    """인위적인 지연을 가진 가짜 generate_answer (호출 횟수 기록)"""
+    def __init__(self, delay: float):
+        self.delay = delay
+        self.calls = 0
+    
+    async def __call__(self, question, search_results, max_tokens=None):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return {"answer": f"{question} 답변", "sources": []}
+
+def test_single_flight_runs_once():
+    flight = SingleFlight()
+    calls = 0
+    
+    async def upstream():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return "결과"
+    
+    async def run():
+        return await asyncio.gather(*(flight.do("q", upstream) for _ in range(20)))
+    
+    results = asyncio.run(run())
+    assert results == ["결과"] * 20
+    assert calls == 1
+    assert flight.stats() == {"calls": 1, "coalesced": 19, "inflight": 0}
+    print("✅ 20개 동시 호출 → 실제 실행 1회")
+
+def test_concurrent_identical_questions_share_one_pipeline():
+    fake_llm = SlowFakeLLM(delay=0.1)
+    embed_calls = 0
+    
+    async def fake_embed(question):
+        nonlocal embed_calls
+        embed_calls += 1
+        await asyncio.sleep(0.01)
+        return [1.0, 0.0]
+    
+    async def fake_search(query_embedding, k=5, score_threshold=None, query=None, tenant=None):
+        return [(Document(page_content="연차 규정", metadata={"title": "규정집.pdf"}), 0.9)]
+    
+    originals = (retriever.aembed_query, retriever.asearch_by_vector, retriever.generate_answer, retriever.answer_cache.max_entries)
+    retriever.aembed_query = fake_embed
+    retriever.asearch_by_vector = fake_search
+    retriever.generate_answer = fake_llm
+    retriever.answer_cache.max_entries = 0  # 합치기 효과만 보기 위해 답변 캐시 끔
+    try:
+        questions = ["연차는 며칠인가요?", "연차는  며칠인가요", "연차는 며칠인가요 ?"] * 10
+        
+        async def run():
+            return await asyncio.gather(*(retriever.retrieve_answer(q, score_threshold=None) for q in questions))
+        
+        before, exported_before = retriever.inflight.stats(), coalescing.COALESCED_TOTAL._values.get((), 0)
+        results = asyncio.run(run())
+        after, exported_after = retriever.inflight.stats(), coalescing.COALESCED_TOTAL._values.get((), 0)
+    finally:
+        retriever.aembed_query, retriever.asearch_by_vector, retriever.generate_answer, retriever.answer_cache.max_entries = originals
+    
+    assert fake_llm.calls == 1
+    assert embed_calls == 1
+    assert all(r is results[0] for r in results)
+    assert after["coalesced"] - before["coalesced"] == len(questions) - 1
+    # 운영에서 합치기 효과를 볼 수 있도록 /metrics로 내보냄
+    assert exported_after - exported_before == len(questions) - 1
+    assert f"rag_coalesced_requests_total {int(exported_after)}" in metrics.render()
+    print(f"✅ {len(questions)}개 동시 질문 → GPT 호출 {fake_llm.calls}회")
+
+def test_each_caller_keeps_its_own_timeout():
+    flight = SingleFlight()
+    
+    async def upstream():
+        await asyncio.sleep(0.3)
+        return "결과"
+    
+    async def abandoned():
+        await asyncio.sleep(10)
+    
+    async def run():
+        # 짧은 마감(0.1초)으로 시작한 작업에 긴 마감(1초) 호출자가 합류
+        short = asyncio.ensure_future(flight.do("q", upstream, timeout=0.1))
+        await asyncio.sleep(0)
+        long = asyncio.ensure_future(flight.do("q", upstream, timeout=1.0))
+        short_result = (await asyncio.gather(short, return_exceptions=True))[0]
+        
+        # 아무도 기다리지 않으면 마감에 작업도 취소
+        lone = asyncio.ensure_future(flight.do("x", abandoned, timeout=0.05))
+        await asyncio.sleep(0)
+        task = flight._inflight["x"].task
+        lone_result = (await asyncio.gather(lone, return_exceptions=True))[0]
+        await asyncio.sleep(0)
+        return short_result, await long, lone_result, task.cancelled()
+    
+    short, long, lone, cancelled = asyncio.run(run())
+    assert isinstance(short, asyncio.TimeoutError) and long == "결과"
+    assert isinstance(lone, asyncio.TimeoutError) and cancelled
+    assert flight.stats() == {"calls": 2, "coalesced": 1, "inflight": 0}
+    print("✅ 짧은 마감으로 시작한 작업에 늦게 합류한 호출자는 자기 마감까지 기다림, 모두 포기하면 작업 취소")
+
+if __name__ == "__main__":
+    test_single_flight_runs_once()
+    test_concurrent_identical_questions_share_one_pipeline()
+    test_each_caller_keeps_its_own_timeout()
@@ -0,0 +1,99 @@
+import asyncio
+import hashlib
+import os
+os.environ.setdefault("OPENAI_API_KEY", "sk-test")
+from langchain.schema import Document
+from langchain_core.messages import AIMessageChunk
+import app.llm as llm_module
+from app.context_packer import count_tokens, pack_context
+
+def make_chunk(text, doc_id="manual.pdf", page=1, start=None):
+    metadata = {"doc_id": doc_id, "title": doc_id, "page": page}
+    if start is not None:
+        metadata.update(start_index=start, end_index=start + len(text))
+    return Document(page_content=text, metadata=metadata)
+
+def test_budget_and_priority():
+    results = [
+        (make_chunk(f"{i}번 규정: " + hashlib.sha256(str(i).encode()).hexdigest() * 4, page=i), 0.5 + i / 100)
+        for i in reversed(range(10))
+    ]
+    packed = pack_context(results, budget=300)
+    assert 0 < packed["tokens"] <= 300
+    assert packed["dropped_budget"] > 0
+    # 검색 순위가 높은 청크부터 들어감
+    scores = [score for _, score in packed["results"]]
+    assert scores == sorted(scores, reverse=True) and scores[0] == 0.59
+    
+    # 첫 청크가 예산보다 커도 잘라서 넣음
+    single = pack_context(results[-1:], budget=20)
+    assert len(single["results"]) == 1 and single["tokens"] <= 20
+
+    # 머리말만으로 예산을 넘으면 본문은 넣지 않음
+    header_only = pack_context(results[-1:], budget=2)
+    assert header_only["context"] == "[문서 1] (manual.pdf, p.0) "
+    print(f"✅ 예산 300 토큰 중 {packed['tokens']} 사용, 청크 {len(packed['results'])}개")
+
+def test_near_duplicates_and_overlap():
+    page = "연차는 입사 1년 후 15일이 부여됩니다. 3년 이상 근속 시 2년마다 1일씩 가산됩니다. 미사용 연차는 수당으로 지급됩니다."
+    first = make_chunk(page[:40], start=0)
+    second = make_chunk(page[30:], start=30)  # 앞 청크와 10자 겹침
+    duplicate = make_chunk(first.page_content + " ", doc_id="copy.pdf")
+    
+    packed = pack_context([(first, 0.9), (duplicate, 0.85), (second, 0.8)], budget=1000)
+    assert [doc.metadata["doc_id"] for doc, _ in packed["results"]] == ["manual.pdf", "manual.pdf"]
+    assert packed["dropped_duplicates"] == 1
+    assert packed["trimmed_chars"] == 10
+    assert packed["context"].count(page[30:40]) == 1
+    print(f"✅ 중복 {packed['dropped_duplicates']}개 제외, 겹침 {packed['trimmed_chars']}자 제거")
+
+def test_token_counts_cached():
+    text = "복리후생 포인트는 매년 1월에 지급됩니다. " * 20
+    count_tokens(text)
+    hits = count_tokens.cache_info().hits
+    pack_context([(make_chunk(text), 0.9)], budget=1000)
+    assert count_tokens.cache_info().hits > hits
+
+class FakeLLM:
+    def __init__(self):
+        self.prompts = []
+    
+    async def astream(self, messages):
+        self.prompts.append(messages[-1].content)
+        yield AIMessageChunk(content="답변" + " 추가" * (len(self.prompts) - 1))
+
+def test_generate_answer_uses_packed_sources():
+    fake = FakeLLM()
+    original = llm_module.llm
+    llm_module.llm = fake
+    try:
+        chunk = make_chunk("연차는 입사 1년 후 15일이 부여됩니다.")
+        results = [(chunk, 0.9), (make_chunk(chunk.page_content, doc_id="copy.pdf"), 0.7)]
+        answer = asyncio.run(llm_module.generate_answer("연차 며칠?", results))
+    finally:
+        llm_module.llm = original
+    
+    assert [source["title"] for source in answer["sources"]] == ["manual.pdf"]
+    assert "[문서 1] (manual.pdf, p.1)" in fake.prompts[0] and "[문서 2]" not in fake.prompts[0]
+
+def test_question_and_answer_tokens_not_cached():
+    fake = FakeLLM()
+    original = llm_module.llm
+    llm_module.llm = fake
+    try:
+        results = [(make_chunk("식대는 월 20만 원입니다."), 0.9)]
+        asyncio.run(llm_module.generate_answer("식대는?", results))
+        cached = count_tokens.cache_info().currsize
+        asyncio.run(llm_module.generate_answer("식대는 얼마인가요?", results))  # 다른 질문, 다른 답변
+    finally:
+        llm_module.llm = original
+    
+    # 청크/고정 문구는 캐시에서 세고, 매번 다른 질문과 답변은 캐시에 넣지 않음
+    assert count_tokens.cache_info().currsize == cached
+
+if __name__ == "__main__":
+    test_budget_and_priority()
+    test_near_duplicates_and_overlap()
+    test_token_counts_cached()
+    test_generate_answer_uses_packed_sources()
+    test_question_and_answer_tokens_not_cached()
@@ -0,0 +1,202 @@
+import asyncio
+import fcntl
+import os
+import tempfile
+import time
+
+import httpx
+from docx import Document as DocxDocument
+
+# app import 전 환경 변수 설정 포함
+from test_kakao_callback import main
+from test_multi_tenant import restore, with_tenant_store
+from benchmarks.fakes import FakeEmbeddings
+from app import jobs
+import app.security.admin as admin_security
+import app.vector_store as vector_store
+
+KEY = "admin-test-key"
+TENANT = "test:documents"
+
+def write_docx(path: str, paragraphs):
+    document = DocxDocument()
+    document.add_heading("복지 규정", level=1)
+    for text in paragraphs:
+        document.add_paragraph(text)
+    document.save(path)
+
+def run_api(scenario):
+    """임시 작업 디렉터리 + 가짜 임베딩 테넌트 저장소로 시나리오 실행"""
+    originals = with_tenant_store("numpy", cache_size=4)
+    vector_store.embedding = FakeEmbeddings(dim=64)
+    job_originals = (jobs.JOBS_DIR, jobs._store, admin_security.API_KEY)
+    jobs.JOBS_DIR, jobs._store, admin_security.API_KEY = tempfile.mkdtemp(prefix="test-jobs-"), None, KEY
+
+    async def run():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test", headers={"X-Admin-Key": KEY}) as client:
+            return await scenario(client)
+
+    try:
+        return asyncio.run(run())
+    finally:
+        jobs.shutdown()
+        jobs.JOBS_DIR, jobs._store, admin_security.API_KEY = job_originals
+        restore(originals)
+
+async def wait_job(client, job_id: str, timeout: float = 60.0) -> dict:
+    deadline = time.monotonic() + timeout
+    while True:
+        job = (await client.get(f"/documents/jobs/{job_id}")).json()
+        if job["status"] in ("done", "failed"):
+            return job
+        assert time.monotonic() < deadline, f"작업이 끝나지 않음: {job}"
+        await asyncio.sleep(0.05)
+
+def test_upload_returns_job_and_indexes_in_background():
+    path = tempfile.mkdtemp(prefix="test-upload-") + "/welfare.docx"
+    write_docx(path, [f"복지 포인트 {i}번 항목은 연간 {i * 10}만원까지 사용할 수 있습니다." for i in range(200)])
+    csv_text = "제품코드,설명\n" + "".join(f"AX-{i},에어컨 필터 교체 주기 {i}개월\n" for i in range(50))
+
+    async def scenario(client):
+        start = time.perf_counter()
+        with open(path, "rb") as f:
+            response = await client.post("/documents", files={"file": ("welfare.docx", f)}, data={"tenant": TENANT})
+        accepted = time.perf_counter() - start
+        assert response.status_code == 202 and response.json()["status"] == "queued"
+        assert "upload_path" not in response.json()
+
+        # 색인하는 동안 이벤트 루프가 막히지 않는지 (질문 응답 지연) 측정
+        lag, job_id = 0.0, response.json()["id"]
+        while (await client.get(f"/documents/jobs/{job_id}")).json()["status"] in ("queued", "running"):
+            tick = time.perf_counter()
+            await asyncio.sleep(0.01)
+            lag = max(lag, time.perf_counter() - tick - 0.01)
+        docx_job = await wait_job(client, job_id)
+
+        csv_response = await client.post("/documents", files={"file": ("filters.csv", csv_text.encode("utf-8"))}, data={"tenant": TENANT})
+        csv_job = await wait_job(client, csv_response.json()["id"])
+        listed = (await client.get("/documents/jobs")).json()
+
+        rejected = await client.post("/documents", files={"file": ("notes.txt", b"memo")})
+        forbidden = await client.get("/documents/jobs", headers={"X-Admin-Key": "wrong"})
+        deleted = await client.delete("/documents/filters.csv", params={"tenant": TENANT})
+        missing = await client.delete("/documents/filters.csv", params={"tenant": TENANT})
+        return accepted, lag, docx_job, csv_job, listed, rejected, forbidden, deleted, missing
+
+    accepted, lag, docx_job, csv_job, listed, rejected, forbidden, deleted, missing = run_api(scenario)
+    assert docx_job["status"] == "done", docx_job["error"]
+    assert docx_job["chunks"] > 0 and docx_job["result"]["added"] == docx_job["chunks"]
+    assert set(docx_job["timings"]) == {"parse", "split", "index", "total"}
+    assert csv_job["status"] == "done" and csv_job["chunks"] > 0
+    assert [job["filename"] for job in listed["jobs"]] == ["filters.csv", "welfare.docx"] and listed["pending"] == 0
+    assert rejected.status_code == 400 and forbidden.status_code == 403
+    assert deleted.json()["deleted"] == csv_job["chunks"] and missing.status_code == 404
+    print(f"✅ 업로드 {accepted * 1000:.0f}ms에 작업 ID 반환, DOCX {docx_job['chunks']}개 청크 "
+          f"({docx_job['timings']['total']}초), 색인 중 이벤트 루프 최대 지연 {lag * 1000:.1f}ms")
+
+def test_failed_reupload_keeps_previous_version():
+    rows = 3000  # 임베딩 배치(EMBED_BATCH_SIZE)가 여러 개가 되도록
+    csv_v1 = "제품코드,설명\n" + "".join(f"AX-{i},에어컨 필터 교체 주기 {i}개월\n" for i in range(rows))
+    csv_v2 = "제품코드,설명\n" + "".join(f"AX-{i},에어컨 필터 교체 주기 {i + 1}개월 (개정)\n" for i in range(rows))
+    changes = []
+    listeners = list(vector_store._change_listeners)
+
+    class FailingEmbeddings(FakeEmbeddings):
+        """fail_after번째 배치 이후 임베딩 API 장애"""
+        fail_after = None
+
+        async def aembed_documents(self, texts):
+            if self.fail_after is not None and self.calls >= self.fail_after:
+                raise RuntimeError("embedding API down")
+            return await super().aembed_documents(texts)
+
+    async def scenario(client):
+        embedding = vector_store.embedding = FailingEmbeddings(dim=64)
+        vector_store.on_collection_change(lambda doc_ids, tenant: changes.append(doc_ids))
+        first = await client.post("/documents", files={"file": ("filters.csv", csv_v1.encode("utf-8"))}, data={"tenant": TENANT})
+        first_job = await wait_job(client, first.json()["id"])
+        first_changes, first_calls = len(changes), embedding.calls
+        before = vector_store._existing_ids({"doc_id": "filters.csv"}, TENANT)
+        embedding.fail_after = embedding.calls + 1  # 새 버전의 두 번째 배치에서 실패
+        second = await client.post("/documents", files={"file": ("filters.csv", csv_v2.encode("utf-8"))}, data={"tenant": TENANT})
+        second_job = await wait_job(client, second.json()["id"])
+        after = vector_store._existing_ids({"doc_id": "filters.csv"}, TENANT)
+        return first_job, second_job, before, after, first_changes, first_calls
+
+    try:
+        first_job, second_job, before, after, first_changes, first_calls = run_api(scenario)
+    finally:
+        vector_store._change_listeners[:] = listeners
+    assert first_job["status"] == "done" and second_job["status"] == "failed"
+    # 배치가 여러 개여도 저장 반영/변경 알림(답변 캐시 비우기)은 한 번
+    assert first_calls > 1 and first_changes == 1
+    assert before and before <= after  # 예전 버전 청크는 하나도 지워지지 않음
+    print(f"✅ 재업로드 색인이 중간에 실패해도 예전 버전 {len(before)}개 청크 유지")
+
+def test_upload_rejected_while_another_process_writes():
+    async def scenario(client):
+        # 다른 프로세스(CLI 색인)가 잠금을 잡은 상태 흉내: 별도 파일 디스크립터로 flock
+        lock_path = vector_store.write_lock().path
+        fd = os.open(lock_path, os.O_RDWR | os.O_CREAT)
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        try:
+            busy = await client.post("/documents", files={"file": ("a.csv", b"a,b\n1,2\n")}, data={"tenant": TENANT})
+        finally:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+            os.close(fd)
+        accepted = await client.post("/documents", files={"file": ("a.csv", b"a,b\n1,2\n")}, data={"tenant": TENANT})
+        return busy, await wait_job(client, accepted.json()["id"])
+
+    busy, job = run_api(scenario)
+    assert busy.status_code == 503 and job["status"] == "done"
+    print("✅ 다른 프로세스가 색인 중이면 업로드 거절 (503)")
+
+def test_job_interrupted_by_shutdown_is_resumed():
+    path = tempfile.mkdtemp(prefix="test-upload-") + "/welfare.docx"
+    write_docx(path, ["복지 포인트는 연간 100만원까지 사용할 수 있습니다."])
+
+    async def scenario(client):
+        with open(path, "rb") as f:
+            job = jobs.save_upload(f, "welfare.docx", TENANT)
+        jobs._stopping = True  # 서버 종료 중: 파싱 프로세스를 쓸 수 없음
+        with jobs._pending_lock:
+            jobs._pending += 1
+        jobs._run_job(job["id"])
+        interrupted = jobs.get_store().get(job["id"])
+        kept = os.path.exists(job["upload_path"])
+
+        resumed = jobs.resume()  # 다음 시작
+        return interrupted, kept, resumed, await wait_job(client, job["id"])
+
+    interrupted, kept, resumed, job = run_api(scenario)
+    assert interrupted["status"] == "queued" and kept
+    assert resumed == 1 and job["status"] == "done" and job["chunks"] > 0
+    print("✅ 서버 종료로 중단된 작업은 업로드를 남기고 다음 시작 때 이어서 색인")
+
+def test_job_store_persists_and_resumes():
+    directory = tempfile.mkdtemp(prefix="test-jobs-")
+    store = jobs.JobStore(f"{directory}/jobs.sqlite3")
+    store.create("a", "a.pdf", None, f"{directory}/missing/a.pdf")
+    store.update("a", status="running", stage="parse", timings={"parse": 1.5})
+
+    reopened = jobs.JobStore(f"{directory}/jobs.sqlite3")  # 서버 재시작
+    job = reopened.get("a")
+    assert job["status"] == "running" and job["timings"] == {"parse": 1.5}
+    assert [job["id"] for job in reopened.unfinished()] == ["a"]
+
+    originals = (jobs.JOBS_DIR, jobs._store)
+    jobs.JOBS_DIR, jobs._store = directory, reopened
+    try:
+        assert jobs.resume() == 0  # 업로드 파일이 없으면 다시 실행하지 않고 실패 처리
+    finally:
+        jobs.JOBS_DIR, jobs._store = originals
+    assert reopened.get("a")["status"] == "failed" and not reopened.unfinished()
+    print("✅ 작업 상태/시간 저장, 재시작 후 끝나지 않은 작업 정리")
+
+if __name__ == "__main__":
+    test_upload_returns_job_and_indexes_in_background()
+    test_failed_reupload_keeps_previous_version()
+    test_upload_rejected_while_another_process_writes()
+    test_job_interrupted_by_shutdown_is_resumed()
+    test_job_store_persists_and_resumes()
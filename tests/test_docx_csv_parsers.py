@@ -0,0 +1,56 @@
+import os
+import tempfile
+from docx import Document as DocxDocument
+from app.parsers import iter_document, parse_document
+from app.parsers.csv_parser import iter_csv
+from app.pipelines import iter_split_text
+
+def test_docx_sections_and_tables():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "규정.docx")
+        doc = DocxDocument()
+        doc.add_paragraph("사내 규정 안내")
+        doc.add_heading("연차 휴가", level=1)
+        doc.add_paragraph("연차는 입사 1년 후 15일이 부여됩니다.")
+        table = doc.add_table(rows=2, cols=2)
+        table.cell(0, 0).text = "근속연수"
+        table.cell(0, 1).text = "연차일수"
+        table.cell(1, 0).text = "3년"
+        table.cell(1, 1).text = "16일"
+        doc.add_heading("복리후생", level=1)
+        doc.add_paragraph("포인트는 매년 1월에 지급됩니다.")
+        doc.save(path)
+        
+        sections = list(iter_document(path))
+        assert [meta["section"] for _, meta in sections] == ["", "연차 휴가", "복리후생"]
+        assert "근속연수 | 연차일수\n3년 | 16일" in sections[1][0]
+        assert all(meta["doc_id"] == "규정.docx" for _, meta in sections)
+        
+        text, metadata = parse_document(path)
+        assert "포인트는 매년 1월" in text and metadata["title"] == "규정.docx"
+        print(f"✅ DOCX 섹션 {len(sections)}개")
+
+def test_csv_streams_row_groups_cp949():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "연차현황.csv")
+        with open(path, "w", encoding="cp949", newline="") as f:
+            f.write("이름,부서,잔여연차\n")
+            for i in range(1, 201):
+                f.write(f"직원{i},인사팀,{i % 15}\n")
+        
+        sections = list(iter_csv(path, section_chars=300))
+        assert len(sections) > 1
+        assert sections[0][0].startswith("이름: 직원1 | 부서: 인사팀 | 잔여연차: 1")
+        # 행 범위가 빠짐없이 이어짐
+        assert sections[0][1]["row_start"] == 1 and sections[-1][1]["row_end"] == 200
+        for (_, prev), (_, cur) in zip(sections, sections[1:]):
+            assert cur["row_start"] == prev["row_end"] + 1
+        assert all(len(text) <= 300 for text, _ in sections)
+        
+        chunks = list(iter_split_text(iter_document(path)))
+        assert all("row_start" in chunk.metadata and "page" not in chunk.metadata for chunk in chunks)
+        print(f"✅ CSV 섹션 {len(sections)}개, 청크 {len(chunks)}개")
+
+if __name__ == "__main__":
+    test_docx_sections_and_tables()
+    test_csv_streams_row_groups_cp949()
@@ -0,0 +1,105 @@
+import asyncio
+import os
+import tempfile
+import threading
+from app import metrics
+from app.embedding_cache import EMBEDDING_CACHE_TOTAL, CachedEmbeddings
+
+class CountingEmbeddings:
+    """호출된 텍스트 수를 세는 가짜 임베딩"""
+    def __init__(self):
+        self.calls = 0
+    
+    def embed_documents(self, texts):
+        self.calls += len(texts)
+        return [[float(len(t)), 1.0, 0.5] for t in texts]
+    
+    def embed_query(self, text):
+        self.calls += 1
+        return [float(len(text)), 1.0, 0.5]
+    
+    async def aembed_query(self, text):
+        return self.embed_query(text)
+
+def test_embedding_cache():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "cache.sqlite3")
+        
+        # 1. 첫 색인: 중복 텍스트는 한 번만 임베딩
+        fake = CountingEmbeddings()
+        cache = CachedEmbeddings(fake, model_name="m", path=path)
+        vectors = cache.embed_documents(["가", "나나", "가"])
+        assert vectors[0] == vectors[2] == [1.0, 1.0, 0.5]
+        assert fake.calls == 2
+        cache.close()
+        
+        # 2. 재색인 (새 프로세스 가정): 바뀐 청크만 임베딩
+        fake = CountingEmbeddings()
+        cache = CachedEmbeddings(fake, model_name="m", path=path)
+        cache.embed_documents(["가", "나나", "다다다"])
+        assert fake.calls == 1
+        assert cache.stats()["hits"] == 2
+        assert cache.stats()["misses"] == 1
+        
+        # 3. 질문 임베딩도 캐시 (비동기 경로 포함)
+        query_hits = EMBEDDING_CACHE_TOTAL._values.get(("query", "hit"), 0)
+        asyncio.run(cache.aembed_query("다다다"))
+        assert fake.calls == 1
+        # 적중/미스는 /metrics로도 내보냄
+        assert EMBEDDING_CACHE_TOTAL._values[("query", "hit")] == query_hits + 1
+        assert 'rag_embedding_cache_total{kind="documents",result="miss"}' in metrics.render()
+        cache.close()
+        
+        # 4. 모델명이 다르면 다른 키
+        fake = CountingEmbeddings()
+        cache = CachedEmbeddings(fake, model_name="other", path=path)
+        cache.embed_documents(["가"])
+        assert fake.calls == 1
+        cache.close()
+        print("✅ 임베딩 캐시 적중/미스 확인")
+
+def test_embedding_cache_lru_eviction():
+    with tempfile.TemporaryDirectory() as tmp:
+        fake = CountingEmbeddings()
+        cache = CachedEmbeddings(fake, model_name="m", path=os.path.join(tmp, "cache.sqlite3"), max_entries=2)
+        cache.embed_documents(["a"])
+        cache.embed_documents(["b"])
+        cache.embed_query("a")          # a를 최근 사용으로 갱신
+        cache.embed_documents(["c"])    # 가장 오래된 b가 삭제됨
+        assert cache.stats()["entries"] == 2
+        
+        calls = fake.calls
+        cache.embed_documents(["a", "c"])
+        assert fake.calls == calls
+        cache.embed_documents(["b"])
+        assert fake.calls == calls + 1
+        cache.close()
+        print("✅ LRU 삭제 확인")
+
+def test_query_lookup_off_event_loop_without_writes():
+    with tempfile.TemporaryDirectory() as tmp:
+        fake = CountingEmbeddings()
+        cache = CachedEmbeddings(fake, model_name="m", path=os.path.join(tmp, "cache.sqlite3"))
+        cache.embed_query("연차")
+        threads = []
+        original_lookup = cache._lookup
+        def recording_lookup(keys):
+            threads.append(threading.current_thread())
+            return original_lookup(keys)
+        cache._lookup = recording_lookup
+        
+        writes = cache._conn.total_changes
+        async def run():
+            return await asyncio.gather(*(cache.aembed_query("연차") for _ in range(50)))
+        vectors = asyncio.run(run())
+        assert all(v == vectors[0] for v in vectors) and fake.calls == 1
+        assert threading.main_thread() not in threads       # 조회는 이벤트 루프 밖에서
+        assert cache._conn.total_changes == writes          # 적중마다 UPDATE/commit 하지 않음
+        assert cache.stats()["hits"] == 50 and cache.stats()["misses"] == 1
+        cache.close()
+        print("✅ 질문 임베딩 캐시 조회는 스레드에서, 적중 시 디스크 쓰기 없음")
+
+if __name__ == "__main__":
+    test_embedding_cache()
+    test_embedding_cache_lru_eviction()
+    test_query_lookup_off_event_loop_without_writes()
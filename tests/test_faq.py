@@ -0,0 +1,168 @@
+import asyncio
+import os
+import tempfile
+import threading
+import time
+
+from langchain.schema import Document
+from langchain_core.messages import AIMessageChunk
+
+# 카카오 요청/가짜 GPT 도우미 재사용 (app import 전 환경 변수 설정 포함)
+from test_kakao_callback import llm_module, post_kakao, retriever, run_with_fakes
+from app import faq
+import app.vector_store as vector_store
+
+searches = []
+
+async def topic_embed(query):
+    """질문 주제로 방향을 정하는 가짜 임베딩 (연차/식대/그 외)"""
+    if "연차" in query:
+        return [1.0, 0.0, 0.0, 0.0]
+    if "식대" in query:
+        return [0.0, 1.0, 0.0, 0.0]
+    return [0.0, 0.0, 1.0, 0.0]
+
+async def topic_search(query_embedding, k=5, score_threshold=None, query=None, tenant=None):
+    searches.append(query)
+    doc_id = "연차규정.pdf" if "연차" in query else "복지규정.pdf"
+    doc = Document(page_content=f"{doc_id} 본문", metadata={"doc_id": doc_id, "title": doc_id, "page": 1})
+    return [(doc, 0.9)]
+
+def with_faq_store():
+    """임시 FAQ 저장소 + 가짜 검색으로 교체 (원래 값 반환 → restore_faq()로 복구)"""
+    originals = (faq.FAQ_DB_PATH, faq._store, faq._tables, faq._tables_version, faq._pending, faq._pending_count,
+                 faq.FAQ_REBUILD_DELAY, faq.FAQ_REFRESH_INTERVAL, faq.aembed_query, faq.asearch_by_vector)
+    faq.FAQ_DB_PATH = os.path.join(tempfile.mkdtemp(prefix="test-faq-"), "faq.sqlite3")
+    faq._store, faq._tables, faq._tables_version, faq._pending, faq._pending_count = None, {}, None, {}, 0
+    faq.FAQ_REBUILD_DELAY = faq.FAQ_REFRESH_INTERVAL = 0.05
+    faq.aembed_query, faq.asearch_by_vector = topic_embed, topic_search
+    return originals
+
+def restore_faq(originals):
+    (faq.FAQ_DB_PATH, faq._store, faq._tables, faq._tables_version, faq._pending, faq._pending_count,
+     faq.FAQ_REBUILD_DELAY, faq.FAQ_REFRESH_INTERVAL, faq.aembed_query, faq.asearch_by_vector) = originals
+
+class TopicLLM:
+    """질문 주제별로 정해진 답변을 내는 가짜 ChatOpenAI"""
+    def __init__(self, version):
+        self.version = version
+
+    async def astream(self, messages):
+        topic = "연차" if "질문: 연차" in messages[1].content else "식대"
+        yield AIMessageChunk(content=f"{topic} {self.version}")
+
+def test_top_questions_answered_without_search_and_rebuilt_on_change():
+    async def scenario():
+        retriever.aembed_query, retriever.asearch_by_vector = topic_embed, topic_search
+        faq.start()
+        built = await faq.build(top_n=10, min_count=3)
+
+        # 라우터: 정확 일치는 검색/GPT 없이, 비슷한 질문은 임베딩 후 검색 없이
+        searches.clear()
+        exact = await post_kakao("연차 며칠이에요!!")
+        semantic = await retriever.retrieve_answer("연차 휴가는 며칠 주나요")
+        assert searches == []
+
+        # 근거 문서가 바뀌면 그 답변만 바로 내리고 백그라운드에서 다시 생성
+        llm_module.llm = TopicLLM("v2")  # run_with_fakes가 끝나면 복구
+        vector_store._notify_change({"연차규정.pdf"}, None)
+        assert retriever.cached_answer("연차 며칠이에요") is None
+        assert retriever.cached_answer("식대는 얼마인가요")["answer"] == "식대 v1"
+        for _ in range(100):
+            rebuilt = retriever.cached_answer("연차 며칠이에요")
+            if rebuilt is not None:
+                break
+            await asyncio.sleep(0.02)
+
+        again = await faq.build(top_n=10, min_count=3)
+        await faq.stop()
+        return built, exact, semantic, rebuilt, again
+
+    originals = with_faq_store()
+    try:
+        for question, times in (("연차 며칠이에요?", 4), ("연차 며칠이에요", 1), ("식대는 얼마인가요", 3), ("주차 되나요", 1)):
+            for _ in range(times):
+                faq.log_question(question)
+        built, exact, semantic, rebuilt, again = run_with_fakes(scenario, TopicLLM("v1"))
+        assert faq.get_store().top_questions("", 10)[0] == ("연차 며칠이에요", "연차 며칠이에요!!", 6)
+    finally:
+        restore_faq(originals)
+
+    assert built == {"questions": 2, "kept": 0, "removed": 0, "generated": 2, "no_evidence": 0, "failed": 0}
+    assert "연차 v1" in exact["template"]["outputs"][0]["simpleText"]["text"]
+    assert semantic["answer"] == "연차 v1"
+    assert rebuilt is not None and rebuilt["answer"] == "연차 v2"
+    assert again["kept"] == 2 and again["generated"] == 0
+    print("✅ 상위 질문 2개 미리 생성 → 검색/GPT 없이 응답, 근거 문서 변경 시 그 답변만 다시 생성")
+
+def test_question_log_flushed_off_event_loop():
+    flush_threads = []
+    
+    async def scenario():
+        store = faq.get_store()
+        original_log = store.log
+        def recording_log(counts):
+            flush_threads.append(threading.current_thread())
+            original_log(counts)
+        store.log = recording_log
+        for _ in range(faq.QUERY_LOG_FLUSH):
+            faq.log_question("연차 며칠이에요?")
+        for _ in range(100):
+            if faq.get_store().top_questions("", 10):
+                break
+            await asyncio.sleep(0.02)
+    
+    originals = with_faq_store()
+    try:
+        asyncio.run(scenario())
+        top = faq.get_store().top_questions("", 10)
+    finally:
+        restore_faq(originals)
+    
+    # QUERY_LOG_FLUSH번째 질문에서 반영하되 이벤트 루프 스레드에서는 쓰지 않음
+    assert top == [("연차 며칠이에요", "연차 며칠이에요?", faq.QUERY_LOG_FLUSH)]
+    assert flush_threads and threading.main_thread() not in flush_threads
+    print("✅ 질문 로그 반영은 이벤트 루프 밖 스레드에서")
+
+def test_lookup_stays_in_memory_and_sees_other_process_answers():
+    version_threads = []
+    
+    async def scenario():
+        store = faq.get_store()
+        original_version = store.version
+        def recording_version():
+            version_threads.append(threading.current_thread())
+            return original_version()
+        store.version = recording_version
+        faq.start()
+        version_threads.clear()  # 서버 시작 시 한 번 불러오는 것은 제외
+        
+        # 다른 프로세스(python -m app.faq build)가 답변을 저장
+        other = faq.FaqStore(faq.FAQ_DB_PATH)
+        other.claim("", [("연차 며칠이에요", "연차 며칠이에요?")])
+        other.put("", "연차 며칠이에요", "연차 며칠이에요?", [1.0, 0.0, 0.0, 0.0],
+                  {"answer": "연차 15일", "sources": []}, {"연차규정.pdf"}, time.time())
+        found = None
+        for _ in range(100):
+            found = retriever.cached_answer("연차 며칠이에요")
+            if found is not None:
+                break
+            await asyncio.sleep(0.02)
+        await faq.stop()
+        return found
+    
+    originals = with_faq_store()
+    try:
+        found = asyncio.run(scenario())
+    finally:
+        restore_faq(originals)
+    
+    # 조회는 메모리 테이블만 보고, 저장소 변경 확인은 이벤트 루프 밖 스레드에서
+    assert found is not None and found["answer"] == "연차 15일"
+    assert version_threads and threading.main_thread() not in version_threads
+    print("✅ FAQ 조회는 SQLite를 읽지 않고, 다른 프로세스의 답변은 백그라운드 새로 고침으로 반영")
+
+if __name__ == "__main__":
+    test_top_questions_answered_without_search_and_rebuilt_on_change()
+    test_question_log_flushed_off_event_loop()
+    test_lookup_stays_in_memory_and_sees_other_process_answers()
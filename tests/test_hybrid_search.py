@@ -0,0 +1,91 @@
+import os
+import tempfile
+import time
+
+# app import 시 실제 API 키/DB 없이 동작하도록 설정
+os.environ.setdefault("OPENAI_API_KEY", "sk-test")
+os.environ.setdefault("VECTOR_DB_PATH", tempfile.mkdtemp(prefix="test-chroma-"))
+os.environ.setdefault("EMBEDDING_CACHE_PATH", "")
+
+from langchain.schema import Document
+from langchain_community.vectorstores import Chroma
+import app.vector_store as vector_store
+from app.lexical_index import LexicalIndex, reciprocal_rank_fusion, tokenize
+
+class TopicEmbeddings:
+    """환불/반품 이야기는 한 방향, 나머지는 다른 방향 (제품 코드는 구분 못함)"""
+    def _vector(self, text):
+        return [1.0, 0.1] if ("환불" in text or "반품" in text) else [0.1, 1.0]
+    
+    def embed_documents(self, texts):
+        return [self._vector(t) for t in texts]
+    
+    def embed_query(self, text):
+        return self._vector(text)
+
+def test_tokenize_korean_and_codes():
+    terms = tokenize("연차휴가는 AB-1234 모델")
+    assert {"연차", "차휴", "휴가", "가는", "ab-1234", "ab", "1234", "모델"} == set(terms)
+
+def test_incremental_index_persist_and_reload():
+    path = tempfile.mkdtemp(prefix="test-lexical-")
+    index = LexicalIndex(path)
+    index.add(["a:1", "a:2"], ["연차는 15일입니다", "복리후생 포인트 안내"])
+    index.add(["b:1"], ["제품 XR-7700 교환 절차"])
+    assert [cid for cid, _ in index.search("XR-7700 교환")][0] == "b:1"
+    
+    index.delete(["a:1"])
+    index.add(["a:2"], ["복리후생 포인트는 1월 지급"])  # 같은 ID 교체
+    index.persist()
+    
+    reopened = LexicalIndex(path)
+    assert len(reopened) == 2
+    assert reopened.search("연차") == []
+    assert [cid for cid, _ in reopened.search("포인트 지급")] == ["a:2"]
+    
+    # 세그먼트가 많아지면 하나로 병합 (삭제된 문서 제거)
+    for i in range(LexicalIndex.MAX_SEGMENTS + 1):
+        reopened.add([f"c:{i}"], [f"출장비 정산 {i}번 규정"])
+    assert len(reopened._segments) <= LexicalIndex.MAX_SEGMENTS
+    reopened.persist()
+    assert len(LexicalIndex(path).search("출장비", k=20)) == LexicalIndex.MAX_SEGMENTS + 1
+
+def test_rrf():
+    fused = reciprocal_rank_fusion(["a", "b", "c"], ["c", "d"])
+    assert [key for key, _ in fused][:2] == ["c", "a"]
+
+def test_hybrid_finds_exact_code():
+    fake = TopicEmbeddings()
+    originals = (vector_store.vector_client, vector_store.lexical_index, vector_store.document_index)
+    vector_store.document_index = None
+    vector_store.vector_client = Chroma(
+        collection_name="test_hybrid",
+        embedding_function=fake,
+        persist_directory=tempfile.mkdtemp(prefix="test-chroma-"),
+    )
+    vector_store.lexical_index = LexicalIndex(tempfile.mkdtemp(prefix="test-lexical-"))
+    try:
+        texts = [f"환불 규정 {i}조: 구매 후 7일 이내 신청" for i in range(30)] + ["QX-1027 모델은 개봉 후 교환 불가"]
+        chunks = [Document(page_content=t, metadata={"doc_id": "manual.pdf", "title": "manual.pdf"}) for t in texts]
+        vector_store.add_documents(chunks)
+        
+        # 벡터 검색만으로는 제품 코드 청크가 상위에 오지 않음
+        vector_store.lexical_index, lexical = None, vector_store.lexical_index
+        plain = vector_store.search_documents("QX-1027 반품", k=3)
+        assert "QX-1027" not in " ".join(doc.page_content for doc, _ in plain)
+        
+        vector_store.lexical_index = lexical
+        start = time.perf_counter()
+        results = vector_store.search_documents("QX-1027 반품", k=3)
+        print(f"⏱️ 하이브리드 검색 {(time.perf_counter() - start) * 1000:.1f}ms")
+        contents = [doc.page_content for doc, _ in results]
+        assert "QX-1027 모델은 개봉 후 교환 불가" in contents
+        assert all(0 <= score <= 1 for _, score in results)
+    finally:
+        vector_store.vector_client, vector_store.lexical_index, vector_store.document_index = originals
+
+if __name__ == "__main__":
+    test_tokenize_korean_and_codes()
+    test_incremental_index_persist_and_reload()
+    test_rrf()
+    test_hybrid_finds_exact_code()
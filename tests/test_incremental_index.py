@@ -0,0 +1,61 @@
+import os
+import tempfile
+
+# app import 시 실제 API 키/DB 없이 동작하도록 설정
+os.environ.setdefault("OPENAI_API_KEY", "sk-test")
+os.environ.setdefault("VECTOR_DB_PATH", tempfile.mkdtemp(prefix="test-chroma-"))
+os.environ.setdefault("EMBEDDING_CACHE_PATH", "")
+
+from langchain.schema import Document
+from langchain_community.vectorstores import Chroma
+import app.vector_store as vector_store
+
+class CountingEmbeddings:
+    """임베딩한 텍스트 수를 세는 가짜 임베딩"""
+    def __init__(self):
+        self.calls = 0
+    
+    def embed_documents(self, texts):
+        self.calls += len(texts)
+        return [[float(len(t)), 1.0] for t in texts]
+    
+    def embed_query(self, text):
+        return [float(len(text)), 1.0]
+
+def make_chunks(doc_id, texts):
+    return [Document(page_content=t, metadata={"doc_id": doc_id, "title": doc_id}) for t in texts]
+
+def test_upsert_and_delete_document():
+    fake = CountingEmbeddings()
+    original = vector_store.vector_client
+    vector_store.vector_client = Chroma(
+        collection_name="test_incremental",
+        embedding_function=fake,
+        persist_directory=tempfile.mkdtemp(prefix="test-chroma-"),
+    )
+    try:
+        # 1. 최초 색인
+        result = vector_store.upsert_document("manual.pdf", make_chunks("manual.pdf", ["a", "b", "c"]))
+        assert result == {"added": 3, "deleted": 0, "unchanged": 0}
+        vector_store.upsert_document("other.pdf", make_chunks("other.pdf", ["x"]))
+        assert fake.calls == 4
+        
+        # 2. 한 청크만 바뀐 재색인 → 바뀐 청크만 임베딩, 사라진 청크는 삭제
+        result = vector_store.upsert_document("manual.pdf", make_chunks("manual.pdf", ["a", "b", "c2"]))
+        assert result == {"added": 1, "deleted": 1, "unchanged": 2}
+        assert fake.calls == 5
+        assert len(vector_store._existing_ids({"doc_id": "manual.pdf"})) == 3
+        
+        # 3. 같은 내용으로 다시 색인 → 변경 없음
+        result = vector_store.upsert_document("manual.pdf", make_chunks("manual.pdf", ["a", "b", "c2"]))
+        assert result["added"] == 0 and fake.calls == 5
+        
+        # 4. 문서 삭제는 다른 문서에 영향 없음
+        assert vector_store.delete_document("manual.pdf") == 3
+        assert vector_store._existing_ids() == {vector_store.chunk_id(make_chunks("other.pdf", ["x"])[0])}
+        print("✅ 문서 단위 증분 색인/삭제 확인")
+    finally:
+        vector_store.vector_client = original
+
+if __name__ == "__main__":
+    test_upsert_and_delete_document()
@@ -0,0 +1,105 @@
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from pathlib import Path
+
+# app import 전 환경 변수 설정 포함
+from test_multi_tenant import restore, with_tenant_store
+from benchmarks.fakes import FakeEmbeddings
+from app import ingest
+from app.ingest import Manifest, discover_files, document_id
+from app.parsers import iter_document
+import app.vector_store as vector_store
+
+def test_manifest_resume():
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        (root / "sub").mkdir()
+        done_file = root / "a.pdf"
+        changed_file = root / "sub" / "b.docx"
+        done_file.write_text("a")
+        changed_file.write_text("b")
+        (root / "notes.txt").write_text("지원하지 않는 형식")
+        
+        assert discover_files(root) == [done_file, changed_file]
+        
+        manifest = Manifest(root / ".ingest_manifest.json")
+        manifest.record(done_file, "done", chunks=3)
+        manifest.record(changed_file, "done", chunks=5)
+        
+        # 파일이 바뀌면 다시 색인 대상
+        time.sleep(0.01)
+        changed_file.write_text("b 수정")
+        
+        # 새 실행(재시작)에서도 완료 기록 유지
+        resumed = Manifest(root / ".ingest_manifest.json")
+        assert resumed.is_done(done_file)
+        assert not resumed.is_done(changed_file)
+        
+        resumed.record(done_file, "failed", error="parse: boom")
+        assert not Manifest(root / ".ingest_manifest.json").is_done(done_file)
+        print("✅ 매니페스트 재시작/변경 감지 확인")
+
+def test_same_filename_in_subdirectories():
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        paths = [root / "a" / "규정.csv", root / "b" / "규정.csv"]
+        for path in paths:
+            path.parent.mkdir()
+            path.write_text("항목,내용\n연차,15일\n", encoding="utf-8")
+        
+        doc_ids = [document_id(root, path) for path in paths]
+        assert doc_ids == ["a/규정.csv", "b/규정.csv"]
+        assert document_id(root, root / "c.pdf") == "c.pdf"  # 루트 바로 아래 파일은 예전과 같은 ID
+        
+        # 내용이 같아도 문서 ID가 겹치지 않음 (청크 ID는 "{doc_id}:{해시}")
+        sections = [list(iter_document(str(path), doc_id)) for path, doc_id in zip(paths, doc_ids)]
+        assert [s[0][1]["doc_id"] for s in sections] == doc_ids
+        assert sections[0][0][1]["title"] == "규정.csv"
+        print("✅ 하위 디렉터리의 같은 파일명 → 상대 경로 문서 ID로 구분")
+
+class FailingEmbeddings(FakeEmbeddings):
+    """failing이 켜져 있으면 두 번째 배치부터 임베딩 API 장애"""
+    failing = False
+
+    async def aembed_documents(self, texts):
+        if self.failing and self.calls >= 1:
+            raise RuntimeError("embedding API down")
+        return await super().aembed_documents(texts)
+
+def test_failed_csv_reingest_keeps_previous_version():
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        path = root / "filters.csv"
+        args = argparse.Namespace(directory=str(root), workers=1, pages_per_task=50, manifest=None,
+                                  batch_size=16, concurrency=1, tenant="test:ingest")
+        originals = with_tenant_store("numpy", cache_size=4)
+        embedding = vector_store.embedding = FailingEmbeddings(dim=64)
+        try:
+            path.write_text("제품코드,설명\n" + "".join(f"AX-{i},필터 교체 주기 {i}개월\n" for i in range(1000)), encoding="utf-8")
+            assert asyncio.run(ingest._run(args)) == 0
+            before = vector_store._existing_ids({"doc_id": "filters.csv"}, "test:ingest")
+
+            # 새 버전 색인이 중간에 실패해도 예전 버전은 그대로
+            time.sleep(0.01)
+            path.write_text("제품코드,설명\n" + "".join(f"AX-{i},필터 교체 주기 {i + 1}개월\n" for i in range(1000)), encoding="utf-8")
+            embedding.calls, embedding.failing = 0, True
+            assert asyncio.run(ingest._run(args)) == 1
+            after = vector_store._existing_ids({"doc_id": "filters.csv"}, "test:ingest")
+            assert len(before) > 16 and before <= after
+
+            # 다시 성공하면 예전 버전에만 있던 청크 정리
+            embedding.failing = False
+            assert asyncio.run(ingest._run(args)) == 0
+            final = vector_store._existing_ids({"doc_id": "filters.csv"}, "test:ingest")
+            assert final and not (final & before)
+        finally:
+            restore(originals)
+    print(f"✅ CSV 재색인이 실패해도 예전 버전 {len(before)}개 청크 유지, 성공하면 정리")
+
+if __name__ == "__main__":
+    test_manifest_resume()
+    test_same_filename_in_subdirectories()
+    test_failed_csv_reingest_keeps_previous_version()
@@ -0,0 +1,148 @@
+import asyncio
+import base64
+import hashlib
+import hmac
+import json
+import os
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# app import 시 실제 API 키/DB 없이 동작하도록 설정
+os.environ.setdefault("OPENAI_API_KEY", "sk-test")
+os.environ.setdefault("VECTOR_DB_PATH", tempfile.mkdtemp(prefix="test-chroma-"))
+os.environ.setdefault("EMBEDDING_CACHE_PATH", "")
+os.environ.setdefault("FAQ_DB_PATH", os.path.join(tempfile.mkdtemp(prefix="test-faq-"), "faq.sqlite3"))
+
+import httpx
+from langchain.schema import Document
+from langchain_core.messages import AIMessageChunk
+import app.llm as llm_module
+import app.main as main
+import app.retriever as retriever
+import app.security.kakao as kakao_security
+
+SECRET = "test-secret"
+
+class CallbackServer:
+    """카카오 콜백 서버 대역 (로컬 HTTP 서버, 받은 요청 본문 기록)"""
+    def __init__(self):
+        received = self.received = []
+        
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers["Content-Length"]))
+                received.append(json.loads(body))
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.end_headers()
+                self.wfile.write(b'{"taskId": "test", "status": "SUCCESS"}')
+            
+            def log_message(self, *args):
+                pass
+        
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}/callback"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+    
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+class StreamingFakeLLM:
+    """토큰을 하나씩 지연을 두고 내보내는 가짜 ChatOpenAI"""
+    def __init__(self, tokens, delay):
+        self.tokens = tokens
+        self.delay = delay
+    
+    async def astream(self, messages):
+        for token in self.tokens:
+            await asyncio.sleep(self.delay)
+            yield AIMessageChunk(content=token)
+
+async def fake_embed_query(query):
+    return [0.1] * 8
+
+async def fake_search_by_vector(query_embedding, k=5, score_threshold=None, query=None, tenant=None):
+    doc = Document(page_content="연차는 입사 1년 후 15일이 부여됩니다.", metadata={"title": "규정.pdf", "page": 3})
+    return [(doc, 0.9)]
+
+def sign(body: bytes) -> str:
+    return base64.b64encode(hmac.new(SECRET.encode("utf-8"), body, hashlib.sha256).digest()).decode("utf-8")
+
+async def post_kakao(question: str, callback_url: str = None) -> dict:
+    user_request = {"utterance": question}
+    if callback_url:
+        user_request["callbackUrl"] = callback_url
+    body = json.dumps({"userRequest": user_request}).encode("utf-8")
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        response = await client.post(
+            "/kakao/router",
+            content=body,
+            headers={"X-Kakao-Signature": sign(body), "Content-Type": "application/json"},
+        )
+    assert response.status_code == 200
+    return response.json()
+
+def run_with_fakes(coro_fn, llm):
+    originals = (kakao_security.SECRET, retriever.aembed_query, retriever.asearch_by_vector, llm_module.llm, main.KAKAO_CALLBACK_WAIT)
+    kakao_security.SECRET = SECRET
+    retriever.aembed_query = fake_embed_query
+    retriever.asearch_by_vector = fake_search_by_vector
+    llm_module.llm = llm
+    main.KAKAO_CALLBACK_WAIT = 0.2
+    retriever.answer_cache.clear()
+    try:
+        return asyncio.run(coro_fn())
+    finally:
+        (kakao_security.SECRET, retriever.aembed_query, retriever.asearch_by_vector, llm_module.llm, main.KAKAO_CALLBACK_WAIT) = originals
+
+async def wait_for(condition, timeout=5.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline, "콜백이 오지 않음"
+        await asyncio.sleep(0.02)
+
+def test_slow_answer_delivered_via_callback():
+    server = CallbackServer()
+    llm = StreamingFakeLLM(["연차는 ", "15일", "입니다."], delay=0.2)  # 0.6초 > 대기 0.2초
+    
+    async def scenario():
+        response = await post_kakao("연차 며칠이에요?", server.url)
+        assert response["useCallback"] is True
+        assert server.received == []
+        await wait_for(lambda: server.received)
+        await main.close_client()
+        return response
+    
+    try:
+        run_with_fakes(scenario, llm)
+    finally:
+        server.close()
+    
+    text = server.received[0]["template"]["outputs"][0]["simpleText"]["text"]
+    assert text.startswith("연차는 15일입니다.") and "규정.pdf (p.3)" in text
+    print(f"✅ 콜백으로 답변 전달: {text[:20]}...")
+
+def test_fast_answer_skips_callback():
+    server = CallbackServer()
+    llm = StreamingFakeLLM(["바로 ", "답변"], delay=0.01)
+    
+    async def scenario():
+        response = await post_kakao("복지 포인트는?", server.url)
+        await asyncio.sleep(0.3)
+        return response
+    
+    try:
+        response = run_with_fakes(scenario, llm)
+    finally:
+        server.close()
+    
+    assert "useCallback" not in response
+    assert response["template"]["outputs"][0]["simpleText"]["text"].startswith("바로 답변")
+    assert server.received == []
+
+if __name__ == "__main__":
+    test_slow_answer_delivered_via_callback()
+    test_fast_answer_skips_callback()
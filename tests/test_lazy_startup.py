@@ -0,0 +1,65 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 새 프로세스에서 import → lifespan 워밍업 → 검색까지 실행하고 상태를 JSON으로 출력
+SCRIPT = """
+import asyncio, json, sys, time
+start = time.perf_counter()
+import app.main as main
+from app import vector_store
+import app.llm as llm_module
+result = {
+    "import_s": time.perf_counter() - start,
+    "heavy_imported": sorted(m for m in ("langchain_openai", "chromadb") if m in sys.modules),
+    "created_on_import": [name for name in ("embedding", "vector_client", "lexical_index", "document_index")
+                          if getattr(vector_store, name) is not vector_store._UNSET] + (["llm"] if llm_module.llm else []),
+}
+if sys.argv[1] == "seed":
+    vector_store.upsert_vectors(["a.pdf:1"], [[1.0, 0.0, 0.0]], [{"doc_id": "a.pdf"}], ["연차 규정"])
+    vector_store._persist()
+
+async def serve():
+    async with main.lifespan(main.app):
+        result["created_after_warmup"] = [name for name in ("embedding", "vector_client", "lexical_index", "document_index")
+                                          if getattr(vector_store, name) is not vector_store._UNSET]
+        result["llm_created"] = llm_module.llm is not None
+        result["search"] = [doc.page_content for doc, _ in vector_store._search([1.0, 0.0, 0.0], k=1)]
+asyncio.run(serve())
+print(json.dumps(result))
+"""
+
+def run_app(backend: str, mode: str) -> dict:
+    env = {
+        **os.environ,
+        "OPENAI_API_KEY": "sk-test",
+        "VECTOR_BACKEND": backend,
+        "VECTOR_DB_PATH": tempfile.mkdtemp(prefix="test-chroma-"),
+        "NUMPY_INDEX_PATH": tempfile.mkdtemp(prefix="test-npindex-"),
+        "EMBEDDING_CACHE_PATH": "",
+        "WARMUP_CONNECT_TIMEOUT": "0",  # 네트워크 없이
+    }
+    out = subprocess.run([sys.executable, "-c", SCRIPT, mode], cwd=ROOT, env=env, capture_output=True, text=True, timeout=120)
+    assert out.returncode == 0, out.stderr
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+def test_import_is_lazy_and_lifespan_warms_up():
+    result = run_app("chroma", "empty")
+    assert result["heavy_imported"] == []  # langchain_openai/chromadb는 처음 쓸 때 import
+    assert result["created_on_import"] == []
+    assert result["created_after_warmup"] == ["embedding", "vector_client", "lexical_index", "document_index"]
+    assert result["llm_created"] and result["search"] == []
+    print(f"✅ import {result['import_s']:.2f}초, 무거운 객체는 워밍업에서 생성")
+
+def test_warmup_opens_existing_collection():
+    result = run_app("numpy", "seed")
+    assert result["search"] == ["연차 규정"]
+    print("✅ 저장된 청크가 있는 컬렉션 워밍업 후 검색")
+
+if __name__ == "__main__":
+    test_import_is_lazy_and_lifespan_warms_up()
+    test_warmup_opens_existing_collection()
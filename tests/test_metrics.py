@@ -0,0 +1,113 @@
+import asyncio
+import io
+import json
+import re
+from contextlib import redirect_stdout
+
+import httpx
+
+# 카카오 요청/가짜 GPT 도우미 재사용 (app import 전 환경 변수 설정 포함)
+from test_kakao_callback import StreamingFakeLLM, main, post_kakao, run_with_fakes
+from app import metrics
+
+def sample_value(text: str, line_prefix: str) -> float:
+    match = re.search(rf"^{re.escape(line_prefix)} (\S+)$", text, re.MULTILINE)
+    assert match, f"{line_prefix} 없음"
+    return float(match.group(1))
+
+def test_render_prometheus_format():
+    histogram = metrics.Histogram("test_seconds", "test", ("stage",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.5, 3.0):
+        histogram.observe(value, "embed")
+    counter = metrics.Counter("test_tokens_total", "test", ("kind",))
+    counter.inc(120, "prompt")
+    counter.inc(30, "prompt")
+
+    text = histogram.render() + "\n" + counter.render()
+    assert "# TYPE test_seconds histogram" in text
+    assert sample_value(text, 'test_seconds_bucket{stage="embed",le="0.1"}') == 1
+    assert sample_value(text, 'test_seconds_bucket{stage="embed",le="1.0"}') == 3  # 누적 카운트
+    assert sample_value(text, 'test_seconds_bucket{stage="embed",le="+Inf"}') == 4
+    assert sample_value(text, 'test_seconds_sum{stage="embed"}') == 4.05
+    assert sample_value(text, 'test_seconds_count{stage="embed"}') == 4
+    assert sample_value(text, 'test_tokens_total{kind="prompt"}') == 150
+    print("✅ Prometheus 텍스트 형식")
+
+def test_request_timing_log():
+    async def handle():
+        timer = metrics.start_request("test")
+        with metrics.stage("embed"):
+            await asyncio.sleep(0.01)
+        # 하위 태스크에서 기록한 단계도 같은 요청으로 합산
+        await asyncio.ensure_future(asyncio.sleep(0))
+        async def search():
+            with metrics.stage("search"):
+                await asyncio.sleep(0.02)
+        await asyncio.ensure_future(search())
+        metrics.count_tokens("prompt", 42)
+        metrics.annotate(cache="miss")
+        timer.finish("ok")
+
+    out = io.StringIO()
+    with redirect_stdout(out):
+        asyncio.run(handle())
+    log = json.loads(out.getvalue().strip().splitlines()[-1])
+
+    assert log["event"] == "request_timing" and log["endpoint"] == "test" and log["status"] == "ok"
+    assert log["stages_ms"]["embed"] >= 10 and log["stages_ms"]["search"] >= 20
+    assert log["total_ms"] >= log["stages_ms"]["embed"] + log["stages_ms"]["search"]
+    assert log["tokens"] == {"prompt": 42} and log["cache"] == "miss"
+    print(f"✅ 요청별 로그: {log['stages_ms']}")
+
+def test_disabled_is_noop():
+    original = metrics.METRICS_ENABLED
+    metrics.METRICS_ENABLED = False
+    try:
+        before = metrics.render()
+        assert metrics.stage("embed") is metrics.stage("search")  # 매번 같은 빈 컨텍스트
+        with metrics.stage("embed"):
+            pass
+        out = io.StringIO()
+        with redirect_stdout(out):
+            metrics.start_request("test").finish("ok")
+        assert out.getvalue() == "" and metrics.render() == before
+    finally:
+        metrics.METRICS_ENABLED = original
+    print("✅ 꺼져 있으면 기록 없음")
+
+def test_metrics_endpoint_after_kakao_request():
+    llm = StreamingFakeLLM(["연차는 ", "15일", "입니다."], delay=0.01)
+
+    async def scenario():
+        out = io.StringIO()
+        with redirect_stdout(out):
+            await post_kakao("연차 며칠이에요?")
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            response = await client.get("/metrics")
+        return out.getvalue(), response
+
+    before = metrics.render()
+    output, response = run_with_fakes(scenario, llm)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+
+    text = response.text
+    def count(stage):
+        prefix = f'rag_stage_seconds_count{{stage="{stage}"}}'
+        return sample_value(text, prefix) - (sample_value(before, prefix) if prefix in before else 0)
+    for stage in ("verify_signature", "pack_context", "llm_first_token", "llm", "format"):
+        assert count(stage) == 1, stage
+    assert 'rag_request_seconds_count{endpoint="kakao",status="ok"}' in text
+    assert 'rag_llm_tokens_total{kind="completion"}' in text
+
+    log = json.loads([line for line in output.splitlines() if line.startswith("{")][-1])
+    assert log["status"] == "ok" and log["tokens"]["prompt"] > 0
+    assert log["stages_ms"]["llm_first_token"] <= log["stages_ms"]["llm"] <= log["total_ms"]
+    print(f"✅ /metrics 수집: {log['stages_ms']}")
+
+if __name__ == "__main__":
+    test_render_prometheus_format()
+    test_request_timing_log()
+    test_disabled_is_noop()
+    test_metrics_endpoint_after_kakao_request()
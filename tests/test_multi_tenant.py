@@ -0,0 +1,112 @@
+import json
+import tempfile
+
+import httpx
+from langchain.schema import Document
+
+# 카카오 요청/가짜 GPT 도우미 재사용 (app import 전 환경 변수 설정 포함)
+from test_kakao_callback import StreamingFakeLLM, fake_search_by_vector, main, retriever, run_with_fakes, sign
+from test_two_stage import TopicEmbeddings
+import app.vector_store as vector_store
+
+def with_tenant_store(backend: str, cache_size: int):
+    """가짜 임베딩 + 임시 저장소 + 빈 테넌트 LRU로 교체 (원래 값 반환 → restore()로 복구)"""
+    originals = (vector_store.embedding, vector_store.VECTOR_BACKEND, vector_store.INDEX_PATH,
+                 vector_store.TENANT_CACHE_SIZE, dict(vector_store._tenants))
+    vector_store.close_tenants()
+    vector_store.embedding = TopicEmbeddings()
+    vector_store.VECTOR_BACKEND = backend
+    vector_store.INDEX_PATH = tempfile.mkdtemp(prefix=f"test-tenants-{backend}-")
+    vector_store.TENANT_CACHE_SIZE = cache_size
+    return originals
+
+def restore(originals):
+    vector_store.close_tenants()
+    (vector_store.embedding, vector_store.VECTOR_BACKEND, vector_store.INDEX_PATH,
+     vector_store.TENANT_CACHE_SIZE, tenants) = originals
+    vector_store._tenants.update(tenants)
+
+def add(tenant: str, doc_id: str, prefix: str):
+    chunks = [Document(page_content=prefix + "x" * i, metadata={"doc_id": doc_id}) for i in range(1, 4)]
+    vector_store.upsert_document(doc_id, chunks, tenant=tenant)
+
+def doc_ids(tenant: str, query: str):
+    return {doc.metadata["doc_id"] for doc, _ in vector_store.search_documents(query, k=5, tenant=tenant)}
+
+def test_tenants_are_isolated_and_lru_bounded():
+    originals = with_tenant_store("numpy", cache_size=2)
+    try:
+        add("kakao:a", "a.pdf", "가")
+        add("kakao:b", "b.pdf", "나")
+        # 다른 테넌트의 문서와 더 가까운 질문이어도 자기 문서만 검색
+        assert doc_ids("kakao:a", "나") == {"a.pdf"}
+        assert doc_ids("kakao:b", "가") == {"b.pdf"}
+
+        add("kakao:c", "c.pdf", "다")  # 세 번째 테넌트 → 가장 오래 안 쓴 a를 내림
+        assert vector_store.open_tenants() == ["kakao:b", "kakao:c"]
+        assert doc_ids("kakao:a", "가") == {"a.pdf"}  # 디스크에서 다시 로드
+        assert vector_store.open_tenants() == ["kakao:c", "kakao:a"]
+
+        # 사용 중인 테넌트는 한도를 넘어도 내리지 않음
+        with vector_store.open_tenant("kakao:c"), vector_store.open_tenant("kakao:a"):
+            with vector_store.open_tenant("kakao:b"):
+                assert len(vector_store.open_tenants()) == 3
+        assert len(vector_store.open_tenants()) == 2
+    finally:
+        restore(originals)
+    print("✅ 테넌트별 검색 분리, LRU 2개 유지, 내린 테넌트는 다시 로드")
+
+def test_chroma_tenant_released_and_reopened():
+    originals = with_tenant_store("chroma", cache_size=1)
+    try:
+        add("telegram:1", "one.pdf", "가")
+        with vector_store.open_tenant("telegram:1") as index:
+            collection = index.collection
+            manager = collection._client._manager  # Chroma 세그먼트 관리자 (열린 컬렉션의 인덱스 보관)
+            assert collection.id in manager._segment_cache
+
+        add("telegram:2", "two.pdf", "나")  # telegram:1을 내림 → 세그먼트도 메모리에서 내림
+        assert vector_store.open_tenants() == ["telegram:2"]
+        assert collection.id not in manager._segment_cache
+        assert doc_ids("telegram:1", "가") == {"one.pdf"}
+        assert doc_ids("telegram:2", "가") == {"two.pdf"}
+    finally:
+        restore(originals)
+    print("✅ Chroma 컬렉션 세그먼트 해제 후 다시 열어도 데이터 유지")
+
+def test_kakao_routes_by_bot_id():
+    llm = StreamingFakeLLM(["답변"], delay=0.01)
+    tenants = []
+
+    async def recording_search(query_embedding, k=5, score_threshold=None, query=None, tenant=None):
+        tenants.append(tenant)
+        return await fake_search_by_vector(query_embedding, k, score_threshold, query)
+
+    async def post(bot_id: str):
+        body = json.dumps({"bot": {"id": bot_id}, "userRequest": {"utterance": "연차 며칠이에요?"}}).encode("utf-8")
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            response = await client.post("/kakao/router", content=body, headers={"X-Kakao-Signature": sign(body)})
+        return response.json()
+
+    async def scenario():
+        retriever.asearch_by_vector = recording_search  # run_with_fakes가 끝나면 복구
+        for bot_id in ("bot-a", "bot-b", "bot-a"):
+            await post(bot_id)
+
+    original = main.MULTI_TENANT
+    main.MULTI_TENANT = True
+    try:
+        run_with_fakes(scenario, llm)
+    finally:
+        main.MULTI_TENANT = original
+    # 같은 질문이어도 봇마다 따로 검색, 같은 봇의 두 번째 질문은 그 봇의 답변 캐시에서 응답
+    assert tenants == ["kakao:bot-a", "kakao:bot-b"]
+    assert retriever.get_answer_cache("kakao:bot-a").get("연차 며칠이에요?") is not None
+    assert retriever.answer_cache.get("연차 며칠이에요?") is None
+    print(f"✅ 카카오 봇 ID별 테넌트: {tenants}")
+
+if __name__ == "__main__":
+    test_tenants_are_isolated_and_lru_bounded()
+    test_chroma_tenant_released_and_reopened()
+    test_kakao_routes_by_bot_id()
@@ -0,0 +1,128 @@
+import os
+import tempfile
+
+# app import 시 실제 API 키/DB 없이 동작하도록 설정
+os.environ.setdefault("OPENAI_API_KEY", "sk-test")
+os.environ.setdefault("VECTOR_DB_PATH", tempfile.mkdtemp(prefix="test-chroma-"))
+os.environ.setdefault("EMBEDDING_CACHE_PATH", "")
+
+import numpy as np
+from langchain.schema import Document
+import app.vector_store as vector_store
+from app.numpy_index import NumpyIndex
+
+class HashEmbeddings:
+    """텍스트별로 고정된 무작위 벡터를 돌려주는 가짜 임베딩"""
+    def _vector(self, text):
+        rng = np.random.default_rng(abs(hash(text)) % (2 ** 32))
+        return rng.standard_normal(32).tolist()
+    
+    def embed_documents(self, texts):
+        return [self._vector(t) for t in texts]
+    
+    def embed_query(self, text):
+        return self._vector(text)
+
+def random_rows(n, dim=32, seed=0):
+    vectors = np.random.default_rng(seed).standard_normal((n, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+def search(index, vector, k):
+    """[(본문, 제곱 L2 거리), ...] (Chroma collection.query()와 같은 형식으로 조회)"""
+    found = index.query([vector.tolist()], n_results=k, include=["documents", "distances"])
+    return list(zip(found["documents"][0], found["distances"][0]))
+
+def test_exact_and_int8_topk():
+    vectors = random_rows(2000)
+    ids = [f"doc.pdf:{i}" for i in range(len(vectors))]
+    queries = random_rows(20, seed=1)
+    exact = np.argsort(-(queries @ vectors.T), axis=1)[:, :10]
+    
+    for dtype in ("float32", "int8"):
+        index = NumpyIndex(tempfile.mkdtemp(prefix="test-npindex-"), dtype=dtype)
+        index.CONVERT_BLOCK_BYTES = 300 * 32 * 4  # int8 변환 블록 경계 확인
+        for start in range(0, len(ids), 700):
+            index.upsert(ids[start:start + 700], vectors[start:start + 700],
+                         [{"doc_id": "doc.pdf"}] * len(ids[start:start + 700]), ids[start:start + 700])
+        
+        hits = 0
+        for query, expected in zip(queries, exact):
+            results = search(index, query, k=10)
+            got = [int(document.split(":")[1]) for document, _ in results]
+            distances = [distance for _, distance in results]
+            assert distances == sorted(distances)
+            hits += len(set(got) & set(expected.tolist()))
+        recall = hits / exact.size
+        assert recall == 1.0 if dtype == "float32" else recall >= 0.9
+        print(f"✅ {dtype}: recall@10 {recall:.3f}")
+
+def test_upsert_delete_compact_and_refresh():
+    path = tempfile.mkdtemp(prefix="test-npindex-")
+    writer = NumpyIndex(path)
+    reader = NumpyIndex(path)  # 다른 워커 프로세스 역할
+    vectors = random_rows(10)
+    
+    writer.upsert([f"a:{i}" for i in range(10)], vectors, [{"doc_id": "a"}] * 10, [f"a{i}" for i in range(10)])
+    top = search(reader, vectors[3], k=1)
+    assert top[0][0] == "a3" and top[0][1] < 1e-3
+    
+    # 같은 ID로 다시 저장하면 예전 행은 검색되지 않음
+    writer.upsert(["a:3"], vectors[7:8], [{"doc_id": "a"}], ["a3-new"])
+    results = [document for document, _ in search(reader, vectors[3], k=10)]
+    assert results.count("a3-new") == 1
+    assert "a3" not in results
+    
+    writer.delete(where={"doc_id": "a"})
+    writer.upsert(["b:0"], vectors[:1], [{"doc_id": "b", "page": 2}], ["b0"])
+    writer.persist()  # 삭제 비율이 높으므로 압축
+    assert writer._meta["generation"] == 1 and writer._meta["rows"] == 1
+    assert reader.get(where={"doc_id": "b"}) == {"ids": ["b:0"], "documents": ["b0"], "metadatas": [{"doc_id": "b", "page": 2}]}
+    assert [document for document, _ in search(reader, vectors[0], k=5)] == ["b0"]
+
+def test_failed_upsert_keeps_rows_aligned():
+    path = tempfile.mkdtemp(prefix="test-npindex-")
+    index = NumpyIndex(path)
+    vectors = random_rows(6)
+    index.upsert(["d"], vectors[:1], [{"doc_id": "x"}], ["d"])
+    
+    # 벡터 파일만 쓰고 키 파일을 쓰기 전에 실패한 것처럼 만듦
+    original_append = index._append
+    def failing_append(name, rows):
+        if name == "keys.i64":
+            raise OSError("디스크 가득 참")
+        original_append(name, rows)
+    index._append = failing_append
+    try:
+        index.upsert(["d", "x1", "x2"], vectors[1:4], [{"doc_id": "x"}] * 3, ["d-new", "x1", "x2"])
+    except OSError:
+        pass
+    finally:
+        index._append = original_append
+    assert index.count() == 1 and index.get(ids=["d"])["documents"] == ["d"]  # 예전 행 유지
+    
+    index.upsert(["e"], vectors[4:5], [{"doc_id": "x"}], ["e"])
+    for cid, vector in (("d", vectors[0]), ("e", vectors[4])):
+        result = index.query([vector.tolist()], n_results=1)
+        assert result["ids"] == [[cid]] and result["distances"][0][0] < 1e-3
+    print("✅ 중간에 실패한 저장이 남긴 바이트는 잘라내고 추가 → 벡터/키 행 위치 일치")
+
+def test_vector_store_with_numpy_backend():
+    originals = (vector_store.vector_client, vector_store.document_index)
+    vector_store.vector_client = NumpyIndex(tempfile.mkdtemp(prefix="test-npindex-"), embedding_function=HashEmbeddings())
+    vector_store.document_index = None
+    try:
+        chunks = [Document(page_content=t, metadata={"doc_id": "manual.pdf", "title": "manual.pdf"}) for t in ["연차", "복지", "출장"]]
+        assert vector_store.upsert_document("manual.pdf", chunks)["added"] == 3
+        results = vector_store.search_documents("복지", k=2)
+        assert results[0][0].page_content == "복지" and abs(results[0][1] - 1.0) < 1e-4
+        assert vector_store.upsert_document("manual.pdf", chunks[:2]) == {"added": 0, "deleted": 1, "unchanged": 2}
+        assert vector_store.delete_document("manual.pdf") == 2
+        assert vector_store.search_documents("복지") == []
+    finally:
+        vector_store.vector_client, vector_store.document_index = originals
+
+if __name__ == "__main__":
+    test_exact_and_int8_topk()
+    test_upsert_delete_compact_and_refresh()
+    test_failed_upsert_keeps_rows_aligned()
+    test_vector_store_with_numpy_backend()
@@ -0,0 +1,57 @@
+import os
+import tempfile
+from app.parsers import iter_document, parse_document
+from app.pipelines import iter_split_text, split_text
+from app.formatters.kakao import format_skill_response
+from app.formatters.telegram import format_answer
+from benchmarks.corpus import write_pdf
+
+def test_chunks_keep_page_and_offsets():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = write_pdf(os.path.join(tmp, "manual.pdf"), pages=3, lines_per_page=30)
+        
+        sections = list(iter_document(path))
+        assert [meta["page"] for _, meta in sections] == [1, 2, 3]
+        
+        chunks = list(iter_split_text(iter_document(path)))
+        assert len(chunks) > 3
+        page_texts = {meta["page"]: text for text, meta in sections}
+        for chunk in chunks:
+            page = chunk.metadata["page"]
+            assert f"Page {page} line" in chunk.page_content
+            start, end = chunk.metadata["start_index"], chunk.metadata["end_index"]
+            assert page_texts[page][start:end] == chunk.page_content
+        print(f"✅ {len(chunks)}개 청크 모두 실제 페이지/오프셋 보유")
+
+def test_whole_text_split_keeps_page():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = write_pdf(os.path.join(tmp, "manual.pdf"), pages=3, lines_per_page=30)
+        page_texts = {meta["page"]: text for text, meta in iter_document(path)}
+        
+        # 스트리밍이 아닌 경로(parse_document + split_text)도 같은 페이지/오프셋
+        chunks = split_text(*parse_document(path))
+        assert {chunk.metadata["page"] for chunk in chunks} == {1, 2, 3}
+        for chunk in chunks:
+            assert "page_starts" not in chunk.metadata
+            page, start = chunk.metadata["page"], chunk.metadata["start_index"]
+            assert page_texts[page][start:start + 20] == chunk.page_content[:20]
+        print("✅ 전체 텍스트로 분할해도 청크마다 실제 페이지 보유")
+
+def test_formatters_cite_pages():
+    sources = [
+        {"title": "manual.pdf", "page": 2, "score": 0.9},
+        {"title": "manual.pdf", "page": 2, "score": 0.8},
+        {"title": "manual.pdf", "page": 7, "score": 0.7},
+        {"title": "old.pdf", "page": "?", "score": 0.6},
+    ]
+    kakao_text = format_skill_response("답변", sources)["template"]["outputs"][0]["simpleText"]["text"]
+    telegram_text = format_answer("답변", sources)
+    for text in (kakao_text, telegram_text):
+        assert text.count("manual.pdf (p.2)") == 1
+        assert "manual.pdf (p.7)" in text
+        assert "old.pdf\n" in text and "p.?" not in text
+
+if __name__ == "__main__":
+    test_chunks_keep_page_and_offsets()
+    test_whole_text_split_keeps_page()
+    test_formatters_cite_pages()
@@ -0,0 +1,73 @@
+import os
+import tempfile
+os.environ.setdefault("OPENAI_API_KEY", "sk-test")
+os.environ.setdefault("VECTOR_DB_PATH", tempfile.mkdtemp(prefix="test-chroma-"))
+os.environ.setdefault("EMBEDDING_CACHE_PATH", "")
+import numpy as np
+from langchain.schema import Document
+from langchain_community.vectorstores import Chroma
+import app.vector_store as vector_store
+from app.ranking import mmr, near_duplicates, rank
+
+class TableEmbeddings:
+    """텍스트 → 미리 정한 벡터"""
+    def __init__(self, table):
+        self.table = table
+    
+    def embed_documents(self, texts):
+        return [self.table[t] for t in texts]
+    
+    def embed_query(self, text):
+        return self.table[text]
+
+def unit(*values):
+    vector = np.array(values, dtype=np.float32)
+    return (vector / np.linalg.norm(vector)).tolist()
+
+def test_dedup_and_mmr():
+    embeddings = np.array([unit(1, 0, 0), unit(1, 0.01, 0), unit(0.9, 0.45, 0), unit(0.7, 0, 0.7)])
+    assert near_duplicates(embeddings, 0.97).tolist() == [False, True, False, False]
+    
+    relevance = np.array([0.9, 0.89, 0.85, 0.8])
+    # 관련도만 보면 0, 1, 2 / 다양성을 보면 거의 같은 1번 대신 방향이 다른 3번이 먼저
+    assert mmr(embeddings, relevance, 3, lambda_mult=1.0).tolist() == [0, 1, 2]
+    assert mmr(embeddings, relevance, 3, lambda_mult=0.5).tolist()[:2] == [0, 3]
+    
+    similarity = np.array([0.9, 0.89, 0.85, 0.2])
+    assert rank(embeddings, similarity, 3, score_threshold=0.3, mmr_lambda=1.0).tolist() == [0, 2]
+
+def test_search_dedups_by_embedding():
+    query = "연차는 며칠인가요"
+    table = {
+        query: unit(1, 0, 0),
+        "연차는 15일입니다.": unit(0.9, 0.1, 0),
+        "연차는 15일 입니다": unit(0.9, 0.1, 0.001),  # 띄어쓰기만 다른 사본 (앞 100자 비교로는 못 거름)
+        "연차 수당 안내": unit(0.8, 0.5, 0),
+        "출장비 정산": unit(0, 0, 1),
+    }
+    originals = (vector_store.vector_client, vector_store.lexical_index, vector_store.document_index)
+    vector_store.document_index = None
+    vector_store.vector_client = Chroma(
+        collection_name="test_ranking",
+        embedding_function=TableEmbeddings(table),
+        persist_directory=tempfile.mkdtemp(prefix="test-chroma-"),
+    )
+    vector_store.lexical_index = None
+    try:
+        texts = [t for t in table if t != query]
+        vector_store.add_documents([Document(page_content=t, metadata={"doc_id": f"{i}.pdf"}) for i, t in enumerate(texts)])
+        
+        results = vector_store.search_documents(query, k=3)
+        contents = [doc.page_content for doc, _ in results]
+        assert contents == ["연차는 15일입니다.", "연차 수당 안내", "출장비 정산"]
+        # 점수는 코사인 유사도 (직교 = 0)
+        assert abs(results[0][1] - float(np.dot(table[query], table[contents[0]]))) < 1e-4
+        assert results[2][1] < 1e-4
+        
+        assert len(vector_store.search_documents(query, k=3, score_threshold=0.5)) == 2
+    finally:
+        vector_store.vector_client, vector_store.lexical_index, vector_store.document_index = originals
+
+if __name__ == "__main__":
+    test_dedup_and_mmr()
+    test_search_dedups_by_embedding()
@@ -0,0 +1,99 @@
+import os
+import tempfile
+
+# app import 전 환경 변수 설정 포함
+from test_kakao_callback import main  # noqa: F401
+from test_multi_tenant import add, doc_ids, restore, with_tenant_store
+from app import snapshot
+import app.vector_store as vector_store
+
+class CountingEmbeddings:
+    """호출 수를 세는 임베딩 (가져오기가 임베딩 API를 부르지 않는지 확인)"""
+
+    def __init__(self, inner):
+        self.inner = inner
+        self.calls = 0
+
+    def embed_documents(self, texts):
+        self.calls += 1
+        return self.inner.embed_documents(texts)
+
+    def embed_query(self, text):
+        self.calls += 1
+        return self.inner.embed_query(text)
+
+def with_snapshot_store(backend: str):
+    """2단계 검색(문서 대표 벡터)까지 켠 임시 테넌트 저장소 (원래 값 반환 → restore_snapshot_store()로 복구)"""
+    originals = (vector_store.TWO_STAGE_SEARCH, with_tenant_store(backend, cache_size=4))
+    vector_store.TWO_STAGE_SEARCH = True
+    return originals
+
+def restore_snapshot_store(originals):
+    two_stage, tenant_store = originals
+    restore(tenant_store)
+    vector_store.TWO_STAGE_SEARCH = two_stage
+
+def export_source(path: str):
+    """numpy 백엔드 테넌트에 문서 3개(하나는 삭제)를 색인하고 스냅샷으로 내보냄"""
+    originals = with_snapshot_store("numpy")
+    try:
+        add("source", "a.pdf", "가")
+        add("source", "b.pdf", "나")
+        add("source", "c.pdf", "다")
+        vector_store.delete_document("c.pdf", tenant="source")
+        vector_store._persist("source")
+        header = snapshot.export_snapshot(path, tenant="source")
+        with vector_store.open_tenant("source") as index:
+            expected = (index.lexical_index.search("나나", k=10), index.document_index.export_arrays()[0])
+    finally:
+        restore_snapshot_store(originals)
+    return header, expected
+
+def test_snapshot_round_trip_without_embedding_calls():
+    path = os.path.join(tempfile.mkdtemp(prefix="test-snapshot-"), "rag.snap")
+    header, (lexical_hits, centroid_docs) = export_source(path)
+    assert header["rows"] == 6 and header["dim"] == 4
+
+    for backend in ("numpy", "chroma"):  # 다른 백엔드로도 가져올 수 있음
+        originals = with_snapshot_store(backend)
+        try:
+            counting = vector_store.embedding = CountingEmbeddings(vector_store.embedding)
+            add("replica", "old.pdf", "다")  # 가져오면 기존 청크는 교체됨
+            counting.calls = 0
+            result = snapshot.import_snapshot(path, tenant="replica")
+            assert result == {"rows": 6, "skipped": False, "seconds": result["seconds"]}
+            assert counting.calls == 0
+            assert snapshot.import_snapshot(path, tenant="replica")["skipped"]
+
+            assert doc_ids("replica", "가") == {"a.pdf", "b.pdf"}
+            with vector_store.open_tenant("replica") as index:
+                assert index.lexical_index.search("나나", k=10) == lexical_hits
+                assert index.document_index.export_arrays()[0] == centroid_docs == ["a.pdf", "b.pdf"]
+        finally:
+            restore_snapshot_store(originals)
+        print(f"✅ 스냅샷 → {backend}: 6개 청크 {result['seconds'] * 1000:.0f}ms, 임베딩 호출 0회, BM25/문서 대표 벡터 동일")
+
+def load_error(path: str) -> str:
+    try:
+        snapshot.Snapshot(path)
+    except snapshot.SnapshotError as e:
+        return str(e)
+    return ""
+
+def test_corrupted_snapshot_is_rejected():
+    path = os.path.join(tempfile.mkdtemp(prefix="test-snapshot-"), "rag.snap")
+    export_source(path)
+    offset = snapshot.Snapshot(path).sections["embeddings"]["offset"]
+    with open(path, "r+b") as f:
+        f.seek(offset)
+        f.write(b"\xff\xff\xff\xff")
+    assert "embeddings" in load_error(path)
+
+    with open(path, "r+b") as f:
+        f.truncate(os.path.getsize(path) - 10)
+    assert "잘렸습니다" in load_error(path)
+    print("✅ 손상되거나 잘린 스냅샷은 가져오지 않음")
+
+if __name__ == "__main__":
+    test_snapshot_round_trip_without_embedding_calls()
+    test_corrupted_snapshot_is_rejected()
@@ -0,0 +1,136 @@
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from app.clients import telegram
+
+class BotApiStub:
+    """텔레그램 Bot API 대역 (로컬 HTTP 서버, keep-alive 지원, 앞의 rate_limited개 요청은 429)"""
+    def __init__(self, rate_limited: int = 0, retry_after: int = 1):
+        received = self.received = []  # (도착 시각, 메서드, 본문)
+        self.connections = set()       # 요청을 보낸 클라이언트 포트 → 연결 재사용 확인
+        stub = self
+        stub.rate_limited = rate_limited
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                stub.connections.add(self.client_address[1])
+                received.append((time.monotonic(), self.path.rsplit("/", 1)[-1], body))
+                if stub.rate_limited > 0:
+                    stub.rate_limited -= 1
+                    status, reply = 429, {"ok": False, "error_code": 429, "parameters": {"retry_after": retry_after}}
+                else:
+                    status, reply = 200, {"ok": True, "result": {"message_id": len(received)}}
+                data = json.dumps(reply).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}/botTEST"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def messages(self, chat_id=None):
+        return [body for _, method, body in self.received
+                if method == "sendMessage" and chat_id in (None, body["chat_id"])]
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+def run_with_stub(stub: BotApiStub, scenario, sender: telegram.TelegramSender):
+    """API 주소/전송 큐를 바꿔 시나리오 실행 후 원래대로 복구"""
+    original = (telegram.API_URL, telegram._sender)
+    telegram.API_URL, telegram._sender = stub.url, sender
+
+    async def run():
+        try:
+            return await scenario()
+        finally:
+            await telegram.close_client()
+
+    try:
+        return asyncio.run(run())
+    finally:
+        telegram.API_URL, telegram._sender = original
+        stub.close()
+
+def test_split_message():
+    paragraph = "연차는 입사 1년 후 15일이 부여됩니다. " * 40  # 약 900자
+    text = "\n\n".join(f"{i}. {paragraph.strip()}" for i in range(12))
+    parts = telegram.split_message(text)
+
+    assert len(text) > 10000 and len(parts) == 3
+    assert all(len(part) <= telegram.MAX_MESSAGE_LENGTH for part in parts)
+    assert all(part[0].isdigit() for part in parts)  # 문단 경계에서 자름
+    assert " ".join(parts).split() == text.split()
+
+    no_spaces = "가" * 9000
+    assert [len(part) for part in telegram.split_message(no_spaces)] == [4096, 4096, 808]
+    assert telegram.split_message("짧은 답변") == ["짧은 답변"]
+    print(f"✅ 긴 답변 분할: {[len(part) for part in parts]}")
+
+def test_long_answer_in_order_over_one_connection():
+    stub = BotApiStub()
+    text = "\n\n".join(f"{i}번 문단 " + "내용 " * 700 for i in range(4))
+
+    async def scenario():
+        results = await telegram.send_message(42, text)
+        await telegram.send_typing(42)
+        await telegram.send_message(42, "두 번째 답변")
+        return results
+
+    results = run_with_stub(stub, scenario, telegram.TelegramSender(chat_rate=100, chat_burst=10))
+    messages = stub.messages()
+    assert len(results) == 4 and all(result["ok"] for result in results)
+    assert [message["text"].split("번")[0] for message in messages[:4]] == ["0", "1", "2", "3"]
+    assert messages[-1]["text"] == "두 번째 답변"
+    assert len(stub.connections) == 1  # 요청마다 새 연결을 맺지 않음
+    print(f"✅ 메시지 {len(messages)}개 순서대로, 연결 1개 재사용")
+
+def test_retry_after_on_429():
+    stub = BotApiStub(rate_limited=1, retry_after=1)
+
+    async def scenario():
+        start = time.monotonic()
+        results = await telegram.send_message(7, "안녕하세요")
+        return results, time.monotonic() - start
+
+    results, elapsed = run_with_stub(stub, scenario, telegram.TelegramSender())
+    assert results[0]["ok"] and len(stub.messages()) == 2  # 429 한 번 후 재전송
+    assert elapsed >= 1.0
+    print(f"✅ 429 → retry_after 대기 후 재시도 ({elapsed:.2f}초)")
+
+def test_rate_limits_per_chat_and_global():
+    stub = BotApiStub()
+
+    async def scenario():
+        await asyncio.gather(*(telegram.send_message(1, f"메시지 {i}") for i in range(6)))
+        await asyncio.gather(*(telegram.send_message(chat_id, "공지") for chat_id in range(100, 110)))
+
+    sender = telegram.TelegramSender(global_rate=50, chat_rate=20, chat_burst=1)
+    run_with_stub(stub, scenario, sender)
+
+    same_chat = [arrived for arrived, _, body in stub.received if body["chat_id"] == 1]
+    other_chats = [arrived for arrived, _, body in stub.received if body["chat_id"] >= 100]
+    assert [body["text"] for body in stub.messages(1)] == [f"메시지 {i}" for i in range(6)]
+    assert same_chat[-1] - same_chat[0] >= 5 / 20 * 0.8  # 채팅당 초당 20개 (도착 시각 오차 허용)
+    # 서로 다른 채팅은 채팅 한도에 막히지 않고 전체 한도(초당 50개, 버스트 50)만 적용
+    assert other_chats[-1] - other_chats[0] < 5 / 20
+    print(f"✅ 같은 채팅 {same_chat[-1] - same_chat[0]:.2f}초, 다른 채팅 10개 {other_chats[-1] - other_chats[0]:.2f}초")
+
+if __name__ == "__main__":
+    test_split_message()
+    test_long_answer_in_order_over_one_connection()
+    test_retry_after_on_429()
+    test_rate_limits_per_chat_and_global()
@@ -0,0 +1,113 @@
+import asyncio
+import time
+
+import httpx
+
+# 카카오 테스트의 가짜 검색/GPT, 텔레그램 전송 테스트의 Bot API 대역 재사용 (app import 전 환경 변수 설정 포함)
+from test_kakao_callback import StreamingFakeLLM, fake_embed_query, fake_search_by_vector, main, retriever, llm_module, wait_for
+from test_telegram_sender import BotApiStub
+from app import metrics
+from app.clients import telegram
+from app.update_queue import UpdateQueue
+import app.security.telegram as telegram_security
+
+SECRET = "telegram-test-secret"
+
+class CountingFakeLLM(StreamingFakeLLM):
+    """동시에 실행 중인 GPT 호출 수를 기록하는 가짜 ChatOpenAI"""
+    def __init__(self, tokens, delay):
+        super().__init__(tokens, delay)
+        self.running = self.max_running = 0
+
+    async def astream(self, messages):
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        try:
+            async for chunk in super().astream(messages):
+                yield chunk
+        finally:
+            self.running -= 1
+
+def update(update_id: int, text: str, chat_id: int = 42) -> dict:
+    return {"update_id": update_id, "message": {"message_id": update_id, "chat": {"id": chat_id}, "text": text}}
+
+async def post_update(client, body: dict, secret: str = SECRET):
+    return await client.post("/telegram/webhook", json=body, headers={"X-Telegram-Bot-Api-Secret-Token": secret})
+
+def run_webhook(scenario, llm, workers=2, max_size=10):
+    """가짜 검색/GPT + Bot API 대역 + 새 업데이트 큐로 시나리오 실행"""
+    stub = BotApiStub()
+    queue = UpdateQueue("telegram", main._answer_telegram, workers=workers, max_size=max_size)
+    originals = (telegram_security.SECRET_TOKEN, telegram.API_URL, telegram._sender, main.telegram_updates,
+                 retriever.aembed_query, retriever.asearch_by_vector, llm_module.llm)
+    telegram_security.SECRET_TOKEN = SECRET
+    telegram.API_URL, telegram._sender = stub.url, telegram.TelegramSender(chat_rate=100, chat_burst=10)
+    main.telegram_updates = queue
+    retriever.aembed_query, retriever.asearch_by_vector = fake_embed_query, fake_search_by_vector
+    llm_module.llm = llm
+    retriever.answer_cache.clear()
+
+    async def run():
+        transport = httpx.ASGITransport(app=main.app)
+        try:
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                return await scenario(client, stub)
+        finally:
+            await queue.stop()
+            await telegram.close_client()
+
+    try:
+        return asyncio.run(run()), stub
+    finally:
+        (telegram_security.SECRET_TOKEN, telegram.API_URL, telegram._sender, main.telegram_updates,
+         retriever.aembed_query, retriever.asearch_by_vector, llm_module.llm) = originals
+        stub.close()
+
+def test_webhook_acks_then_answers_in_background():
+    llm = CountingFakeLLM(["연차는 ", "15일", "입니다."], delay=0.1)
+
+    async def scenario(client, stub):
+        start = time.perf_counter()
+        response = await post_update(client, update(1, "연차 며칠이에요?"))
+        acked = time.perf_counter() - start
+        duplicate = await post_update(client, update(1, "연차 며칠이에요?"))  # 텔레그램 재전송
+        ignored = await post_update(client, {"update_id": 2, "edited_message": {"chat": {"id": 42}, "text": "수정"}})
+        forbidden = await post_update(client, update(3, "연차?"), secret="wrong")
+        await wait_for(lambda: stub.messages())
+        await asyncio.sleep(0.1)
+        return response, acked, duplicate, ignored, forbidden
+
+    (response, acked, duplicate, ignored, forbidden), stub = run_webhook(scenario, llm)
+    assert response.status_code == 200 and response.json()["status"] == "accepted"
+    assert acked < 0.3  # GPT 답변(0.3초)을 기다리지 않고 응답
+    assert duplicate.json()["status"] == "duplicate" and ignored.status_code == 200
+    assert forbidden.status_code == 403
+
+    methods = [method for _, method, _ in stub.received]
+    assert methods == ["sendChatAction", "sendMessage"]  # 중복/무시한 업데이트는 답변하지 않음
+    text = stub.messages()[0]["text"]
+    assert text.startswith("연차는 15일입니다.") and "규정.pdf (p.3)" in text
+    print(f"✅ {acked * 1000:.0f}ms에 응답, 답변은 백그라운드 전송: {text[:12]}...")
+
+def test_bounded_workers_and_backpressure():
+    llm = CountingFakeLLM(["답변"], delay=0.3)
+
+    async def scenario(client, stub):
+        responses = await asyncio.gather(*(post_update(client, update(100 + i, f"질문 {i}", chat_id=i)) for i in range(8)))
+        depth = metrics.render()
+        await wait_for(lambda: len(stub.messages()) == sum(r.status_code == 200 for r in responses))
+        return responses, depth
+
+    (responses, depth), stub = run_webhook(scenario, llm, workers=2, max_size=2)
+    accepted = [r for r in responses if r.status_code == 200]
+    rejected = [r for r in responses if r.status_code == 503]
+    assert len(accepted) + len(rejected) == 8 and 2 <= len(accepted) <= 4  # 작업자 2 + 큐 2
+    assert llm.max_running <= 2  # GPT 동시 호출 수 제한
+    assert 'rag_queue_depth{queue="telegram"}' in depth
+    assert 'rag_queue_rejected_total{queue="telegram",reason="full"}' in metrics.render()
+    assert "# TYPE rag_queue_depth gauge" in depth
+    print(f"✅ 작업자 2개/큐 2개: {len(accepted)}개 처리, {len(rejected)}개 503 (텔레그램 재전송 대상)")
+
+if __name__ == "__main__":
+    test_webhook_acks_then_answers_in_background()
+    test_bounded_workers_and_backpressure()
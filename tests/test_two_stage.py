@@ -0,0 +1,72 @@
+import os
+import tempfile
+os.environ.setdefault("OPENAI_API_KEY", "sk-test")
+os.environ.setdefault("VECTOR_DB_PATH", tempfile.mkdtemp(prefix="test-chroma-"))
+os.environ.setdefault("EMBEDDING_CACHE_PATH", "")
+import numpy as np
+from langchain.schema import Document
+import app.vector_store as vector_store
+from app.document_index import DocumentIndex, centroids_from
+from app.numpy_index import NumpyIndex
+
+def unit(*values):
+    vector = np.array(values, dtype=np.float32)
+    return vector / np.linalg.norm(vector)
+
+class TopicEmbeddings:
+    """텍스트 첫 글자로 방향을 정하는 가짜 임베딩 (가: x축, 나: y축, 다: z축)"""
+    AXES = {"가": unit(1, 0, 0, 0.1), "나": unit(0, 1, 0, 0.1), "다": unit(0, 0, 1, 0.1)}
+    
+    def embed_documents(self, texts):
+        return [self.embed_query(t) for t in texts]
+    
+    def embed_query(self, text):
+        return (self.AXES[text[0]] + 0.01 * len(text)).tolist()
+
+def test_document_index_update_and_reload():
+    path = tempfile.mkdtemp(prefix="test-docindex-")
+    index = DocumentIndex(path)
+    index.update({f"doc{i}": unit(1, i, 0) for i in range(100)})  # 행 파일이 한 번 늘어남
+    index.update({"doc0": unit(0, 0, 1), "doc5": None})
+    index.persist()
+    
+    reopened = DocumentIndex(path)
+    assert len(reopened) == 99
+    assert reopened.search(unit(0, 0, 1), k=1)[0][0] == "doc0"
+    assert "doc5" not in [doc_id for doc_id, _ in reopened.search(unit(1, 5, 0), k=99)]
+    
+    # 삭제된 행은 재사용
+    index.update({"new": unit(1, -1, 0)})
+    assert index._meta["docs"]["new"] == 5
+    
+    centroids = centroids_from(["a", "b", "a"], np.array([[2, 0], [0, 1], [0, 3]], dtype=np.float32))
+    assert np.allclose(centroids["a"], [1, 1]) and np.allclose(centroids["b"], [0, 1])
+
+def test_two_stage_search_with_numpy_backend():
+    originals = (vector_store.vector_client, vector_store.lexical_index, vector_store.document_index,
+                 vector_store.TWO_STAGE_MIN_CHUNKS, vector_store.TWO_STAGE_DOCS)
+    vector_store.vector_client = NumpyIndex(tempfile.mkdtemp(prefix="test-npindex-"), embedding_function=TopicEmbeddings())
+    vector_store.lexical_index = None
+    vector_store.document_index = DocumentIndex(tempfile.mkdtemp(prefix="test-docindex-"))
+    vector_store.TWO_STAGE_MIN_CHUNKS = 0
+    vector_store.TWO_STAGE_DOCS = 1
+    try:
+        for doc_id, prefix in (("a.pdf", "가"), ("b.pdf", "나"), ("c.pdf", "다")):
+            chunks = [Document(page_content=prefix + "x" * i, metadata={"doc_id": doc_id}) for i in range(1, 4)]
+            vector_store.upsert_document(doc_id, chunks)
+        assert len(vector_store.document_index) == 3
+        
+        results = vector_store.search_documents("나", k=5)
+        assert results and {doc.metadata["doc_id"] for doc, _ in results} == {"b.pdf"}
+        
+        # 문서를 지우면 대표 벡터도 삭제 → 다음으로 가까운 문서에서 검색
+        vector_store.delete_document("b.pdf")
+        assert len(vector_store.document_index) == 2
+        assert vector_store.search_documents("나", k=5)[0][0].metadata["doc_id"] != "b.pdf"
+    finally:
+        (vector_store.vector_client, vector_store.lexical_index, vector_store.document_index,
+         vector_store.TWO_STAGE_MIN_CHUNKS, vector_store.TWO_STAGE_DOCS) = originals
+
+if __name__ == "__main__":
+    test_document_index_update_and_reload()
+    test_two_stage_search_with_numpy_backend()